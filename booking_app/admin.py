@@ -1,8 +1,15 @@
 # booking_app/admin.py
-from django.contrib import admin
+from datetime import date, datetime, time
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Max, Min
+from django.utils import timezone
 from .models import User, Speaker, SpeakerPhone, Conference, ConferenceCategory
-from .models import ConferenceHasSpeaker, Booking, Feedback, Payment
+from .models import ConferenceHasSpeaker, Booking, Feedback, Payment, OutboxMessage, GroupOrder
+from .models import ArchivedBooking, ArchivedPayment, BookingEvent, CheckIn, ConferenceDeletion
+from . import sharding
+from .deletion import queue_deletion
+from .paginators import EstimatedCountPaginator
 
 class CustomUserAdmin(UserAdmin):
     model = User
@@ -32,29 +39,293 @@ class ConferenceHasSpeakerInline(admin.TabularInline):
     extra = 1
 
 class ConferenceAdmin(admin.ModelAdmin):
-    list_display = ['conference_id', 'topic', 'date', 'time_start', 'time_end', 'capacity', 'price']
+    list_display = ['conference_id', 'topic', 'date', 'time_start', 'time_end', 'capacity', 'seats_taken', 'price']
     search_fields = ['topic', 'description']
     list_filter = ['date', 'time_start']
+    readonly_fields = ['seats_taken', 'archived_at', 'deleting_at']  # Maintained by inventory.py, archiving.py and deletion.py
     inlines = [ConferenceCategoryInline, ConferenceHasSpeakerInline]
+    actions = ['delete_in_batches']
 
-class BookingAdmin(admin.ModelAdmin):
+    # Django's own delete loads every booking of the conference to list and
+    # cascade it, which times out for large conferences
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def has_batch_delete_permission(self, request):
+        return super().has_delete_permission(request)
+
+    @admin.action(description='Delete selected conferences in the background', permissions=['batch_delete'])
+    def delete_in_batches(self, request, queryset):
+        queued = queue_deletion(queryset, request.user)
+        self.message_user(
+            request,
+            f'Closed {queued} conference(s) to bookings and queued them for deletion; '
+            f'`python manage.py delete_conferences` deletes them. Progress is under Conference deletions.',
+            messages.SUCCESS,
+        )
+
+def choices_filter(field, title, choices):
+    """Build a list filter with fixed choices.
+
+    The default filter for a plain CharField runs SELECT DISTINCT over the
+    whole table on every changelist load to find its options.
+    """
+    class ChoicesListFilter(admin.SimpleListFilter):
+        parameter_name = field
+
+        def lookups(self, request, model_admin):
+            return choices
+
+        def queryset(self, request, queryset):
+            if self.value():
+                return queryset.filter(**{field: self.value()})
+            return queryset
+
+    ChoicesListFilter.title = title
+    return ChoicesListFilter
+
+BOOKING_STATUS_CHOICES = [('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled')]
+PAYMENT_STATUS_CHOICES = [('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')]
+EVENT_KIND_CHOICES = [('booked', 'Booked'), ('paid', 'Paid'), ('cancelled', 'Cancelled'), ('refunded', 'Refunded')]
+PAYMENT_METHOD_CHOICES = [('credit_card', 'Credit Card'), ('debit_card', 'Debit Card'), ('paypal', 'PayPal')]
+
+class MonthPartitionFilter(admin.SimpleListFilter):
+    """Narrow a changelist to one calendar month as an indexed range scan.
+
+    Used instead of date_hierarchy, which builds its links with a SELECT
+    DISTINCT over every row. The month links here only need MIN/MAX of the
+    (indexed) date column on ``bounds_model``.
+    """
+    title = 'month'
+    parameter_name = 'month'
+    field = None
+    bounds_model = None
+    bounds_field = None
+    is_datetime = False
+    max_months = 24
+
+    def lookups(self, request, model_admin):
+        bounds = self.bounds_model.objects.aggregate(first=Min(self.bounds_field), last=Max(self.bounds_field))
+        if bounds['first'] is None:
+            return []
+        first, last = bounds['first'], bounds['last']
+        if self.is_datetime:
+            first, last = timezone.localtime(first).date(), timezone.localtime(last).date()
+        months = []
+        year, month = last.year, last.month
+        while (year, month) >= (first.year, first.month) and len(months) < self.max_months:
+            months.append((f'{year}-{month:02d}', date(year, month, 1).strftime('%B %Y')))
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        return months
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            year, month = map(int, self.value().split('-'))
+            start = date(year, month, 1)
+        except ValueError:
+            return queryset.none()
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        if self.is_datetime:
+            start = timezone.make_aware(datetime.combine(start, time.min))
+            end = timezone.make_aware(datetime.combine(end, time.min))
+        return queryset.filter(**{f'{self.field}__gte': start, f'{self.field}__lt': end})
+
+class ConferenceMonthFilter(MonthPartitionFilter):
+    title = 'conference month'
+    field = 'conference__date'
+    bounds_model = Conference
+    bounds_field = 'date'
+
+class PaymentMonthFilter(MonthPartitionFilter):
+    title = 'payment month'
+    field = 'payment_date'
+    bounds_model = Payment
+    bounds_field = 'payment_date'
+    is_datetime = True
+
+class ShardFilter(admin.SimpleListFilter):
+    """Pick the shard a changelist of a sharded model reads, the first one unless chosen."""
+    title = 'shard'
+    parameter_name = 'shard'
+
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in sharding.shards()]
+
+    def value(self):
+        value = super().value()
+        return value if value in sharding.shards() else sharding.shards()[0]
+
+    def choices(self, changelist):
+        # No "All": one query cannot read several databases
+        for alias, title in self.lookup_choices:
+            yield {
+                'selected': self.value() == alias,
+                'query_string': changelist.get_query_string({self.parameter_name: alias}),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        return queryset.using(self.value())
+
+class ShardedAdmin(admin.ModelAdmin):
+    """Admin for the models of booking_app/sharding.py.
+
+    With sharding the changelist shows one shard at a time, picked with
+    ShardFilter. Rows there cannot be joined to users and conferences on
+    default, so related rows are prefetched instead of joined, and filters
+    and searches across relations are left out. A row's page reads the
+    shard its primary key belongs to.
+    """
+    def get_list_filter(self, request):
+        list_filter = super().get_list_filter(request)
+        if not sharding.sharding_enabled():
+            return list_filter
+        return [ShardFilter, *(spec for spec in list_filter if '__' not in getattr(spec, 'field', ''))]
+
+    def get_list_select_related(self, request):
+        # An empty list, as False would have Django join every relation in list_display
+        return () if sharding.sharding_enabled() else super().get_list_select_related(request)
+
+    def get_search_fields(self, request):
+        search_fields = super().get_search_fields(request)
+        if not sharding.sharding_enabled():
+            return search_fields
+        return [field for field in search_fields if '__' not in field]
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if sharding.sharding_enabled() and self.list_select_related:
+            queryset = queryset.prefetch_related(*self.list_select_related)
+        return queryset
+
+    def get_object(self, request, object_id, from_field=None):
+        if not sharding.sharding_enabled() or from_field is not None:
+            return super().get_object(request, object_id, from_field)
+        try:
+            alias = sharding.shard_for_pk(object_id)
+        except (TypeError, ValueError):
+            return None
+        return self.get_queryset(request).using(alias).filter(pk=object_id).first()
+
+# Booking and Payment grow to millions of rows, so their changelists join the
+# related rows up front, estimate the unfiltered total instead of counting it,
+# use fixed-choice filters, and only offer searches that can use an index
+# (exact username/transaction id, topic prefix).
+class BookingAdmin(ShardedAdmin):
     list_display = ['booking_id', 'user', 'conference', 'time', 'status', 'payment_status']
-    list_filter = ['status', 'payment_status', 'time']
-    search_fields = ['user__username', 'conference__topic']
+    list_filter = [
+        ConferenceMonthFilter,
+        choices_filter('status', 'status', BOOKING_STATUS_CHOICES),
+        choices_filter('payment_status', 'payment status', PAYMENT_STATUS_CHOICES),
+    ]
+    list_select_related = ['user', 'conference']
+    search_fields = ['=user__username', '^conference__topic']
+    search_help_text = 'Exact username or the start of a conference topic.'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    raw_id_fields = ['user', 'conference']
 
-class PaymentAdmin(admin.ModelAdmin):
-    list_display = ['payment_id', 'booking', 'amount', 'payment_method', 'payment_date', 'status']
-    list_filter = ['status', 'payment_method', 'payment_date']
-    search_fields = ['booking__user__username', 'booking__conference__topic', 'transaction_id']
+class PaymentAdmin(ShardedAdmin):
+    list_display = ['payment_id', 'booking', 'order', 'amount', 'payment_method', 'payment_date', 'status']
+    list_filter = [
+        PaymentMonthFilter,
+        choices_filter('status', 'status', PAYMENT_STATUS_CHOICES),
+        choices_filter('payment_method', 'payment method', PAYMENT_METHOD_CHOICES),
+    ]
+    list_select_related = ['booking__user', 'booking__conference', 'order__user', 'order__conference']
+    search_fields = ['=transaction_id', '=booking__user__username', '^booking__conference__topic']
+    search_help_text = 'Exact transaction id or username, or the start of a conference topic.'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    raw_id_fields = ['booking', 'order']
+
+class GroupOrderAdmin(admin.ModelAdmin):
+    list_display = ['order_id', 'user', 'conference', 'seats', 'status', 'payment_status', 'created_at']
+    list_select_related = ['user', 'conference']
+    list_filter = [
+        choices_filter('status', 'status', BOOKING_STATUS_CHOICES),
+        choices_filter('payment_status', 'payment status', PAYMENT_STATUS_CHOICES),
+    ]
+    search_fields = ['=user__username', '^conference__topic']
+    raw_id_fields = ['user', 'conference']
 
-class FeedbackAdmin(admin.ModelAdmin):
+class FeedbackAdmin(ShardedAdmin):
     list_display = ['user', 'conference', 'rating']
+    list_select_related = ['user', 'conference']
     list_filter = ['rating']
     search_fields = ['user__username', 'conference__topic', 'comments']
 
+class OutboxMessageAdmin(ShardedAdmin):
+    list_display = ['id', 'event', 'recipient', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['event', 'status']
+    search_fields = ['=recipient', '=dedupe_key']
+    raw_id_fields = ['booking']
+
+# Archived rows, ledger events, check-ins and deletion records are only written by
+# booking_app/archiving.py, ledger.py, tickets.py and deletion.py
+class ReadOnlyAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+class ArchivedBookingAdmin(ReadOnlyAdmin):
+    list_display = ['booking_id', 'user', 'conference', 'status', 'payment_status', 'archived_at']
+    list_filter = [ConferenceMonthFilter, choices_filter('status', 'status', BOOKING_STATUS_CHOICES)]
+    list_select_related = ['user', 'conference']
+    search_fields = ['=booking_id', '=user__username', '^conference__topic']
+    search_help_text = 'Exact booking id or username, or the start of a conference topic.'
+
+class ArchivedPaymentAdmin(ReadOnlyAdmin):
+    list_display = ['payment_id', 'booking', 'amount', 'payment_method', 'payment_date', 'status']
+    list_filter = [choices_filter('payment_method', 'payment method', PAYMENT_METHOD_CHOICES)]
+    list_select_related = ['booking__user', 'booking__conference']
+    search_fields = ['=transaction_id', '=booking__user__username']
+    search_help_text = 'Exact transaction id or username.'
+
+class BookingEventAdmin(ReadOnlyAdmin):
+    list_display = ['id', 'at', 'conference', 'kind', 'booking_id', 'order_id', 'seats', 'amount']
+    list_filter = [choices_filter('kind', 'kind', EVENT_KIND_CHOICES)]
+    list_select_related = ['conference']
+    search_fields = ['=booking_id', '=order_id']
+    search_help_text = 'Exact booking or group order id.'
+    raw_id_fields = ['conference']
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+class CheckInAdmin(ReadOnlyAdmin):
+    list_display = ['id', 'scanned_at', 'conference', 'code', 'device']
+    list_select_related = ['conference']
+    search_fields = ['=code']
+    search_help_text = "Exact ticket code, 'b' and a booking id or 't' and a group ticket id."
+    raw_id_fields = ['conference']
+
+class ConferenceDeletionAdmin(ReadOnlyAdmin):
+    list_display = ['conference_id', 'topic', 'requested_by', 'requested_at', 'step', 'rows_deleted', 'finished_at']
+    list_select_related = ['requested_by']
+    search_fields = ['=conference_id', '^topic']
+    search_help_text = 'Exact conference id or the start of its topic.'
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 admin.site.register(User, CustomUserAdmin)
 admin.site.register(Speaker, SpeakerAdmin)
 admin.site.register(Conference, ConferenceAdmin)
 admin.site.register(Booking, BookingAdmin)
 admin.site.register(Feedback, FeedbackAdmin)
-admin.site.register(Payment, PaymentAdmin)
\ No newline at end of file
+admin.site.register(Payment, PaymentAdmin)
+admin.site.register(GroupOrder, GroupOrderAdmin)
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
+admin.site.register(ArchivedBooking, ArchivedBookingAdmin)
+admin.site.register(ArchivedPayment, ArchivedPaymentAdmin)
+admin.site.register(BookingEvent, BookingEventAdmin)
+admin.site.register(CheckIn, CheckInAdmin)
+admin.site.register(ConferenceDeletion, ConferenceDeletionAdmin)
\ No newline at end of file
@@ -0,0 +1,462 @@
+# booking_app/admission.py
+"""Admission control for the endpoints bots hammer during sales.
+
+AdmissionControlMiddleware decides in ``process_view``, before the view
+runs a single query, whether a request goes through:
+
+* Token-bucket rate limits per user, per client IP and per route, from
+  ``ADMISSION_CONTROL['RATES']``. The user comes from the session, so
+  checking it loads no User row.
+* For the routes in ``QUEUED_ROUTES``, at most ``CONCURRENCY`` visitors
+  per conference are booking at once. Past that, callers get a numbered
+  ticket in a signed cookie and are let in first come, first served as
+  slots free up, so retrying faster does not jump the queue.
+
+The queue only uses the cache's atomic ``add`` and ``incr``. Each running
+request holds one of the conference's slots, a key taken with ``add`` and
+leased for ``SLOT_LEASE_SECONDS``, so a slot whose request died without
+releasing it frees itself. A waiting caller's page retries every
+``QUEUE_RETRY_SECONDS`` and refreshes its ticket each time; a ticket not
+seen for ``TICKET_IDLE_SECONDS`` was abandoned, and the queue moves past
+it as it does past tickets already let in.
+
+A visitor holds their slot from the booking form to its submission. When
+a queued route answers with a page (the form, or the form with errors)
+the slot is kept and its lease handed back in a signed pass cookie; the
+next request with the pass runs under the same slot and renews it. Any
+other response, such as the redirect after booking, frees the slot. So an
+admitted visitor's POST never goes back into the queue, and the waiting
+page, which refreshes with a GET, leads to the form.
+
+Per-IP limits key on the address the trusted proxies saw: with
+``CLIENT_IP_HEADER`` set to X-Forwarded-For, the hop ``TRUSTED_PROXIES``
+from the right, since the client can write anything to the left of it.
+
+Rejections are plain 429 responses with a Retry-After header. Buckets and
+queue counters live in the default cache, so limits hold across worker
+processes. If the cache is unreachable they fall back to per-process
+memory rather than failing requests. Bucket updates are read-modify-write,
+so under heavy contention a bucket can let a few extra requests through;
+the limits are for shedding load, not for exact accounting.
+
+Every decision is timed. The time is added to the response as
+``Server-Timing: admission;dur=<ms>`` and summarised by ``stats()``.
+"""
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+TICKET_COOKIE = 'admission_ticket'
+PASS_COOKIE = 'admission_pass'
+TICKET_SALT = 'booking_app.admission'
+TICKET_MAX_AGE = 600
+QUEUE_TIMEOUT = 86400  # Ticket counters; far longer than any sale's queue
+ADVANCE_LIMIT = 100  # Tickets the queue can move past per request
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+DEFAULTS = {
+    'RATES': {},
+    'QUEUED_ROUTES': [],
+    'CONCURRENCY': 20,
+    'QUEUE_RETRY_SECONDS': 2,
+    'TICKET_IDLE_SECONDS': 30,
+    'SLOT_LEASE_SECONDS': 60,
+    'CLIENT_IP_HEADER': 'REMOTE_ADDR',
+    'TRUSTED_PROXIES': 1,
+}
+
+_stats = {'requests': 0, 'rejected': 0, 'queued': 0, 'total_us': 0.0, 'max_us': 0.0}
+_stats_lock = threading.Lock()
+
+
+def admission_settings():
+    return {**DEFAULTS, **getattr(settings, 'ADMISSION_CONTROL', {})}
+
+
+def parse_rate(rate):
+    """'10/m' -> (burst 10, refill 10/60 tokens per second)."""
+    count, _, period = rate.partition('/')
+    count = int(count)
+    return count, count / PERIODS[period[:1]]
+
+
+class LocalStore:
+    """Per-process stand-in for the cache, used when the cache is down."""
+
+    def __init__(self, clock=time.monotonic):
+        self._data = {}
+        self._lock = threading.Lock()
+        self.clock = clock
+
+    def _live(self, key, now):
+        value, expires = self._data.get(key, (None, 0))
+        if value is not None and expires < now:
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key, self.clock())
+
+    def get_many(self, keys):
+        with self._lock:
+            now = self.clock()
+            found = {key: self._live(key, now) for key in keys}
+        return {key: value for key, value in found.items() if value is not None}
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._data[key] = (value, self.clock() + timeout)
+
+    def add(self, key, value, timeout):
+        with self._lock:
+            now = self.clock()
+            if self._live(key, now) is not None:
+                return False
+            self._data[key] = (value, now + timeout)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key, delta, timeout):
+        with self._lock:
+            now = self.clock()
+            current = self._live(key, now)
+            value = (current or 0) + delta
+            # Like cache.incr(), keep the expiry the key was created with
+            expires = now + timeout if current is None else self._data[key][1]
+            self._data[key] = (value, expires)
+            return value
+
+
+class SharedStore:
+    """The default cache, falling back to a LocalStore if it raises."""
+
+    def __init__(self):
+        self.local = LocalStore()
+
+    def _fallback(self, exc):
+        logger.warning('Admission control is using per-process limits: %s', exc)
+
+    def get(self, key):
+        try:
+            return cache.get(key)
+        except Exception as exc:
+            self._fallback(exc)
+            return self.local.get(key)
+
+    def get_many(self, keys):
+        try:
+            return cache.get_many(keys)
+        except Exception as exc:
+            self._fallback(exc)
+            return self.local.get_many(keys)
+
+    def set(self, key, value, timeout):
+        try:
+            cache.set(key, value, timeout)
+        except Exception as exc:
+            self._fallback(exc)
+            self.local.set(key, value, timeout)
+
+    def add(self, key, value, timeout):
+        try:
+            return cache.add(key, value, timeout)
+        except Exception as exc:
+            self._fallback(exc)
+            return self.local.add(key, value, timeout)
+
+    def delete(self, key):
+        try:
+            cache.delete(key)
+        except Exception as exc:
+            self._fallback(exc)
+            self.local.delete(key)
+
+    def incr(self, key, delta, timeout):
+        try:
+            cache.add(key, 0, timeout)
+            try:
+                return cache.incr(key, delta)
+            except ValueError:
+                # Expired between add() and incr()
+                cache.set(key, delta, timeout)
+                return delta
+        except Exception as exc:
+            self._fallback(exc)
+            return self.local.incr(key, delta, timeout)
+
+
+store = SharedStore()
+
+
+def take_token(key, rate, now=None):
+    """Take one token from the bucket at ``key``. Returns seconds to wait, 0 if allowed."""
+    burst, refill = parse_rate(rate)
+    now = time.time() if now is None else now
+    tokens, stamp = store.get(key) or (burst, now)
+    tokens = min(burst, tokens + (now - stamp) * refill)
+    timeout = int(burst / refill) + 1
+    if tokens < 1:
+        store.set(key, (tokens, now), timeout)
+        return (1 - tokens) / refill
+    store.set(key, (tokens - 1, now), timeout)
+    return 0
+
+
+def client_ip(request, header, trusted_proxies=1):
+    """The client address; behind proxies, the hop of ``header`` (e.g. HTTP_X_FORWARDED_FOR) the first trusted one added."""
+    hops = [hop.strip() for hop in request.META.get(header, '').split(',') if hop.strip()]
+    if not hops:
+        return request.META.get('REMOTE_ADDR', '')
+    # Every hop was added by a trusted proxy if there are fewer than expected
+    return hops[-min(trusted_proxies, len(hops))]
+
+
+def check_rates(request, route, rates, ip_header='REMOTE_ADDR', trusted_proxies=1, now=None):
+    """Return the longest wait any of the route's buckets asks for (0 if none)."""
+    ip = client_ip(request, ip_header, trusted_proxies)
+    user_id = None
+    if 'user' in rates and hasattr(request, 'session'):
+        # Only then, so IP-only limits never load the session
+        user_id = request.session.get(SESSION_KEY)
+    identities = {
+        'user': f'user:{user_id}' if user_id else f'ip:{ip}',
+        'ip': f'ip:{ip}',
+        'route': 'all',
+    }
+    wait = 0
+    for scope, rate in rates.items():
+        wait = max(wait, take_token(f'ratelimit:{route}:{scope}:{identities[scope]}', rate, now))
+    return wait
+
+
+# Per-conference queue. ``tail`` is the last ticket handed out and
+# ``head`` the last ticket the queue has moved past: every ticket up to it
+# was let in or abandoned. ``slot:<n>`` are the running requests' leases,
+# ``seen:<ticket>`` marks a ticket whose holder is still polling and
+# ``done:<ticket>`` one that was let in.
+
+def _queue_key(conference, name):
+    return f'admission:{conference}:{name}'
+
+
+def _advance(conference, head, tail):
+    """Move ``head`` past the let-in and abandoned tickets at the front of the queue; returns it."""
+    numbers = range(head + 1, min(tail, head + ADVANCE_LIMIT) + 1)
+    if not numbers:
+        return head
+    found = store.get_many(
+        [_queue_key(conference, f'{name}:{number}') for number in numbers for name in ('done', 'seen')]
+    )
+    for number in numbers:
+        waiting = (
+            _queue_key(conference, f'seen:{number}') in found
+            and _queue_key(conference, f'done:{number}') not in found
+        )
+        if waiting:
+            break
+        # Whoever claims the ticket moves head past it, so head moves once per ticket
+        if store.add(_queue_key(conference, f'passed:{number}'), 1, QUEUE_TIMEOUT):
+            head = max(head, store.incr(_queue_key(conference, 'head'), 1, QUEUE_TIMEOUT))
+    return head
+
+
+def _take_slot(conference, slots, taken, lease_seconds):
+    """Lease a free slot; returns ``(key, token)``, or None if they all went."""
+    token = uuid.uuid4().hex
+    for key in slots:
+        if key not in taken and store.add(key, token, lease_seconds):
+            return key, token
+    return None
+
+
+def enter(conference, ticket, concurrency, idle=None, lease_seconds=None):
+    """Try to start a request for ``conference``.
+
+    Returns ``(lease, ticket, position)``: the slot lease to hand to
+    ``leave()`` if the request may run, else None and the caller's ticket
+    and place in line. A caller without a ticket gets one if anyone is
+    already waiting or every slot is taken.
+    """
+    idle = idle or DEFAULTS['TICKET_IDLE_SECONDS']
+    lease_seconds = lease_seconds or DEFAULTS['SLOT_LEASE_SECONDS']
+    slots = [_queue_key(conference, f'slot:{number}') for number in range(concurrency)]
+    tail = store.get(_queue_key(conference, 'tail')) or 0
+    head = _advance(conference, store.get(_queue_key(conference, 'head')) or 0, tail)
+    taken = store.get_many(slots)
+    free = concurrency - len(taken)
+
+    if ticket is None:
+        if free > 0 and head >= tail:
+            lease = _take_slot(conference, slots, taken, lease_seconds)
+            if lease:
+                return lease, None, 0
+        ticket = store.incr(_queue_key(conference, 'tail'), 1, QUEUE_TIMEOUT)
+    # A ticket passed as abandoned in the moment before this is still let in
+    # ahead of the line, as ``ticket <= head``
+    store.set(_queue_key(conference, f'seen:{ticket}'), 1, idle)
+
+    if free > 0 and ticket <= head + free:
+        lease = _take_slot(conference, slots, taken, lease_seconds)
+        if lease:
+            store.set(_queue_key(conference, f'done:{ticket}'), 1, TICKET_MAX_AGE)
+            return lease, None, 0
+    return None, ticket, max(ticket - head, 1)
+
+
+def resume(lease, lease_seconds=None):
+    """Renew a slot kept from an earlier request; False if its lease ran out and it is gone."""
+    key, token = lease
+    if store.get(key) != token:
+        return False
+    store.set(key, token, lease_seconds or DEFAULTS['SLOT_LEASE_SECONDS'])
+    return True
+
+
+def leave(lease):
+    """Release a slot taken by ``enter()``, unless its lease ran out and someone else holds it."""
+    key, token = lease
+    if store.get(key) == token:
+        store.delete(key)
+
+
+def _record(elapsed_us, outcome):
+    with _stats_lock:
+        _stats['requests'] += 1
+        _stats['total_us'] += elapsed_us
+        _stats['max_us'] = max(_stats['max_us'], elapsed_us)
+        if outcome:
+            _stats[outcome] += 1
+
+
+def stats():
+    with _stats_lock:
+        requests = _stats['requests']
+        return {
+            'requests': requests,
+            'rejected': _stats['rejected'],
+            'queued': _stats['queued'],
+            'mean_us': _stats['total_us'] / requests if requests else 0.0,
+            'max_us': _stats['max_us'],
+        }
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.update(requests=0, rejected=0, queued=0, total_us=0.0, max_us=0.0)
+
+
+def too_many_requests(wait, message):
+    response = HttpResponse(message, status=429, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(max(1, round(wait)))
+    return response
+
+
+def queued_response(position, retry):
+    response = HttpResponse(
+        '<!DOCTYPE html><html><head><meta http-equiv="refresh" content="%d">'
+        '<title>You are in line</title></head><body>'
+        '<p>Booking is busy right now. You are number %d in line; this page '
+        'will retry automatically.</p></body></html>' % (retry, position),
+        status=429,
+    )
+    response['Retry-After'] = str(retry)
+    return response
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        lease = getattr(request, '_admission_lease', None)
+        if lease is not None:
+            if response.status_code == 200:
+                # The visitor is on the booking form; keep their slot for its submission
+                key, token = lease
+                response.set_signed_cookie(
+                    PASS_COOKIE, f'{key}|{token}', salt=TICKET_SALT,
+                    max_age=admission_settings()['SLOT_LEASE_SECONDS'], httponly=True,
+                )
+            else:
+                leave(lease)
+                response.delete_cookie(PASS_COOKIE)
+        ticket = getattr(request, '_admission_ticket', None)
+        if ticket is not None:
+            response.set_signed_cookie(
+                TICKET_COOKIE, ticket, salt=TICKET_SALT, max_age=TICKET_MAX_AGE, httponly=True,
+            )
+        elif getattr(request, '_admission_admitted_ticket', False):
+            response.delete_cookie(TICKET_COOKIE)
+
+        elapsed_us = getattr(request, '_admission_us', None)
+        if elapsed_us is not None:
+            response['Server-Timing'] = f'admission;dur={elapsed_us / 1000:.3f}'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        route = match.url_name if match else None
+        config = admission_settings()
+        rates = config['RATES'].get(route)
+        queued = route in config['QUEUED_ROUTES'] and 'slug' in view_kwargs
+        if not rates and not queued:
+            return None
+
+        started = time.perf_counter()
+        outcome = None
+        try:
+            if rates:
+                wait = check_rates(
+                    request, route, rates, config['CLIENT_IP_HEADER'], config['TRUSTED_PROXIES'],
+                )
+                if wait:
+                    outcome = 'rejected'
+                    return too_many_requests(wait, 'Too many requests. Please slow down and try again shortly.')
+            if queued:
+                return self._enter_queue(request, view_kwargs['slug'], config)
+        finally:
+            elapsed_us = (time.perf_counter() - started) * 1e6
+            if outcome is None and getattr(request, '_admission_ticket', None) is not None:
+                outcome = 'queued'
+            request._admission_us = elapsed_us
+            _record(elapsed_us, outcome)
+
+    def _enter_queue(self, request, slug, config):
+        kept = request.get_signed_cookie(PASS_COOKIE, default=None, salt=TICKET_SALT)
+        if kept:
+            key, _, token = kept.partition('|')
+            if key.startswith(_queue_key(slug, 'slot:')) and resume((key, token), config['SLOT_LEASE_SECONDS']):
+                request._admission_lease = (key, token)
+                return None
+
+        ticket = None
+        held = request.get_signed_cookie(TICKET_COOKIE, default=None, salt=TICKET_SALT, max_age=TICKET_MAX_AGE)
+        if held:
+            held_slug, _, number = held.rpartition(':')
+            if held_slug == slug and number.isdigit():
+                ticket = int(number)
+
+        lease, ticket, position = enter(
+            slug, ticket, config['CONCURRENCY'], config['TICKET_IDLE_SECONDS'], config['SLOT_LEASE_SECONDS'],
+        )
+        if lease:
+            request._admission_lease = lease
+            request._admission_admitted_ticket = held is not None
+            return None
+        request._admission_ticket = f'{slug}:{ticket}'
+        return queued_response(position, config['QUEUE_RETRY_SECONDS'])
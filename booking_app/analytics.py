@@ -0,0 +1,391 @@
+# booking_app/analytics.py
+"""Daily rollups behind the organizer analytics dashboard.
+
+Two ways keep DailyConferenceStats and DailyPaymentMethodStats current:
+
+* Signal handlers apply small deltas as Booking, Payment and Feedback rows
+  are written, so the dashboard is live without scanning the source tables.
+* ``rebuild_day()`` recomputes one day from the source tables on every
+  shard, counting archived rows too (see booking_app/archiving.py). The
+  update_analytics command walks days forward from a stored watermark
+  with it up to yesterday, catching up on writes that skipped signals
+  (bulk_create, raw SQL, restored backups) and correcting any drift.
+
+A booking, its revenue, payment method and any later cancellation count
+towards the day its payment was made; a group order counts as one booking
+per seat. Feedback counts towards the day of the conference it rates.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import sharding
+from .models import (
+    AnalyticsWatermark, ArchivedFeedback, ArchivedPayment, Booking, Conference, DailyConferenceStats,
+    DailyPaymentMethodStats, Feedback, GroupOrder, Payment,
+)
+
+WATERMARK = 'daily_rollups'
+
+
+def _bump(model, lookup, create, **deltas):
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    if create:
+        model.objects.get_or_create(**lookup)
+    model.objects.filter(**lookup).update(**{field: F(field) + value for field, value in deltas.items()})
+
+
+def bump_conference_day(conference_id, day, create=True, **deltas):
+    _bump(DailyConferenceStats, {'conference_id': conference_id, 'day': day}, create, **deltas)
+
+
+def bump_payment_method(conference_id, day, payment_method, create=True, **deltas):
+    _bump(
+        DailyPaymentMethodStats,
+        {'conference_id': conference_id, 'day': day, 'payment_method': payment_method},
+        create,
+        **deltas,
+    )
+
+
+def _payment_day(payment):
+    return timezone.localdate(payment.payment_date) if payment.payment_date else timezone.localdate()
+
+
+def _payment_target(payment):
+    """Return ``(conference_id, seats)`` for a booking or group order payment."""
+    if payment.order_id:
+        return payment.order.conference_id, payment.order.seats
+    return payment.booking.conference_id, 1
+
+
+# Remember the status each row was loaded with so post_save can tell
+# which transition happened without another query.
+
+@receiver(post_init, sender=Booking)
+@receiver(post_init, sender=GroupOrder)
+@receiver(post_init, sender=Payment)
+def remember_loaded_status(sender, instance, **kwargs):
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(post_init, sender=Feedback)
+def remember_loaded_rating(sender, instance, **kwargs):
+    instance._loaded_rating = instance.__dict__.get('rating')
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, created, **kwargs):
+    conference_id, seats = _payment_target(instance)
+    day = _payment_day(instance)
+    was_completed = not created and instance._loaded_status == 'completed'
+    is_completed = instance.status == 'completed'
+    sign = int(is_completed) - int(was_completed)
+
+    bump_conference_day(conference_id, day, bookings=seats if created else 0, revenue=sign * instance.amount)
+    if sign:
+        bump_payment_method(conference_id, day, instance.payment_method, payments=sign, amount=sign * instance.amount)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Payment)
+def payment_deleted(sender, instance, **kwargs):
+    if instance.order_id:
+        target = GroupOrder.objects.filter(pk=instance.order_id).values_list('conference_id', 'seats').first()
+    else:
+        conference_id = (
+            Booking.objects.for_pk(instance.booking_id).filter(pk=instance.booking_id)
+            .values_list('conference_id', flat=True).first()
+        )
+        target = None if conference_id is None else (conference_id, 1)
+    if target is None:
+        return
+    conference_id, seats = target
+    day = _payment_day(instance)
+    completed = instance._loaded_status == 'completed'
+    # Deletes only decrement existing rows: creating a rollup row here could
+    # race a cascade that is deleting the conference itself.
+    bump_conference_day(
+        conference_id, day, create=False,
+        bookings=-seats,
+        revenue=-instance.amount if completed else 0,
+    )
+    if completed:
+        bump_payment_method(
+            conference_id, day, instance.payment_method, create=False,
+            payments=-1, amount=-instance.amount,
+        )
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=GroupOrder)
+def booking_saved(sender, instance, created, **kwargs):
+    was_cancelled = not created and instance._loaded_status == 'cancelled'
+    sign = int(instance.status == 'cancelled') - int(was_cancelled)
+    if sign:
+        seats = getattr(instance, 'seats', 1)
+        for payment_date in instance.payments.values_list('payment_date', flat=True):
+            day = timezone.localdate(payment_date) if payment_date else timezone.localdate()
+            bump_conference_day(instance.conference_id, day, cancellations=sign * seats)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_save, sender=Feedback)
+def feedback_saved(sender, instance, created, **kwargs):
+    day = instance.conference.date
+    if day is None:
+        return
+    rating = int(instance.rating)
+    previous = 0 if created or instance._loaded_rating is None else int(instance._loaded_rating)
+    bump_conference_day(
+        instance.conference_id, day,
+        ratings_count=int(created),
+        ratings_sum=rating - previous,
+    )
+    instance._loaded_rating = instance.rating
+
+
+@receiver(post_delete, sender=Feedback)
+def feedback_deleted(sender, instance, **kwargs):
+    day = Conference.objects.filter(pk=instance.conference_id).values_list('date', flat=True).first()
+    if day is None or instance._loaded_rating is None:
+        return
+    bump_conference_day(
+        instance.conference_id, day, create=False,
+        ratings_count=-1, ratings_sum=-int(instance._loaded_rating),
+    )
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _payment_rows(start, end):
+    """Rollup figures of the payments made in [start, end), from every shard and the archive.
+
+    Returns ``(totals, methods)``: rows of bookings, cancellations and
+    revenue per conference, and rows of completed payments and their amount
+    per conference and payment method. A conference can appear in several
+    rows of each. A group order's payments are on its conference's shard
+    but the order is on ``default``, so they are grouped by order on the
+    shard and attributed to the order's conference here.
+    """
+    completed = Q(status='completed')
+
+    def grouped(payments, cancelled):
+        totals = payments.values('conference').annotate(
+            bookings=Sum('seats'),
+            cancellations=Sum(Case(When(cancelled, then='seats'), default=Value(0))),
+            revenue=Sum('amount', filter=completed),
+        )
+        methods = payments.filter(completed).values('conference', 'payment_method').annotate(
+            payments=Count('pk'),
+            amount=Sum('amount'),
+        )
+        return list(totals), list(methods)
+
+    def shard_rows(alias):
+        payments = Payment.objects.using(alias).filter(payment_date__gte=start, payment_date__lt=end)
+        bookings = payments.filter(booking__isnull=False).annotate(
+            conference=F('booking__conference_id'), seats=Value(1),
+        )
+        orders = payments.filter(order__isnull=False).values('order_id', 'payment_method', 'status').annotate(
+            payments=Count('pk'),
+            amount=Sum('amount'),
+        )
+        return [(*grouped(bookings, Q(booking__status='cancelled')), list(orders))]
+
+    archived = ArchivedPayment.objects.filter(payment_date__gte=start, payment_date__lt=end).annotate(
+        conference=F('booking__conference_id'), seats=Value(1),
+    )
+    totals, methods = grouped(archived, Q(booking__status='cancelled'))
+    order_rows = []
+    for shard_totals, shard_methods, shard_orders in sharding.fan_out(shard_rows):
+        totals += shard_totals
+        methods += shard_methods
+        order_rows += shard_orders
+
+    orders = GroupOrder.objects.in_bulk({row['order_id'] for row in order_rows})
+    for row in order_rows:
+        order = orders.get(row['order_id'])
+        if order is None:
+            continue
+        seats = row['payments'] * order.seats
+        is_completed = row['status'] == 'completed'
+        totals.append({
+            'conference': order.conference_id,
+            'bookings': seats,
+            'cancellations': seats if order.status == 'cancelled' else 0,
+            'revenue': row['amount'] if is_completed else None,
+        })
+        if is_completed:
+            methods.append({
+                'conference': order.conference_id,
+                'payment_method': row['payment_method'],
+                'payments': row['payments'],
+                'amount': row['amount'],
+            })
+    return totals, methods
+
+
+def _feedback_rows(conference_ids):
+    """Rating counts and sums per conference of ``conference_ids``, from every shard and the archive."""
+    def ratings(feedback):
+        return list(feedback.filter(conference_id__in=conference_ids).values('conference_id').annotate(
+            ratings_count=Count('pk'),
+            ratings_sum=Sum('rating'),
+        ))
+
+    return ratings(ArchivedFeedback.objects.all()) + sharding.fan_out(
+        lambda alias: ratings(Feedback.objects.using(alias))
+    )
+
+
+@transaction.atomic
+def rebuild_day(day):
+    """Recompute every rollup row for ``day`` from the source and archive tables on every shard."""
+    start, end = _day_bounds(day)
+
+    totals = {}
+    methods = {}
+    payment_totals, payment_methods = _payment_rows(start, end)
+    for row in payment_totals:
+        stats = totals.setdefault(
+            row['conference'],
+            DailyConferenceStats(conference_id=row['conference'], day=day),
+        )
+        stats.bookings += row['bookings']
+        stats.cancellations += row['cancellations']
+        stats.revenue += row['revenue'] or 0
+    for row in payment_methods:
+        stats = methods.setdefault(
+            (row['conference'], row['payment_method']),
+            DailyPaymentMethodStats(conference_id=row['conference'], day=day, payment_method=row['payment_method']),
+        )
+        stats.payments += row['payments']
+        stats.amount += row['amount']
+    # Feedback may be on another database than its conference, so find the conferences first
+    conference_ids = list(Conference.objects.filter(date=day).values_list('pk', flat=True))
+    for row in _feedback_rows(conference_ids):
+        stats = totals.setdefault(
+            row['conference_id'],
+            DailyConferenceStats(conference_id=row['conference_id'], day=day),
+        )
+        stats.ratings_count += row['ratings_count']
+        stats.ratings_sum += row['ratings_sum']
+
+    DailyConferenceStats.objects.filter(day=day).delete()
+    DailyPaymentMethodStats.objects.filter(day=day).delete()
+    DailyConferenceStats.objects.bulk_create(totals.values())
+    DailyPaymentMethodStats.objects.bulk_create(methods.values())
+
+
+def first_source_day():
+    """Earliest day any source row contributes to, or None if there is no data."""
+    candidates = sharding.fan_out(
+        lambda alias: Payment.objects.using(alias).order_by('payment_date')
+        .filter(payment_date__isnull=False).values_list('payment_date', flat=True)[:1]
+    )
+    candidates += ArchivedPayment.objects.filter(payment_date__isnull=False).order_by('payment_date').values_list(
+        'payment_date', flat=True,
+    )[:1]
+    candidates = [timezone.localdate(payment_date) for payment_date in candidates]
+    rated = set(ArchivedFeedback.objects.values_list('conference_id', flat=True).distinct())
+    rated.update(sharding.fan_out(
+        lambda alias: Feedback.objects.using(alias).values_list('conference_id', flat=True).distinct()
+    ))
+    first_feedback = (
+        Conference.objects.filter(pk__in=rated, date__isnull=False)
+        .order_by('date').values_list('date', flat=True).first()
+    )
+    if first_feedback:
+        candidates.append(first_feedback)
+    return min(candidates) if candidates else None
+
+
+def catch_up(until=None, start=None, progress=None):
+    """Rebuild each day after the watermark up to ``until``, advancing it as it goes.
+
+    ``until`` is at most yesterday: today's rows are still being written,
+    and a rebuild racing the signal handlers' deltas would lose some of
+    them, so today is left to the signals. The watermark is saved after
+    every day, so an interrupted run resumes where it stopped. Returns the
+    number of days rebuilt.
+    """
+    yesterday = timezone.localdate() - timedelta(days=1)
+    until = min(until or yesterday, yesterday)
+    watermark = AnalyticsWatermark.objects.filter(name=WATERMARK).first()
+    if start is None:
+        if watermark is not None:
+            start = watermark.day + timedelta(days=1)
+        else:
+            start = first_source_day()
+            if start is None:
+                return 0
+
+    rebuilt = 0
+    day = start
+    while day <= until:
+        with transaction.atomic():
+            rebuild_day(day)
+            AnalyticsWatermark.objects.update_or_create(name=WATERMARK, defaults={'day': day})
+        rebuilt += 1
+        if progress:
+            progress(day)
+        day += timedelta(days=1)
+    return rebuilt
+
+
+def dashboard_data(start, end):
+    """Read the dashboard figures for [start, end] from the rollup tables only."""
+    stats = DailyConferenceStats.objects.filter(day__gte=start, day__lte=end)
+
+    per_day = list(
+        stats.values('day')
+        .annotate(bookings=Sum('bookings'), cancellations=Sum('cancellations'), revenue=Sum('revenue'))
+        .order_by('day')
+    )
+    per_conference = list(
+        stats.values('conference_id', 'conference__topic', 'conference__slug')
+        .annotate(
+            bookings=Sum('bookings'),
+            cancellations=Sum('cancellations'),
+            revenue=Sum('revenue'),
+            ratings_count=Sum('ratings_count'),
+            ratings_sum=Sum('ratings_sum'),
+        )
+        .order_by('-revenue')
+    )
+    for row in per_conference:
+        row['cancellation_rate'] = row['cancellations'] / row['bookings'] if row['bookings'] else None
+        row['average_rating'] = row['ratings_sum'] / row['ratings_count'] if row['ratings_count'] else None
+
+    payment_methods = list(
+        DailyPaymentMethodStats.objects.filter(day__gte=start, day__lte=end)
+        .values('payment_method')
+        .annotate(payments=Sum('payments'), amount=Sum('amount'))
+        .order_by('-amount')
+    )
+    totals = stats.aggregate(
+        bookings=Sum('bookings'),
+        cancellations=Sum('cancellations'),
+        revenue=Sum('revenue'),
+        ratings_count=Sum('ratings_count'),
+        ratings_sum=Sum('ratings_sum'),
+    )
+    totals['cancellation_rate'] = totals['cancellations'] / totals['bookings'] if totals['bookings'] else None
+    totals['average_rating'] = totals['ratings_sum'] / totals['ratings_count'] if totals['ratings_count'] else None
+
+    return {
+        'per_day': per_day,
+        'per_conference': per_conference,
+        'payment_methods': payment_methods,
+        'totals': totals,
+    }
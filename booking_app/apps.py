@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class BookingAppConfig(AppConfig):
+    name = 'booking_app'
+
+    def ready(self):
+        # Connect the signal handlers that keep the analytics rollups, calendar
+        # feeds, conference snapshots, price tables, per-user booked sets and speaker index current
+        from . import analytics, calendar_feeds, pricing, snapshots, speaker_index, user_bookings  # noqa: F401
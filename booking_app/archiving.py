@@ -0,0 +1,181 @@
+# booking_app/archiving.py
+"""Move the bookings, payments and feedback of past conferences out of the
+live tables and into the ArchivedBooking, ArchivedPayment and
+ArchivedFeedback tables.
+
+The live tables then only hold conferences that are upcoming or recently
+over, so capacity counts, My Bookings and the admin changelists work over a
+working set that stops growing. A conference is archived once it ended more
+than ARCHIVE_AFTER_DAYS ago (365 by default) and none of its payments are
+still waiting on the gateway.
+
+Rows are moved in batches of BATCH_SIZE bookings, each in its own short
+transaction that copies the rows and then deletes the originals. What is
+left in the live tables is the remaining work, so an interrupted run
+resumes where it stopped. A conference's ``archived_at`` is set when
+nothing of it is left to move.
+
+Receipts read from both the live and the archive tables, and the finance
+report and analytics rebuilds count both, so archiving changes where rows
+live but not any figure. Group orders and their payments stay live.
+
+With sharding (booking_app/sharding.py) a batch reads and deletes the
+live rows on one database and writes the archive on ``default``; the
+archive itself is not sharded. A conference is swept on its shard and
+then on ``default``, for rows written before sharding was set up, before
+it is marked archived.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import calendar_feeds, sharding
+from .models import (
+    ArchivedBooking, ArchivedFeedback, ArchivedPayment, Booking, Conference, Feedback, OutboxMessage, Payment,
+)
+from .user_bookings import booked_set_key
+
+BATCH_SIZE = 1000
+IN_FLIGHT_PAYMENT_STATUSES = ('pending', 'processing')
+
+
+def archive_cutoff():
+    """Conferences dated before this day are due for archiving."""
+    return timezone.localdate() - timedelta(days=getattr(settings, 'ARCHIVE_AFTER_DAYS', 365))
+
+
+def archivable_conferences(before=None):
+    waiting = sharding.fan_out(
+        lambda alias: Payment.objects.using(alias).filter(status__in=IN_FLIGHT_PAYMENT_STATUSES, booking__isnull=False)
+        .values_list('booking__conference_id', flat=True).distinct()
+    )
+    return (
+        Conference.objects.filter(date__lt=before or archive_cutoff(), archived_at__isnull=True, deleting_at__isnull=True)
+        .exclude(pk__in=waiting)
+        .order_by('date', 'conference_id')
+    )
+
+
+def _delete(queryset):
+    # Delete without signals: the analytics handlers would otherwise take the
+    # archived rows out of the daily rollups, which should keep counting them.
+    return queryset._raw_delete(queryset.db)
+
+
+def _forget_users(user_ids):
+    """Drop cached per-user state that listed the moved rows."""
+    for user_id in user_ids:
+        calendar_feeds.bump(calendar_feeds.user_version_key(user_id))
+    keys = [booked_set_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _aliases(conference_id):
+    """The conference's shard, then ``default`` for rows written before sharding was set up."""
+    return list(dict.fromkeys([sharding.shard_for(conference_id), 'default']))
+
+
+def archive_booking_batch(conference_id, batch_size=BATCH_SIZE, alias=None):
+    """Move up to ``batch_size`` of a conference's bookings on ``alias``, with their payments.
+
+    ``alias`` defaults to the conference's shard. Returns ``(bookings,
+    payments)`` moved; (0, 0) once none are left.
+    """
+    alias = alias or sharding.shard_for(conference_id)
+    with sharding.atomic(alias):
+        return _archive_booking_batch(alias, conference_id, batch_size)
+
+
+def _archive_booking_batch(alias, conference_id, batch_size):
+    bookings = list(
+        Booking.objects.using(alias).select_for_update().filter(conference_id=conference_id).order_by('pk')[:batch_size]
+    )
+    if not bookings:
+        return 0, 0
+    booking_ids = [booking.pk for booking in bookings]
+    payments = list(Payment.objects.using(alias).filter(booking_id__in=booking_ids))
+    now = timezone.now()
+
+    ArchivedBooking.objects.bulk_create(
+        ArchivedBooking(
+            booking_id=booking.pk, user_id=booking.user_id, conference_id=booking.conference_id,
+            time=booking.time, status=booking.status, payment_status=booking.payment_status, archived_at=now,
+        )
+        for booking in bookings
+    )
+    ArchivedPayment.objects.bulk_create(
+        ArchivedPayment(
+            payment_id=payment.pk, booking_id=payment.booking_id, amount=payment.amount,
+            payment_method=payment.payment_method, transaction_id=payment.transaction_id,
+            payment_date=payment.payment_date, status=payment.status, gateway_charge_id=payment.gateway_charge_id,
+        )
+        for payment in payments
+    )
+    OutboxMessage.objects.using(alias).filter(booking_id__in=booking_ids).update(booking=None)
+    _delete(Payment.objects.using(alias).filter(pk__in=[payment.pk for payment in payments]))
+    _delete(Booking.objects.using(alias).filter(pk__in=booking_ids))
+    _forget_users({booking.user_id for booking in bookings})
+    return len(bookings), len(payments)
+
+
+def archive_feedback_batch(conference_id, batch_size=BATCH_SIZE, alias=None):
+    """Move up to ``batch_size`` of a conference's feedback rows on ``alias``; returns how many."""
+    alias = alias or sharding.shard_for(conference_id)
+    with sharding.atomic(alias):
+        feedback = list(
+            Feedback.objects.using(alias).select_for_update().filter(conference_id=conference_id).order_by('pk')[:batch_size]
+        )
+        ArchivedFeedback.objects.bulk_create(
+            ArchivedFeedback(
+                id=row.pk, user_id=row.user_id, conference_id=row.conference_id,
+                comments=row.comments, rating=row.rating,
+            )
+            for row in feedback
+        )
+        _delete(Feedback.objects.using(alias).filter(pk__in=[row.pk for row in feedback]))
+    return len(feedback)
+
+
+def archive_conference(conference_id, batch_size=BATCH_SIZE):
+    """Move everything of one conference to the archive, batch by batch.
+
+    Returns ``{'bookings': n, 'payments': n, 'feedback': n}``.
+    """
+    moved = {'bookings': 0, 'payments': 0, 'feedback': 0}
+    for alias in _aliases(conference_id):
+        while True:
+            bookings, payments = archive_booking_batch(conference_id, batch_size, alias)
+            if not bookings:
+                break
+            moved['bookings'] += bookings
+            moved['payments'] += payments
+        while True:
+            feedback = archive_feedback_batch(conference_id, batch_size, alias)
+            if not feedback:
+                break
+            moved['feedback'] += feedback
+    Conference.objects.filter(pk=conference_id).update(archived_at=timezone.now())
+    return moved
+
+
+def archive_conferences(before=None, batch_size=BATCH_SIZE, limit=None, progress=None):
+    """Archive every conference due for it, oldest first.
+
+    ``progress(conference, moved)`` is called after each conference.
+    Returns the totals moved, including the number of conferences.
+    """
+    totals = {'conferences': 0, 'bookings': 0, 'payments': 0, 'feedback': 0}
+    conferences = archivable_conferences(before).only('conference_id', 'topic', 'date')
+    if limit:
+        conferences = conferences[:limit]
+    for conference in list(conferences):
+        moved = archive_conference(conference.pk, batch_size)
+        totals['conferences'] += 1
+        for name, count in moved.items():
+            totals[name] += count
+        if progress:
+            progress(conference, moved)
+    return totals
@@ -0,0 +1,29 @@
+# booking_app/auth_backends.py
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .models import user_cache_key
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that loads the session user from the cache.
+
+    AuthenticationMiddleware calls get_user() on every authenticated request,
+    which is a SELECT on the user table each time. The user object is cached
+    for USER_CACHE_TIMEOUT seconds and dropped whenever the user is saved,
+    deleted or changed by a queryset update() or bulk_update() (see
+    invalidate_cached_users() in models.py). Changes that bypass the ORM,
+    such as raw SQL or edits made directly in the database, are not seen
+    until the entry expires, so deactivate users or reset passwords
+    through the ORM.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, getattr(settings, 'USER_CACHE_TIMEOUT', 300))
+        return user
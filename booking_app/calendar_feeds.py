@@ -0,0 +1,261 @@
+# booking_app/calendar_feeds.py
+"""iCalendar feeds of the conference catalogue and of each user's bookings.
+
+Calendar apps poll subscribed feeds every few minutes, so a poll should
+cost as little as possible when nothing has changed:
+
+* Personal feeds are addressed by a signed token carrying the user id
+  and the user's ``calendar_feed_version``, so a poll needs no session.
+  The version is read from the cache. Resetting the feed bumps it, which
+  revokes every URL handed out before, for example one that leaked.
+* Each feed has version stamps in the cache: one for the catalogue,
+  bumped when a conference changes, and one per user, bumped when one of
+  their bookings does. A stamp is the time of the change in microseconds,
+  so it gives both the ETag and Last-Modified. A conditional poll reads
+  the stamps with one cache lookup and gets a 304.
+* A full fetch is served from a cached copy of the feed for the current
+  stamps. On a miss the feed is streamed straight from a database
+  iterator and cached as it goes out.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import sharding
+from .models import Booking, Conference, User
+
+TOKEN_SALT = 'booking_app.calendar_feeds'
+CATALOGUE_VERSION_KEY = 'calendar_version:conferences'
+FEED_CACHE_TIMEOUT = 3600
+CHUNK_SIZE = 16 * 1024
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+PRODID = '-//Conference Booking System//Calendar Feeds//EN'
+EVENT_STATUS = {'pending': 'TENTATIVE', 'confirmed': 'CONFIRMED'}
+
+
+def user_version_key(user_id):
+    return f'calendar_version:user:{user_id}'
+
+
+def feed_version_key(user_id):
+    return f'calendar_feed_version:{user_id}'
+
+
+def feed_version(user_id):
+    """The ``calendar_feed_version`` of ``user_id``, or None if there is no such user."""
+    key = feed_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list('calendar_feed_version', flat=True).first()
+        if version is not None:
+            cache.set(key, version, FEED_CACHE_TIMEOUT)
+    return version
+
+
+def feed_token(user):
+    """The token in ``user``'s personal feed URL."""
+    return signing.Signer(salt=TOKEN_SALT).sign(f'{user.pk}:{user.calendar_feed_version}')
+
+
+def user_for_token(token):
+    """The user id a feed token was issued for, or None if it is not genuine or was revoked."""
+    try:
+        user_id, _, version = signing.Signer(salt=TOKEN_SALT).unsign(token).partition(':')
+        # Tokens issued before feeds had versions carry the user id alone
+        user_id, version = int(user_id), int(version or 0)
+    except (signing.BadSignature, ValueError):
+        return None
+    return user_id if feed_version(user_id) == version else None
+
+
+def reset_feed_token(user_id):
+    """Revoke ``user_id``'s personal feed URL; the next feed_token() is a new one."""
+    User.objects.filter(pk=user_id).update(calendar_feed_version=F('calendar_feed_version') + 1)
+    cache.delete(feed_version_key(user_id))
+    transaction.on_commit(lambda: cache.delete(feed_version_key(user_id)))
+
+
+def _stamp():
+    return time.time_ns() // 1000
+
+
+def bump(key):
+    """Mark the feed behind ``key`` as changed once the current transaction commits."""
+    transaction.on_commit(lambda: cache.set(key, _stamp(), None))
+
+
+def versions(*keys):
+    """The version stamps for ``keys``, starting any missing ones at now."""
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        now = _stamp()
+        for key in missing:
+            cache.add(key, now, None)
+        found.update(cache.get_many(missing))  # Another worker may have added it first
+    return [found[key] for key in keys]
+
+
+# iCalendar writing (RFC 5545)
+
+def escape(text):
+    return (
+        text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """The content line ``line`` folded into 75-octet pieces, with its CRLF."""
+    data = line.encode()
+    pieces = []
+    start, limit = 0, 75
+    while len(data) - start > limit:
+        end = start + limit
+        while data[end] & 0xC0 == 0x80:  # Never split a UTF-8 sequence
+            end -= 1
+        pieces.append(data[start:end].decode())
+        start, limit = end, 74  # Continuation lines start with a space
+    pieces.append(data[start:].decode())
+    return '\r\n '.join(pieces) + '\r\n'
+
+
+def utc(day, time_of_day):
+    value = timezone.make_aware(datetime.combine(day, time_of_day), timezone.get_default_timezone())
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def conference_event(conference, stamp, status=None):
+    host = urlsplit(settings.SITE_URL).hostname or 'localhost'
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:conference-{conference.conference_id}@{host}',
+        f'DTSTAMP:{stamp}',
+        f'DTSTART:{utc(conference.date, conference.time_start)}',
+        f'DTEND:{utc(conference.date, conference.time_end)}',
+        f'SUMMARY:{escape(conference.topic)}',
+        f'DESCRIPTION:{escape(conference.description)}',
+        f'URL:{settings.SITE_URL}{reverse("conference_detail", args=[conference.slug])}',
+    ]
+    if status:
+        lines.append(f'STATUS:{status}')
+    lines.append('END:VEVENT')
+    return ''.join(fold(line) for line in lines)
+
+
+def write_calendar(name, events):
+    """Yield an iCalendar document in chunks of about CHUNK_SIZE characters."""
+    chunk = [fold(line) for line in (
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN', 'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape(name)}',
+    )]
+    size = 0
+    for event in events:
+        chunk.append(event)
+        size += len(event)
+        if size >= CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk, size = [], 0
+    chunk.append('END:VCALENDAR\r\n')
+    yield ''.join(chunk)
+
+
+def catalogue_events(stamp):
+    conferences = (
+        Conference.objects.filter(date__isnull=False)
+        .only('conference_id', 'topic', 'slug', 'description', 'date', 'time_start', 'time_end')
+        .order_by('date', 'time_start')
+    )
+    for conference in conferences.iterator(chunk_size=2000):
+        yield conference_event(conference, stamp)
+
+
+def booking_events(user_id, stamp):
+    # Bookings may be on a shard (booking_app/sharding.py), so the conferences are read apart
+    statuses = dict(sharding.fan_out(
+        lambda alias: Booking.objects.using(alias).filter(user_id=user_id, status__in=EVENT_STATUS)
+        .values_list('conference_id', 'status')
+    ))
+    conferences = (
+        Conference.objects.filter(pk__in=statuses, date__isnull=False)
+        .only('conference_id', 'topic', 'slug', 'description', 'date', 'time_start', 'time_end')
+        .order_by('date', 'time_start')
+    )
+    for conference in conferences.iterator(chunk_size=2000):
+        yield conference_event(conference, stamp, EVENT_STATUS[statuses[conference.pk]])
+
+
+# Responses
+
+def _caching(chunks, key):
+    """Pass ``chunks`` through and cache the whole body once they have all gone out."""
+    body = []
+    for chunk in chunks:
+        body.append(chunk)
+        yield chunk
+    cache.set(key, ''.join(body), FEED_CACHE_TIMEOUT)
+
+
+def feed_response(request, feed, version_keys, title, events, private=False):
+    """Serve ``feed``.ics, whose content changes with the stamps at ``version_keys``.
+
+    ``events(stamp)`` yields the feed's VEVENT blocks; it is only called
+    when no cached copy of the current version exists.
+    """
+    stamps = versions(*version_keys)
+    etag = '"%s"' % '-'.join(map(str, stamps))
+    last_modified = max(stamps) // 1_000_000 + 1  # Round up to whole seconds
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        key = f'calendar_feed:{":".join(version_keys)}:{etag}'
+        body = cache.get(key)
+        if body is not None:
+            response = HttpResponse(body, content_type=CONTENT_TYPE)
+        else:
+            stamp = datetime.fromtimestamp(max(stamps) / 1_000_000, dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+            response = StreamingHttpResponse(
+                _caching(write_calendar(title, events(stamp)), key), content_type=CONTENT_TYPE,
+            )
+        response['Content-Disposition'] = f'inline; filename="{feed}.ics"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Clients may keep the feed but must check it is current before use
+    response['Cache-Control'] = 'private, no-cache' if private else 'public, no-cache'
+    return response
+
+
+def catalogue_response(request):
+    return feed_response(request, 'conferences', [CATALOGUE_VERSION_KEY], 'Conferences', catalogue_events)
+
+
+def bookings_response(request, user_id):
+    return feed_response(
+        request, 'bookings', [user_version_key(user_id), CATALOGUE_VERSION_KEY], 'My bookings',
+        lambda stamp: booking_events(user_id, stamp), private=True,
+    )
+
+
+# A conference change can alter every feed that lists it, so it bumps the
+# catalogue stamp, which personal feeds include in their ETag too.
+
+@receiver([post_save, post_delete], sender=Conference)
+def conference_changed(sender, **kwargs):
+    bump(CATALOGUE_VERSION_KEY)
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def booking_changed(sender, instance, **kwargs):
+    bump(user_version_key(instance.user_id))
@@ -0,0 +1,221 @@
+# booking_app/co_bookings.py
+"""The co-booking matrix behind "attendees also booked", built with NumPy.
+
+Cell (a, b) of the matrix counts the attendees holding bookings for both
+conference a and conference b; the diagonal counts each conference's
+bookings. It is BᵀB for the attendee × conference booking matrix B, and
+only its nonzero cells are stored, as CoBooking rows. Each conference's
+RECOMMENDATION_NEIGHBOURS closest conferences by cosine similarity,
+count(a, b) / sqrt(count(a, a) * count(b, b)), are kept as ranked
+ConferenceNeighbour rows so a page reads them with one indexed query (see
+booking_app/recommendations.py).
+
+``rebuild()`` computes the whole matrix from the booking tables on every
+shard, archived bookings included. ``update()`` (the update_recommendations command, run
+every few minutes) folds in bookings made since the last run: the new
+counts of the attendees who booked again minus what they counted before
+are added to the matrix, and the neighbours of the conferences whose rows
+changed are ranked again. Cancellations, and the drift in other
+conferences' scores as the diagonal grows, are only picked up by the next
+rebuild, so run ``update_recommendations --rebuild`` nightly. Each shard
+hands out its own range of booking ids, so each has its own watermark;
+adding a shard makes the next update a rebuild.
+
+This module imports NumPy; the web views only read the neighbour table
+through booking_app/recommendations.py.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+
+from . import sharding
+from .inventory import HOLDING_STATUSES
+from .models import ArchivedBooking, Booking, CoBooking, ConferenceNeighbour, RecommendationWatermark
+
+WATERMARK = 'co_bookings'
+BATCH_SIZE = 5000
+
+
+def top_k():
+    return getattr(settings, 'RECOMMENDATION_NEIGHBOURS', 10)
+
+
+def pair_counts(users, conferences):
+    """The nonzero cells of BᵀB from parallel arrays of booked ``(user, conference)`` pairs.
+
+    Returns ``(a, b, count)`` arrays, both triangles and the diagonal.
+    """
+    if not len(users):
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty
+    order = np.lexsort((conferences, users))
+    conferences = conferences[order]
+    starts = np.flatnonzero(np.r_[True, users[order][1:] != users[order][:-1]])
+    sizes = np.diff(np.r_[starts, len(users)])
+    # Every booking pairs with every booking of the same attendee, itself included
+    per_booking = np.repeat(sizes, sizes)
+    left = np.repeat(np.arange(len(users)), per_booking)
+    first = np.repeat(np.repeat(starts, sizes), per_booking)
+    offset = np.arange(len(left)) - np.repeat(np.cumsum(per_booking) - per_booking, per_booking)
+    base = int(conferences.max()) + 1
+    cells, counts = np.unique(conferences[left] * base + conferences[first + offset], return_counts=True)
+    return cells // base, cells % base, counts
+
+
+def rank_neighbours(a, b, counts, diagonal):
+    """``ConferenceNeighbour`` rows for every conference in ``a``, the ``top_k()`` best per conference.
+
+    ``diagonal`` maps a conference id to its booking count and must cover
+    every id in ``b``.
+    """
+    off = a != b
+    a, b, counts = a[off], b[off], counts[off]
+    if not len(a):
+        return []
+    totals = np.array([diagonal[conference] for conference in b.tolist()], dtype=np.float64)
+    own = np.array([diagonal[conference] for conference in a.tolist()], dtype=np.float64)
+    scores = counts / np.sqrt(own * totals)
+    order = np.lexsort((b, -scores, a))
+    a, b, counts, scores = a[order], b[order], counts[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, a[1:] != a[:-1]])
+    ranks = np.arange(len(a)) - np.repeat(starts, np.diff(np.r_[starts, len(a)]))
+    keep = ranks < top_k()
+    return [
+        ConferenceNeighbour(conference_id=conference, neighbour_id=neighbour, rank=rank, score=score, co_bookings=count)
+        for conference, neighbour, rank, score, count in zip(
+            a[keep].tolist(), b[keep].tolist(), ranks[keep].tolist(), scores[keep].tolist(), counts[keep].tolist(),
+        )
+    ]
+
+
+def _bookings(queryset):
+    rows = np.array(list(queryset.values_list('user_id', 'conference_id')), dtype=np.int64).reshape(-1, 2)
+    return rows[:, 0], rows[:, 1]
+
+
+def watermark_name(alias):
+    """The watermark of ``alias``'s bookings; each shard hands out its own range of ids."""
+    return WATERMARK if alias == 'default' else f'{WATERMARK}:{alias}'
+
+
+def _last_bookings():
+    """The newest booking id on each shard."""
+    return dict(sharding.fan_out(
+        lambda alias: [(alias, Booking.objects.using(alias).aggregate(last=Max('pk'))['last'] or 0)]
+    ))
+
+
+def _held(alias, last):
+    return Booking.objects.using(alias).filter(pk__lte=last, status__in=HOLDING_STATUSES)
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute the whole matrix and every conference's neighbours. Returns the number of cells."""
+    lasts = _last_bookings()
+    users, conferences = _bookings(ArchivedBooking.objects.filter(status__in=HOLDING_STATUSES))
+    rows = np.array(
+        sharding.fan_out(lambda alias: _held(alias, lasts[alias]).values_list('user_id', 'conference_id')),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    a, b, counts = pair_counts(np.concatenate([rows[:, 0], users]), np.concatenate([rows[:, 1], conferences]))
+
+    CoBooking.objects.all().delete()
+    CoBooking.objects.bulk_create(
+        (CoBooking(conference_id=x, other_id=y, count=n) for x, y, n in zip(a.tolist(), b.tolist(), counts.tolist())),
+        batch_size=BATCH_SIZE,
+    )
+    diagonal = dict(zip(a[a == b].tolist(), counts[a == b].tolist()))
+    ConferenceNeighbour.objects.all().delete()
+    ConferenceNeighbour.objects.bulk_create(rank_neighbours(a, b, counts, diagonal), batch_size=BATCH_SIZE)
+    for alias, last in lasts.items():
+        RecommendationWatermark.objects.update_or_create(name=watermark_name(alias), defaults={'booking_id': last})
+    return len(a)
+
+
+def _merge(*parts):
+    """Sum several ``(a, b, count)`` cell lists, dropping cells that cancel out."""
+    a = np.concatenate([part[0] for part in parts])
+    b = np.concatenate([part[1] for part in parts])
+    counts = np.concatenate([part[2] for part in parts])
+    if not len(a):
+        return a, b, counts
+    base = int(max(a.max(), b.max())) + 1
+    cells, inverse = np.unique(a * base + b, return_inverse=True)
+    sums = np.bincount(inverse.ravel(), weights=counts, minlength=len(cells)).astype(np.int64)
+    nonzero = sums != 0
+    return cells[nonzero] // base, cells[nonzero] % base, sums[nonzero]
+
+
+@transaction.atomic
+def update():
+    """Fold bookings made since the last run into the matrix. Returns the number of conferences re-ranked.
+
+    Builds the matrix from scratch if it has never been built.
+    """
+    names = {alias: watermark_name(alias) for alias in sharding.shards()}
+    watermarks = {
+        watermark.name: watermark
+        for watermark in RecommendationWatermark.objects.select_for_update().filter(name__in=names.values())
+    }
+    if len(watermarks) < len(names):
+        rebuild()
+        return ConferenceNeighbour.objects.values('conference_id').distinct().count()
+    marks = {alias: watermarks[name].booking_id for alias, name in names.items()}
+    lasts = _last_bookings()
+    if all(lasts[alias] <= marks[alias] for alias in lasts):
+        return 0
+    users = set(sharding.fan_out(
+        lambda alias: _held(alias, lasts[alias]).filter(pk__gt=marks[alias]).values_list('user_id', flat=True).distinct()
+    ))
+    # Every booking of those users, on any shard, and whether it was counted before
+    rows = np.array(
+        sharding.fan_out(
+            lambda alias: [
+                (user_id, conference_id, pk <= marks[alias])
+                for pk, user_id, conference_id in _held(alias, lasts[alias]).filter(user_id__in=users)
+                .values_list('pk', 'user_id', 'conference_id')
+            ]
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    before = rows[:, 2] == 1
+    now_a, now_b, now_counts = pair_counts(rows[:, 0], rows[:, 1])
+    was_a, was_b, was_counts = pair_counts(rows[before, 0], rows[before, 1])
+    a, b, delta = _merge((now_a, now_b, now_counts), (was_a, was_b, -was_counts))
+
+    if len(a):
+        current = {
+            (x, y): n for x, y, n in CoBooking.objects.filter(conference_id__in=set(a.tolist()))
+            .values_list('conference_id', 'other_id', 'count')
+        }
+        CoBooking.objects.bulk_create(
+            [
+                CoBooking(conference_id=x, other_id=y, count=current.get((x, y), 0) + n)
+                for x, y, n in zip(a.tolist(), b.tolist(), delta.tolist())
+            ],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['conference', 'other'],
+            update_fields=['count'],
+        )
+
+    affected = set(a.tolist())
+    if affected:
+        row = np.array(
+            list(CoBooking.objects.filter(conference_id__in=affected).values_list('conference_id', 'other_id', 'count')),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        diagonal = dict(
+            CoBooking.objects.filter(conference_id__in=set(row[:, 1].tolist()), other_id=F('conference_id'))
+            .values_list('conference_id', 'count')
+        )
+        ConferenceNeighbour.objects.filter(conference_id__in=affected).delete()
+        ConferenceNeighbour.objects.bulk_create(
+            rank_neighbours(row[:, 0], row[:, 1], row[:, 2], diagonal), batch_size=BATCH_SIZE,
+        )
+    for alias, name in names.items():
+        watermarks[name].booking_id = lasts[alias]
+        watermarks[name].save(update_fields=['booking_id'])
+    return len(affected)
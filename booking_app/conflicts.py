@@ -0,0 +1,141 @@
+# booking_app/conflicts.py
+"""Schedule conflict detection for conferences.
+
+Conferences are treated as half-open intervals [time_start, time_end) on
+their ``date``, so a session ending at 10:00 does not clash with one that
+starts at 10:00. Conferences without a date cannot be placed on the
+calendar and are ignored.
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from django.conf import settings
+
+from . import sharding
+from .models import Booking, Conference, ConferenceHasSpeaker
+
+
+class IntervalIndex:
+    """Per-date index of intervals answering "what overlaps [start, end)?".
+
+    Intervals are kept sorted by start time together with a running maximum
+    of end times, so a query only walks back from the first interval that
+    starts after ``end`` until no earlier interval can still be running.
+    Build the index from all intervals at once where possible; ``add``
+    inserts in place and only raises the running maximum after the new
+    interval.
+    """
+
+    def __init__(self, intervals=()):
+        self._by_date = defaultdict(list)
+        for date, start, end, key in intervals:
+            self._by_date[date].append((start, end, key))
+        self._starts = {}
+        self._max_end = {}
+        for date, items in self._by_date.items():
+            self._reindex(date, items)
+
+    def _reindex(self, date, items):
+        items.sort(key=lambda item: item[0])
+        self._starts[date] = [start for start, _, _ in items]
+        running, max_end = None, []
+        for _, end, _ in items:
+            running = end if running is None or end > running else running
+            max_end.append(running)
+        self._max_end[date] = max_end
+
+    def add(self, date, start, end, key):
+        items = self._by_date[date]
+        starts = self._starts.setdefault(date, [])
+        max_end = self._max_end.setdefault(date, [])
+        # After any intervals with the same start, as a stable sort would put it
+        i = bisect_right(starts, start)
+        items.insert(i, (start, end, key))
+        starts.insert(i, start)
+        max_end.insert(i, end if i == 0 or end > max_end[i - 1] else max_end[i - 1])
+        for j in range(i + 1, len(max_end)):
+            if max_end[j] >= end:
+                break
+            max_end[j] = end
+
+    def overlapping(self, date, start, end):
+        """Return the keys of intervals on ``date`` that overlap [start, end)."""
+        items = self._by_date.get(date)
+        if not items:
+            return []
+        max_end = self._max_end[date]
+        found = []
+        i = bisect_left(self._starts[date], end) - 1
+        while i >= 0 and max_end[i] > start:
+            _, item_end, key = items[i]
+            if item_end > start:
+                found.append(key)
+            i -= 1
+        found.reverse()
+        return found
+
+
+def find_conflicts(intervals):
+    """Find every overlapping pair of intervals that share a resource.
+
+    ``intervals`` is an iterable of ``(resource, date, start, end, key)``
+    tuples. A sort followed by a sweep with a heap of active end times keeps
+    this at O(n log n + k) for k conflicts instead of comparing all pairs.
+    Yields ``(resource, key_a, key_b)`` with ``key_a`` starting first.
+    """
+    ordered = sorted(
+        (item for item in intervals if item[1] is not None),
+        key=lambda item: (str(item[0]), item[1], item[2], item[3]),
+    )
+    active = []
+    current = None
+    for seq, (resource, date, start, end, key) in enumerate(ordered):
+        if (resource, date) != current:
+            current = (resource, date)
+            active = []
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, _, other in sorted(active, key=lambda entry: entry[1]):
+            yield resource, other, key
+        heapq.heappush(active, (end, seq, key))
+
+
+def booking_overlap_policy():
+    """Return how overlapping bookings are handled: 'warn', 'block' or 'off'."""
+    return getattr(settings, 'BOOKING_OVERLAP_POLICY', 'warn')
+
+
+def user_booking_conflicts(user, conference):
+    """Return the user's active bookings whose conference overlaps ``conference``."""
+    if conference.date is None:
+        return []
+    bookings = sharding.fan_out(
+        lambda alias: Booking.objects.using(alias).filter(user=user)
+        .exclude(status='cancelled')
+        .exclude(conference=conference)
+    )
+    # Bookings and conferences may be on different databases, so match them up here
+    same_day = Conference.objects.filter(pk__in={b.conference_id for b in bookings}, date=conference.date).in_bulk()
+    for b in bookings:
+        if b.conference_id in same_day:
+            b.conference = same_day[b.conference_id]
+    index = IntervalIndex(
+        (b.conference.date, b.conference.time_start, b.conference.time_end, b)
+        for b in bookings if b.conference_id in same_day
+    )
+    return index.overlapping(conference.date, conference.time_start, conference.time_end)
+
+
+def speaker_conflicts():
+    """Return ``(speaker_id, conference_id, conference_id)`` for double-booked speakers."""
+    rows = ConferenceHasSpeaker.objects.filter(
+        conference__date__isnull=False
+    ).values_list(
+        'speaker_id',
+        'conference__date',
+        'conference__time_start',
+        'conference__time_end',
+        'conference_id',
+    )
+    return list(find_conflicts(rows))
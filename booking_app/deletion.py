@@ -0,0 +1,191 @@
+# booking_app/deletion.py
+"""Delete conferences with large booking histories in batches.
+
+Deleting a Conference through the ORM has Django's collector load every
+booking, payment, ticket and feedback row of it into memory and send
+their delete signals, in one transaction that holds its locks to the end;
+with tens of thousands of bookings the admin request times out. Instead
+the admin action (or ``queue_deletion()``) only closes the conference and
+records a ConferenceDeletion, and the delete_conferences command empties
+the conference's tables afterwards:
+
+- Each batch selects up to BATCH_SIZE primary keys and removes them with
+  one raw DELETE, in its own short transaction. The command sleeps
+  CONFERENCE_DELETION_PAUSE seconds between batches so writers waiting on
+  the same tables get their turn.
+- Children go before their parents: payments and outbox links with their
+  bookings, tickets and payments before group orders, archived payments
+  before archived bookings.
+- What is left in the tables is the remaining work, so an interrupted run
+  resumes where it stopped. The conference row itself is deleted last,
+  once a pass over every table finds nothing.
+
+Queuing a deletion sets the conference's ``deleting_at``, which closes it
+to new bookings and group orders and keeps it out of archiving, repricing
+and recommendations.
+The per-user caches of My Bookings and the calendar feeds are dropped for
+every batch of bookings deleted; the other delete signals only maintain
+the rollups, ledger and recommendations of the conference, which are
+deleted with it.
+
+With sharding (booking_app/sharding.py) bookings, payments and feedback
+are deleted on the conference's shard, which Django's cascade would not
+reach, and on ``default`` for rows written before sharding was set up.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import calendar_feeds, sharding, snapshots
+from .models import (
+    ArchivedBooking, ArchivedFeedback, ArchivedPayment, Booking, BookingEvent, CheckIn, CoBooking, Conference,
+    ConferenceCategory, ConferenceDeletion, ConferenceHasSpeaker, ConferenceNeighbour, DailyConferenceStats,
+    DailyPaymentMethodStats, Feedback, GroupOrder, LedgerSnapshot, OutboxMessage, Payment, PriceTable, Ticket,
+    TicketRevocation,
+)
+from .user_bookings import booked_set_key
+
+BATCH_SIZE = 1000
+
+# Tables on default that only reference the conference, as (label, model, foreign key)
+CONFERENCE_TABLES = [
+    ('booking events', BookingEvent, 'conference'),
+    ('ledger snapshots', LedgerSnapshot, 'conference'),
+    ('check-ins', CheckIn, 'conference'),
+    ('ticket revocations', TicketRevocation, 'conference'),
+    ('daily stats', DailyConferenceStats, 'conference'),
+    ('daily payment stats', DailyPaymentMethodStats, 'conference'),
+    ('co-bookings', CoBooking, 'conference'),
+    ('co-bookings', CoBooking, 'other'),
+    ('neighbours', ConferenceNeighbour, 'conference'),
+    ('neighbours', ConferenceNeighbour, 'neighbour'),
+    ('price table', PriceTable, 'conference'),
+    ('categories', ConferenceCategory, 'conference'),
+    ('speakers', ConferenceHasSpeaker, 'conference'),
+]
+
+
+def pause_seconds():
+    return getattr(settings, 'CONFERENCE_DELETION_PAUSE', 0.05)
+
+
+def _delete(queryset):
+    # Delete without the collector or signals; see the module docstring
+    return queryset._raw_delete(queryset.db)
+
+
+def _forget_users(user_ids):
+    """Drop cached per-user state that listed the deleted bookings."""
+    for user_id in user_ids:
+        calendar_feeds.bump(calendar_feeds.user_version_key(user_id))
+    keys = [booked_set_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _booking_children(alias, booking_ids):
+    user_ids = set(Booking.objects.using(alias).filter(pk__in=booking_ids).values_list('user_id', flat=True))
+    OutboxMessage.objects.using(alias).filter(booking_id__in=booking_ids).update(booking=None)
+    payments = _delete(Payment.objects.using(alias).filter(booking_id__in=booking_ids))
+    _forget_users(user_ids)
+    return payments
+
+
+def _group_order_payments(alias, order_ids):
+    # On the shards, so committed ahead of the orders; a rerun finds the orders without them
+    return sum(_delete(Payment.objects.using(shard).filter(order_id__in=order_ids)) for shard in sharding.shards())
+
+
+def _steps(conference_id):
+    """``(label, alias, queryset, before)`` for every table that references the conference, children first.
+
+    ``before(alias, pks)`` deletes what references a batch of rows and
+    returns how many rows it deleted.
+    """
+    sharded_aliases = list(dict.fromkeys([sharding.shard_for(conference_id), 'default']))
+    steps = []
+    for alias in sharded_aliases:
+        steps += [
+            ('bookings', alias, Booking.objects.filter(conference_id=conference_id), _booking_children),
+            ('feedback', alias, Feedback.objects.filter(conference_id=conference_id), None),
+        ]
+    steps += [
+        ('tickets', 'default', Ticket.objects.filter(order__conference_id=conference_id), None),
+        ('group orders', 'default', GroupOrder.objects.filter(conference_id=conference_id), _group_order_payments),
+        ('archived payments', 'default', ArchivedPayment.objects.filter(booking__conference_id=conference_id), None),
+        ('archived bookings', 'default', ArchivedBooking.objects.filter(conference_id=conference_id), None),
+        ('archived feedback', 'default', ArchivedFeedback.objects.filter(conference_id=conference_id), None),
+    ]
+    steps += [
+        (label, 'default', model.objects.filter(**{field: conference_id}), None)
+        for label, model, field in CONFERENCE_TABLES
+    ]
+    return steps
+
+
+def _batches(alias, queryset, before, batch_size):
+    """Delete ``queryset`` on ``alias`` in batches, yielding the rows deleted by each."""
+    while True:
+        with transaction.atomic(using=alias):
+            pks = list(queryset.using(alias).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return
+            deleted = before(alias, pks) if before else 0
+            deleted += _delete(queryset.model._base_manager.using(alias).filter(pk__in=pks))
+        yield deleted
+
+
+def queue_deletion(conferences, user=None):
+    """Close ``conferences`` to bookings and queue them for the delete_conferences command.
+
+    Returns the number of conferences given; ones already queued stay queued as they were.
+    """
+    rows = list(conferences.values_list('pk', 'topic', 'slug'))
+    with transaction.atomic():
+        Conference.objects.filter(pk__in=[pk for pk, _, _ in rows], deleting_at__isnull=True).update(
+            deleting_at=timezone.now(),
+        )
+        ConferenceDeletion.objects.bulk_create(
+            [ConferenceDeletion(conference_id=pk, topic=topic, requested_by=user) for pk, topic, _ in rows],
+            ignore_conflicts=True,
+        )
+        snapshots.invalidate(*[slug for _, _, slug in rows])
+    return len(rows)
+
+
+def delete_conference(deletion, batch_size=BATCH_SIZE, progress=None):
+    """Empty the tables of ``deletion``'s conference batch by batch, then delete the conference.
+
+    ``progress(deletion)`` is called after every batch, with ``step`` and
+    ``rows_deleted`` updated.
+    """
+    while True:
+        deleted = 0
+        for label, alias, queryset, before in _steps(deletion.conference_id):
+            for count in _batches(alias, queryset, before, batch_size):
+                deleted += count
+                deletion.step = label
+                deletion.rows_deleted += count
+                deletion.save(update_fields=['step', 'rows_deleted'])
+                if progress:
+                    progress(deletion)
+                time.sleep(pause_seconds())
+        if not deleted:
+            break
+    # Nothing references the conference any more, so the collector has nothing to load
+    for conference in Conference.objects.filter(pk=deletion.conference_id):
+        conference.delete()
+    deletion.step = ''
+    deletion.finished_at = timezone.now()
+    deletion.save(update_fields=['step', 'finished_at'])
+    return deletion
+
+
+def delete_queued(batch_size=BATCH_SIZE, limit=None, progress=None):
+    """Finish every queued deletion, oldest first. Returns the deletions finished."""
+    deletions = ConferenceDeletion.objects.filter(finished_at__isnull=True).order_by('requested_at', 'pk')
+    if limit:
+        deletions = deletions[:limit]
+    return [delete_conference(deletion, batch_size, progress) for deletion in list(deletions)]
@@ -1,7 +1,15 @@
 # booking_app/forms.py
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
-from .models import User, Booking, Feedback, Conference, Speaker, Payment
+from django.core.validators import validate_email
+from .models import User, Booking, Feedback, Payment
+from .group_orders import max_group_seats
+
+PAYMENT_METHOD_CHOICES = [
+    ('credit_card', 'Credit Card'),
+    ('debit_card', 'Debit Card'),
+    ('paypal', 'PayPal'),
+]
 
 class UserRegistrationForm(UserCreationForm):
     first_name = forms.CharField(max_length=45, required=True)
@@ -26,11 +34,7 @@ class PaymentForm(forms.ModelForm):
         model = Payment
         fields = ['payment_method']
         widgets = {
-            'payment_method': forms.Select(choices=[
-                ('credit_card', 'Credit Card'),
-                ('debit_card', 'Debit Card'),
-                ('paypal', 'PayPal'),
-            ], attrs={'class': 'form-select'}),
+            'payment_method': forms.Select(choices=PAYMENT_METHOD_CHOICES, attrs={'class': 'form-select'}),
         }
     
     # Credit card fields (for demo purposes)
@@ -50,4 +54,43 @@ class FeedbackForm(forms.ModelForm):
 class ConferenceSearchForm(forms.Form):
     topic = forms.CharField(required=False)
     category = forms.CharField(required=False)
-    speaker = forms.ModelChoiceField(queryset=Speaker.objects.all(), required=False)
\ No newline at end of file
+    # Only the chosen speaker's id; the name is picked through the
+    # speaker_autocomplete endpoint rather than listed in the page
+    speaker = forms.CharField(required=False, max_length=45, widget=forms.HiddenInput)
+
+class AnalyticsRangeForm(forms.Form):
+    start = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
+class GroupBookingForm(forms.Form):
+    attendees = forms.CharField(
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 8}),
+        help_text='One attendee per line: Name, email',
+    )
+    payment_method = forms.ChoiceField(choices=PAYMENT_METHOD_CHOICES, widget=forms.Select(attrs={'class': 'form-select'}))
+    
+    def clean_attendees(self):
+        """Return the attendees as a list of ``(name, email)`` tuples."""
+        attendees = []
+        emails = set()
+        for number, line in enumerate(self.cleaned_data['attendees'].splitlines(), 1):
+            if not line.strip():
+                continue
+            name, _, email = line.rpartition(',')
+            name, email = name.strip(), email.strip().lower()
+            if not name:
+                raise forms.ValidationError(f'Line {number}: expected "Name, email".')
+            try:
+                validate_email(email)
+            except forms.ValidationError:
+                raise forms.ValidationError(f'Line {number}: "{email}" is not a valid email address.')
+            if email in emails:
+                raise forms.ValidationError(f'Line {number}: {email} is listed more than once.')
+            emails.add(email)
+            attendees.append((name[:100], email))
+        
+        if not attendees:
+            raise forms.ValidationError('Add at least one attendee.')
+        if len(attendees) > max_group_seats():
+            raise forms.ValidationError(f'A group order can hold at most {max_group_seats()} seats.')
+        return attendees
\ No newline at end of file
@@ -0,0 +1,130 @@
+# booking_app/gateway.py
+"""Payment gateway clients.
+
+A gateway accepts a capture request and answers straight away; the result
+arrives later as a signed webhook (see ``payment_webhook_view``). Nothing
+here touches the database, so submits can run on worker threads.
+
+Configure the client with ``settings.PAYMENT_GATEWAY``; ``BACKEND`` names
+the PaymentGateway subclass and the other keys are read from the same
+dict. ``python manage.py mock_gateway`` serves the HTTP API HTTPGateway
+speaks, for development and benchmarks.
+"""
+import hashlib
+import hmac
+import json
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+SIGNATURE_HEADER = 'X-Gateway-Signature'
+
+DEFAULTS = {
+    'BACKEND': 'booking_app.gateway.HTTPGateway',
+    'URL': 'http://127.0.0.1:8765',
+    'TIMEOUT': 5,
+    'WEBHOOK_SECRET': '',
+    'CALLBACK_URL': None,
+    'MAX_IN_FLIGHT': 20,
+    'CONCURRENCY': 4,
+    'CAPTURE_TIMEOUT': 300,
+    'MAX_ATTEMPTS': 5,
+}
+
+
+class GatewayError(Exception):
+    pass
+
+
+class InvalidSignature(Exception):
+    pass
+
+
+def gateway_settings():
+    return {**DEFAULTS, **getattr(settings, 'PAYMENT_GATEWAY', {})}
+
+
+def callback_url():
+    config = gateway_settings()
+    return config['CALLBACK_URL'] or settings.SITE_URL.rstrip('/') + reverse('payment_webhook')
+
+
+def sign(body, secret):
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify(body, signature, secret=None):
+    """Return the decoded event if ``signature`` matches ``body``."""
+    secret = gateway_settings()['WEBHOOK_SECRET'] if secret is None else secret
+    if not secret or not hmac.compare_digest(sign(body, secret), signature or ''):
+        raise InvalidSignature('Webhook signature does not match.')
+    event = json.loads(body)
+    if not isinstance(event, dict) or 'reference' not in event or 'status' not in event:
+        raise ValueError('Webhook event needs a reference and a status.')
+    return event
+
+
+class PaymentGateway:
+    """Interface every payment provider implements."""
+
+    def __init__(self, config):
+        self.config = config
+
+    def submit(self, payment, callback_url):
+        """Start capturing ``payment`` and return the gateway's charge id.
+
+        Must not wait for the capture itself: the outcome is POSTed to
+        ``callback_url``. Submitting the same payment twice must not charge
+        twice; gateways dedupe on ``payment.transaction_id``.
+        """
+        raise NotImplementedError
+
+    def charge(self, payment):
+        """Capture ``payment`` and block until it finishes.
+
+        Returns ``(charge_id, status)``. Only the benchmarks use this, to
+        show what an in-request capture would cost.
+        """
+        raise NotImplementedError
+
+
+class HTTPGateway(PaymentGateway):
+    """Client for a JSON-over-HTTP gateway such as the mock_gateway command."""
+
+    def _post(self, path, payload, timeout):
+        request = Request(
+            self.config['URL'].rstrip('/') + path,
+            data=json.dumps(payload).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST',
+        )
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                return json.loads(response.read())
+        except HTTPError as exc:
+            raise GatewayError(f'Gateway answered {exc.code} {exc.reason}') from exc
+        except (URLError, OSError, ValueError) as exc:
+            raise GatewayError(f'Gateway unreachable: {exc}') from exc
+
+    def _payload(self, payment):
+        return {
+            'reference': payment.transaction_id,
+            'amount': str(payment.amount),
+            'method': payment.payment_method,
+        }
+
+    def submit(self, payment, callback_url):
+        reply = self._post('/charges', {**self._payload(payment), 'callback_url': callback_url}, self.config['TIMEOUT'])
+        return reply['charge_id']
+
+    def charge(self, payment):
+        reply = self._post('/charges/sync', self._payload(payment), None)
+        return reply['charge_id'], reply['status']
+
+
+def get_gateway():
+    config = gateway_settings()
+    return import_string(config['BACKEND'])(config)
@@ -0,0 +1,74 @@
+# booking_app/group_orders.py
+"""Group orders: many attendee seats for one conference, bought at once.
+
+An order is all-or-nothing. Inside one transaction it reserves every seat
+with a single conditional UPDATE, inserts the tickets with ``bulk_create``
+and queues one Payment for the whole order, so the number of queries
+does not grow with the number of seats. The order is confirmed when the
+payment gateway reports the capture (see booking_app/payments.py).
+"""
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+
+from . import ledger, sharding, tickets
+from .inventory import SeatsUnavailable, release_seats, reserve_seats
+from .models import GroupOrder, Ticket
+from .payments import queue_capture
+
+TICKET_BATCH_SIZE = 500
+
+
+def max_group_seats():
+    return getattr(settings, 'GROUP_ORDER_MAX_SEATS', 1000)
+
+
+def place_group_order(user, conference, attendees, payment_method, unit_price=None):
+    """Book a seat for each ``(name, email)`` in ``attendees`` and take one payment.
+
+    Each seat costs ``unit_price``, the price quoted to the user, or the
+    conference's base price.
+
+    Raises SeatsUnavailable, leaving nothing behind, if the conference
+    cannot fit every attendee. The seats stay held while the payment is
+    captured and are released if it fails.
+    """
+    seats = len(attendees)
+    if unit_price is None:
+        unit_price = conference.price
+    # The payment is written to the conference's shard
+    with sharding.atomic(sharding.shard_for(conference.pk)):
+        if not reserve_seats(conference.pk, seats):
+            raise SeatsUnavailable(f'Fewer than {seats} seats are left.')
+
+        order = GroupOrder.objects.create(user=user, conference=conference, seats=seats)
+        ledger.record('booked', order, seats=seats)
+        Ticket.objects.bulk_create(
+            [Ticket(order=order, attendee_name=name, attendee_email=email) for name, email in attendees],
+            batch_size=TICKET_BATCH_SIZE,
+        )
+
+        queue_capture(
+            order=order,
+            amount=unit_price * seats,
+            payment_method=payment_method,
+            transaction_id=str(uuid.uuid4()),
+        )
+    return order
+
+
+def cancel_group_order(order):
+    with transaction.atomic():
+        # Re-read under a lock so a repeated cancel cannot release seats twice
+        order = GroupOrder.objects.select_for_update().get(pk=order.pk)
+        held_seats = order.status in ('pending', 'confirmed')
+        issued_tickets = order.status == 'confirmed'
+        order.status = 'cancelled'
+        order.save(update_fields=['status'])
+        if held_seats:
+            release_seats(order.conference_id, order.seats)
+            ledger.record_cancellation(order, order.seats)
+        if issued_tickets:
+            tickets.revoke(order.conference_id, [f't{pk}' for pk in order.tickets.values_list('pk', flat=True)])
+    return order
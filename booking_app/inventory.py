@@ -0,0 +1,110 @@
+# booking_app/inventory.py
+"""Seat inventory for conferences.
+
+``Conference.seats_taken`` counts the seats held by pending and confirmed
+bookings and group orders; a seat is held from the moment it is booked
+until the booking is cancelled or its payment fails. Seats are reserved
+with one conditional UPDATE, so the capacity check and the increment
+happen in the same statement and two requests can never both take the
+last seat.
+Callers reserve inside the transaction that creates the booking rows; if
+that transaction rolls back, the reservation goes with it.
+
+Pages read the count through ``cached_seats_taken()``. The cached value
+is adjusted when a reservation commits and expires after
+SEATS_CACHE_TIMEOUT, so any drift from a lost update is short-lived. The
+database stays the only authority on whether a seat can be taken.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+
+from . import sharding
+from .models import ArchivedBooking, Booking, Conference, GroupOrder
+from .routers import primary_db
+
+HOLDING_STATUSES = ('pending', 'confirmed')
+SEATS_CACHE_TIMEOUT = 60
+
+
+class SeatsUnavailable(Exception):
+    pass
+
+
+def seats_cache_key(conference_id):
+    return f'conference_seats:{conference_id}'
+
+
+def _adjust_cached_seats(conference_id, delta):
+    def adjust():
+        try:
+            if delta > 0:
+                cache.incr(seats_cache_key(conference_id), delta)
+            else:
+                cache.decr(seats_cache_key(conference_id), -delta)
+        except ValueError:
+            pass  # Not cached; the next read loads it from the database
+    transaction.on_commit(adjust)
+
+
+def reserve_seats(conference_id, seats=1):
+    """Take ``seats`` seats, or none at all. Returns True if they were taken."""
+    taken = bool(
+        Conference.objects.filter(pk=conference_id, seats_taken__lte=F('capacity') - seats)
+        .update(seats_taken=F('seats_taken') + seats)
+    )
+    if taken:
+        _adjust_cached_seats(conference_id, seats)
+    return taken
+
+
+def release_seats(conference_id, seats=1):
+    Conference.objects.filter(pk=conference_id).update(seats_taken=F('seats_taken') - seats)
+    _adjust_cached_seats(conference_id, -seats)
+
+
+def seats_taken(conference_id):
+    return Conference.objects.filter(pk=conference_id).values_list('seats_taken', flat=True).get()
+
+
+def cached_seats_taken(conference_id):
+    """``seats_taken`` for display, from the cache when possible."""
+    taken = cache.get(seats_cache_key(conference_id))
+    if taken is None:
+        with primary_db():
+            taken = seats_taken(conference_id)
+        cache.add(seats_cache_key(conference_id), taken, SEATS_CACHE_TIMEOUT)
+    return taken
+
+
+def recount_seats(conference_ids=None):
+    """Reset ``seats_taken`` from the bookings and group orders holding seats.
+
+    For repairs after rows were changed outside the booking views (admin
+    edits, raw SQL, restored backups). Bookings moved to the archive still
+    count. Returns the number of conferences whose count changed.
+    """
+    conferences = Conference.objects.all()
+    if conference_ids is not None:
+        conferences = conferences.filter(pk__in=conference_ids)
+    counts = dict.fromkeys(conferences.values_list('pk', flat=True), 0)
+
+    live = sharding.fan_out(
+        lambda alias: Booking.objects.using(alias).filter(conference_id__in=counts, status__in=HOLDING_STATUSES)
+        .values_list('conference_id').annotate(Count('pk'))
+    )
+    archived = (
+        ArchivedBooking.objects.filter(conference_id__in=counts, status__in=HOLDING_STATUSES)
+        .values_list('conference_id').annotate(Count('pk'))
+    )
+    for conference_id, seats in [*live, *archived]:
+        counts[conference_id] += seats
+    orders = GroupOrder.objects.filter(conference_id__in=counts, status__in=HOLDING_STATUSES)
+    for conference_id, seats in orders.values_list('conference_id', 'seats'):
+        counts[conference_id] += seats
+
+    changed = 0
+    for conference_id, seats in counts.items():
+        changed += Conference.objects.filter(pk=conference_id).exclude(seats_taken=seats).update(seats_taken=seats)
+    cache.delete_many([seats_cache_key(conference_id) for conference_id in counts])
+    return changed
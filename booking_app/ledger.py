@@ -0,0 +1,167 @@
+# booking_app/ledger.py
+"""Append-only ledger of each conference's seats and revenue.
+
+Every booking state change also writes a BookingEvent, in the same
+transaction as the change:
+
+* ``booked``: a booking or group order takes seats (``seats`` > 0).
+* ``paid``: its payment is captured (``amount`` > 0).
+* ``cancelled``: it gives its seats back (``seats`` < 0).
+* ``refunded``: a captured payment is owed back because what it paid for
+  was cancelled (``amount`` < 0).
+
+The seats held and net revenue at any moment are the sums of the events up
+to that moment. ``take_snapshots()``, run every few minutes by the
+snapshot_ledger command, stores those running totals for each conference
+that had events since the previous run. ``state_at()`` then starts from the
+nearest snapshot and only replays the events after it, instead of adding up
+a conference's whole history.
+
+Snapshots are cut LEDGER_SNAPSHOT_LAG_SECONDS (300 by default) behind the
+clock. An event is stamped when it is written but only becomes visible when
+its transaction commits. The lag gives every transaction that could still
+add an event before the cut time to finish.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, Max, OuterRef, Sum, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from . import sharding
+from .models import ArchivedPayment, BookingEvent, Conference, GroupOrder, LedgerSnapshot, Payment
+
+
+def snapshot_lag():
+    return timedelta(seconds=getattr(settings, 'LEDGER_SNAPSHOT_LAG_SECONDS', 300))
+
+
+def record(kind, target, seats=0, amount=0):
+    """Append a ``kind`` event for ``target``, a Booking or GroupOrder.
+
+    Call it inside the transaction that makes the change it records.
+    """
+    return BookingEvent.objects.create(
+        conference_id=target.conference_id,
+        kind=kind,
+        booking_id=getattr(target, 'booking_id', None),
+        order_id=getattr(target, 'order_id', None),
+        seats=seats,
+        amount=amount,
+        at=timezone.now(),
+    )
+
+
+def record_cancellation(target, seats):
+    """Record ``target`` giving back its ``seats``, and a refund of anything already paid for it."""
+    record('cancelled', target, seats=-seats)
+    paid = target.payments.filter(status='completed').aggregate(total=Sum('amount'))['total']
+    if paid:
+        record('refunded', target, amount=-paid)
+
+
+def latest_snapshots(conference_ids):
+    """The newest snapshot of each conference."""
+    snapshots = LedgerSnapshot.objects.filter(conference_id__in=conference_ids).annotate(
+        newest=Window(RowNumber(), partition_by=F('conference_id'), order_by=F('as_of').desc()),
+    ).filter(newest=1)
+    return {snapshot.conference_id: snapshot for snapshot in snapshots}
+
+
+@transaction.atomic
+def take_snapshots(until=None):
+    """Snapshot, as of ``until``, every conference with events since the last snapshot.
+
+    All snapshots are cut at the same times, so a conference without a
+    snapshot at the previous cut had no events since its own last one.
+    Returns the number of snapshots written.
+    """
+    until = until or timezone.now() - snapshot_lag()
+    last = LedgerSnapshot.objects.aggregate(last=Max('as_of'))['last']
+    if last is not None and until <= last:
+        return 0
+    events = BookingEvent.objects.filter(at__lte=until)
+    if last is not None:
+        events = events.filter(at__gt=last)
+    changes = {
+        row['conference_id']: row
+        for row in events.values('conference_id').annotate(seats=Sum('seats'), revenue=Sum('amount'))
+    }
+    previous = latest_snapshots(changes)
+    LedgerSnapshot.objects.bulk_create(
+        LedgerSnapshot(
+            conference_id=conference_id,
+            as_of=until,
+            seats=row['seats'] + (previous[conference_id].seats if conference_id in previous else 0),
+            revenue=row['revenue'] + (previous[conference_id].revenue if conference_id in previous else 0),
+        )
+        for conference_id, row in changes.items()
+    )
+    return len(changes)
+
+
+def state_at(conference_id, when):
+    """Return ``(seats held, net revenue)`` for a conference at ``when``."""
+    seats, revenue = 0, Decimal('0.00')
+    events = BookingEvent.objects.filter(conference_id=conference_id, at__lte=when)
+    snapshot = LedgerSnapshot.objects.filter(conference_id=conference_id, as_of__lte=when).order_by('-as_of').first()
+    if snapshot is not None:
+        seats, revenue = snapshot.seats, snapshot.revenue
+        events = events.filter(at__gt=snapshot.as_of)
+    totals = events.aggregate(seats=Sum('seats'), revenue=Sum('amount'))
+    return seats + (totals['seats'] or 0), revenue + (totals['revenue'] or 0)
+
+
+@transaction.atomic
+def open_ledger():
+    """Give each conference without a snapshot an opening one from the current tables.
+
+    For bookings made before the ledger existed. The current seats come
+    from the seat inventory and the current revenue is every captured
+    payment whose booking or group order is not cancelled, on every shard
+    and archived ones included. The snapshot is cut with the others (or now, if there are
+    none yet), less any of the conference's events after the cut.
+    Returns the number of snapshots written.
+    """
+    as_of = LedgerSnapshot.objects.aggregate(last=Max('as_of'))['last'] or timezone.now()
+    conferences = Conference.objects.filter(~Exists(LedgerSnapshot.objects.filter(conference=OuterRef('pk'))))
+    seats = dict(conferences.values_list('pk', 'seats_taken'))
+    revenue = defaultdict(Decimal)
+    # Group orders are on default and their payments on the shards, so they cannot be joined
+    orders = dict(
+        GroupOrder.objects.filter(conference_id__in=seats).exclude(status='cancelled').values_list('pk', 'conference_id')
+    )
+
+    def paid(alias):
+        completed = Payment.objects.using(alias).filter(status='completed')
+        booked = (
+            completed.filter(booking__conference_id__in=seats).exclude(booking__status='cancelled')
+            .values('booking__conference_id').annotate(total=Sum('amount'))
+            .values_list('booking__conference_id', 'total')
+        )
+        ordered = completed.filter(order_id__in=orders).values('order_id').annotate(total=Sum('amount'))
+        return [*booked, *((orders[order_id], total) for order_id, total in ordered.values_list('order_id', 'total'))]
+
+    archived = (
+        ArchivedPayment.objects.filter(status='completed', booking__conference_id__in=seats)
+        .exclude(booking__status='cancelled')
+        .values('booking__conference_id').annotate(total=Sum('amount'))
+        .values_list('booking__conference_id', 'total')
+    )
+    for conference_id, total in [*archived, *sharding.fan_out(paid)]:
+        revenue[conference_id] += total
+    later = BookingEvent.objects.filter(conference_id__in=seats, at__gt=as_of).values('conference_id').annotate(
+        seats=Sum('seats'), revenue=Sum('amount'),
+    )
+    for row in later:
+        seats[row['conference_id']] -= row['seats']
+        revenue[row['conference_id']] -= row['revenue']
+    LedgerSnapshot.objects.bulk_create(
+        LedgerSnapshot(conference_id=conference_id, as_of=as_of, seats=taken, revenue=revenue[conference_id])
+        for conference_id, taken in seats.items()
+    )
+    return len(seats)
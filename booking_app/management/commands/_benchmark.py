@@ -0,0 +1,95 @@
+# Shared helpers for the benchmark_* management commands.
+from contextlib import contextmanager
+from datetime import date, time, timedelta
+from decimal import Decimal
+from time import perf_counter
+
+from django.db import connection, transaction
+
+from booking_app.models import Booking, Conference, Payment, User
+
+PAYMENT_METHODS = ('credit_card', 'debit_card', 'paypal')
+
+
+@contextmanager
+def rolled_back(using=None):
+    """Run the block in a transaction that is always rolled back.
+
+    Benchmarks seed their own rows, so this keeps them from leaving data
+    behind in whatever database the command is pointed at.
+    """
+    with transaction.atomic(using=using):
+        yield
+        transaction.set_rollback(True, using=using)
+
+
+def timed(func, repeat=1):
+    """Call ``func`` ``repeat`` times and return the mean wall time in ms."""
+    start = perf_counter()
+    for _ in range(repeat):
+        func()
+    return (perf_counter() - start) * 1000 / repeat
+
+
+def seed_bookings(rows, conference_count=200, batch_size=10000):
+    """Bulk-insert users, conferences and ``rows`` bookings, each with one payment.
+
+    Prices, payment methods and statuses vary so grouped reports have
+    something to group: every 7th booking is cancelled and every 11th
+    payment is still pending. Returns the seeded conference ids.
+    """
+    user_count = max(rows // conference_count + 1, 1)
+    first_user = (User.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+    User.objects.bulk_create(
+        (User(pk=first_user + i, username=f'benchmark-user-{i}', password='!') for i in range(user_count)),
+        batch_size=5000,
+    )
+    prices = [Decimal(25 + (i * 37) % 400) + Decimal('0.99') for i in range(conference_count)]
+    Conference.objects.bulk_create(
+        Conference(
+            topic=f'Benchmark conference {i}',
+            slug=f'benchmark-conference-{i}',
+            description='Seeded by a benchmark command',
+            date=date.today() + timedelta(days=i % 365),
+            time_start=time(9),
+            time_end=time(17),
+            capacity=user_count + i % 50,
+            price=prices[i],
+        )
+        for i in range(conference_count)
+    )
+    conference_ids = list(
+        Conference.objects.filter(slug__startswith='benchmark-conference-')
+        .order_by('pk').values_list('pk', flat=True)
+    )
+
+    first_booking = (Booking.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+    for offset in range(0, rows, batch_size):
+        ids = range(first_booking + offset, first_booking + min(offset + batch_size, rows))
+        Booking.objects.bulk_create(
+            Booking(
+                pk=pk,
+                user_id=first_user + (pk - first_booking) % user_count,
+                conference_id=conference_ids[(pk - first_booking) // user_count],
+                status='cancelled' if pk % 7 == 0 else 'confirmed',
+                payment_status='pending' if pk % 11 == 0 else 'completed',
+            )
+            for pk in ids
+        )
+        Payment.objects.bulk_create(
+            Payment(
+                booking_id=pk,
+                amount=prices[(pk - first_booking) // user_count],
+                payment_method=PAYMENT_METHODS[pk % 3],
+                transaction_id=f'benchmark-{pk}',
+                status='pending' if pk % 11 == 0 else 'completed',
+            )
+            for pk in ids
+        )
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute('ANALYZE TABLE booking_app_booking, booking_app_payment')
+        else:
+            cursor.execute('ANALYZE')
+    return conference_ids
@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from booking_app.archiving import BATCH_SIZE, archivable_conferences, archive_conferences, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = "Move past conferences' bookings, payments and feedback to the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=date.fromisoformat,
+                            help='Archive conferences dated before this day (default: ARCHIVE_AFTER_DAYS ago).')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Bookings moved per transaction.')
+        parser.add_argument('--limit', type=int, help='Archive at most this many conferences.')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the conferences that are due.')
+
+    def handle(self, *args, **options):
+        before = options['before'] or archive_cutoff()
+        if options['dry_run']:
+            conferences = archivable_conferences(before)
+            for conference in conferences[:options['limit']] if options['limit'] else conferences:
+                self.stdout.write(f'{conference.date} {conference.topic}')
+            return
+
+        totals = archive_conferences(
+            before=before,
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+            progress=lambda conference, moved: self.stdout.write(
+                f'{conference.date} {conference.topic}: {moved["bookings"]} booking(s), '
+                f'{moved["payments"]} payment(s), {moved["feedback"]} feedback'
+            ),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {totals["conferences"]} conference(s) from before {before}: {totals["bookings"]} booking(s), '
+            f'{totals["payments"]} payment(s), {totals["feedback"]} feedback.'
+        ))
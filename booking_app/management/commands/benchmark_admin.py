@@ -0,0 +1,61 @@
+from django.contrib import admin
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from booking_app.models import Booking, Payment, User
+from ._benchmark import rolled_back, seed_bookings, timed
+
+# The changelist options BookingAdmin and PaymentAdmin used to have.
+BASELINES = {
+    Booking: {
+        'list_filter': ['status', 'payment_status', 'time'],
+        'search_fields': ['user__username', 'conference__topic'],
+    },
+    Payment: {
+        'list_filter': ['status', 'payment_method', 'payment_date'],
+        'search_fields': ['booking__user__username', 'booking__conference__topic', 'transaction_id'],
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'Seed Booking/Payment rows and time the admin changelists before and after tuning.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Bookings (and payments) to seed.')
+        parser.add_argument('--conferences', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.stdout.write(f"Seeding {options['rows']:,} bookings and payments...")
+            seed_bookings(options['rows'], options['conferences'])
+            superuser = User.objects.create_superuser('benchmark-admin', 'admin@example.com', 'benchmark')
+            for model in (Booking, Payment):
+                self.compare(superuser, model, options['repeat'])
+
+    def compare(self, superuser, model, repeat):
+        tuned = admin.site._registry[model]
+        baseline = type('BaselineAdmin', (admin.ModelAdmin,), {
+            'list_display': tuned.list_display,
+            **BASELINES[model],
+        })(model, admin.site)
+        searches = {Booking: 'benchmark-user-7', Payment: 'benchmark-7'}
+        factory = RequestFactory()
+
+        def render_changelist(model_admin, params):
+            request = factory.get('/', params)
+            request.user = superuser
+            model_admin.changelist_view(request).render()
+
+        for label, model_admin in (('baseline', baseline), ('tuned', tuned)):
+            for page, params in (('changelist', {}), ('search', {'q': searches[model]})):
+                render_changelist(model_admin, params)
+                with CaptureQueriesContext(connection) as queries:
+                    ms = timed(lambda: render_changelist(model_admin, params), repeat)
+                self.stdout.write(
+                    f'{model.__name__:<8} {page:<10} {label:<9} {ms:9.1f} ms  '
+                    f'{len(queries) // repeat:4d} queries'
+                )
@@ -0,0 +1,114 @@
+import logging
+import uuid
+from datetime import date, time
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from booking_app import admission
+from booking_app.models import Conference, User
+from ._benchmark import rolled_back
+
+BURST_SETTINGS = {
+    **admission.DEFAULTS,
+    'RATES': {
+        'login': {'ip': '20/m'},
+        'book_conference': {'user': '10/m', 'ip': '60/m'},
+    },
+    'QUEUED_ROUTES': ['book_conference'],
+    'CONCURRENCY': 20,
+}
+
+
+class Command(BaseCommand):
+    help = 'Send a synthetic burst through the admission control layer and check what it lets in.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per burst.')
+        parser.add_argument('--waiting', type=int, default=30, help='Users queued for a full conference.')
+
+    def handle(self, *args, **options):
+        # A fresh address per run, so buckets left over from an earlier run don't count
+        ip = f'10.{uuid.uuid4().int % 250}.{uuid.uuid4().int % 250}.{uuid.uuid4().int % 250}'
+        with override_settings(ALLOWED_HOSTS=['testserver'], ADMISSION_CONTROL=BURST_SETTINGS), rolled_back():
+            conference = Conference.objects.create(
+                topic='Benchmark admission', slug=f'benchmark-admission-{uuid.uuid4().hex[:8]}',
+                description='Seeded by a benchmark command', date=date.today(),
+                time_start=time(9), time_end=time(17), capacity=500, price=250,
+            )
+            user = User.objects.create(username=f'benchmark-admission-{uuid.uuid4().hex[:8]}', password='!')
+
+            booker = Client(REMOTE_ADDR=ip)
+            booker.force_login(user)
+            self.burst('book_conference, one user', booker, reverse('book_conference', args=[conference.slug]),
+                       options['requests'], expected=10)
+            self.burst('login, one IP', Client(REMOTE_ADDR=ip), reverse('login'),
+                       options['requests'], expected=20)
+
+        self.queue_order(options['waiting'])
+
+    def burst(self, label, client, url, count, expected):
+        # Django logs a warning for every 429; a burst of them would bury the results
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        admission.reset_stats()
+        admitted, rejected = [], []
+        for _ in range(count):
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                started = perf_counter()
+                response = client.get(url)
+                elapsed = (perf_counter() - started) * 1000
+            (rejected if response.status_code == 429 else admitted).append((elapsed, len(queries)))
+
+        if len(admitted) != expected:
+            raise CommandError(f'{label}: expected {expected} requests through, got {len(admitted)}.')
+        if any(query_count for _, query_count in rejected):
+            raise CommandError(f'{label}: a rejected request ran database queries.')
+
+        stats = admission.stats()
+        self.stdout.write(
+            f'{label:<28} {len(admitted):4d} admitted  {len(rejected):4d} rejected  '
+            f'{mean(admitted):6.2f} ms/admitted  {mean(rejected):6.2f} ms/rejected (0 queries)  '
+            f'overhead {stats["mean_us"]:.0f} µs mean, {stats["max_us"]:.0f} µs max'
+        )
+
+    def queue_order(self, waiting):
+        """Fill a conference's slots, queue ``waiting`` users and check they get in in arrival order."""
+        slug = f'benchmark-queue-{uuid.uuid4().hex[:8]}'
+        concurrency = BURST_SETTINGS['CONCURRENCY']
+        leases = [admission.enter(slug, None, concurrency)[0] for _ in range(concurrency)]
+
+        tickets = []
+        for _ in range(waiting):
+            lease, ticket, _ = admission.enter(slug, None, concurrency)
+            if lease:
+                raise CommandError('A user got in while every slot was taken.')
+            tickets.append(ticket)
+
+        # The last user retries constantly; it must not get ahead of anyone
+        order = []
+        pending = list(tickets)
+        while pending:
+            admission.leave(leases.pop(0))
+            for ticket in [pending[-1]] * 10 + pending:
+                lease = admission.enter(slug, ticket, concurrency)[0] if ticket in pending else None
+                if lease:
+                    leases.append(lease)
+                    pending.remove(ticket)
+                    order.append(ticket)
+                    break
+
+        if order != tickets:
+            raise CommandError(f'Queue admitted users out of order: {order}')
+        self.stdout.write(
+            f'{"queue, full conference":<28} {waiting:4d} users waited for {concurrency} slots '
+            f'and got in in arrival order, despite one retrying 10x as often'
+        )
+
+
+def mean(samples):
+    return sum(elapsed for elapsed, _ in samples) / len(samples) if samples else 0.0
@@ -0,0 +1,115 @@
+from datetime import date, timedelta
+from time import perf_counter
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from booking_app import analytics, archiving
+from booking_app.inventory import HOLDING_STATUSES
+from booking_app.models import ArchivedBooking, Booking, Conference, DailyConferenceStats, Feedback, Payment, User
+from booking_app.reporting import build_report
+from ._benchmark import rolled_back, seed_bookings, timed
+
+
+def rollups(day):
+    """The rebuilt rollup rows for ``day``, comparable across runs."""
+    analytics.rebuild_day(day)
+    return sorted(DailyConferenceStats.objects.filter(day=day).values_list(
+        'conference_id', 'bookings', 'cancellations', 'revenue', 'ratings_count', 'ratings_sum',
+    ))
+
+
+class Command(BaseCommand):
+    help = 'Hot-path timings before and after archiving past conferences, and archiving throughput.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help='Bookings (and payments) to seed.')
+        parser.add_argument('--conferences', type=int, default=200)
+        parser.add_argument('--past', type=float, default=0.8, help='Share of conferences that ended years ago.')
+        parser.add_argument('--batch-size', type=int, default=archiving.BATCH_SIZE)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        with override_settings(ALLOWED_HOSTS=['testserver']), rolled_back():
+            self.stdout.write(f"Seeding {options['rows']:,} bookings and payments...")
+            conference_ids = seed_bookings(options['rows'], options['conferences'])
+            past_ids = conference_ids[:int(len(conference_ids) * options['past'])]
+            long_ago = date.today() - timedelta(days=3 * 365)
+            for i, conference_id in enumerate(past_ids):
+                Conference.objects.filter(pk=conference_id).update(date=long_ago + timedelta(days=i))
+            # Payments of conferences that ended long ago have settled one way or the other
+            Payment.objects.filter(booking__conference_id__in=past_ids, status='pending').update(status='failed')
+            Feedback.objects.bulk_create(
+                (
+                    Feedback(user_id=user_id, conference_id=conference_id, comments='Benchmark', rating=1 + pk % 5)
+                    for pk, user_id, conference_id in Booking.objects.filter(conference_id__in=past_ids)
+                    .values_list('pk', 'user_id', 'conference_id')
+                    if pk % 3 == 0
+                ),
+                batch_size=5000,
+            )
+            user = User.objects.get(pk=Booking.objects.filter(conference_id=conference_ids[-1]).values('user_id')[:1])
+            superuser = User.objects.create_superuser('benchmark-archive-admin', 'admin@example.com', 'benchmark')
+            client = Client()
+            client.force_login(user)
+            booking_id = Booking.objects.filter(
+                user=user, conference_id__in=past_ids, payment_status='completed',
+            ).values_list('pk', flat=True).first()
+
+            report = build_report()
+            today, feedback_day = timezone.localdate(), long_ago + timedelta(days=1)
+            days = {day: rollups(day) for day in (today, feedback_day)}
+            self.stdout.write(f'{"hot path":<36} {"before ms":>10} {"after ms":>10}')
+            measures = [
+                ('Booking changelist, cancelled', lambda: self.changelist(superuser, Booking, {'status': 'cancelled'})),
+                ('Payment changelist, failed', lambda: self.changelist(superuser, Payment, {'status': 'failed'})),
+                ('seats held per conference', lambda: list(
+                    Booking.objects.filter(status__in=HOLDING_STATUSES).values('conference_id').annotate(Count('pk'))
+                )),
+                ('My Bookings page', lambda: client.get(reverse('my_bookings'))),
+                ('finance report', build_report),
+            ]
+            before = [timed(lambda: (reset_queries(), measure()), repeat) for _, measure in measures]
+            hot_before = Booking.objects.count(), Payment.objects.count(), Feedback.objects.count()
+
+            started = perf_counter()
+            totals = archiving.archive_conferences(before=date.today(), batch_size=options['batch_size'])
+            seconds = perf_counter() - started
+
+            after = [timed(lambda: (reset_queries(), measure()), repeat) for _, measure in measures]
+            for (label, _), ms_before, ms_after in zip(measures, before, after):
+                self.stdout.write(f'{label:<36} {ms_before:10.1f} {ms_after:10.1f}')
+
+            hot_after = Booking.objects.count(), Payment.objects.count(), Feedback.objects.count()
+            self.stdout.write(
+                f'\nLive rows (bookings, payments, feedback): {hot_before} -> {hot_after}'
+                f'\nArchived {totals["conferences"]} conferences, {totals["bookings"]:,} bookings, '
+                f'{totals["payments"]:,} payments and {totals["feedback"]:,} feedback in {seconds:.1f} s '
+                f'({totals["bookings"] / seconds:,.0f} bookings/s, batches of {options["batch_size"]})'
+            )
+
+            if build_report() != report:
+                raise CommandError('The finance report changed after archiving.')
+            if any(rollups(day) != rows for day, rows in days.items()):
+                raise CommandError('Rebuilt rollups changed after archiving.')
+            if not ArchivedBooking.objects.filter(pk=booking_id).exists():
+                raise CommandError('The sample booking was not archived.')
+            with CaptureQueriesContext(connection) as queries:
+                receipt = client.get(reverse('receipt', args=[booking_id]))
+            if receipt.status_code != 200:
+                raise CommandError(f'The archived receipt returned {receipt.status_code}.')
+            self.stdout.write(
+                f'Finance report and rebuilt rollups unchanged; archived receipt served in {len(queries)} queries.'
+            )
+
+    def changelist(self, superuser, model, params):
+        request = RequestFactory().get('/', params)
+        request.user = superuser
+        admin.site._registry[model].changelist_view(request).render()
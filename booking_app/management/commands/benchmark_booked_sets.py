@@ -0,0 +1,63 @@
+from datetime import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+from booking_app.models import Booking, Conference, User
+from booking_app.user_bookings import active_conference_ids, booked_set_key
+from ._benchmark import rolled_back, timed
+
+
+class Command(BaseCommand):
+    help = 'Compare per-conference exists() queries with the cached per-user booked set.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conferences', type=int, default=50, help='Cards on the listing page.')
+        parser.add_argument('--booked', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        with rolled_back():
+            user = User.objects.create(username='benchmark-booked-user', password='!')
+            conferences = [
+                Conference.objects.create(
+                    topic=f'Benchmark listing {i}', description='Seeded by a benchmark command',
+                    time_start=time(9), time_end=time(10), capacity=10,
+                )
+                for i in range(options['conferences'])
+            ]
+            Booking.objects.bulk_create(
+                Booking(user=user, conference=conference, status='confirmed')
+                for conference in conferences[:options['booked']]
+            )
+
+            def per_card_queries():
+                return [Booking.objects.filter(user=user, conference=c).exists() for c in conferences]
+
+            def cold_set():
+                cache.delete(booked_set_key(user.pk))
+                booked = active_conference_ids(user.pk)
+                return [c.conference_id in booked for c in conferences]
+
+            def warm_set():
+                booked = active_conference_ids(user.pk)
+                return [c.conference_id in booked for c in conferences]
+
+            expected = per_card_queries()
+            for label, func in (
+                ('exists() per card', per_card_queries),
+                ('booked set, cold', cold_set),
+                ('booked set, warm', warm_set),
+            ):
+                with CaptureQueriesContext(connection) as queries:
+                    if func() != expected:
+                        raise CommandError(f'{label} disagrees with the database.')
+                query_count = len(queries)
+                # Keep the DEBUG query log from filling up between pages
+                ms = timed(lambda: (reset_queries(), func()), repeat)
+                self.stdout.write(
+                    f'{label:<20} {query_count:4d} queries/page  {ms * 1000:9.1f} µs/page'
+                )
@@ -0,0 +1,119 @@
+from datetime import date, time, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from booking_app import calendar_feeds
+from booking_app.models import Booking, Conference, User
+from ._benchmark import rolled_back, timed
+
+
+class CountingCache:
+    """Wraps the cache to count calls; each call is one round trip to a shared cache."""
+
+    def __init__(self, wrapped):
+        self.wrapped = wrapped
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attribute = getattr(self.wrapped, name)
+        if not callable(attribute):
+            return attribute
+
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return attribute(*args, **kwargs)
+        return counted
+
+
+def retire(*keys):
+    """Move the stamps on, as a committed change would, so the next fetch rebuilds the feed."""
+    for key in keys:
+        cache.set(key, calendar_feeds._stamp(), None)
+
+
+class Command(BaseCommand):
+    help = 'Measure calendar feed polls: streamed rebuild vs cached body vs conditional 304.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conferences', type=int, default=2000)
+        parser.add_argument('--bookings', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        with override_settings(ALLOWED_HOSTS=['testserver']), rolled_back():
+            Conference.objects.bulk_create(
+                Conference(
+                    topic=f'Benchmark calendar {i}', slug=f'benchmark-calendar-{i}',
+                    description='Seeded by a benchmark command; with commas, semicolons and a long enough '
+                                'description to need folding across several lines',
+                    date=date.today() + timedelta(days=i % 365), time_start=time(9), time_end=time(17), capacity=50,
+                )
+                for i in range(options['conferences'])
+            )
+            user = User.objects.create(username='benchmark-calendar-user', password='!')
+            conferences = Conference.objects.filter(slug__startswith='benchmark-calendar-')
+            Booking.objects.bulk_create(
+                Booking(user=user, conference=conference, status='confirmed')
+                for conference in conferences[:options['bookings']]
+            )
+            client = Client()
+
+            self.stdout.write(f'{"feed":<12} {"request":<20} {"status":>6} {"queries":>7} {"cache calls":>11} '
+                              f'{"ms":>8} {"KB":>7}')
+            for feed, url, keys, events in (
+                ('catalogue', reverse('conference_calendar'),
+                 [calendar_feeds.CATALOGUE_VERSION_KEY], Conference.objects.filter(date__isnull=False).count()),
+                ('bookings', reverse('booking_calendar', args=[calendar_feeds.feed_token(user)]),
+                 [calendar_feeds.user_version_key(user.pk), calendar_feeds.CATALOGUE_VERSION_KEY],
+                 options['bookings']),
+            ):
+                retire(*keys)
+                body = self.check_feed(client.get(url), events)
+                for label, prepare, headers in (
+                    ('rebuilt and streamed', lambda: retire(*keys), lambda: {}),
+                    ('cached body', None, lambda: {}),
+                    ('unchanged (304)', None, lambda: {'HTTP_IF_NONE_MATCH': client.get(url)['ETag']}),
+                ):
+                    self.measure(client, feed, url, label, prepare, headers(), repeat)
+                if feed == 'catalogue':
+                    self.stdout.write(f'{"":<12} feed holds {events:,d} events, {len(body) / 1024:.0f} KB')
+
+    def check_feed(self, response, events):
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        lines = body.split(b'\r\n')
+        if lines[0] != b'BEGIN:VCALENDAR' or body.count(b'BEGIN:VEVENT') != events:
+            raise CommandError(f'Expected a calendar with {events} events.')
+        if any(len(line) > 75 for line in lines):
+            raise CommandError('The feed has unfolded lines longer than 75 octets.')
+        if 'Cookie' in response.get('Vary', ''):
+            raise CommandError('The feed touched the session.')
+        return body
+
+    def measure(self, client, feed, url, label, prepare, headers, repeat):
+        def fetch():
+            if prepare:
+                prepare()
+            response = client.get(url, **headers)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            return response, body
+
+        counting = CountingCache(calendar_feeds.cache)
+        calendar_feeds.cache = counting
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                response, body = fetch()
+            query_count = len(queries)
+            calls = counting.calls
+            ms = timed(lambda: (reset_queries(), fetch()), repeat)
+        finally:
+            calendar_feeds.cache = counting.wrapped
+        self.stdout.write(
+            f'{feed:<12} {label:<20} {response.status_code:6d} {query_count:7d} {calls:11d} '
+            f'{ms:8.2f} {len(body) / 1024:7.1f}'
+        )
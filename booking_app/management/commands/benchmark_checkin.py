@@ -0,0 +1,102 @@
+import json
+import random
+import uuid
+from collections import Counter
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from booking_app import tickets
+from booking_app.models import Booking, CheckIn
+from ._benchmark import rolled_back, seed_bookings, timed
+
+
+def lookup_scan(conference_id, booking_id, scanned_at):
+    """Check-in without signed tickets: one Booking read and one write per scan."""
+    status = Booking.objects.filter(pk=booking_id, conference_id=conference_id).values_list('status', flat=True).first()
+    if status != 'confirmed':
+        return 'revoked' if status else 'invalid'
+    _, created = CheckIn.objects.get_or_create(
+        conference_id=conference_id, code=f'b{booking_id}', defaults={'scanned_at': scanned_at, 'batch': uuid.uuid4()},
+    )
+    return 'admitted' if created else 'duplicate'
+
+
+class Command(BaseCommand):
+    help = 'Door check-in: offline ticket verification, and scans per second per lookup vs in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attendees', type=int, default=5000)
+        parser.add_argument('--rescans', type=float, default=0.1, help='Share of tickets scanned a second time.')
+        parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 50, 200, 1000])
+        parser.add_argument('--rtt-ms', type=float, default=150, help='Round trip over the venue link.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(5)
+        with override_settings(ALLOWED_HOSTS=['testserver']), rolled_back():
+            conference_id = seed_bookings(options['attendees'], 1)[0]
+            bookings = list(Booking.objects.filter(conference_id=conference_id).values_list('pk', 'status'))
+            # Cancelled bookings had their tickets issued and then revoked
+            cancelled = [pk for pk, status in bookings if status == 'cancelled']
+            tickets.revoke(conference_id, [f'b{pk}' for pk in cancelled])
+            scans = [tickets.ticket_token(conference_id, f'b{pk}') for pk, _ in bookings]
+            scans += rng.sample(scans, int(len(scans) * options['rescans']))
+            rng.shuffle(scans)
+            revoked = {tickets.ticket_token(conference_id, f'b{pk}') for pk in cancelled}
+            expected = Counter(admitted=len(bookings) - len(cancelled), revoked=sum(token in revoked for token in scans))
+            expected['duplicate'] = len(scans) - sum(expected.values())
+
+            key = tickets.conference_key(conference_id)
+            us = timed(lambda: [tickets.read_token(token, key) for token in scans]) * 1000 / len(scans)
+            self.stdout.write(f'Offline verification on a scanner: {us:.1f} µs per ticket, no round trip')
+            self.stdout.write(f'Link time is round trips x {options["rtt_ms"]:.0f} ms, for one scanner sending all scans.\n')
+
+            self.stdout.write(
+                f'{"check-in":<30} {"scans/s":>9} {"queries/scan":>13} {"round trips":>12} '
+                f'{"link s":>9}'
+            )
+            now = timezone.now()
+            parsed = [tickets.read_token(token, key) for token in scans]
+            self.report('Booking lookup per scan', options, len(scans), len(scans), lambda: Counter(
+                lookup_scan(conference_id, int(code[1:]), now) for _, code in parsed
+            ), expected, conference_id)
+
+            client = Client()
+            url = reverse('check_in', args=[conference_id])
+            headers = {'HTTP_X_SCANNER_KEY': tickets.scanner_key(conference_id)}
+            for size in options['batch_sizes']:
+                bodies = [
+                    json.dumps({'device': 'benchmark', 'scans': [{'token': token} for token in scans[i:i + size]]})
+                    for i in range(0, len(scans), size)
+                ]
+
+                def post_all():
+                    results = Counter()
+                    for body in bodies:
+                        results.update(client.post(url, body, content_type='application/json', **headers).json()['results'])
+                    return results
+                self.report(f'endpoint, {size} per batch', options, len(scans), len(bodies), post_all, expected, conference_id)
+
+    def report(self, label, options, scan_count, round_trips, run, expected, conference_id):
+        CheckIn.objects.filter(conference_id=conference_id).delete()
+        tickets._admitted.clear()
+        queries = 0
+
+        def count(execute, *args):
+            nonlocal queries
+            queries += 1
+            return execute(*args)
+        with connection.execute_wrapper(count):
+            started = perf_counter()
+            results = run()
+            seconds = perf_counter() - started
+        if results != expected:
+            raise CommandError(f'{label}: got {dict(results)}, expected {dict(expected)}.')
+        link = round_trips * options['rtt_ms'] / 1000
+        self.stdout.write(
+            f'{label:<30} {scan_count / seconds:9,.0f} {queries / scan_count:13.2f} {round_trips:12,d} {link:9,.1f}'
+        )
@@ -0,0 +1,110 @@
+import threading
+from datetime import date, time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from booking_app import snapshots
+from booking_app.inventory import seats_cache_key
+from booking_app.models import Booking, Conference, ConferenceCategory, ConferenceHasSpeaker, Speaker, User
+from booking_app.user_bookings import booked_set_key
+from ._benchmark import rolled_back, timed
+
+
+def seed_conference(slug):
+    conference = Conference.objects.create(
+        topic='Benchmark flash sale', slug=slug, description='Seeded by a benchmark command',
+        date=date.today(), time_start=time(9), time_end=time(17), capacity=500, price=250,
+    )
+    for i in range(4):
+        speaker, _ = Speaker.objects.get_or_create(
+            speaker_id=f'benchmark-speaker-{i}',
+            defaults={'first_name': 'Speaker', 'last_name': str(i), 'expertise': 'Benchmarks'},
+        )
+        ConferenceHasSpeaker.objects.create(conference=conference, speaker=speaker)
+    ConferenceCategory.objects.bulk_create(
+        ConferenceCategory(conference=conference, category=name) for name in ('Web', 'Data', 'Ops')
+    )
+    return conference
+
+
+class Command(BaseCommand):
+    help = 'Measure the conference detail page with cold and warm snapshots, and concurrent cold misses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=50)
+
+    def handle(self, *args, **options):
+        repeat = options['requests']
+        with override_settings(ALLOWED_HOSTS=['testserver']), rolled_back():
+            conference = seed_conference('benchmark-flash-sale')
+            user = User.objects.create(username='benchmark-detail-user', password='!')
+            others = [
+                Conference.objects.create(
+                    topic=f'Benchmark other {i}', description='Seeded by a benchmark command',
+                    time_start=time(9), time_end=time(10), capacity=10,
+                )
+                for i in range(20)
+            ]
+            Booking.objects.bulk_create(Booking(user=user, conference=other, status='confirmed') for other in others)
+
+            client = Client()
+            client.force_login(user)
+            url = reverse('conference_detail', args=[conference.slug])
+            client.get(url)
+
+            def cold():
+                cache.delete_many([
+                    snapshots.snapshot_key(conference.slug),
+                    seats_cache_key(conference.pk),
+                    booked_set_key(user.pk),
+                ])
+                client.get(url)
+
+            for label, func in (('cold (rebuild every request)', cold), ('warm snapshot', lambda: client.get(url))):
+                with CaptureQueriesContext(connection) as queries:
+                    ms = timed(func, repeat)
+                self.stdout.write(f'{label:<30} {len(queries) / repeat:5.2f} queries/request  {ms:7.2f} ms/request')
+
+        self.stdout.write(self.style.SUCCESS(self.concurrent_misses(options['threads'])))
+
+    def concurrent_misses(self, thread_count):
+        # Other threads cannot see rows in the rolled-back transaction, so
+        # this part commits one conference and deletes it afterwards
+        conference = seed_conference('benchmark-flash-sale-concurrent')
+        try:
+            cache.delete(snapshots.snapshot_key(conference.slug))
+            builds_before = snapshots.stats['builds']
+            barrier = threading.Barrier(thread_count)
+            results = []
+
+            def visitor():
+                barrier.wait()
+                try:
+                    results.append(snapshots.get_snapshot(conference.slug))
+                finally:
+                    connections.close_all()
+
+            threads = [threading.Thread(target=visitor) for _ in range(thread_count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            builds = snapshots.stats['builds'] - builds_before
+        finally:
+            speakers = list(Speaker.objects.filter(speaker_id__startswith='benchmark-speaker-'))
+            conference.delete()
+            for speaker in speakers:
+                if not speaker.conferencehasspeaker_set.exists():
+                    speaker.delete()
+
+        if len(results) != thread_count or any(result is None for result in results):
+            raise CommandError('Some concurrent requests got no snapshot.')
+        if builds != 1:
+            raise CommandError(f'{thread_count} concurrent misses caused {builds} rebuilds.')
+        return f'{thread_count} concurrent requests on a cold snapshot caused 1 rebuild.'
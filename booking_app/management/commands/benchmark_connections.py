@@ -0,0 +1,82 @@
+import threading
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from conference_system.db_pool import PooledDatabaseWrapperMixin, get_pool
+
+
+def request_cycle(conn):
+    """Mimic what Django does to a connection around a single request."""
+    conn.close_if_unusable_or_obsolete()  # request_started
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    conn.close_if_unusable_or_obsolete()  # request_finished
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request connection overhead with and without persistent or pooled connections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per thread.')
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--pool-size', type=int, default=2)
+
+    def handle(self, *args, **options):
+        base = connections[options['database']]
+        backend = base.__class__
+        pooled = type('PooledDatabaseWrapper', (PooledDatabaseWrapperMixin, backend), {})
+
+        modes = [
+            ('new connection per request', backend, {'CONN_MAX_AGE': 0}),
+            ('persistent (CONN_MAX_AGE)', backend, {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True}),
+            ('pooled', pooled, {'CONN_MAX_AGE': 0, 'POOL': {'SIZE': options['pool_size'], 'TIMEOUT': 30}}),
+        ]
+        for label, wrapper_class, overrides in modes:
+            alias = f'benchmark-{label}'
+            settings_dict = {**base.settings_dict, **overrides}
+            ms, connects = self.run_mode(wrapper_class, settings_dict, alias, options)
+            if wrapper_class is not pooled:
+                self.stdout.write(f'{label:<28} {ms:7.3f} ms/request  {connects:5d} connections opened')
+            else:
+                # connection_created fires on every checkout, so count real connections from the pool
+                pool = get_pool(alias, settings_dict)
+                stats = pool.stats()
+                self.stdout.write(f"{label:<28} {ms:7.3f} ms/request  {stats['created']:5d} connections opened")
+                self.stdout.write(
+                    f"{'':<28} pool size={stats['size']} created={stats['created']} "
+                    f"checkouts={stats['checkouts']} timeouts={stats['timeouts']} "
+                    f"wait avg={stats['wait_ms_avg']:.3f} ms max={stats['wait_ms_max']:.3f} ms"
+                )
+                pool.close_all()
+
+    def run_mode(self, wrapper_class, settings_dict, alias, options):
+        connects = []
+
+        def count_connect(sender, connection, **kwargs):
+            if connection.alias == alias:
+                connects.append(1)
+
+        def worker():
+            conn = wrapper_class(settings_dict, alias)
+            for _ in range(options['requests']):
+                request_cycle(conn)
+            conn.close()
+
+        connection_created.connect(count_connect)
+        try:
+            threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+            start = perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = perf_counter() - start
+        finally:
+            connection_created.disconnect(count_connect)
+
+        total = options['requests'] * options['threads']
+        return elapsed * 1000 / total, len(connects)
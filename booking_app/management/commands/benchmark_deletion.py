@@ -0,0 +1,85 @@
+import tracemalloc
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from booking_app import deletion
+from booking_app.models import Booking, Conference, ConferenceDeletion, Payment
+from ._benchmark import rolled_back, seed_bookings
+
+
+def left(conference_id):
+    return (
+        Booking.objects.filter(conference_id=conference_id).count()
+        + Payment.objects.filter(booking__conference_id=conference_id).count()
+        + Conference.objects.filter(pk=conference_id).count()
+    )
+
+
+class Command(BaseCommand):
+    help = "Deleting a conference with Django's cascade vs the batched deletion service: time, longest transaction, memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20_000, help='Bookings (and payments) per conference.')
+        parser.add_argument('--batch-size', type=int, default=deletion.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        with rolled_back(), override_settings(CONFERENCE_DELETION_PAUSE=0):
+            cascaded, batched = seed_bookings(options['rows'] * 2, conference_count=2)
+            rows = {pk: Booking.objects.filter(conference_id=pk).count() for pk in (cascaded, batched)}
+            self.stdout.write(f'Two conferences with {rows[cascaded]:,} and {rows[batched]:,} bookings, one payment each\n')
+            self.stdout.write(f'{"":<30} {"total s":>8} {"longest transaction ms":>23} {"peak MB":>8} {"queries":>8}')
+
+            def cascade():
+                Conference.objects.get(pk=cascaded).delete()
+
+            seconds, peak, queries = self.measure(cascade)
+            self.stdout.write(f'{"Conference.delete()":<30} {seconds:8.2f} {seconds * 1000:23,.0f} {peak:8.1f} {queries:8,}')
+
+            gaps = []
+
+            def service():
+                deletion.queue_deletion(Conference.objects.filter(pk=batched))
+                last = perf_counter()
+
+                def progress(_):
+                    nonlocal last
+                    now = perf_counter()
+                    gaps.append(now - last)
+                    last = now
+
+                deletion.delete_conference(ConferenceDeletion.objects.get(conference_id=batched), options['batch_size'], progress)
+
+            seconds, peak, queries = self.measure(service)
+            self.stdout.write(
+                f'{"batched, " + format(options["batch_size"], ",") + " per batch":<30} {seconds:8.2f} '
+                f'{max(gaps) * 1000:23,.0f} {peak:8.1f} {queries:8,}'
+            )
+            if left(cascaded) or left(batched):
+                raise CommandError('A deletion left rows behind.')
+            self.stdout.write(
+                '\nThe cascade holds its locks for the whole delete; the batched deletion releases them after every '
+                'batch.\nLongest transaction for the batched run is the longest time between two batches. '
+                'Times include tracemalloc\'s overhead.'
+            )
+
+    def measure(self, func):
+        """``(seconds, peak MB allocated, queries)`` for one call of ``func``."""
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        tracemalloc.start()
+        started = perf_counter()
+        try:
+            with connection.execute_wrapper(count):
+                func()
+            seconds = perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+        return seconds, peak, len(queries)
@@ -0,0 +1,81 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+
+from booking_app.group_orders import place_group_order
+from booking_app.inventory import SeatsUnavailable, reserve_seats, seats_taken
+from booking_app.models import Conference, GroupOrder, Payment, Ticket, User
+from ._benchmark import rolled_back, timed
+
+
+def per_seat_order(user, conference, attendees, payment_method):
+    """The naive version: one capacity check and one INSERT per seat."""
+    with transaction.atomic():
+        order = GroupOrder.objects.create(user=user, conference=conference, seats=len(attendees))
+        for name, email in attendees:
+            if not reserve_seats(conference.pk):
+                raise SeatsUnavailable
+            Ticket.objects.create(order=order, attendee_name=name, attendee_email=email)
+        Payment.objects.create(
+            order=order, amount=conference.price * len(attendees), payment_method=payment_method,
+            transaction_id=f'benchmark-order-{order.pk}', status='completed',
+        )
+        order.status = 'confirmed'
+        order.payment_status = 'completed'
+        order.save(update_fields=['status', 'payment_status'])
+    return order
+
+
+class Command(BaseCommand):
+    help = 'Time group orders of 1, 10, 100 and 1,000 seats against a per-seat loop.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes, repeat = options['sizes'], options['repeat']
+        with rolled_back():
+            user = User.objects.create(username='benchmark-group-buyer', password='!')
+            conference = Conference.objects.create(
+                topic='Benchmark group conference',
+                slug='benchmark-group-conference',
+                description='Seeded by a benchmark command',
+                date=date.today(),
+                time_start=time(9),
+                time_end=time(17),
+                capacity=max(sizes) * (repeat + 1) * 2,
+                price=Decimal('99.00'),
+            )
+
+            self.stdout.write(f"{'seats':>6} {'bulk ms':>10} {'queries':>8} {'per-seat ms':>12} {'queries':>8}")
+            for size in sizes:
+                attendees = [(f'Attendee {i}', f'attendee{i}@example.com') for i in range(size)]
+                row = [f'{size:>6}']
+                for func in (place_group_order, per_seat_order):
+                    # Each order is rolled back so every size starts from the same state
+                    def run():
+                        # Keep the DEBUG query log from filling up on the large sizes
+                        reset_queries()
+                        with rolled_back():
+                            func(user, conference, attendees, 'credit_card')
+                    ms = timed(run, repeat)
+                    with CaptureQueriesContext(connection) as queries:
+                        with rolled_back():
+                            func(user, conference, attendees, 'credit_card')
+                    row.append(f'{ms:10.1f} {len(queries):8d}')
+                self.stdout.write(' '.join(row))
+
+            # An order that does not fit must leave nothing behind
+            conference.capacity = 5
+            conference.save(update_fields=['capacity'])
+            try:
+                place_group_order(user, conference, [('Too many', f'x{i}@example.com') for i in range(6)], 'paypal')
+            except SeatsUnavailable:
+                pass
+            if seats_taken(conference.pk) or GroupOrder.objects.filter(conference=conference).exists():
+                raise CommandError('An oversized group order left seats or rows behind.')
+        self.stdout.write(self.style.SUCCESS('Oversized orders are rejected without side effects.'))
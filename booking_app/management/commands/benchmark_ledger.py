@@ -0,0 +1,117 @@
+import random
+from datetime import time, timedelta
+from decimal import Decimal
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from booking_app import ledger
+from booking_app.models import Booking, BookingEvent, Conference, LedgerSnapshot, User
+from ._benchmark import rolled_back, timed
+
+KINDS = (('booked', 1, 0), ('paid', 0, 1), ('cancelled', -1, 0), ('refunded', 0, -1))
+
+
+def full_replay(conference_id, when):
+    """What a point-in-time query costs without snapshots: every event up to ``when``."""
+    totals = BookingEvent.objects.filter(conference_id=conference_id, at__lte=when).aggregate(
+        seats=Sum('seats'), revenue=Sum('amount'),
+    )
+    return totals['seats'] or 0, totals['revenue'] or Decimal('0.00')
+
+
+class Command(BaseCommand):
+    help = 'Booking ledger event ingest throughput, snapshot cost, and point-in-time queries with vs without snapshots.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=200_000, help='Events of history to seed.')
+        parser.add_argument('--conferences', type=int, default=10)
+        parser.add_argument('--days', type=int, default=30, help='Days of history the events are spread over.')
+        parser.add_argument('--snapshot-minutes', type=int, default=60, help='Minutes between seeded snapshots.')
+        parser.add_argument('--changes', type=int, default=2000, help='State changes for the per-change ingest test.')
+        parser.add_argument('--queries', type=int, default=200, help='Point-in-time queries to time.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(3)
+        with rolled_back():
+            Conference.objects.bulk_create(
+                Conference(topic=f'Benchmark ledger {i}', slug=f'benchmark-ledger-{i}', description='Seeded by a benchmark command',
+                           time_start=time(9), time_end=time(17), capacity=10_000, price=50)
+                for i in range(options['conferences'])
+            )
+            conference_ids = list(
+                Conference.objects.filter(slug__startswith='benchmark-ledger-').values_list('pk', flat=True)
+            )
+            user = User.objects.create(username='benchmark-ledger-user', password='!')
+            booking = Booking.objects.create(user=user, conference_id=conference_ids[0])
+            self.ingest(booking, options['changes'])
+            BookingEvent.objects.filter(conference_id__in=conference_ids).delete()
+
+            start = timezone.now() - timedelta(days=options['days'])
+            span = timedelta(days=options['days']).total_seconds()
+            events = sorted(
+                (start + timedelta(seconds=rng.uniform(0, span)), rng.choice(conference_ids), *rng.choice(KINDS))
+                for _ in range(options['events'])
+            )
+            started = perf_counter()
+            BookingEvent.objects.bulk_create(
+                (
+                    BookingEvent(conference_id=conference_id, kind=kind, booking_id=booking.pk,
+                                 seats=seats, amount=Decimal(50) * sign, at=at)
+                    for at, conference_id, kind, seats, sign in events
+                ),
+                batch_size=1000,
+            )
+            seconds = perf_counter() - started
+            self.stdout.write(
+                f'{"bulk load (batches of 1,000)":<36} {options["events"] / seconds:12,.0f} events/s'
+            )
+
+            # Snapshots as snapshot_ledger --loop would have taken them over the seeded history
+            LedgerSnapshot.objects.filter(conference_id__in=conference_ids).delete()
+            cuts = []
+            cut = start
+            while cut < timezone.now():
+                cut += timedelta(minutes=options['snapshot_minutes'])
+                cuts.append(cut)
+            started = perf_counter()
+            written = sum(ledger.take_snapshots(until=cut) for cut in cuts)
+            seconds = perf_counter() - started
+            self.stdout.write(
+                f'\n{len(cuts)} snapshot runs, {written:,} snapshots: {seconds * 1000 / len(cuts):.1f} ms per run'
+            )
+
+            moments = [(rng.choice(conference_ids), start + timedelta(seconds=rng.uniform(0, span)))
+                       for _ in range(options['queries'])]
+            for conference_id, when in moments[:20]:
+                if ledger.state_at(conference_id, when) != full_replay(conference_id, when):
+                    raise CommandError(f'Snapshot replay disagrees with a full replay at {when}.')
+            per_conference = options['events'] // options['conferences']
+            self.stdout.write(f'\n{"point-in-time query":<36} {"ms":>8} {"events read (avg)":>18}')
+            for label, query, read in (
+                ('full replay of every event', full_replay, per_conference // 2),
+                ('nearest snapshot + replay', ledger.state_at,
+                 per_conference * options['snapshot_minutes'] // (options['days'] * 24 * 60 * 2)),
+            ):
+                ms = timed(lambda: [query(*moment) for moment in moments]) / len(moments)
+                self.stdout.write(f'{label:<36} {ms:8.3f} {read:18,d}')
+
+    def ingest(self, booking, changes):
+        """Time booking state changes committed one at a time, with and without the ledger event."""
+        self.stdout.write(f'{"ingest":<36} {"changes/s":>12} {"µs per change":>14}')
+        baseline = None
+        for label, with_event in (('status update only', False), ('status update + ledger event', True)):
+            def change():
+                with transaction.atomic():
+                    Booking.objects.filter(pk=booking.pk).update(status='confirmed')
+                    if with_event:
+                        ledger.record('paid', booking, amount=50)
+            ms = timed(lambda: (reset_queries(), change()), changes)
+            self.stdout.write(f'{label:<36} {1000 / ms:12,.0f} {ms * 1000:14.0f}')
+            baseline = baseline or ms
+        self.stdout.write(f'{"ledger overhead per change":<36} {"":>12} {(ms - baseline) * 1000:14.0f}')
+        if connection.vendor == 'sqlite':
+            self.stdout.write('(inside one rolled-back transaction: each change commits a savepoint, not to disk)')
@@ -0,0 +1,158 @@
+import queue
+import threading
+import time
+from datetime import date, time as clock
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from booking_app.gateway import SIGNATURE_HEADER, gateway_settings, get_gateway
+from booking_app.mock_gateway import start_mock_gateway
+from booking_app.models import Conference, Payment, User
+from booking_app.payments import handle_gateway_event, process_batch
+from ._benchmark import rolled_back
+
+SECRET = 'benchmark-webhook-secret'
+
+
+class CallbackCollector(ThreadingHTTPServer):
+    """Receives webhooks so the main thread can apply them.
+
+    The benchmark's rows live in an uncommitted transaction that only the
+    main thread's connection can see, so events are queued rather than
+    applied by the server thread.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), CallbackHandler)
+        self.events = queue.Queue()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/'
+
+
+class CallbackHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.events.put((body, self.headers.get(SIGNATURE_HEADER, '')))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def drain(collector, payment_ids, timeout=60):
+    """Run the capture worker and apply webhooks until every payment settles."""
+    pending = set(payment_ids)
+    deadline = time.perf_counter() + timeout
+    while pending:
+        if time.perf_counter() > deadline:
+            raise CommandError(f'{len(pending)} payment(s) never settled.')
+        process_batch()
+        try:
+            event = collector.events.get(timeout=0.02)
+        except queue.Empty:
+            continue
+        while event is not None:
+            pending.discard(handle_gateway_event(*event).pk)
+            try:
+                event = collector.events.get_nowait()
+            except queue.Empty:
+                event = None
+
+
+class Command(BaseCommand):
+    help = 'Show that booking request time no longer depends on payment gateway latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latencies', type=float, nargs='+', default=[0.0, 0.25, 1.0])
+        parser.add_argument('--bookings', type=int, default=20, help='Bookings per latency.')
+        parser.add_argument('--blocking-samples', type=int, default=3)
+        parser.add_argument('--max-in-flight', type=int, default=5)
+        parser.add_argument('--failure-rate', type=float, default=0.1)
+
+    def handle(self, *args, **options):
+        gateway = start_mock_gateway(SECRET, failure_rate=options['failure_rate'])
+        collector = CallbackCollector()
+        config = {
+            **gateway_settings(),
+            'URL': gateway.url,
+            'WEBHOOK_SECRET': SECRET,
+            'CALLBACK_URL': collector.url,
+            'MAX_IN_FLIGHT': options['max_in_flight'],
+        }
+        try:
+            with override_settings(PAYMENT_GATEWAY=config, ALLOWED_HOSTS=['testserver']), rolled_back():
+                self.run(gateway, collector, options)
+        finally:
+            gateway.shutdown()
+            collector.shutdown()
+
+    def run(self, gateway, collector, options):
+        count = options['bookings']
+        conference = Conference.objects.create(
+            topic='Benchmark payments conference',
+            slug='benchmark-payments-conference',
+            description='Seeded by a benchmark command',
+            date=date.today(),
+            time_start=clock(9),
+            time_end=clock(17),
+            capacity=count * len(options['latencies']),
+            price=Decimal('149.00'),
+        )
+        url = f'/conferences/{conference.slug}/book/'
+
+        self.stdout.write(
+            f"{'gateway s':>9} {'async request ms':>17} {'blocking request ms':>20} "
+            f"{'settle all s':>13} {'peak in flight':>15}"
+        )
+        for round_number, latency in enumerate(options['latencies']):
+            gateway.latency = latency
+            gateway.peak_in_flight = 0
+
+            request_ms = []
+            for i in range(count):
+                user = User.objects.create(username=f'benchmark-payer-{round_number}-{i}', password='!')
+                client = Client()
+                client.force_login(user)
+                started = time.perf_counter()
+                response = client.post(url, {'conference': conference.pk, 'payment_method': 'credit_card'})
+                request_ms.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 302:
+                    raise CommandError(f'Booking request failed with {response.status_code}.')
+            async_ms = sum(request_ms) / count
+
+            # What the same request cost when it waited on the gateway itself
+            payments = list(Payment.objects.filter(booking__conference=conference, status='pending'))
+            started = time.perf_counter()
+            for payment in payments[:options['blocking_samples']]:
+                get_gateway().charge(payment)
+            blocking_ms = async_ms + (time.perf_counter() - started) * 1000 / max(options['blocking_samples'], 1)
+
+            started = time.perf_counter()
+            drain(collector, [payment.pk for payment in payments])
+            settle_s = time.perf_counter() - started
+
+            self.stdout.write(
+                f'{latency:9.2f} {async_ms:17.1f} {blocking_ms:20.1f} '
+                f'{settle_s:13.2f} {gateway.peak_in_flight:15d}'
+            )
+            if gateway.peak_in_flight > options['max_in_flight']:
+                raise CommandError('The worker exceeded the in-flight limit.')
+
+        statuses = Payment.objects.filter(booking__conference=conference).values_list('status', flat=True)
+        completed = sum(status == 'completed' for status in statuses)
+        conference.refresh_from_db()
+        self.stdout.write(
+            f'{completed} of {len(statuses)} payments captured, the rest declined; '
+            f'{conference.seats_taken} seats still held.'
+        )
+        if conference.seats_taken != completed:
+            raise CommandError('Declined payments did not release their seats.')
+        self.stdout.write(self.style.SUCCESS('Request time stays flat while gateway latency grows.'))
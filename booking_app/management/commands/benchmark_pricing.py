@@ -0,0 +1,130 @@
+import random
+from datetime import date, time, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from booking_app import pricing
+from booking_app.models import Conference, PriceTable
+from ._benchmark import rolled_back, timed
+
+
+def direct_price(price, capacity, day, seats_taken, today):
+    """The price worked out from the tiers directly, as a view would without the tables."""
+    share = seats_taken / capacity
+    occupancy = max((tier for tier in pricing.occupancy_tiers() if tier[0] <= share), default=(0, 1))[1]
+    leads = pricing.lead_time_tiers()
+    if day is None:
+        lead = max(leads)[1]
+    else:
+        days_left = (day - today).days
+        lead = max((tier for tier in leads if tier[0] <= days_left), default=min(leads))[1]
+    return (Decimal(price) * Decimal(str(lead)) * Decimal(str(occupancy))).quantize(pricing.CENT, ROUND_HALF_UP)
+
+
+class Command(BaseCommand):
+    help = 'Bulk price table rebuilds vs one at a time, and price lookups and quotes vs pricing on the fly.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conferences', type=int, default=5000)
+        parser.add_argument('--one-by-one', type=int, default=200, help='Conferences repriced one at a time.')
+        parser.add_argument('--lookups', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(5)
+        today = date.today()
+        with rolled_back():
+            rows = self.seed(rng, options['conferences'])
+            ids = list(rows)
+            self.stdout.write(f'{len(ids):,} upcoming conferences\n')
+
+            bulk_ms = timed(pricing.reprice)
+            some = ids[:options['one_by_one']]
+            single_ms = timed(lambda: [pricing.reprice([pk]) for pk in some]) / len(some)
+            if PriceTable.objects.filter(conference_id__in=ids).count() != len(ids):
+                raise CommandError('reprice() missed conferences.')
+            self.stdout.write(
+                f'Rebuild every table: {bulk_ms:,.0f} ms in bulk ({bulk_ms * 1000 / len(ids):.0f} µs per conference) '
+                f'vs {single_ms * len(ids):,.0f} ms one at a time ({single_ms * 1000:.0f} µs per conference)'
+            )
+
+            # Every tier of every band, on days around the band edges, against the direct formula
+            checks = [
+                (pk, rng.randint(0, rows[pk][1]), rows[pk][2] - timedelta(days=rng.choice([0, 1, 13, 14, 15, 59, 60, 61, 90])))
+                for pk in rng.choices(ids, k=options['lookups'])
+            ]
+            tables = dict(PriceTable.objects.filter(conference_id__in=ids).values_list('conference_id', 'table'))
+            for pk, seats_taken, day in checks:
+                expected = direct_price(*rows[pk], seats_taken, day)
+                if pricing.price_from_table(tables[pk], seats_taken, day) != expected:
+                    raise CommandError(f'The table price of conference {pk} on {day} disagrees with the tiers.')
+
+            cache.set_many({pricing.table_key(pk): table for pk, table in tables.items()}, 60)
+            try:
+                self.hot_path(checks, rows, today)
+            finally:
+                cache.delete_many([pricing.table_key(pk) for pk in ids])
+            self.check_quotes(ids[0])
+
+    def hot_path(self, checks, rows, today):
+        count = len(checks)
+
+        def on_the_fly():
+            for pk, seats_taken, _ in checks:
+                price, capacity, day = Conference.objects.values_list('price', 'capacity', 'date').get(pk=pk)
+                direct_price(price, capacity, day, seats_taken, today)
+
+        quotes = [pricing.issue_quote(7, pk, Decimal('99.00')) for pk, _, _ in checks]
+        with CaptureQueriesContext(connection) as queries:
+            for (pk, seats_taken, _), quote in zip(checks, quotes):
+                pricing.current_price(pk, seats_taken)
+                pricing.read_quote(quote, 7, pk)
+        if queries:
+            raise CommandError(f'Pricing ran {len(queries)} queries with the tables cached.')
+
+        self.stdout.write(f'\n{"per booking page":<34} {"µs":>8} {"queries":>8}')
+        for label, func, queries in (
+            ('price on the fly', on_the_fly, 1),
+            ('price from the cached table', lambda: [pricing.current_price(pk, taken) for pk, taken, _ in checks], 0),
+            ('sign a quote', lambda: [pricing.issue_quote(7, pk, Decimal('99.00')) for pk, _, _ in checks], 0),
+            ('check a quote', lambda: [pricing.read_quote(quote, 7, pk) for (pk, _, _), quote in zip(checks, quotes)], 0),
+        ):
+            self.stdout.write(f'{label:<34} {timed(func) * 1000 / count:8.1f} {queries:8d}')
+
+    def check_quotes(self, conference_id):
+        quote = pricing.issue_quote(7, conference_id, Decimal('123.45'))
+        if pricing.read_quote(quote, 7, conference_id) != Decimal('123.45'):
+            raise CommandError('A quote did not read back its price.')
+        refused = {
+            'another user': lambda: pricing.read_quote(quote, 8, conference_id),
+            'another conference': lambda: pricing.read_quote(quote, 7, conference_id + 1),
+            'a tampered quote': lambda: pricing.read_quote(quote[:-2] + ('AA' if quote[-2:] != 'AA' else 'BB'), 7, conference_id),
+            'an expired quote': override_settings(PRICE_QUOTE_SECONDS=-1)(lambda: pricing.read_quote(quote, 7, conference_id)),
+        }
+        for label, read in refused.items():
+            try:
+                read()
+            except pricing.InvalidQuote:
+                continue
+            raise CommandError(f'{label.capitalize()} was honoured.')
+        self.stdout.write('\nQuotes for another user or conference, tampered or expired are refused.')
+
+    def seed(self, rng, count):
+        """Conferences from today to 400 days out; returns ``{pk: (price, capacity, date)}``."""
+        Conference.objects.bulk_create(
+            (
+                Conference(topic=f'Benchmark pricing {i}', slug=f'benchmark-pricing-{i}', description='Seeded by a benchmark command',
+                           date=date.today() + timedelta(days=i % 400), time_start=time(9), time_end=time(17),
+                           capacity=rng.randint(20, 2000), price=Decimal(rng.randint(20, 900)) + Decimal('0.99'))
+                for i in range(count)
+            ),
+            batch_size=2000,
+        )
+        return {
+            pk: (price, capacity, day) for pk, price, capacity, day in
+            Conference.objects.filter(slug__startswith='benchmark-pricing-').values_list('pk', 'price', 'capacity', 'date')
+        }
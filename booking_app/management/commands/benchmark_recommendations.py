@@ -0,0 +1,137 @@
+import random
+from collections import Counter
+from datetime import date, time, timedelta
+from itertools import combinations_with_replacement
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from booking_app import co_bookings
+from booking_app.inventory import HOLDING_STATUSES
+from booking_app.models import Booking, CoBooking, Conference, ConferenceNeighbour, User
+from booking_app.recommendations import also_booked
+from ._benchmark import rolled_back, timed
+
+
+def self_join(conference_id, limit=5):
+    """What the detail page would run without the precomputed neighbours."""
+    return list(
+        Booking.objects.filter(status__in=HOLDING_STATUSES, user__bookings__conference_id=conference_id,
+                               user__bookings__status__in=HOLDING_STATUSES)
+        .exclude(conference_id=conference_id)
+        .values('conference_id').annotate(together=Count('pk')).order_by('-together')[:limit]
+    )
+
+
+def matrix():
+    return set(CoBooking.objects.values_list('conference_id', 'other_id', 'count'))
+
+
+class Command(BaseCommand):
+    help = 'Co-booking matrix build and incremental update times, and recommendation reads vs an on-the-fly self-join.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20_000)
+        parser.add_argument('--conferences', type=int, default=300)
+        parser.add_argument('--per-user', type=int, default=5, help='Mean bookings per attendee.')
+        parser.add_argument('--new', type=float, default=0.01, help='Share of bookings added before the update.')
+        parser.add_argument('--lookups', type=int, default=100)
+
+    def handle(self, *args, **options):
+        rng = random.Random(11)
+        with rolled_back():
+            conference_ids = self.seed(rng, options)
+            held = list(Booking.objects.filter(conference_id__in=conference_ids).values_list('user_id', 'conference_id'))
+            self.stdout.write(f'{len(held):,} bookings by {options["users"]:,} attendees over {len(conference_ids)} conferences')
+
+            # The NumPy counts against a plain Python count of every attendee's pairs
+            per_user = {}
+            for user_id, conference_id in held:
+                per_user.setdefault(user_id, []).append(conference_id)
+            expected = Counter()
+            for booked in per_user.values():
+                for x, y in combinations_with_replacement(sorted(booked), 2):
+                    expected[x, y] += 1
+                    if x != y:
+                        expected[y, x] += 1
+            started = perf_counter()
+            a, b, counts = co_bookings.pair_counts(*co_bookings._bookings(Booking.objects.filter(conference_id__in=conference_ids)))
+            numpy_ms = (perf_counter() - started) * 1000
+            if dict(zip(zip(a.tolist(), b.tolist()), counts.tolist())) != dict(expected):
+                raise CommandError('NumPy co-booking counts disagree with a plain count.')
+
+            started = perf_counter()
+            cells = co_bookings.rebuild()
+            rebuild_s = perf_counter() - started
+            self.stdout.write(
+                f'Full rebuild: {rebuild_s:.2f} s ({numpy_ms:.0f} ms of it reading and counting with NumPy), '
+                f'{cells:,} nonzero cells of {len(conference_ids) ** 2:,}'
+            )
+
+            sample = rng.sample(conference_ids, min(options['lookups'], len(conference_ids)))
+            self.stdout.write(f'\n{"detail page recommendations":<34} {"ms":>8} {"queries":>8}')
+            for label, read in (('self-join over Booking', self_join), ('precomputed neighbours', also_booked)):
+                ms = timed(lambda: [read(conference_id) for conference_id in sample]) / len(sample)
+                with CaptureQueriesContext(connection) as queries:
+                    read(sample[0])
+                self.stdout.write(f'{label:<34} {ms:8.2f} {len(queries):8d}')
+            together = {row['conference_id']: row['together'] for row in self_join(sample[0], None)}
+            stored = ConferenceNeighbour.objects.filter(conference_id=sample[0]).values_list('neighbour_id', 'co_bookings')
+            if any(together.get(neighbour) != count for neighbour, count in stored):
+                raise CommandError('Stored co-booking counts disagree with the self-join.')
+
+            added = self.book_more(rng, conference_ids, int(len(held) * options['new']))
+            started = perf_counter()
+            reranked = co_bookings.update()
+            update_s = perf_counter() - started
+            updated = matrix()
+            started = perf_counter()
+            co_bookings.rebuild()
+            rebuild_s = perf_counter() - started
+            if updated != matrix():
+                raise CommandError('The incrementally updated matrix differs from a rebuild.')
+            self.stdout.write(
+                f'\nAfter {added:,} new bookings: update {update_s:.2f} s ({reranked} conferences re-ranked) '
+                f'vs rebuild {rebuild_s:.2f} s; matrices identical'
+            )
+
+    def seed(self, rng, options):
+        """Attendees who mostly book within one of a few interest groups, so neighbours mean something."""
+        Conference.objects.bulk_create(
+            Conference(topic=f'Benchmark recs {i}', slug=f'benchmark-recs-{i}', description='Seeded by a benchmark command',
+                       date=date.today() + timedelta(days=1 + i % 200), time_start=time(9), time_end=time(17),
+                       capacity=options['users'], price=50)
+            for i in range(options['conferences'])
+        )
+        conference_ids = list(Conference.objects.filter(slug__startswith='benchmark-recs-').order_by('pk').values_list('pk', flat=True))
+        first_user = (User.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+        User.objects.bulk_create(
+            (User(pk=first_user + i, username=f'benchmark-recs-{i}', password='!') for i in range(options['users'])),
+            batch_size=5000,
+        )
+        self.user_ids = range(first_user, first_user + options['users'])
+        self.groups = [conference_ids[i::20] for i in range(20)]
+        self.booked = {}
+        bookings = []
+        for user_id in self.user_ids:
+            group = rng.choice(self.groups)
+            picks = {rng.choice(group) if rng.random() < 0.8 else rng.choice(conference_ids)
+                     for _ in range(max(1, int(rng.expovariate(1 / options['per_user']))))}
+            self.booked[user_id] = picks
+            bookings += [Booking(user_id=user_id, conference_id=conference_id, status='confirmed') for conference_id in picks]
+        Booking.objects.bulk_create(bookings, batch_size=5000)
+        return conference_ids
+
+    def book_more(self, rng, conference_ids, count):
+        bookings = []
+        while len(bookings) < count:
+            user_id = rng.choice(self.user_ids)
+            conference_id = rng.choice(conference_ids)
+            if conference_id not in self.booked[user_id]:
+                self.booked[user_id].add(conference_id)
+                bookings.append(Booking(user_id=user_id, conference_id=conference_id, status='confirmed'))
+        Booking.objects.bulk_create(bookings, batch_size=5000)
+        return len(bookings)
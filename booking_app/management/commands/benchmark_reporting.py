@@ -0,0 +1,94 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q, Sum
+
+from booking_app.models import Booking, Conference, Payment
+from booking_app.reporting import build_report
+from ._benchmark import rolled_back, seed_bookings, timed
+
+
+def orm_aggregates():
+    """The same revenue figures from database GROUP BYs."""
+    paid = Q(status='completed')
+    refunded = paid & Q(booking__status='cancelled')
+    by_method = {
+        row['payment_method']: (row['revenue'] or 0, row['refunds'] or 0)
+        for row in Payment.objects.values('payment_method').annotate(
+            revenue=Sum('amount', filter=paid),
+            refunds=Sum('amount', filter=refunded),
+        )
+    }
+    by_conference = {
+        row['booking__conference_id']: (row['revenue'] or 0, row['refunds'] or 0)
+        for row in Payment.objects.values('booking__conference_id').annotate(
+            revenue=Sum('amount', filter=paid),
+            refunds=Sum('amount', filter=refunded),
+        )
+    }
+    confirmed = dict(
+        Booking.objects.filter(status='confirmed').values('conference_id')
+        .annotate(seats=Count('pk')).values_list('conference_id', 'seats')
+    )
+    capacity = dict(Conference.objects.values_list('conference_id', 'capacity'))
+    return by_method, by_conference, confirmed, capacity
+
+
+def python_loop():
+    """The same revenue figures by walking ORM objects with Decimal."""
+    by_method = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    by_conference = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    for payment in Payment.objects.select_related('booking').iterator(chunk_size=5000):
+        if payment.status != 'completed':
+            continue
+        by_method[payment.payment_method][0] += payment.amount
+        by_conference[payment.booking.conference_id][0] += payment.amount
+        if payment.booking.status == 'cancelled':
+            by_method[payment.payment_method][1] += payment.amount
+            by_conference[payment.booking.conference_id][1] += payment.amount
+    confirmed = defaultdict(int)
+    for booking in Booking.objects.iterator(chunk_size=5000):
+        if booking.status == 'confirmed':
+            confirmed[booking.conference_id] += 1
+    return by_method, by_conference, confirmed
+
+
+class Command(BaseCommand):
+    help = 'Compare the NumPy finance report with ORM aggregates and a Python loop.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000)
+        parser.add_argument('--conferences', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        with rolled_back():
+            self.stdout.write(f"Seeding {options['rows']:,} bookings and payments...")
+            seed_bookings(options['rows'], options['conferences'])
+
+            results = {}
+            for label, func in (
+                ('vectorized (NumPy)', build_report),
+                ('ORM aggregates', orm_aggregates),
+                ('Python Decimal loop', python_loop),
+            ):
+                results[label] = func()
+                ms = timed(func, repeat)
+                self.stdout.write(f'{label:<22} {ms:9.1f} ms')
+
+        # Compare per-method totals to the cent. The ORM Sum is quantized first
+        # because some backends (SQLite) add decimals as floats.
+        cent = Decimal('0.01')
+        report = results['vectorized (NumPy)']
+        orm_by_method = results['ORM aggregates'][0]
+        loop_by_method = results['Python Decimal loop'][0]
+        for row in report['revenue_by_method']:
+            method = row['payment_method']
+            expected = (row['revenue'], row['refunds'])
+            orm = tuple(Decimal(value).quantize(cent) for value in orm_by_method[method])
+            loop = tuple(loop_by_method[method])
+            if orm != expected or loop != expected:
+                raise CommandError(f'Totals for {method} do not match: {expected}, {orm}, {loop}')
+        self.stdout.write(self.style.SUCCESS('All three approaches agree to the cent.'))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from booking_app.models import User
+from ._benchmark import rolled_back, timed
+
+SETUPS = [
+    ('db sessions + ModelBackend',
+     'django.contrib.sessions.backends.db',
+     'django.contrib.auth.backends.ModelBackend'),
+    ('cached_db sessions + CachedModelBackend',
+     'django.contrib.sessions.backends.cached_db',
+     'booking_app.auth_backends.CachedModelBackend'),
+    ('signed cookies + CachedModelBackend',
+     'django.contrib.sessions.backends.signed_cookies',
+     'booking_app.auth_backends.CachedModelBackend'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Measure queries and time per logged-in request for each session/auth setup.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+
+    def handle(self, *args, **options):
+        repeat = options['requests']
+        url = reverse('my_bookings')
+
+        with rolled_back():
+            user = User.objects.create_user(username='benchmark-session-user', password='benchmark')
+            baseline = None
+            for label, engine, backend in SETUPS:
+                with override_settings(
+                    SESSION_ENGINE=engine,
+                    AUTHENTICATION_BACKENDS=[backend],
+                    ALLOWED_HOSTS=['testserver'],
+                ):
+                    client = Client()
+                    client.force_login(user)
+                    client.get(url)  # warm the session and user caches
+
+                    with CaptureQueriesContext(connection) as queries:
+                        ms = timed(lambda: client.get(url), repeat)
+                    per_request = len(queries) / repeat
+
+                if baseline is None:
+                    baseline = per_request
+                self.stdout.write(
+                    f'{label:<42} {per_request:5.2f} queries/request '
+                    f'({baseline - per_request:+.2f} saved)  {ms:7.2f} ms/request'
+                )
@@ -0,0 +1,214 @@
+import random
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import date, time, timedelta
+from pathlib import Path
+from time import perf_counter, sleep
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from booking_app import ledger, sharding
+from booking_app.inventory import SeatsUnavailable, reserve_seats
+from booking_app.models import Booking, Conference, Payment, User
+from booking_app.payments import queue_capture
+from ._benchmark import timed
+
+PREFIX = 'benchmark-shard-'
+
+
+def add_sqlite_database(alias, path):
+    settings.DATABASES[alias] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(path), 'OPTIONS': {'timeout': 60}}
+    connections.settings[alias] = connections.configure_settings({'default': settings.DATABASES[alias]})['default']
+
+
+def write_rows(user_id, conference):
+    """Only the sharded rows: a booking and its payment in one shard transaction."""
+    alias = sharding.shard_for(conference.pk)
+    with transaction.atomic(using=alias):
+        booking, = Booking.objects.using(alias).bulk_create([
+            Booking(user_id=user_id, conference_id=conference.pk),
+        ])
+        Payment.objects.using(alias).bulk_create([Payment(
+            booking=booking, amount=conference.price, payment_method='credit_card',
+            transaction_id=str(uuid.uuid4()), next_attempt_at=timezone.now(),
+        )])
+
+
+def book(user_id, conference):
+    """The booking view's transaction: seat, booking, ledger event and payment, with their signals."""
+    booking = Booking(user_id=user_id, conference=conference, status='pending', payment_status='pending')
+    with sharding.atomic(sharding.shard_for(conference.pk)):
+        if not reserve_seats(conference.pk):
+            raise SeatsUnavailable
+        booking.save()
+        ledger.record('booked', booking, seats=1)
+        queue_capture(
+            booking=booking, amount=conference.price, payment_method='credit_card', transaction_id=str(uuid.uuid4()),
+        )
+
+
+class Command(BaseCommand):
+    help = 'Booking write throughput vs shard count, over several local SQLite databases, and the fan-out read.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+        parser.add_argument('--writers', type=int, default=8, help='Concurrent writer threads.')
+        parser.add_argument('--bookings', type=int, default=2000, help='Bookings written per run.')
+        parser.add_argument('--conferences', type=int, default=64)
+        parser.add_argument('--lookups', type=int, default=50)
+        parser.add_argument(
+            '--latency-ms', type=float, default=1.0,
+            help='Round trip added to every query, as to a database server; 0 for local SQLite speed.',
+        )
+
+    def handle(self, *args, **options):
+        if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Run this against the SQLite development settings.')
+        users = -(-options['bookings'] // options['conferences'])
+        rng = random.Random(3)
+        directory = Path(tempfile.mkdtemp(prefix='shards-'))
+        aliases = [f'{PREFIX}{i}' for i in range(max(options['shards']))]
+        # Writers can queue on default's lock for longer than SQLite's 5 s timeout
+        default_options = connections.settings['default'].setdefault('OPTIONS', {})
+        default_timeout = default_options.get('timeout')
+        default_options['timeout'] = 60
+        try:
+            self.make_shards(directory, aliases)
+            self.seed(users, options['conferences'])
+            pairs = [(user_id, conference) for user_id in self.user_ids for conference in self.conferences]
+            rng.shuffle(pairs)
+            pairs = pairs[:options['bookings']]
+            self.latency = options['latency_ms'] / 1000
+            self.stdout.write(
+                f'{len(pairs):,} bookings per run by {options["writers"]} writer threads over '
+                f'{len(self.conferences)} conferences; shards are SQLite files in WAL mode, '
+                f'{options["latency_ms"]:g} ms round trip per query\n'
+            )
+            self.stdout.write(
+                f'{"shards":>6} {"rows only/s":>12} {"booking view/s":>15} '
+                f'{"my bookings ms":>15} {"one by one ms":>14}'
+            )
+            for count in options['shards']:
+                with override_settings(BOOKING_SHARDS=aliases[:count]):
+                    rows = self.write_all(pairs, options['writers'], write_rows)
+                    full = self.write_all(pairs, options['writers'], book)
+                    parallel, serial = self.read(rng.sample(list(self.user_ids), min(options['lookups'], users)))
+                self.stdout.write(f'{count:6d} {rows:12,.0f} {full:15,.0f} {parallel:15.2f} {serial:14.2f}')
+            self.stdout.write(
+                '\n"rows only" writes just the sharded rows. "booking view" also updates the seat count, '
+                'ledger and rollups on default,\nwhich SQLite locks as a whole for every booking; '
+                'a server database locks only the conference\'s rows there.'
+            )
+        finally:
+            Conference.objects.filter(slug__startswith=PREFIX).delete()
+            User.objects.filter(username__startswith=PREFIX).delete()
+            for alias in aliases:
+                connections[alias].close()
+                connections.settings.pop(alias, None)
+                settings.DATABASES.pop(alias, None)
+            shutil.rmtree(directory)
+            if default_timeout is None:
+                del default_options['timeout']
+            else:
+                default_options['timeout'] = default_timeout
+
+    def make_shards(self, directory, aliases):
+        """Migrate one SQLite file and copy it for every other shard."""
+        for i, alias in enumerate(aliases):
+            path = directory / f'{alias}.sqlite3'
+            if i:
+                shutil.copy(directory / f'{aliases[0]}.sqlite3', path)
+            add_sqlite_database(alias, path)
+            if not i:
+                call_command('migrate', database=alias, verbosity=0)
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode=WAL')
+                connections[alias].close()
+        with override_settings(BOOKING_SHARDS=aliases):
+            for alias in aliases:
+                sharding.prepare_shard(alias)
+
+    def seed(self, users, conference_count):
+        Conference.objects.bulk_create(
+            Conference(topic=f'Benchmark shard {i}', slug=f'{PREFIX}{i}', description='Seeded by a benchmark command',
+                       date=date.today() + timedelta(days=30), time_start=time(9), time_end=time(17),
+                       capacity=users, price=50)
+            for i in range(conference_count)
+        )
+        self.conferences = list(Conference.objects.filter(slug__startswith=PREFIX))
+        first_user = (User.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+        User.objects.bulk_create(User(pk=first_user + i, username=f'{PREFIX}{i}', password='!') for i in range(users))
+        self.user_ids = range(first_user, first_user + users)
+
+    def write_all(self, pairs, writers, write):
+        """Write every pair on ``writers`` threads; returns bookings per second."""
+        for alias in sharding.shards():
+            for model in (Payment, Booking):
+                model.objects.using(alias).all()._raw_delete(alias)
+        Conference.objects.filter(slug__startswith=PREFIX).update(seats_taken=0)
+
+        def work(chunk):
+            try:
+                with self.round_trips(['default', *sharding.shards()]):
+                    for user_id, conference in chunk:
+                        write(user_id, conference)
+            finally:
+                connections.close_all()
+
+        started = perf_counter()
+        with ThreadPoolExecutor(max_workers=writers) as pool:
+            list(pool.map(work, [pairs[i::writers] for i in range(writers)]))
+        seconds = perf_counter() - started
+        self.verify(len(pairs))
+        return len(pairs) / seconds
+
+    def round_trips(self, aliases):
+        """Wait ``--latency-ms`` before every query this thread sends to ``aliases``."""
+        def delay(execute, *args):
+            sleep(self.latency)
+            return execute(*args)
+
+        stack = ExitStack()
+        if self.latency:
+            for alias in aliases:
+                stack.enter_context(connections[alias].execute_wrapper(delay))
+        return stack
+
+    def verify(self, count):
+        placed = 0
+        for alias in sharding.shards():
+            rows = list(Booking.objects.using(alias).values_list('pk', 'conference_id'))
+            if any(sharding.shard_for(conference_id) != alias or sharding.shard_for_pk(pk) != alias
+                   for pk, conference_id in rows):
+                raise CommandError(f'A booking on {alias} belongs on another shard.')
+            if Payment.objects.using(alias).exclude(booking_id__in=[pk for pk, _ in rows]).exists():
+                raise CommandError(f'A payment on {alias} is not with its booking.')
+            placed += len(rows)
+        if placed != count:
+            raise CommandError(f'{placed} bookings written, expected {count}.')
+
+    def read(self, user_ids):
+        """ms per user to list their bookings from every shard, at once and one shard after another."""
+        def query(user_id):
+            def shard_rows(alias):
+                with self.round_trips([alias]):
+                    return list(Booking.objects.using(alias).filter(user_id=user_id).order_by('-time'))
+            return shard_rows
+
+        expected = {user_id: sum(Booking.objects.using(alias).filter(user_id=user_id).count() for alias in sharding.shards())
+                    for user_id in user_ids}
+        if any(len(sharding.fan_out(query(user_id))) != expected[user_id] for user_id in user_ids):
+            raise CommandError('The fan-out read missed bookings.')
+        parallel = timed(lambda: [sharding.fan_out(query(user_id)) for user_id in user_ids]) / len(user_ids)
+        serial = timed(lambda: [
+            [row for alias in sharding.shards() for row in query(user_id)(alias)] for user_id in user_ids
+        ]) / len(user_ids)
+        return parallel, serial
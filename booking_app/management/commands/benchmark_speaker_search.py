@@ -0,0 +1,96 @@
+import random
+from time import perf_counter
+
+from django import forms
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.db.models import Q
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from booking_app import admission
+from booking_app.forms import ConferenceSearchForm
+from booking_app.models import Speaker
+from booking_app.speaker_index import build_index, search_speakers
+from ._benchmark import rolled_back, timed
+
+FIRST_NAMES = ('Ada', 'Alan', 'Grace', 'José', 'María', 'Linus', 'Margaret', 'Ken', 'Barbara', 'Dennis',
+               'Frances', 'John', 'Radia', 'Edsger', 'Sophie', 'Tim', 'Hedy', 'Guido', 'Anita', 'Niklaus')
+LAST_NAMES = ('Lovelace', 'Turing', 'Hopper', 'García', 'Hamilton', 'Thompson', 'Liskov', 'Ritchie',
+              'Allen', 'McCarthy', 'Perlman', 'Dijkstra', 'Wilson', 'Berners-Lee', 'Lamarr', 'Borg', 'Wirth')
+EXPERTISE = ('Databases', 'Distributed systems', 'Compilers', 'Security', 'Data science', 'Web performance',
+             'Machine learning', 'Networking', 'Accessibility', 'DevOps')
+QUERIES = ('a', 'jo', 'garcia', 'maria gar', 'data', 'web perf')
+
+
+class LegacySearchForm(forms.Form):
+    """The search form's speaker field before autocomplete: every speaker as an <option>."""
+    speaker = forms.ModelChoiceField(queryset=Speaker.objects.all(), required=False)
+
+
+class Command(BaseCommand):
+    help = 'Compare listing every speaker in the search form with the in-memory speaker autocomplete.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--speakers', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        rng = random.Random(7)
+        with override_settings(ALLOWED_HOSTS=['testserver'], ADMISSION_CONTROL=admission.DEFAULTS), rolled_back():
+            Speaker.objects.bulk_create(
+                Speaker(
+                    speaker_id=f'benchmark-speaker-search-{i}',
+                    first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                    expertise=rng.choice(EXPERTISE),
+                )
+                for i in range(options['speakers'])
+            )
+            speaker_id = f'benchmark-speaker-search-{options["speakers"] // 2}'
+
+            self.stdout.write(f'{"search form speaker field":<34} {"queries":>7} {"ms":>8} {"bytes":>10}')
+            for label, form_class in (('<select> of every speaker', LegacySearchForm),
+                                      ('hidden speaker id', ConferenceSearchForm)):
+                def render():
+                    form = form_class({'speaker': speaker_id})
+                    form.is_valid()
+                    return str(form['speaker'])
+
+                with CaptureQueriesContext(connection) as queries:
+                    html = render()
+                query_count = len(queries)
+                ms = timed(lambda: (reset_queries(), render()), max(repeat // 20, 1))
+                self.stdout.write(f'{label:<34} {query_count:7d} {ms:8.2f} {len(html):10,d}')
+
+            started = perf_counter()
+            index = build_index()
+            build_ms = (perf_counter() - started) * 1000
+            self.stdout.write(
+                f'\nIndex: {len(index):,d} speakers, {len(index.tokens):,d} tokens, built in {build_ms:.1f} ms (1 query)'
+            )
+
+            self.stdout.write(f'\n{"query":<12} {"matches":>7} {"index µs":>9} {"istartswith µs":>15}')
+            for query in QUERIES:
+                expected = search_speakers(query)
+                words = query.split()
+                database = Speaker.objects.all()
+                for word in words:
+                    database = database.filter(
+                        Q(first_name__istartswith=word) | Q(last_name__istartswith=word) | Q(expertise__istartswith=word)
+                    )
+                database = database.order_by('first_name', 'last_name', 'speaker_id')[:10]
+                index_us = timed(lambda: search_speakers(query), repeat) * 1000
+                database_us = timed(lambda: (reset_queries(), list(database.all())), max(repeat // 10, 1)) * 1000
+                self.stdout.write(f'{query:<12} {len(expected):7d} {index_us:9.1f} {database_us:15.1f}')
+                if not expected:
+                    raise CommandError(f'No speakers found for {query!r}.')
+
+            client = Client()
+            url = reverse('speaker_autocomplete')
+            client.get(url, {'q': 'jo'})
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url, {'q': 'jo'})
+            ms = timed(lambda: client.get(url, {'q': 'jo'}), repeat)
+            self.stdout.write(f'\nAutocomplete endpoint: {ms:.2f} ms/request, {len(queries)} queries')
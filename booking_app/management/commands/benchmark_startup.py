@@ -0,0 +1,91 @@
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a web worker does before it can answer its first request: load the
+# WSGI application named in settings (settings, apps, middleware) and the
+# URLconf, which imports every view module.
+WORKER_BOOT = '''
+import resource
+from django.conf import settings
+from django.urls import get_resolver
+from django.utils.module_loading import import_string
+import_string(settings.WSGI_APPLICATION)
+get_resolver().url_patterns
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+# Modules only a few requests or commands need; loading any of them at boot fails the run
+LAZY_MODULES = ('reportlab', 'PIL', 'numpy')
+
+
+def run(argv):
+    """Run ``argv`` under ``-X importtime``: (wall ms, {module: self µs}, output)."""
+    started = perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *argv],
+        capture_output=True, text=True, cwd=settings.BASE_DIR, check=False,
+    )
+    ms = (perf_counter() - started) * 1000
+    if result.returncode:
+        raise CommandError(f'{" ".join(argv)} failed:\n{result.stderr[-2000:]}')
+    imports = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            imports[match[4]] = int(match[1])
+    return ms, imports, result.stdout
+
+
+class Command(BaseCommand):
+    help = 'Cold-start time of a web worker and a management command, from python -X importtime.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--top', type=int, default=10, help='Show this many of the costliest packages.')
+        parser.add_argument('--budget-ms', type=float,
+                            help='Fail if the median worker boot takes longer than this (for CI).')
+
+    def handle(self, *args, **options):
+        manage = str(Path(settings.BASE_DIR) / 'manage.py')
+        scenarios = (
+            ('worker boot', ['-c', WORKER_BOOT]),
+            ('manage.py check', [manage, 'check']),
+        )
+        self.stdout.write(f'{"start-up":<18} {"median ms":>10} {"min ms":>8} {"imports ms":>11} {"modules":>8} {"max RSS MB":>11}')
+        worker = None
+        for label, argv in scenarios:
+            runs = [run(argv) for _ in range(options['runs'])]
+            walls = [ms for ms, _, _ in runs]
+            imports = runs[-1][1]
+            output = runs[-1][2].split()
+            rss = f'{int(output[-1]) / 1024:11.0f}' if label == 'worker boot' else f'{"":>11}'
+            self.stdout.write(
+                f'{label:<18} {statistics.median(walls):10.0f} {min(walls):8.0f} '
+                f'{sum(imports.values()) / 1000:11.0f} {len(imports):8d} {rss}'
+            )
+            if label == 'worker boot':
+                worker = statistics.median(walls), imports
+
+        median, imports = worker
+        packages = Counter()
+        for module, self_us in imports.items():
+            packages[module.split('.')[0]] += self_us
+        self.stdout.write('\nCostliest packages at worker boot (own import time):')
+        for package, self_us in packages.most_common(options['top']):
+            self.stdout.write(f'  {package:<24} {self_us / 1000:7.1f} ms')
+
+        loaded = sorted({module.split('.')[0] for module in imports} & set(LAZY_MODULES))
+        if loaded:
+            raise CommandError(f'Worker boot imports {", ".join(loaded)}, which should only load on first use.')
+        if options['budget_ms'] is not None:
+            if median > options['budget_ms']:
+                raise CommandError(f'Worker boot took {median:.0f} ms, over the {options["budget_ms"]:.0f} ms budget.')
+            self.stdout.write(self.style.SUCCESS(f'Worker boot is within the {options["budget_ms"]:.0f} ms budget.'))
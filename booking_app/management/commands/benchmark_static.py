@@ -0,0 +1,117 @@
+import gzip
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+ASSET_PATTERN = re.compile(r'<(?:link[^>]+href|script[^>]+src)="([^"]+)"')
+
+# What the home page loaded before assets were self-hosted. The CDNs served
+# these same files gzipped (Bootstrap's JS as one bundle of Popper and
+# Bootstrap); the hero background was the full-size JPEG plus a request for
+# a .jpg that did not exist.
+BEFORE_CSS = ('vendor/bootstrap-5.3.0/css/bootstrap.min.css', 'vendor/fontawesome-6.0.0/css/all.min.css')
+BEFORE_JS = ('vendor/bootstrap-5.3.0/js/popper.min.js', 'vendor/bootstrap-5.3.0/js/bootstrap.min.js')
+BEFORE_INLINE_CSS = 568  # The <style> blocks in base.html and home.html, gzipped
+BEFORE_REQUESTS = 6  # HTML, two stylesheets, the JS bundle, the JPEG and the 404
+BEFORE_HERO = 'images/conference-bg.jpeg'
+BEFORE_ORIGINS = 3  # The site, cdn.jsdelivr.net and cdnjs.cloudflare.com
+
+# Hero variant picked by the breakpoints in css/site.css
+VIEWPORTS = {'phone (375px)': 640, 'tablet (800px)': 1024, 'desktop (1440px)': 1500}
+
+# Connection setup for a new HTTPS origin: DNS, TCP and TLS round trips
+SETUP_RTTS = 3
+
+
+class Command(BaseCommand):
+    help = 'Measure bytes sent for the home page and estimate first paint, before vs after the static pipeline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rtt', type=float, default=150, help='Round trip time in ms (default: slow 4G).')
+        parser.add_argument('--bandwidth', type=float, default=1.6, help='Download bandwidth in Mbit/s.')
+
+    def handle(self, *args, **options):
+        if not Path(settings.STATIC_ROOT, staticfiles_storage.manifest_name).exists():
+            raise CommandError('No staticfiles manifest; run `python manage.py collectstatic` first.')
+        self.rtt = options['rtt']
+        self.bandwidth = options['bandwidth'] * 1000 / 8  # bytes per ms
+
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']):
+            client = Client(HTTP_ACCEPT_ENCODING='br, gzip')
+            page = client.get(reverse('home'))
+            html = page.content
+            assets = [self.fetch(client, url) for url in ASSET_PATTERN.findall(html.decode())]
+            heroes = {
+                label: self.fetch(client, staticfiles_storage.url(f'images/conference-bg-{width}.webp'))
+                for label, width in VIEWPORTS.items()
+            }
+
+        html_bytes = len(gzip.compress(html))
+        css = [asset for asset in assets if asset['url'].endswith('.css')]
+        self.stdout.write(f'{"asset":<68} {"encoding":>8} {"bytes":>9}  cache-control')
+        for asset in assets + list(heroes.values()):
+            self.stdout.write(
+                f'{asset["url"]:<68} {asset["encoding"]:>8} {asset["bytes"]:9,d}  {asset["cache_control"]}'
+            )
+        not_immutable = [asset['url'] for asset in assets if 'immutable' not in asset['cache_control']]
+        if not_immutable:
+            raise CommandError(f'Served without immutable caching: {", ".join(not_immutable)}')
+
+        before_css = sum(gzipped(name) for name in BEFORE_CSS)
+        before_js = sum(gzipped(name) for name in BEFORE_JS)
+        before_hero = Path(finders.find(BEFORE_HERO)).stat().st_size
+        before_html = html_bytes + BEFORE_INLINE_CSS
+
+        before_paint = self.first_paint(before_html, before_css, origins=BEFORE_ORIGINS)
+        # The stylesheets come from the page's own origin now, over the connection it already has
+        after_paint = self.first_paint(html_bytes, sum(asset['bytes'] for asset in css), origins=1)
+        before_total = before_html + before_css + before_js + before_hero
+
+        self.stdout.write('')
+        self.stdout.write(f'{"first visit":<24} {"bytes":>10} {"requests":>9} {"first paint":>12} {"hero shown":>11}')
+        self.stdout.write(
+            f'{"before, any viewport":<24} {before_total:10,d} {BEFORE_REQUESTS:9d} '
+            f'{before_paint:10.0f}ms {before_paint + self.transfer(before_hero) + self.rtt:9.0f}ms'
+        )
+        after_assets = sum(asset['bytes'] for asset in assets)
+        for label, hero in heroes.items():
+            self.stdout.write(
+                f'{"after, " + label:<24} {html_bytes + after_assets + hero["bytes"]:10,d} {len(assets) + 2:9d} '
+                f'{after_paint:10.0f}ms {after_paint + self.transfer(hero["bytes"]) + self.rtt:9.0f}ms'
+            )
+        self.stdout.write(
+            f'\nRepeat visits fetch only the HTML ({html_bytes:,d} bytes): every asset is immutable. '
+            f'Estimates assume {self.rtt:.0f} ms RTT and {self.bandwidth * 8 / 1000:.1f} Mbit/s; '
+            f'render-blocking CSS is all that first paint waits for.'
+        )
+
+    def fetch(self, client, url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url} returned {response.status_code}')
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return {
+            'url': url,
+            'bytes': len(body),
+            'encoding': response.get('Content-Encoding', 'identity'),
+            'cache_control': response.get('Cache-Control', ''),
+        }
+
+    def transfer(self, size):
+        return size / self.bandwidth
+
+    def first_paint(self, html_bytes, css_bytes, origins):
+        """HTML on a fresh connection, then the stylesheets, with new origins set up in parallel."""
+        html_done = (SETUP_RTTS + 1) * self.rtt + self.transfer(html_bytes)
+        css_start = (SETUP_RTTS if origins > 1 else 0) * self.rtt + self.rtt
+        return html_done + css_start + self.transfer(css_bytes)
+
+
+def gzipped(name):
+    return len(gzip.compress(Path(finders.find(name)).read_bytes()))
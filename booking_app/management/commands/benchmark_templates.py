@@ -0,0 +1,121 @@
+import uuid
+from datetime import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from booking_app.models import Booking, Conference, ConferenceCategory, ConferenceHasSpeaker, Payment, Speaker, User
+from booking_app.snapshots import version_key
+from ._benchmark import rolled_back, timed
+
+UNCACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **settings.TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ],
+    },
+}]
+CACHED_TEMPLATES = [{
+    **UNCACHED_TEMPLATES[0],
+    'OPTIONS': {
+        **UNCACHED_TEMPLATES[0]['OPTIONS'],
+        'loaders': [('django.template.loaders.cached.Loader', UNCACHED_TEMPLATES[0]['OPTIONS']['loaders'])],
+    },
+}]
+
+
+def seed(rows):
+    """A user with ``rows`` bookings, each on its own conference with categories, speakers and a payment."""
+    prefix = f'benchmark-render-{uuid.uuid4().hex[:6]}'
+    user = User.objects.create(username=prefix, password='!')
+    Conference.objects.bulk_create(
+        Conference(
+            topic=f'Benchmark render {i}', slug=f'{prefix}-{i}', description='Seeded by a benchmark command ' * 4,
+            time_start=time(9), time_end=time(17), capacity=100, price=99,
+        )
+        for i in range(rows)
+    )
+    conferences = list(Conference.objects.filter(slug__startswith=prefix))
+    speakers = [
+        Speaker.objects.get_or_create(
+            speaker_id=f'benchmark-render-speaker-{i}',
+            defaults={'first_name': 'Speaker', 'last_name': str(i), 'expertise': 'Benchmarks'},
+        )[0]
+        for i in range(2)
+    ]
+    ConferenceCategory.objects.bulk_create(
+        ConferenceCategory(conference=conference, category=name)
+        for conference in conferences for name in ('Web', 'Data')
+    )
+    ConferenceHasSpeaker.objects.bulk_create(
+        ConferenceHasSpeaker(conference=conference, speaker=speaker)
+        for conference in conferences for speaker in speakers
+    )
+    bookings = Booking.objects.bulk_create(
+        Booking(user=user, conference=conference, status='confirmed', payment_status='completed')
+        for conference in conferences
+    )
+    Payment.objects.bulk_create(
+        Payment(booking=booking, amount=99, payment_method='credit_card', status='completed',
+                transaction_id=uuid.uuid4().hex)
+        for booking in bookings
+    )
+    return user, conferences
+
+
+def retire_fragments(conferences):
+    """Give every conference a new version, as an edit would, so no cached fragment matches."""
+    cache.set_many({version_key(conference.slug): uuid.uuid4().hex for conference in conferences}, None)
+
+
+class Command(BaseCommand):
+    help = 'Render time, queries and HTML size of My Bookings and the conference listing against row count.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"page":<12} {"rows":>5}  {"templates":<36} {"queries":>7} {"ms/page":>9} {"KB":>7}'
+        )
+        for rows in options['rows']:
+            with override_settings(ALLOWED_HOSTS=['testserver']), rolled_back():
+                user, conferences = seed(rows)
+                client = Client()
+                client.force_login(user)
+                for page in ('my_bookings', 'conferences'):
+                    for label, templates, warm in (
+                        ('parsed per request, cold fragments', UNCACHED_TEMPLATES, False),
+                        ('cached loader, cold fragments', CACHED_TEMPLATES, False),
+                        ('cached loader, warm fragments', CACHED_TEMPLATES, True),
+                    ):
+                        self.measure(client, page, rows, label, templates, warm, conferences, options['repeat'])
+
+    def measure(self, client, page, rows, label, templates, warm, conferences, repeat):
+        url = reverse(page)
+
+        def render():
+            if not warm:
+                retire_fragments(conferences)
+            return client.get(url)
+
+        with override_settings(TEMPLATES=templates):
+            client.get(url)  # Load templates and warm the caches
+            with CaptureQueriesContext(connection) as queries:
+                response = render()
+            query_count = len(queries)
+            # Keep the DEBUG query log from filling up between pages
+            ms = timed(lambda: (reset_queries(), render()), repeat)
+        self.stdout.write(
+            f'{page:<12} {rows:5d}  {label:<36} {query_count:7d} {ms:9.1f} {len(response.content) / 1024:7.1f}'
+        )
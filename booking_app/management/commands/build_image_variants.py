@@ -0,0 +1,38 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Source image (relative to the first STATICFILES_DIRS entry) -> widths to
+# produce. Widths wider than the source are skipped.
+IMAGE_VARIANTS = {
+    'images/conference-bg.jpeg': (640, 1024, 1500),
+}
+JPEG_QUALITY = 75
+WEBP_QUALITY = 72
+
+
+class Command(BaseCommand):
+    help = 'Write resized JPEG and WebP variants of the large static images for responsive backgrounds.'
+
+    def handle(self, *args, **options):
+        try:
+            from PIL import Image
+        except ImportError:
+            raise CommandError('Building image variants needs Pillow: pip install Pillow')
+
+        root = settings.STATICFILES_DIRS[0]
+        for name, widths in IMAGE_VARIANTS.items():
+            stem = os.path.splitext(os.path.join(root, name))[0]
+            with Image.open(os.path.join(root, name)) as source:
+                source = source.convert('RGB')
+                for width in widths:
+                    if width > source.width:
+                        continue
+                    image = source.resize((width, round(source.height * width / source.width)), Image.LANCZOS)
+                    for path, kwargs in (
+                        (f'{stem}-{width}.jpg', {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True}),
+                        (f'{stem}-{width}.webp', {'quality': WEBP_QUALITY, 'method': 6}),
+                    ):
+                        image.save(path, **kwargs)
+                        self.stdout.write(f'Wrote {os.path.relpath(path, root)} ({os.path.getsize(path):,} bytes)')
@@ -0,0 +1,49 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from booking_app.deletion import BATCH_SIZE, delete_queued, queue_deletion
+from booking_app.models import Conference, ConferenceDeletion
+
+
+class Command(BaseCommand):
+    help = 'Delete the conferences queued for deletion, and everything of theirs, in batches. Resumes interrupted runs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('conference_ids', nargs='*', type=int, help='Queue these conferences first.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows deleted per transaction.')
+        parser.add_argument('--limit', type=int, help='Delete at most this many conferences.')
+        parser.add_argument('--list', action='store_true', help='Only list the queued deletions and their progress.')
+
+    def handle(self, *args, **options):
+        if options['conference_ids']:
+            conferences = Conference.objects.filter(pk__in=options['conference_ids'])
+            missing = set(options['conference_ids']) - set(conferences.values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f'No conference with id {", ".join(map(str, sorted(missing)))}.')
+            queue_deletion(conferences)
+        if options['list']:
+            for deletion in ConferenceDeletion.objects.filter(finished_at__isnull=True).order_by('requested_at', 'pk'):
+                self.stdout.write(
+                    f'{deletion.conference_id} {deletion.topic}: {deletion.rows_deleted:,} row(s) deleted'
+                    + (f', at {deletion.step}' if deletion.step else '')
+                )
+            return
+
+        started = perf_counter()
+        shown = {}
+
+        def progress(deletion):
+            # One line per table, and every 10 batches within it
+            key = (deletion.pk, deletion.step)
+            shown[key] = shown.get(key, 0) + 1
+            if shown[key] % 10 == 1:
+                self.stdout.write(f'{deletion.conference_id} {deletion.topic}: {deletion.step}, '
+                                  f'{deletion.rows_deleted:,} row(s) deleted so far')
+
+        deletions = delete_queued(options['batch_size'], options['limit'], progress)
+        for deletion in deletions:
+            self.stdout.write(f'{deletion.conference_id} {deletion.topic}: deleted with {deletion.rows_deleted:,} row(s)')
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {len(deletions)} conference(s) in {perf_counter() - started:.1f} s.'
+        ))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking_app.outbox import dispatch_batch
+
+
+class Command(BaseCommand):
+    help = 'Send queued booking notifications from the outbox in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when the outbox is empty.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep between polls with --loop.')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        started = time.perf_counter()
+        while True:
+            batch_started = time.perf_counter()
+            sent, failed = dispatch_batch(options['batch_size'])
+            if sent or failed:
+                elapsed = time.perf_counter() - batch_started
+                total_sent += sent
+                total_failed += failed
+                self.stdout.write(
+                    f'Sent {sent}, failed {failed} in {elapsed * 1000:.0f} ms '
+                    f'({sent / elapsed:.0f} messages/s)'
+                )
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        elapsed = time.perf_counter() - started
+        rate = total_sent / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {total_sent} sent, {total_failed} failed, {rate:.0f} messages/s overall.'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from booking_app.reporting import CHUNK_SIZE, build_report, export_csv
+
+
+class Command(BaseCommand):
+    help = 'Export occupancy, revenue-by-method, refund and price-band reports as CSV files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='reports', help='Directory to write the CSV files to.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        report = build_report(options['chunk_size'])
+        for path in export_csv(report, options['output']):
+            self.stdout.write(f'Wrote {path}')
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from booking_app.ledger import state_at
+from booking_app.models import Conference
+
+
+class Command(BaseCommand):
+    help = 'Seats held and net revenue of conferences at a past moment, replayed from the booking ledger.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('when', type=datetime.fromisoformat, help='e.g. 2026-10-19T10:05 (local time).')
+        parser.add_argument('slugs', nargs='+', help='Conference slugs.')
+
+    def handle(self, *args, **options):
+        when = options['when']
+        if timezone.is_naive(when):
+            when = timezone.make_aware(when)
+        conferences = {conference.slug: conference for conference in Conference.objects.filter(slug__in=options['slugs'])}
+        missing = set(options['slugs']) - set(conferences)
+        if missing:
+            raise CommandError(f'No conference with slug {", ".join(sorted(missing))}.')
+        self.stdout.write(f'{"conference":<40} {"seats":>6} {"capacity":>8} {"revenue":>12}')
+        for slug in options['slugs']:
+            conference = conferences[slug]
+            seats, revenue = state_at(conference.pk, when)
+            self.stdout.write(f'{conference.topic[:40]:<40} {seats:6d} {conference.capacity:8d} {revenue:12}')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from booking_app.gateway import gateway_settings
+from booking_app.mock_gateway import MockGatewayServer
+
+
+class Command(BaseCommand):
+    help = 'Run a local mock payment gateway with configurable latency and failure rate.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=1.0, help='Seconds before a charge completes.')
+        parser.add_argument('--jitter', type=float, default=0.2, help='Random +/- seconds added to the latency.')
+        parser.add_argument('--failure-rate', type=float, default=0.05, help='Fraction of charges that are declined.')
+        parser.add_argument('--max-in-flight', type=int, default=100, help='Outstanding charges before answering 429.')
+        parser.add_argument('--quiet', action='store_true')
+
+    def handle(self, *args, **options):
+        server = MockGatewayServer(
+            (options['host'], options['port']),
+            gateway_settings()['WEBHOOK_SECRET'],
+            latency=options['latency'],
+            jitter=options['jitter'],
+            failure_rate=options['failure_rate'],
+            max_in_flight=options['max_in_flight'],
+            verbose=not options['quiet'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Mock gateway on {server.url} (latency {options['latency']}s "
+            f"+/- {options['jitter']}s, failure rate {options['failure_rate']:.0%})"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from booking_app.sharding import prepare_shard, shards, sharding_enabled
+
+
+class Command(BaseCommand):
+    help = "Start each shard's booking, payment, feedback and outbox ids at its own range. Run after migrating the shards."
+
+    def handle(self, *args, **options):
+        if not sharding_enabled():
+            raise CommandError('BOOKING_SHARDS is not set.')
+        for alias in shards():
+            first = prepare_shard(alias)
+            self.stdout.write(f'{alias}: new ids from {first:,}')
+        self.stdout.write(self.style.SUCCESS(f'Prepared {len(shards())} shard(s).'))
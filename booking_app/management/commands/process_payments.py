@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking_app.payments import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Submit pending payments to the payment gateway for capture.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when nothing is due.')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep between polls with --loop.')
+
+    def handle(self, *args, **options):
+        total_submitted = total_failed = 0
+        while True:
+            submitted, retried, failed = process_batch()
+            if submitted or retried or failed:
+                total_submitted += submitted
+                total_failed += failed
+                self.stdout.write(f'Submitted {submitted}, will retry {retried}, failed {failed}')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {total_submitted} submitted, {total_failed} failed.'))
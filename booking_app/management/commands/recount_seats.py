@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from booking_app.inventory import recount_seats
+
+
+class Command(BaseCommand):
+    help = 'Reset each conference seat count from its confirmed bookings and group orders.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('conference_ids', type=int, nargs='*', help='Only recount these conferences.')
+
+    def handle(self, *args, **options):
+        changed = recount_seats(options['conference_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Corrected the seat count of {changed} conference(s).'))
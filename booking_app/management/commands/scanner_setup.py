@@ -0,0 +1,26 @@
+import base64
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from booking_app.models import Conference
+from booking_app.tickets import SCANNER_HEADER, conference_key, scanner_key
+
+
+class Command(BaseCommand):
+    help = "Print what a conference's door scanners need: the ticket key, their own key and the check-in URLs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug', help='Conference slug.')
+
+    def handle(self, *args, **options):
+        conference = Conference.objects.filter(slug=options['slug']).first()
+        if conference is None:
+            raise CommandError(f'No conference with slug {options["slug"]}.')
+        site = settings.SITE_URL.rstrip('/')
+        self.stdout.write(f'Conference:      {conference.pk} {conference.topic}')
+        self.stdout.write(f'Ticket key:      {base64.b64encode(conference_key(conference.pk)).decode()}')
+        self.stdout.write(f'{SCANNER_HEADER}:   {scanner_key(conference.pk)}')
+        self.stdout.write(f'Scans (POST):    {site}{reverse("check_in", args=[conference.pk])}')
+        self.stdout.write(f'Revocations:     {site}{reverse("ticket_revocations", args=[conference.pk])}?since=<next>')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from booking_app.conflicts import speaker_conflicts
+from booking_app.models import Conference, Speaker
+
+
+class Command(BaseCommand):
+    help = 'Report speakers who are scheduled in overlapping conferences.'
+
+    def handle(self, *args, **options):
+        conflicts = speaker_conflicts()
+        if not conflicts:
+            self.stdout.write(self.style.SUCCESS('No speaker conflicts found.'))
+            return
+
+        speaker_ids = {speaker_id for speaker_id, _, _ in conflicts}
+        conference_ids = {cid for _, a, b in conflicts for cid in (a, b)}
+        speakers = Speaker.objects.in_bulk(speaker_ids)
+        conferences = Conference.objects.in_bulk(conference_ids)
+
+        for speaker_id, first_id, second_id in conflicts:
+            first, second = conferences[first_id], conferences[second_id]
+            self.stdout.write(
+                f"{speakers[speaker_id]}: '{first.topic}' "
+                f"({first.time_start:%H:%M}-{first.time_end:%H:%M}) overlaps '{second.topic}' "
+                f"({second.time_start:%H:%M}-{second.time_end:%H:%M}) on {first.date}"
+            )
+        self.stdout.write(self.style.WARNING(f'{len(conflicts)} speaker conflict(s) found.'))
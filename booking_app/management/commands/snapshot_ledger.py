@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking_app.ledger import open_ledger, take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Snapshot each conference's seats and revenue from the booking ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep taking snapshots instead of exiting.')
+        parser.add_argument('--interval', type=float, default=300.0, help='Seconds between snapshots with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            # Conferences with bookings from before the ledger, or new ones, start from the current tables
+            opened = open_ledger()
+            if opened:
+                self.stdout.write(f'Opened the ledger for {opened} conference(s).')
+            started = time.perf_counter()
+            written = take_snapshots()
+            self.stdout.write(
+                f'Wrote {written} snapshot(s) in {(time.perf_counter() - started) * 1000:.0f} ms.'
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from booking_app.analytics import catch_up
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily analytics rollups from the last watermark up to yesterday.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', type=date.fromisoformat,
+                            help='Rebuild from this day (YYYY-MM-DD) instead of the watermark.')
+        parser.add_argument('--until', type=date.fromisoformat,
+                            help='Last day to rebuild (default and latest: yesterday; today is kept by the signals).')
+
+    def handle(self, *args, **options):
+        rebuilt = catch_up(
+            until=options['until'],
+            start=options['start'],
+            progress=lambda day: self.stdout.write(f'Rebuilt {day}'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'{rebuilt} day(s) rebuilt.'))
@@ -0,0 +1,18 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from booking_app import pricing
+
+
+class Command(BaseCommand):
+    help = "Rebuild the price tables of upcoming conferences. Run after changing the pricing tiers, and nightly."
+
+    def add_arguments(self, parser):
+        parser.add_argument('conference_ids', nargs='*', type=int,
+                            help='Reprice only these conferences, past ones included.')
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        count = pricing.reprice(options['conference_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Repriced {count} conference(s) in {perf_counter() - started:.1f} s.'))
@@ -0,0 +1,22 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from booking_app import co_bookings
+
+
+class Command(BaseCommand):
+    help = 'Fold new bookings into the co-booking matrix and re-rank the "attendees also booked" neighbours.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recompute the whole matrix, picking up cancellations (run nightly).')
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        if options['rebuild']:
+            cells = co_bookings.rebuild()
+            message = f'Rebuilt the co-booking matrix: {cells} nonzero cell(s)'
+        else:
+            message = f'Re-ranked {co_bookings.update()} conference(s)'
+        self.stdout.write(self.style.SUCCESS(f'{message} in {perf_counter() - started:.1f} s.'))
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking_app", "0004_booking_payment_status_conference_price_payment"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="conference",
+            name="date",
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="conference",
+            name="topic",
+            field=models.CharField(db_index=True, max_length=45),
+        ),
+        migrations.AlterField(
+            model_name="payment",
+            name="payment_date",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="payment",
+            name="transaction_id",
+            field=models.CharField(
+                blank=True, db_index=True, max_length=100, null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking_app", "0005_admin_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalyticsWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=45, unique=True)),
+                ("day", models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DailyPaymentMethodStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("payment_method", models.CharField(max_length=45)),
+                ("payments", models.IntegerField(default=0)),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "conference",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_payment_stats",
+                        to="booking_app.conference",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["day"], name="booking_app_day_f909c4_idx")
+                ],
+                "unique_together": {("conference", "day", "payment_method")},
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyConferenceStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("bookings", models.IntegerField(default=0)),
+                ("cancellations", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("ratings_count", models.IntegerField(default=0)),
+                ("ratings_sum", models.IntegerField(default=0)),
+                (
+                    "conference",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="booking_app.conference",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["day"], name="booking_app_day_e3c99b_idx")
+                ],
+                "unique_together": {("conference", "day")},
+            },
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_taken_seats(apps, schema_editor):
+    Booking = apps.get_model("booking_app", "Booking")
+    Conference = apps.get_model("booking_app", "Conference")
+    # The statuses that hold a seat, as in booking_app.inventory.HOLDING_STATUSES
+    holding = (
+        Booking.objects.filter(status__in=("pending", "confirmed"))
+        .values("conference_id")
+        .annotate(seats=models.Count("pk"))
+    )
+    for row in holding:
+        Conference.objects.filter(pk=row["conference_id"]).update(
+            seats_taken=row["seats"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking_app", "0007_outbox_message"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GroupOrder",
+            fields=[
+                ("order_id", models.AutoField(primary_key=True, serialize=False)),
+                ("seats", models.IntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("status", models.CharField(default="pending", max_length=45)),
+                ("payment_status", models.CharField(default="pending", max_length=45)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="conference",
+            name="seats_taken",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="payment",
+            name="booking",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="payments",
+                to="booking_app.booking",
+            ),
+        ),
+        migrations.CreateModel(
+            name="Ticket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("attendee_name", models.CharField(max_length=100)),
+                ("attendee_email", models.EmailField(max_length=254)),
+                (
+                    "order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tickets",
+                        to="booking_app.grouporder",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="grouporder",
+            name="conference",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="group_orders",
+                to="booking_app.conference",
+            ),
+        ),
+        migrations.AddField(
+            model_name="grouporder",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="group_orders",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="order",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="payments",
+                to="booking_app.grouporder",
+            ),
+        ),
+        migrations.RunPython(count_taken_seats, migrations.RunPython.noop),
+    ]
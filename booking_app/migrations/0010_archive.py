@@ -0,0 +1,97 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking_app", "0009_payment_gateway"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedBooking",
+            fields=[
+                ("booking_id", models.IntegerField(primary_key=True, serialize=False)),
+                ("time", models.TimeField()),
+                ("status", models.CharField(max_length=45)),
+                ("payment_status", models.CharField(max_length=45)),
+                ("archived_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="conference",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="ArchivedPayment",
+            fields=[
+                ("payment_id", models.IntegerField(primary_key=True, serialize=False)),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("payment_method", models.CharField(max_length=45)),
+                (
+                    "transaction_id",
+                    models.CharField(
+                        blank=True, db_index=True, max_length=100, null=True
+                    ),
+                ),
+                ("payment_date", models.DateTimeField(db_index=True)),
+                ("status", models.CharField(max_length=45)),
+                ("gateway_charge_id", models.CharField(blank=True, max_length=100)),
+                (
+                    "booking",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="payments",
+                        to="booking_app.archivedbooking",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArchivedFeedback",
+            fields=[
+                ("id", models.IntegerField(primary_key=True, serialize=False)),
+                ("comments", models.CharField(max_length=45)),
+                ("rating", models.IntegerField()),
+                (
+                    "conference",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_feedbacks",
+                        to="booking_app.conference",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_feedbacks",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="archivedbooking",
+            name="conference",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="archived_bookings",
+                to="booking_app.conference",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedbooking",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="archived_bookings",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
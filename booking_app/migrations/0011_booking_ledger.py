@@ -0,0 +1,85 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking_app", "0010_archive"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("as_of", models.DateTimeField()),
+                ("seats", models.IntegerField()),
+                ("revenue", models.DecimalField(decimal_places=2, max_digits=14)),
+                (
+                    "conference",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_snapshots",
+                        to="booking_app.conference",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["as_of"], name="booking_app_as_of_1cbc36_idx")
+                ],
+                "unique_together": {("conference", "as_of")},
+            },
+        ),
+        migrations.CreateModel(
+            name="BookingEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kind", models.CharField(max_length=45)),
+                ("booking_id", models.IntegerField(blank=True, null=True)),
+                ("order_id", models.IntegerField(blank=True, null=True)),
+                ("seats", models.IntegerField(default=0)),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=10),
+                ),
+                ("at", models.DateTimeField()),
+                (
+                    "conference",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="booking_events",
+                        to="booking_app.conference",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["conference", "at"],
+                        name="booking_app_confere_6346a6_idx",
+                    ),
+                    models.Index(fields=["at"], name="booking_app_at_1e269f_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking_app", "0011_booking_ledger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TicketRevocation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.CharField(max_length=20)),
+                ("revoked_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "conference",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ticket_revocations",
+                        to="booking_app.conference",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("conference", "code")},
+            },
+        ),
+        migrations.CreateModel(
+            name="CheckIn",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.CharField(max_length=20)),
+                ("scanned_at", models.DateTimeField()),
+                ("device", models.CharField(blank=True, max_length=45)),
+                ("batch", models.UUIDField()),
+                (
+                    "conference",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="check_ins",
+                        to="booking_app.conference",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["batch"], name="booking_app_batch_d1f9bb_idx")
+                ],
+                "unique_together": {("conference", "code")},
+            },
+        ),
+    ]
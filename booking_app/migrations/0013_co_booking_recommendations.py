@@ -0,0 +1,100 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking_app", "0012_ticket_check_in"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecommendationWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=45, unique=True)),
+                ("booking_id", models.IntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ConferenceNeighbour",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rank", models.SmallIntegerField()),
+                ("score", models.FloatField()),
+                ("co_bookings", models.IntegerField()),
+                (
+                    "conference",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="neighbours",
+                        to="booking_app.conference",
+                    ),
+                ),
+                (
+                    "neighbour",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="booking_app.conference",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("conference", "rank")},
+            },
+        ),
+        migrations.CreateModel(
+            name="CoBooking",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.IntegerField()),
+                (
+                    "conference",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="co_bookings",
+                        to="booking_app.conference",
+                    ),
+                ),
+                (
+                    "other",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="booking_app.conference",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("conference", "other")},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking_app", "0014_shard_foreign_keys"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceTable",
+            fields=[
+                (
+                    "conference",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="price_table",
+                        serialize=False,
+                        to="booking_app.conference",
+                    ),
+                ),
+                ("table", models.JSONField()),
+                ("computed_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking_app", "0015_price_tables"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConferenceDeletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("conference_id", models.IntegerField(unique=True)),
+                ("topic", models.CharField(max_length=45)),
+                ("requested_at", models.DateTimeField(auto_now_add=True)),
+                ("step", models.CharField(blank=True, max_length=45)),
+                ("rows_deleted", models.PositiveBigIntegerField(default=0)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
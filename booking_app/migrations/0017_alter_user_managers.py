@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:15
+
+import booking_app.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking_app", "0016_conference_deletions"),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name="user",
+            managers=[
+                ("objects", booking_app.models.CachedUserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking_app", "0017_alter_user_managers"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="calendar_feed_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:17
+
+from django.db import migrations, models
+
+
+def mark_queued_deletions(apps, schema_editor):
+    # Deletions queued before this field existed closed the conference with archived_at
+    Conference = apps.get_model("booking_app", "Conference")
+    ConferenceDeletion = apps.get_model("booking_app", "ConferenceDeletion")
+    for conference_id, requested_at in ConferenceDeletion.objects.filter(
+        finished_at__isnull=True
+    ).values_list("conference_id", "requested_at"):
+        Conference.objects.filter(pk=conference_id).update(deleting_at=requested_at)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking_app", "0018_user_calendar_feed_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conference",
+            name="deleting_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_queued_deletions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,150 @@
+# booking_app/mock_gateway.py
+"""A local stand-in for a payment gateway, for development and benchmarks.
+
+Speaks the API HTTPGateway expects:
+
+* ``POST /charges`` answers 202 with a charge id at once and, after the
+  configured latency, POSTs a signed ``succeeded``/``failed`` event to the
+  request's ``callback_url``. A repeated reference gets the same charge
+  back (and the event re-sent once it is known), never a second charge.
+  Answers 429 while ``max_in_flight`` charges are outstanding.
+* ``POST /charges/sync`` waits out the latency and returns the outcome in
+  the response, like a gateway called inside the request would.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request, urlopen
+
+from .gateway import SIGNATURE_HEADER, sign
+
+CALLBACK_RETRIES = 3
+
+
+class MockGatewayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, secret, latency=1.0, jitter=0.0, failure_rate=0.0, max_in_flight=100, verbose=False):
+        super().__init__(address, MockGatewayHandler)
+        self.secret = secret
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.max_in_flight = max_in_flight
+        self.verbose = verbose
+        self.charges = {}  # reference -> {'charge_id', 'status', 'callback_url'}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+        self.random = random.Random()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def outcome(self):
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        status = 'failed' if self.random.random() < self.failure_rate else 'succeeded'
+        return delay, status
+
+    def start_charge(self, reference, callback_url):
+        """Return ``(http_status, charge)`` for an asynchronous capture request."""
+        with self.lock:
+            charge = self.charges.get(reference)
+            if charge is not None:
+                if charge['status'] is not None:
+                    threading.Thread(target=self.deliver, args=(reference,), daemon=True).start()
+                return 202, charge
+            if self.in_flight >= self.max_in_flight:
+                return 429, None
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            charge = self.charges[reference] = {
+                'charge_id': f'ch_{uuid.uuid4().hex[:16]}',
+                'status': None,
+                'callback_url': callback_url,
+            }
+        delay, status = self.outcome()
+        timer = threading.Timer(delay, self.finish_charge, args=(reference, status))
+        timer.daemon = True
+        timer.start()
+        return 202, charge
+
+    def finish_charge(self, reference, status):
+        with self.lock:
+            self.charges[reference]['status'] = status
+            self.in_flight -= 1
+        self.deliver(reference)
+
+    def deliver(self, reference):
+        charge = self.charges[reference]
+        event = {
+            'reference': reference,
+            'charge_id': charge['charge_id'],
+            'status': charge['status'],
+            'error': 'Card declined' if charge['status'] == 'failed' else '',
+        }
+        body = json.dumps(event).encode()
+        request = Request(
+            charge['callback_url'],
+            data=body,
+            headers={'Content-Type': 'application/json', SIGNATURE_HEADER: sign(body, self.secret)},
+            method='POST',
+        )
+        for attempt in range(CALLBACK_RETRIES):
+            try:
+                with urlopen(request, timeout=10):
+                    return
+            except OSError as exc:
+                self.log(f'callback for {reference} failed ({exc}), attempt {attempt + 1}')
+                time.sleep(2 ** attempt)
+
+    def log(self, message):
+        if self.verbose:
+            print(f'[mock_gateway] {message}', flush=True)
+
+
+class MockGatewayHandler(BaseHTTPRequestHandler):
+    def _reply(self, status, payload=None):
+        body = json.dumps(payload or {}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            reference = payload['reference']
+        except (ValueError, KeyError, TypeError):
+            return self._reply(400, {'error': 'expected JSON with a reference'})
+
+        if self.path == '/charges':
+            if not payload.get('callback_url'):
+                return self._reply(400, {'error': 'callback_url is required'})
+            status, charge = self.server.start_charge(reference, payload['callback_url'])
+            if charge is None:
+                return self._reply(status, {'error': 'too many charges in flight'})
+            return self._reply(status, {'charge_id': charge['charge_id']})
+
+        if self.path == '/charges/sync':
+            delay, status = self.server.outcome()
+            time.sleep(delay)
+            return self._reply(200, {'charge_id': f'ch_{uuid.uuid4().hex[:16]}', 'status': status})
+
+        self._reply(404, {'error': 'not found'})
+
+    def log_message(self, format, *args):
+        self.server.log(format % args)
+
+
+def start_mock_gateway(secret, host='127.0.0.1', port=0, **options):
+    """Serve a MockGatewayServer from a daemon thread and return it."""
+    server = MockGatewayServer((host, port), secret, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
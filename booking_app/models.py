@@ -1,13 +1,31 @@
 # booking_app/models.py
-from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.db import models, transaction
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.utils.text import slugify
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
+from django.core.cache import cache
+
+from .sharding import ShardedManager, shards
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # Queryset updates send no signals, so drop the cached copies of the users they change here
+        user_ids = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+        invalidate_cached_users(user_ids)
+        return updated
+
+class CachedUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
 
 class User(AbstractUser):
+    objects = CachedUserManager()
+    
     phone = models.BigIntegerField(null=True, blank=True)
     role = models.CharField(max_length=45, default='attendee')  # 'attendee', 'admin', 'organizer'
+    # Part of the personal calendar feed URL; bumped to revoke the old URL (see calendar_feeds.py)
+    calendar_feed_version = models.PositiveIntegerField(default=0)
     
     def get_full_name(self):
         """Return the user's full name."""
@@ -15,6 +33,35 @@ class User(AbstractUser):
             return f"{self.first_name} {self.last_name}"
         return self.username
 
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+def invalidate_cached_users(user_ids):
+    """Drop the cached session users (see auth_backends.py) for ``user_ids``."""
+    keys = [user_cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    # Again after commit, in case a request cached the old row in between
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_cached_users([instance.pk])
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_rows(sender, instance, using, **kwargs):
+    """Delete the user's bookings, feedback and group order payments on the other shards.
+
+    Django's cascade only reaches the database the user is deleted from,
+    and the foreign keys from the shards are not enforced to stop it.
+    """
+    order_ids = list(GroupOrder.objects.using(using).filter(user=instance).values_list('pk', flat=True))
+    for alias in shards():
+        if alias == using:
+            continue
+        Payment.objects.using(alias).filter(order_id__in=order_ids).delete()
+        Booking.objects.using(alias).filter(user_id=instance.pk).delete()
+        Feedback.objects.using(alias).filter(user_id=instance.pk).delete()
+
 class Speaker(models.Model):
     speaker_id = models.CharField(max_length=45, primary_key=True)
     first_name = models.CharField(max_length=45)
@@ -33,14 +80,17 @@ class SpeakerPhone(models.Model):
 
 class Conference(models.Model):
     conference_id = models.AutoField(primary_key=True)
-    topic = models.CharField(max_length=45)
+    topic = models.CharField(max_length=45, db_index=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
     description = models.CharField(max_length=255)
-    date = models.DateField(null=True, blank=True)  # Making it nullable temporarily
+    date = models.DateField(null=True, blank=True, db_index=True)  # Making it nullable temporarily
     time_start = models.TimeField()
     time_end = models.TimeField() 
     capacity = models.IntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)  # Added price field
+    seats_taken = models.IntegerField(default=0)  # Seats held by bookings; see booking_app/inventory.py
+    archived_at = models.DateTimeField(null=True, blank=True)  # Bookings moved to the archive; see booking_app/archiving.py
+    deleting_at = models.DateTimeField(null=True, blank=True)  # Queued for deletion; see booking_app/deletion.py
     speakers = models.ManyToManyField(Speaker, through='ConferenceHasSpeaker')
     
     def __str__(self):
@@ -76,12 +126,15 @@ class ConferenceHasSpeaker(models.Model):
 
 class Booking(models.Model):
     booking_id = models.AutoField(primary_key=True)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
-    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='bookings')
+    # Bookings may live on another database than users and conferences; see booking_app/sharding.py
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings', db_constraint=False)
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='bookings', db_constraint=False)
     time = models.TimeField(auto_now_add=True)
     status = models.CharField(max_length=45, default='pending')  # 'pending', 'confirmed', 'cancelled'
     payment_status = models.CharField(max_length=45, default='pending')  # 'pending', 'completed', 'failed'
     
+    objects = ShardedManager()
+    
     class Meta:
         unique_together = ('user', 'conference')
     
@@ -90,24 +143,313 @@ class Booking(models.Model):
 
 class Payment(models.Model):
     payment_id = models.AutoField(primary_key=True)
-    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='payments')
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='payments', null=True, blank=True)
+    order = models.ForeignKey('GroupOrder', on_delete=models.CASCADE, related_name='payments', null=True, blank=True, db_constraint=False)  # Set instead of booking for group orders
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_method = models.CharField(max_length=45)  # 'credit_card', 'debit_card', 'paypal', etc.
-    transaction_id = models.CharField(max_length=100, blank=True, null=True)
-    payment_date = models.DateTimeField(auto_now_add=True)
-    status = models.CharField(max_length=45, default='pending')  # 'pending', 'completed', 'failed'
+    transaction_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)
+    payment_date = models.DateTimeField(auto_now_add=True, db_index=True)
+    status = models.CharField(max_length=45, default='pending')  # 'pending', 'processing', 'completed', 'failed'
+    # Gateway capture state; see booking_app/payments.py
+    gateway_charge_id = models.CharField(max_length=100, blank=True)
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.CharField(max_length=255, blank=True)
+    
+    objects = ShardedManager()
+    
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
     
     def __str__(self):
-        return f"Payment for {self.booking}"
+        return f"Payment for {self.booking or self.order}"
 
 class Feedback(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feedbacks')
-    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='feedbacks')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feedbacks', db_constraint=False)
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='feedbacks', db_constraint=False)
     comments = models.CharField(max_length=45)
     rating = models.IntegerField()
     
+    objects = ShardedManager()
+    
     class Meta:
         unique_together = ('user', 'conference')
     
     def __str__(self):
-        return f"{self.user.username} - {self.conference.topic} - {self.rating}"
\ No newline at end of file
+        return f"{self.user.username} - {self.conference.topic} - {self.rating}"
+
+class GroupOrder(models.Model):
+    """Many attendee seats for one conference, bought in one go with one Payment."""
+    order_id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='group_orders')
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='group_orders')
+    seats = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=45, default='pending')  # 'pending', 'confirmed', 'cancelled'
+    payment_status = models.CharField(max_length=45, default='pending')  # 'pending', 'completed', 'failed'
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.conference.topic} x{self.seats}"
+
+class Ticket(models.Model):
+    order = models.ForeignKey(GroupOrder, on_delete=models.CASCADE, related_name='tickets')
+    attendee_name = models.CharField(max_length=100)
+    attendee_email = models.EmailField()
+    
+    def __str__(self):
+        return f"{self.attendee_name} - {self.order}"
+
+# Analytics rollups (maintained by booking_app/analytics.py)
+
+class DailyConferenceStats(models.Model):
+    """Per-conference, per-day sales totals.
+
+    Bookings, revenue and cancellations are attributed to the day the
+    booking was paid for; ratings to the day the conference takes place.
+    """
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    bookings = models.IntegerField(default=0)
+    cancellations = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ratings_count = models.IntegerField(default=0)
+    ratings_sum = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('conference', 'day')
+        indexes = [models.Index(fields=['day'])]
+    
+    def __str__(self):
+        return f"{self.conference_id} - {self.day}"
+
+class DailyPaymentMethodStats(models.Model):
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='daily_payment_stats')
+    day = models.DateField()
+    payment_method = models.CharField(max_length=45)
+    payments = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ('conference', 'day', 'payment_method')
+        indexes = [models.Index(fields=['day'])]
+    
+    def __str__(self):
+        return f"{self.conference_id} - {self.day} - {self.payment_method}"
+
+class AnalyticsWatermark(models.Model):
+    """Last day fully rebuilt by the update_analytics command."""
+    name = models.CharField(max_length=45, unique=True)
+    day = models.DateField()
+    
+    def __str__(self):
+        return f"{self.name} - {self.day}"
+
+
+class OutboxMessage(models.Model):
+    """A notification written in the same transaction as the change it reports.
+
+    The dispatch_outbox command sends pending messages in batches; see
+    booking_app/outbox.py.
+    """
+    event = models.CharField(max_length=45)  # 'booking_confirmed', 'booking_cancelled', 'payment_failed'
+    dedupe_key = models.CharField(max_length=100, unique=True)
+    booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name='outbox_messages')
+    recipient = models.EmailField()
+    status = models.CharField(max_length=45, default='pending')  # 'pending', 'sending', 'sent', 'failed'
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField()  # While 'sending', when the claim on it lapses
+    last_error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    objects = ShardedManager()
+    
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+    
+    def __str__(self):
+        return f"{self.event} - {self.recipient} - {self.status}"
+
+
+# Archive of past conferences (filled by booking_app/archiving.py)
+#
+# Rows keep the primary keys they had in the live tables, so receipt links
+# and transaction ids stay valid after a booking is archived.
+
+class ArchivedBooking(models.Model):
+    booking_id = models.IntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_bookings')
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='archived_bookings')
+    time = models.TimeField()
+    status = models.CharField(max_length=45)
+    payment_status = models.CharField(max_length=45)
+    archived_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.conference.topic}"
+
+class ArchivedPayment(models.Model):
+    payment_id = models.IntegerField(primary_key=True)
+    booking = models.ForeignKey(ArchivedBooking, on_delete=models.CASCADE, related_name='payments')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    payment_method = models.CharField(max_length=45)
+    transaction_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)
+    payment_date = models.DateTimeField(db_index=True)
+    status = models.CharField(max_length=45)
+    gateway_charge_id = models.CharField(max_length=100, blank=True)
+    
+    def __str__(self):
+        return f"Payment for {self.booking}"
+
+class ArchivedFeedback(models.Model):
+    id = models.IntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_feedbacks')
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='archived_feedbacks')
+    comments = models.CharField(max_length=45)
+    rating = models.IntegerField()
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.conference.topic} - {self.rating}"
+
+
+# Booking ledger (written and read by booking_app/ledger.py)
+
+class BookingEvent(models.Model):
+    """One change to a conference's seats or revenue; rows are only ever added.
+
+    ``seats`` and ``amount`` are signed deltas: a booking holds seats, a
+    cancellation gives them back, a payment adds revenue and a refund takes
+    it away.
+    """
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='booking_events')
+    kind = models.CharField(max_length=45)  # 'booked', 'paid', 'cancelled', 'refunded'
+    booking_id = models.IntegerField(null=True, blank=True)  # Plain ids: events outlive archived bookings
+    order_id = models.IntegerField(null=True, blank=True)
+    seats = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    at = models.DateTimeField()
+    
+    class Meta:
+        indexes = [models.Index(fields=['conference', 'at']), models.Index(fields=['at'])]
+    
+    def __str__(self):
+        return f"{self.kind} - {self.conference_id} - {self.at}"
+
+class LedgerSnapshot(models.Model):
+    """A conference's seats held and net revenue from every event up to ``as_of``."""
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='ledger_snapshots')
+    as_of = models.DateTimeField()
+    seats = models.IntegerField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2)
+    
+    class Meta:
+        unique_together = ('conference', 'as_of')
+        indexes = [models.Index(fields=['as_of'])]
+    
+    def __str__(self):
+        return f"{self.conference_id} - {self.as_of}"
+
+
+# Venue check-in (written by booking_app/tickets.py)
+#
+# A ticket code is 'b<booking_id>' for a single booking or 't<ticket_id>' for
+# one seat of a group order.
+
+class CheckIn(models.Model):
+    """A ticket admitted at the door; a code is admitted at most once."""
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='check_ins')
+    code = models.CharField(max_length=20)
+    scanned_at = models.DateTimeField()  # Scanner's clock
+    device = models.CharField(max_length=45, blank=True)
+    batch = models.UUIDField()  # Tells a batch which of its rows it inserted
+    
+    class Meta:
+        unique_together = ('conference', 'code')
+        indexes = [models.Index(fields=['batch'])]
+    
+    def __str__(self):
+        return f"{self.code} - {self.conference_id} - {self.scanned_at}"
+
+class TicketRevocation(models.Model):
+    """A ticket cancelled after it was issued; scanners pull these by id."""
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='ticket_revocations')
+    code = models.CharField(max_length=20)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('conference', 'code')
+    
+    def __str__(self):
+        return f"{self.code} - {self.conference_id}"
+
+
+# "Attendees also booked" recommendations (built by booking_app/recommendations.py)
+
+class CoBooking(models.Model):
+    """How many attendees booked both conferences: one nonzero cell of the co-booking matrix.
+
+    The diagonal (``other`` is ``conference``) holds the conference's own
+    booking count.
+    """
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='co_bookings')
+    other = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='+')
+    count = models.IntegerField()
+    
+    class Meta:
+        unique_together = ('conference', 'other')
+    
+    def __str__(self):
+        return f"{self.conference_id} - {self.other_id} - {self.count}"
+
+class ConferenceNeighbour(models.Model):
+    """One of the conferences most often booked together with ``conference``."""
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='neighbours')
+    neighbour = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name='+')
+    rank = models.SmallIntegerField()  # 0 is the closest
+    score = models.FloatField()
+    co_bookings = models.IntegerField()
+    
+    class Meta:
+        unique_together = ('conference', 'rank')
+    
+    def __str__(self):
+        return f"{self.conference_id} - {self.rank} - {self.neighbour_id}"
+
+class RecommendationWatermark(models.Model):
+    """Last booking counted into the co-booking matrix."""
+    name = models.CharField(max_length=45, unique=True)
+    booking_id = models.IntegerField()
+    
+    def __str__(self):
+        return f"{self.name} - {self.booking_id}"
+
+
+# Dynamic pricing (built and read by booking_app/pricing.py)
+
+class PriceTable(models.Model):
+    """A conference's price at every occupancy tier, for each lead-time band from the day it starts."""
+    conference = models.OneToOneField(Conference, on_delete=models.CASCADE, primary_key=True, related_name='price_table')
+    table = models.JSONField()
+    computed_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.conference_id} - {self.computed_at}"
+
+
+# Conference deletion (see booking_app/deletion.py)
+#
+# Rows outlive the conference as a record of who deleted it and when.
+
+class ConferenceDeletion(models.Model):
+    """A conference queued for deletion in batches, and how far it got."""
+    conference_id = models.IntegerField(unique=True)
+    topic = models.CharField(max_length=45)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    requested_at = models.DateTimeField(auto_now_add=True)
+    step = models.CharField(max_length=45, blank=True)  # Table being emptied
+    rows_deleted = models.PositiveBigIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.conference_id} - {self.topic}"
@@ -0,0 +1,141 @@
+# booking_app/outbox.py
+"""Transactional outbox for booking notifications.
+
+Views call ``enqueue()`` inside the same transaction that changes the
+Booking/Payment rows, so a notification exists if and only if the change
+committed. ``dispatch_batch()`` (run by the dispatch_outbox command) sends
+pending messages over a single email connection per batch, retrying
+failures with exponential backoff. A booking's messages are kept on its
+shard (see booking_app/sharding.py), so they commit with the booking.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import sharding
+from .models import OutboxMessage
+from .tickets import booking_token
+
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 30
+MAX_BACKOFF_SECONDS = 3600
+SEND_LEASE_SECONDS = 300
+
+
+def enqueue(event, booking):
+    """Queue ``event`` for ``booking``; a repeat of the same event is ignored.
+
+    A reopened booking (see booking_view) is notified again for each
+    payment attempt.
+    """
+    dedupe_key = f'{event}:{booking.booking_id}'
+    attempt = booking.payments.count()
+    if attempt > 1:
+        dedupe_key += f':{attempt}'
+    message, _ = OutboxMessage.objects.for_pk(booking.booking_id).get_or_create(
+        dedupe_key=dedupe_key,
+        defaults={
+            'event': event,
+            'booking': booking,
+            'recipient': booking.user.email,
+            'next_attempt_at': timezone.now(),
+        },
+    )
+    return message
+
+
+def backoff(attempts):
+    return timedelta(seconds=min(BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS))
+
+
+def build_email(message):
+    context = {'booking': message.booking, 'message': message, 'ticket_token': booking_token(message.booking)}
+    subject = render_to_string(f'booking_app/emails/{message.event}_subject.txt', context)
+    body = render_to_string(f'booking_app/emails/{message.event}.txt', context)
+    return EmailMessage(
+        subject=' '.join(subject.split()),
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[message.recipient],
+    )
+
+
+def dispatch_batch(batch_size=100):
+    """Send up to ``batch_size`` due messages from each shard. Returns ``(sent, failed)``.
+
+    Messages are claimed in a short transaction, with SKIP LOCKED where
+    the database supports it, that marks them 'sending' until
+    SEND_LEASE_SECONDS from now. They are sent after it commits, so no row
+    lock is held while waiting on the mail server, and the outcome is
+    recorded afterwards. Several workers can drain the outbox without
+    sending anything twice; a worker that dies mid-batch leaves its
+    messages to be claimed again once the lease runs out, so they may
+    then be sent twice.
+    """
+    sent = failed = 0
+    for alias in sharding.shards():
+        shard_sent, shard_failed = _dispatch_shard(alias, batch_size)
+        sent += shard_sent
+        failed += shard_failed
+    return sent, failed
+
+
+def claim_due(alias, batch_size, now=None):
+    """Mark up to ``batch_size`` due messages on ``alias`` 'sending' and return them."""
+    now = now or timezone.now()
+    with transaction.atomic(using=alias):
+        batch = list(
+            OutboxMessage.objects.using(alias).select_for_update(skip_locked=True)
+            .filter(status__in=('pending', 'sending'), next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        for message in batch:
+            message.status = 'sending'
+            message.attempts += 1
+            message.next_attempt_at = now + timedelta(seconds=SEND_LEASE_SECONDS)
+        OutboxMessage.objects.using(alias).bulk_update(batch, ['status', 'attempts', 'next_attempt_at'])
+    return batch
+
+
+def _dispatch_shard(alias, batch_size):
+    batch = claim_due(alias, batch_size)
+    if not batch:
+        return 0, 0
+    # Conferences and users are on default, which a shard cannot join to
+    prefetch_related_objects(batch, 'booking', 'booking__conference', 'booking__user')
+
+    delivered = []
+    errors = {}
+    connection = get_connection()
+    connection.open()
+    try:
+        for message in batch:
+            if message.booking is None:
+                # Deleted with its conference or user; no retry brings it back
+                errors[message] = ('Booking no longer exists', True)
+                continue
+            try:
+                connection.send_messages([build_email(message)])
+            except Exception as exc:
+                errors[message] = (str(exc), message.attempts >= MAX_ATTEMPTS)
+            else:
+                delivered.append(message.pk)
+    finally:
+        connection.close()
+
+    # Only messages still under this worker's claim are recorded
+    claimed = OutboxMessage.objects.using(alias).filter(status='sending')
+    claimed.filter(pk__in=delivered).update(status='sent', sent_at=timezone.now(), last_error='')
+    now = timezone.now()
+    for message, (error, dead) in errors.items():
+        claimed.filter(pk=message.pk, attempts=message.attempts).update(
+            status='failed' if dead else 'pending',
+            next_attempt_at=now if dead else now + backoff(message.attempts),
+            last_error=error[:255],
+        )
+    return len(delivered), len(errors)
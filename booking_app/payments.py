@@ -0,0 +1,159 @@
+# booking_app/payments.py
+"""Asynchronous payment capture.
+
+The booking views only write a pending Payment; no gateway call happens
+inside the request. ``process_batch()`` (run by the process_payments
+command) claims due payments, marks them 'processing' and submits them to
+the gateway outside any transaction, on a small thread pool. The gateway
+reports each outcome to ``payment_webhook_view``, which calls
+``settle_payment()`` to finish the Payment and its Booking or GroupOrder.
+
+At most ``MAX_IN_FLIGHT`` payments wait on the gateway at once, over all
+shards (see booking_app/sharding.py). Submits
+that fail are retried with backoff. A payment whose webhook never arrives
+is resubmitted after ``CAPTURE_TIMEOUT`` seconds, which is safe because
+the gateway dedupes on the transaction id.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import ledger, outbox, sharding
+from .gateway import callback_url, gateway_settings, get_gateway, verify
+from .inventory import release_seats
+from .models import Booking, GroupOrder, Payment
+
+
+def queue_capture(**fields):
+    """Create a pending Payment that the next process_batch() will submit."""
+    return Payment.objects.create(status='pending', next_attempt_at=timezone.now(), **fields)
+
+
+def claim_due(now=None):
+    """Mark due payments 'processing' and return them, within the in-flight limit."""
+    config = gateway_settings()
+    now = now or timezone.now()
+    stale = now - timedelta(seconds=config['CAPTURE_TIMEOUT'])
+    in_flight = sum(sharding.fan_out(
+        lambda alias: [Payment.objects.using(alias).filter(status='processing', submitted_at__gt=stale).count()]
+    ))
+    slots = config['MAX_IN_FLIGHT'] - in_flight
+    batch = []
+    for alias in sharding.shards():
+        if len(batch) >= slots:
+            break
+        with transaction.atomic(using=alias):
+            claimed = list(
+                Payment.objects.using(alias).select_for_update(skip_locked=True)
+                .filter(Q(status='pending', next_attempt_at__lte=now) | Q(status='processing', submitted_at__lte=stale))
+                .order_by('next_attempt_at')[:slots - len(batch)]
+            )
+            for payment in claimed:
+                payment.status = 'processing'
+                payment.submitted_at = now
+                payment.attempts += 1
+            Payment.objects.using(alias).bulk_update(claimed, ['status', 'submitted_at', 'attempts'])
+        batch += claimed
+    return batch
+
+
+def _submit(gateway, payment, url):
+    try:
+        return payment, gateway.submit(payment, url), None
+    except Exception as exc:
+        return payment, None, exc
+
+
+def process_batch():
+    """Submit due payments to the gateway. Returns ``(submitted, retried, failed)``."""
+    batch = claim_due()
+    if not batch:
+        return 0, 0, 0
+
+    config = gateway_settings()
+    gateway = get_gateway()
+    url = callback_url()
+    with ThreadPoolExecutor(max_workers=config['CONCURRENCY']) as pool:
+        results = list(pool.map(lambda payment: _submit(gateway, payment, url), batch))
+
+    submitted = retried = failed = 0
+    now = timezone.now()
+    for payment, charge_id, error in results:
+        if error is None:
+            submitted += 1
+            # The webhook may already have settled it; only fill in the charge id
+            Payment.objects.for_pk(payment.pk).filter(pk=payment.pk, status='processing').update(gateway_charge_id=charge_id)
+        elif payment.attempts >= config['MAX_ATTEMPTS']:
+            failed += 1
+            settle_payment(payment.pk, succeeded=False, error=str(error))
+        else:
+            retried += 1
+            Payment.objects.for_pk(payment.pk).filter(pk=payment.pk, status='processing').update(
+                status='pending',
+                next_attempt_at=now + outbox.backoff(payment.attempts),
+                last_error=str(error)[:255],
+            )
+    return submitted, retried, failed
+
+
+def settle_payment(payment_id, succeeded, charge_id='', error=''):
+    """Record the gateway's verdict on a payment and on what it pays for.
+
+    Repeated webhooks for a settled payment change nothing. A booking or
+    group order cancelled while its capture was in flight stays cancelled;
+    the captured payment then shows up as a refund owed in the finance
+    report and as a refund in the booking ledger.
+    """
+    alias = sharding.shard_for_pk(payment_id)
+    with sharding.atomic(alias):
+        payment = Payment.objects.using(alias).select_for_update().get(pk=payment_id)
+        if payment.status in ('completed', 'failed'):
+            return payment
+        payment.status = 'completed' if succeeded else 'failed'
+        payment.gateway_charge_id = charge_id or payment.gateway_charge_id
+        payment.last_error = error[:255]
+        payment.save()
+
+        if payment.order_id:
+            target = GroupOrder.objects.select_for_update().get(pk=payment.order_id)
+            seats = target.seats
+        else:
+            target = Booking.objects.using(alias).select_for_update().get(pk=payment.booking_id)
+            seats = 1
+        target.payment_status = payment.status
+        if succeeded:
+            ledger.record('paid', target, amount=payment.amount)
+            if target.status == 'cancelled':
+                ledger.record('refunded', target, amount=-payment.amount)
+        if target.status == 'pending':
+            target.status = 'confirmed' if succeeded else 'cancelled'
+            if not succeeded:
+                release_seats(target.conference_id, seats)
+                ledger.record('cancelled', target, seats=-seats)
+        target.save()
+
+        if payment.booking_id and target.status == 'confirmed':
+            outbox.enqueue('booking_confirmed', target)
+        elif payment.booking_id and not succeeded:
+            outbox.enqueue('payment_failed', target)
+    return payment
+
+
+def handle_gateway_event(body, signature):
+    """Verify and apply one webhook body. Returns the settled Payment."""
+    event = verify(body, signature)
+    # The reference does not say which shard the payment is on
+    payment_ids = sharding.fan_out(
+        lambda alias: Payment.objects.using(alias).filter(transaction_id=event['reference']).values_list('pk', flat=True)[:1]
+    )
+    if not payment_ids:
+        raise Payment.DoesNotExist(f"No payment with transaction id {event['reference']}")
+    return settle_payment(
+        payment_ids[0],
+        succeeded=event['status'] == 'succeeded',
+        charge_id=event.get('charge_id', ''),
+        error=event.get('error', ''),
+    )
@@ -0,0 +1,180 @@
+# booking_app/pricing.py
+"""Demand-based prices, from precomputed price tables, and signed quotes.
+
+A seat costs the conference's base ``price`` times two multipliers: one
+for how full the conference is (PRICING_OCCUPANCY_TIERS) and one for how
+soon it starts (PRICING_LEAD_TIME_TIERS). Nothing is computed per request.
+``reprice()`` builds each conference's price table in bulk: the price at
+every occupancy tier, for every lead-time band from the day that band
+starts. Tables are stored as PriceTable rows and cached, so pricing a seat
+is a cache read and a bisect. A conference that fills past a threshold or
+enters a new band moves to the next cell of its table without anything
+being recomputed. A table only goes stale when the conference's price,
+capacity or date change, which reprices it (see the receivers below), or
+when the tiers in settings change; run the update_prices command after
+deploying new tiers, and nightly to pick up conferences saved in bulk.
+
+The booking pages hand the visitor a quote: the price, signed together
+with their user and the conference, valid for PRICE_QUOTE_SECONDS. The
+booking charges the quoted price once the signature checks out, which
+needs no query, so a seat that tips the conference into the next tier
+while the visitor fills in the form does not change what they pay. An
+expired or tampered quote is refused and the form shows a new price.
+"""
+import bisect
+import math
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Conference, PriceTable
+
+QUOTE_SALT = 'booking_app.pricing.quote'
+TABLE_TIMEOUT = 24 * 3600
+BATCH_SIZE = 2000
+CENT = Decimal('0.01')
+
+
+class InvalidQuote(Exception):
+    pass
+
+
+def occupancy_tiers():
+    return getattr(settings, 'PRICING_OCCUPANCY_TIERS', [(0, 1)])
+
+
+def lead_time_tiers():
+    return getattr(settings, 'PRICING_LEAD_TIME_TIERS', [(0, 1)])
+
+
+def quote_seconds():
+    return getattr(settings, 'PRICE_QUOTE_SECONDS', 900)
+
+
+def table_key(conference_id):
+    return f'price_table:{conference_id}'
+
+
+def build_table(price, capacity, day):
+    """The price table of one conference, in the form PriceTable stores.
+
+    ``{'seats': [...], 'bands': [[first day, [price, ...]], ...]}``: the
+    seats taken at which each occupancy tier starts, and for each lead-time
+    band, earliest first, the ordinal of its first day (None for the first
+    band) and its price at every tier. A conference without a date has one
+    band, at the multiplier of the furthest lead time.
+    """
+    occupancy = sorted(occupancy_tiers())
+    leads = sorted(lead_time_tiers(), reverse=True)
+    if day is None:
+        leads = leads[:1]
+    bands = []
+    previous_days = None
+    for days, lead_multiplier in leads:
+        start = None if previous_days is None else (day - timedelta(days=previous_days - 1)).toordinal()
+        prices = [
+            str((Decimal(price) * Decimal(str(lead_multiplier)) * Decimal(str(multiplier))).quantize(CENT, ROUND_HALF_UP))
+            for _, multiplier in occupancy
+        ]
+        bands.append([start, prices])
+        previous_days = days
+    return {'seats': [math.ceil(share * capacity) for share, _ in occupancy], 'bands': bands}
+
+
+def price_from_table(table, seats_taken, today):
+    """The price of the next seat when ``seats_taken`` are taken on ``today``."""
+    day = today.toordinal()
+    prices = table['bands'][0][1]
+    for start, band_prices in table['bands'][1:]:
+        if start > day:
+            break
+        prices = band_prices
+    tier = max(bisect.bisect_right(table['seats'], seats_taken) - 1, 0)
+    return Decimal(prices[tier])
+
+
+def reprice(conference_ids=None):
+    """Rebuild and cache the price tables of ``conference_ids``, or of every upcoming conference.
+
+    Returns the number of tables written.
+    """
+    conferences = Conference.objects.all()
+    if conference_ids is None:
+        conferences = conferences.filter(
+            Q(date__gte=timezone.localdate()) | Q(date__isnull=True), archived_at__isnull=True, deleting_at__isnull=True,
+        )
+    else:
+        conferences = conferences.filter(pk__in=conference_ids)
+    tables = {
+        pk: build_table(price, capacity, day)
+        for pk, price, capacity, day in conferences.values_list('pk', 'price', 'capacity', 'date').iterator()
+    }
+    now = timezone.now()
+    PriceTable.objects.bulk_create(
+        (PriceTable(conference_id=pk, table=table, computed_at=now) for pk, table in tables.items()),
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['conference'],
+        update_fields=['table', 'computed_at'],
+    )
+    entries = {table_key(pk): table for pk, table in tables.items()}
+    transaction.on_commit(lambda: cache.set_many(entries, TABLE_TIMEOUT))
+    return len(tables)
+
+
+def price_table(conference_id):
+    """A conference's price table: from the cache, else the stored row, else built from the conference."""
+    table = cache.get(table_key(conference_id))
+    if table is None:
+        table = PriceTable.objects.filter(conference_id=conference_id).values_list('table', flat=True).first()
+        if table is None:
+            # Not repriced yet; reads never write, so leave storing it to reprice()
+            price, capacity, day = Conference.objects.values_list('price', 'capacity', 'date').get(pk=conference_id)
+            table = build_table(price, capacity, day)
+        cache.add(table_key(conference_id), table, TABLE_TIMEOUT)
+    return table
+
+
+def current_price(conference_id, seats_taken, today=None):
+    return price_from_table(price_table(conference_id), seats_taken, today or timezone.localdate())
+
+
+def issue_quote(user_id, conference_id, price):
+    """A signed quote of ``price`` for ``user_id`` booking ``conference_id``."""
+    return signing.dumps([user_id, conference_id, str(price)], salt=QUOTE_SALT, compress=True)
+
+
+def read_quote(token, user_id, conference_id):
+    """The price quoted to ``user_id`` for ``conference_id``. Raises InvalidQuote."""
+    try:
+        quoted_user, quoted_conference, price = signing.loads(
+            token or '', salt=QUOTE_SALT, max_age=quote_seconds(),
+        )
+    except signing.SignatureExpired:
+        raise InvalidQuote('Your price quote has expired.')
+    except (signing.BadSignature, TypeError, ValueError):
+        raise InvalidQuote('Your price quote is not valid.')
+    if (quoted_user, quoted_conference) != (user_id, conference_id):
+        raise InvalidQuote('Your price quote is for another booking.')
+    return Decimal(price)
+
+
+@receiver(post_save, sender=Conference)
+def conference_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        pk = instance.pk
+        transaction.on_commit(lambda: reprice([pk]))
+
+
+@receiver(post_delete, sender=Conference)
+def conference_deleted(sender, instance, **kwargs):
+    key = table_key(instance.pk)
+    transaction.on_commit(lambda: cache.delete(key))
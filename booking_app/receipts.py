@@ -0,0 +1,137 @@
+# booking_app/receipts.py
+"""PDF receipts, drawn with ReportLab.
+
+ReportLab (and the Pillow modules it pulls in) takes longer to import than
+the rest of the app together, and only receipt downloads need it, so it is
+imported on the first download rather than when a worker boots. Keep it out
+of module-level imports here and in anything the URLconf loads;
+``python manage.py benchmark_startup`` fails if a worker boot imports it.
+"""
+import io
+
+
+def render_receipt_pdf(booking, payment):
+    """Return the receipt for ``booking`` and its completed ``payment`` as PDF bytes."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    
+    # Create a file-like buffer to receive PDF data
+    buffer = io.BytesIO()
+    
+    # Create the PDF object, using the buffer as its "file."
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    
+    # Container for the 'Flowable' objects
+    elements = []
+    
+    # Styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=30,
+        alignment=1  # Center alignment
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=12,
+        spaceAfter=10
+    )
+    
+    # Add content
+    elements.append(Paragraph("Payment Receipt", title_style))
+    elements.append(Spacer(1, 12))
+    
+    # Conference Details
+    elements.append(Paragraph("Conference Details", heading_style))
+    conference_data = [
+        ["Conference:", booking.conference.topic],
+        ["Date:", booking.conference.date.strftime("%B %d, %Y") if booking.conference.date else "Not specified"],
+        ["Time:", f"{booking.conference.time_start.strftime('%I:%M %p')} - {booking.conference.time_end.strftime('%I:%M %p')}"],
+    ]
+    
+    conference_table = Table(conference_data, colWidths=[1.5*inch, 4*inch])
+    conference_table.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ]))
+    elements.append(conference_table)
+    elements.append(Spacer(1, 12))
+    
+    # Payment Information
+    elements.append(Paragraph("Payment Information", heading_style))
+    payment_data = [
+        ["Receipt #:", payment.transaction_id],
+        ["Date:", payment.payment_date.strftime("%B %d, %Y %H:%M")],
+        ["Method:", payment.payment_method.title()],
+        ["Status:", "Paid"],
+    ]
+    
+    payment_table = Table(payment_data, colWidths=[1.5*inch, 4*inch])
+    payment_table.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ]))
+    elements.append(payment_table)
+    elements.append(Spacer(1, 12))
+    
+    # Attendee Information
+    elements.append(Paragraph("Attendee Information", heading_style))
+    attendee_data = [
+        ["Name:", f"{booking.user.first_name} {booking.user.last_name}"],
+        ["Email:", booking.user.email],
+    ]
+    
+    if booking.user.phone:
+        attendee_data.append(["Phone:", str(booking.user.phone)])
+    
+    attendee_table = Table(attendee_data, colWidths=[1.5*inch, 4*inch])
+    attendee_table.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ]))
+    elements.append(attendee_table)
+    elements.append(Spacer(1, 12))
+    
+    # Amount Details
+    elements.append(Paragraph("Amount Details", heading_style))
+    amount_data = [
+        ["Description", "Amount"],
+        [f"Conference Registration - {booking.conference.topic}", f"${payment.amount}"],
+        ["Total", f"${payment.amount}"],
+    ]
+    
+    amount_table = Table(amount_data, colWidths=[4*inch, 1.5*inch])
+    amount_table.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    elements.append(amount_table)
+    
+    # Build the PDF
+    doc.build(elements)
+    
+    # Get the value of the BytesIO buffer and write it to the response
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
@@ -0,0 +1,46 @@
+# booking_app/recommendations.py
+"""Reads for "attendees also booked" recommendations.
+
+The ranked neighbours of each conference are precomputed by
+booking_app/co_bookings.py, so a page reads them with one query on the
+(conference, rank) index. Only conferences that are still to come are
+recommended.
+"""
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import ConferenceNeighbour
+
+SHOWN = 5
+
+
+def _upcoming():
+    return (Q(neighbour__date__gte=timezone.localdate()) | Q(neighbour__date__isnull=True)) & Q(
+        neighbour__archived_at__isnull=True, neighbour__deleting_at__isnull=True,
+    )
+
+
+def also_booked(conference_id, exclude=(), limit=SHOWN):
+    """Upcoming conferences most often booked together with ``conference_id``, best first."""
+    neighbours = (
+        ConferenceNeighbour.objects.filter(_upcoming(), conference_id=conference_id)
+        .select_related('neighbour').order_by('rank')
+    )
+    return [row.neighbour for row in neighbours if row.neighbour_id not in exclude][:limit]
+
+
+def recommended_for(conference_ids, exclude=(), limit=SHOWN):
+    """Upcoming conferences closest to all of ``conference_ids`` together, leaving those out.
+
+    Each neighbour scores the sum of its similarity to the given conferences.
+    Returns dicts with ``slug``, ``topic``, ``date`` and ``score``.
+    """
+    if not conference_ids:
+        return []
+    return list(
+        ConferenceNeighbour.objects.filter(_upcoming(), conference_id__in=conference_ids)
+        .exclude(neighbour_id__in={*conference_ids, *exclude})
+        .values(slug=F('neighbour__slug'), topic=F('neighbour__topic'), date=F('neighbour__date'))
+        .annotate(score=Sum('score'))
+        .order_by('-score', 'slug')[:limit]
+    )
@@ -0,0 +1,254 @@
+# booking_app/reporting.py
+"""Finance reconciliation reports computed with NumPy.
+
+Columns are streamed out of the database in chunks (the SQL comes from a
+``values_list`` queryset) and stacked into NumPy arrays, then every report is a handful of vectorized
+group-bys over those arrays. Money never goes through float: amounts are
+converted to integer cents in SQL and summed as int64. Bookings and payments
+of archived conferences are read from the archive tables alongside the live
+ones, which are read from every shard.
+"""
+import csv
+import os
+from decimal import Decimal
+
+import numpy as np
+from django.db import connections
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+from . import sharding
+from .models import ArchivedBooking, ArchivedPayment, Booking, Conference, GroupOrder, Payment
+
+CHUNK_SIZE = 50000
+
+# Lower bounds of the price bands, in dollars
+PRICE_BANDS = [0, 50, 100, 200, 500]
+
+
+def cents(field):
+    """SQL expression for a DecimalField as integer cents."""
+    return Cast(Round(F(field) * 100), BigIntegerField())
+
+
+def fetch_columns(queryset, columns, chunk_size=CHUNK_SIZE):
+    """Load ``columns`` ({name: dtype}) of a queryset into NumPy arrays.
+
+    The ORM only compiles the SQL; rows are read with ``fetchmany`` straight
+    into arrays so no per-row model or converter work happens in Python.
+    """
+    query = queryset.values_list(*columns).query
+    # SQL puts plain fields before annotations, whatever order was asked for
+    names = [*query.extra_select, *query.values_select, *query.annotation_select]
+    sql, params = query.sql_with_params()
+    chunks = {name: [] for name in names}
+
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for name, values in zip(names, zip(*rows)):
+                chunks[name].append(np.array(values, dtype=columns[name]))
+
+    return {
+        name: np.concatenate(parts) if parts else np.array([], dtype=columns[name])
+        for name, parts in chunks.items()
+    }
+
+
+def concat_columns(*tables):
+    """Stack column dicts with the same columns, as from ``fetch_columns``."""
+    return {name: np.concatenate([table[name] for table in tables]) for name in tables[0]}
+
+
+def group_sum(codes, values, groups):
+    """Exact integer sum of ``values`` per group code."""
+    totals = np.zeros(groups, dtype=np.int64)
+    np.add.at(totals, codes, values)
+    return totals
+
+
+def lookup(sorted_ids, ids):
+    """Positions of ``ids`` in ``sorted_ids``, and a mask of the ids found there.
+
+    ``np.searchsorted`` gives an id that is missing (a deleted conference or
+    order, or NaN) the position of the next one up, or one past the end, so
+    only the masked positions may be used.
+    """
+    position = np.searchsorted(sorted_ids, ids)
+    found = position < len(sorted_ids)
+    found[found] = sorted_ids[position[found]] == ids[found]
+    return position, found
+
+
+def to_money(value):
+    return Decimal(int(value)).scaleb(-2)
+
+
+def load_data(chunk_size=CHUNK_SIZE):
+    conferences = fetch_columns(
+        Conference.objects.annotate(price_cents=cents('price')).order_by('conference_id'),
+        {'conference_id': np.int64, 'topic': object, 'capacity': np.int64, 'price_cents': np.int64},
+        chunk_size,
+    )
+    booking_columns = {'conference_id': np.int64, 'status': object}
+    bookings = concat_columns(
+        fetch_columns(ArchivedBooking.objects.all(), booking_columns, chunk_size),
+        *sharding.fan_out(lambda alias: [fetch_columns(Booking.objects.using(alias), booking_columns, chunk_size)]),
+    )
+    orders = fetch_columns(
+        GroupOrder.objects.order_by('pk'),
+        {'order_id': np.int64, 'conference_id': np.int64, 'seats': np.int64, 'status': object},
+        chunk_size,
+    )
+    payment_columns = {
+        'conference_id': np.int64,
+        'booking_status': object,
+        'payment_method': object,
+        'status': object,
+        'amount_cents': np.int64,
+    }
+
+    def shard_payments(alias):
+        payments = Payment.objects.using(alias).annotate(amount_cents=cents('amount'))
+        booked = fetch_columns(
+            payments.filter(booking__isnull=False).annotate(
+                conference_id=F('booking__conference_id'),
+                booking_status=F('booking__status'),
+            ),
+            payment_columns,
+            chunk_size,
+        )
+        # A group order's payments are on the shard, the order itself on default
+        ordered = fetch_columns(
+            payments.filter(order__isnull=False),
+            {'order_id': np.int64, 'payment_method': object, 'status': object, 'amount_cents': np.int64},
+            chunk_size,
+        )
+        return [booked, ordered]
+
+    live = sharding.fan_out(shard_payments)
+    order_payments = concat_columns(*live[1::2])
+    position, found = lookup(orders['order_id'], order_payments['order_id'])
+    position = position[found]
+    payments = concat_columns(
+        fetch_columns(
+            ArchivedPayment.objects.annotate(
+                amount_cents=cents('amount'),
+                conference_id=F('booking__conference_id'),
+                booking_status=F('booking__status'),
+            ),
+            payment_columns,
+            chunk_size,
+        ),
+        *live[::2],
+        {
+            'conference_id': orders['conference_id'][position],
+            'booking_status': orders['status'][position],
+            'payment_method': order_payments['payment_method'][found],
+            'status': order_payments['status'][found],
+            'amount_cents': order_payments['amount_cents'][found],
+        },
+    )
+    return conferences, bookings, orders, payments
+
+
+def build_report(chunk_size=CHUNK_SIZE):
+    """Return the reconciliation tables as ``{name: [row dict, ...]}``."""
+    conferences, bookings, orders, payments = load_data(chunk_size)
+    conference_ids = conferences['conference_id']
+    conference_count = len(conference_ids)
+
+    # Rows of conferences deleted since are left out of the per-conference figures
+    booking_position, booking_found = lookup(conference_ids, bookings['conference_id'])
+    confirmed = booking_found & (bookings['status'] == 'confirmed')
+    confirmed_seats = np.bincount(booking_position[confirmed], minlength=conference_count)
+    order_position, order_found = lookup(conference_ids, orders['conference_id'])
+    confirmed_orders = order_found & (orders['status'] == 'confirmed')
+    confirmed_seats += group_sum(order_position[confirmed_orders], orders['seats'][confirmed_orders], conference_count)
+
+    # Completed payments are revenue; those whose booking or group order was
+    # cancelled are refunds owed
+    position, found = lookup(conference_ids, payments['conference_id'])
+    completed = payments['status'] == 'completed'
+    cancelled = payments['booking_status'] == 'cancelled'
+    paid_cents = np.where(completed, payments['amount_cents'], 0)
+    refund_cents = np.where(completed & cancelled, payments['amount_cents'], 0)
+
+    revenue = group_sum(position[found], paid_cents[found], conference_count)
+    refunds = group_sum(position[found], refund_cents[found], conference_count)
+    capacity = conferences['capacity']
+    occupancy_pct = np.divide(
+        confirmed_seats * 100.0, capacity,
+        out=np.zeros(conference_count), where=capacity > 0,
+    )
+
+    occupancy = [
+        {
+            'conference_id': int(conference_ids[i]),
+            'topic': conferences['topic'][i],
+            'capacity': int(capacity[i]),
+            'confirmed': int(confirmed_seats[i]),
+            'occupancy_pct': round(float(occupancy_pct[i]), 1),
+            'revenue': to_money(revenue[i]),
+            'refunds': to_money(refunds[i]),
+            'net': to_money(revenue[i] - refunds[i]),
+        }
+        for i in range(conference_count)
+    ]
+
+    methods, method_codes = np.unique(payments['payment_method'].astype(str), return_inverse=True)
+    method_payments = np.bincount(method_codes[completed], minlength=len(methods))
+    method_revenue = group_sum(method_codes, paid_cents, len(methods))
+    method_refunds = group_sum(method_codes, refund_cents, len(methods))
+    revenue_by_method = [
+        {
+            'payment_method': str(methods[i]),
+            'payments': int(method_payments[i]),
+            'revenue': to_money(method_revenue[i]),
+            'refunds': to_money(method_refunds[i]),
+            'net': to_money(method_revenue[i] - method_refunds[i]),
+        }
+        for i in range(len(methods))
+    ]
+
+    bounds = np.array(PRICE_BANDS, dtype=np.int64) * 100
+    band = np.clip(np.digitize(conferences['price_cents'], bounds) - 1, 0, None)
+    band_count = len(PRICE_BANDS)
+    band_conferences = np.bincount(band, minlength=band_count)
+    band_confirmed = np.bincount(band, weights=confirmed_seats, minlength=band_count).astype(np.int64)
+    band_revenue = group_sum(band, revenue, band_count)
+    band_refunds = group_sum(band, refunds, band_count)
+    price_bands = [
+        {
+            'band': f'${low}+' if i == band_count - 1 else f'${low}-{PRICE_BANDS[i + 1]}',
+            'conferences': int(band_conferences[i]),
+            'confirmed': int(band_confirmed[i]),
+            'revenue': to_money(band_revenue[i]),
+            'refunds': to_money(band_refunds[i]),
+        }
+        for i, low in enumerate(PRICE_BANDS)
+    ]
+
+    return {
+        'occupancy': occupancy,
+        'revenue_by_method': revenue_by_method,
+        'price_bands': price_bands,
+    }
+
+
+def export_csv(report, directory):
+    """Write each report table to ``<directory>/<name>.csv`` and return the paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, rows in report.items():
+        path = os.path.join(directory, f'{name}.csv')
+        with open(path, 'w', newline='') as handle:
+            if rows:
+                writer = csv.DictWriter(handle, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+        paths.append(path)
+    return paths
@@ -0,0 +1,81 @@
+# booking_app/routers.py
+"""Send read-only page views to database replicas.
+
+ReplicaRoutingMiddleware marks GET/HEAD requests to the URL names listed in
+REPLICA_READ_VIEWS as replica-safe, and PrimaryReplicaRouter then sends
+their reads to one of REPLICA_DATABASES. Everything else, including all
+writes, stays on the ``default`` (primary) database.
+
+After any write request the browser is pinned to the primary for
+REPLICA_PIN_SECONDS with a cookie, so users always see their own bookings,
+cancellations and feedback even if the replicas are lagging.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_state = threading.local()
+
+
+def replicas_enabled():
+    return bool(getattr(settings, 'REPLICA_DATABASES', []))
+
+
+@contextmanager
+def primary_db():
+    """Force reads in the block onto the primary, e.g. for seat-inventory checks."""
+    previous = getattr(_state, 'use_replica', False)
+    _state.use_replica = False
+    try:
+        yield
+    finally:
+        _state.use_replica = previous
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'use_replica', False) and replicas_enabled():
+            return random.choice(settings.REPLICA_DATABASES)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {'default', *getattr(settings, 'REPLICA_DATABASES', [])}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.use_replica = False
+
+        if request.method not in SAFE_METHODS and replicas_enabled():
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+            and request.resolver_match.view_name in getattr(settings, 'REPLICA_READ_VIEWS', ())
+        ):
+            _state.use_replica = True
@@ -0,0 +1,224 @@
+# booking_app/sharding.py
+"""Horizontal sharding of bookings, payments and feedback by conference.
+
+With BOOKING_SHARDS set to several aliases from DATABASES, every Booking,
+Payment, Feedback and OutboxMessage of a conference is stored on
+``BOOKING_SHARDS[conference_id % len(BOOKING_SHARDS)]``. A conference's
+booking traffic then only writes to one database, and the write load of
+the site spreads over all of them. Users, conferences, group orders, the
+ledger and the rollups stay on ``default``. With BOOKING_SHARDS empty
+``default`` is the only shard and nothing changes.
+
+ShardRouter places the rows: a new row goes to its conference's shard, a
+row read from a shard keeps using it, and relations followed from a
+sharded row to any other model read ``default``. The sharded models'
+managers are ShardedManagers, so code that knows the conference or the
+primary key goes straight to the right database::
+
+    Booking.objects.for_conference(conference_id).filter(user=user)
+    Booking.objects.for_pk(booking_id).get(pk=booking_id)
+
+A primary key says which shard its row is on: shard i hands out ids from
+i * BOOKING_SHARD_ID_SPAN up (the prepare_shards command sets this), so
+receipt links and payment ids need no lookup table. Reads that span
+conferences, like a user's bookings, go to every shard at once with
+``fan_out()``.
+
+Joins cannot cross databases: queries on the sharded models must not
+select_related or filter across to conferences or users, and load those
+with prefetch_related instead. The foreign keys from the sharded tables to
+``default`` are not enforced by the database.
+
+The finance report, analytics rebuilds, ledger openings and the
+co-booking matrix read every shard with ``fan_out()``. A group order is on
+``default`` while its payments are on the shards, so those readers look
+orders up by id rather than joining them. The admin changelists of the
+sharded models show one shard at a time. Deleting a user deletes their
+rows on the other shards too (see booking_app/models.py), and conferences
+are deleted and archived on their shard and on ``default``
+(booking_app/deletion.py, archiving.py). Rows written before
+BOOKING_SHARDS was set are not moved to their shards.
+"""
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, models, transaction
+
+SHARDED_MODELS = ('booking', 'payment', 'feedback', 'outboxmessage')
+MAX_FAN_OUT_WORKERS = 16
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def shards():
+    return list(getattr(settings, 'BOOKING_SHARDS', None) or ['default'])
+
+
+def sharding_enabled():
+    return shards() != ['default']
+
+
+def id_span():
+    return getattr(settings, 'BOOKING_SHARD_ID_SPAN', 100_000_000)
+
+
+def shard_for(conference_id):
+    """The alias holding a conference's bookings, payments and feedback."""
+    aliases = shards()
+    return aliases[int(conference_id) % len(aliases)]
+
+
+def shard_for_pk(pk):
+    """The alias holding the sharded row with primary key ``pk``."""
+    aliases = shards()
+    return aliases[int(pk) // id_span() % len(aliases)]
+
+
+def is_sharded(model):
+    """Whether ``model``, a model class or instance, is split between the shards."""
+    return model._meta.app_label == 'booking_app' and model._meta.model_name in SHARDED_MODELS
+
+
+def shard_of(instance):
+    """The alias a sharded row was read from, or belongs on if it is new."""
+    # Assigning a user to a new row already set its db to default
+    if instance._state.db and not instance._state.adding:
+        return instance._state.db
+    if getattr(instance, 'conference_id', None) is not None:
+        return shard_for(instance.conference_id)
+    if getattr(instance, 'booking_id', None) is not None:
+        return shard_for_pk(instance.booking_id)
+    if getattr(instance, 'order_id', None) is not None:
+        return shard_for(instance.order.conference_id)
+    return instance._state.db
+
+
+class ShardRouter:
+    """Route the sharded models by conference; defer everything else to the next router."""
+
+    def _db(self, model, hints):
+        instance = hints.get('instance')
+        if instance is None or not sharding_enabled():
+            return None
+        if not is_sharded(model):
+            # Relations followed from a sharded row lead back to default
+            return 'default' if is_sharded(instance) else None
+        if is_sharded(instance):
+            return shard_of(instance)
+        if instance._meta.model_name == 'conference':
+            return shard_for(instance.pk)
+        # A group order's payments
+        conference_id = getattr(instance, 'conference_id', None)
+        return None if conference_id is None else shard_for(conference_id)
+
+    def db_for_read(self, model, **hints):
+        return self._db(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded(obj1) or is_sharded(obj2):
+            return True
+        return None
+
+
+class ShardedQuerySet(models.QuerySet):
+    def for_conference(self, conference_id):
+        return self.using(shard_for(conference_id))
+
+    def for_pk(self, pk):
+        return self.using(shard_for_pk(pk))
+
+    def create(self, **kwargs):
+        # Let the router place the row by its conference unless using() chose a shard
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(force_insert=True, using=self._db)
+        return obj
+
+
+class ShardedManager(models.Manager.from_queryset(ShardedQuerySet)):
+    pass
+
+
+@contextmanager
+def atomic(alias):
+    """A transaction on shard ``alias`` with one on ``default`` nested inside it.
+
+    An exception rolls both back. They are not one distributed transaction:
+    ``default`` commits first, so if the shard's commit then fails the
+    seats and ledger events it wrote stay recorded without their booking.
+    That can leave a seat unsold, but never sells one twice.
+    """
+    with ExitStack() as stack:
+        if alias != 'default':
+            stack.enter_context(transaction.atomic(using=alias))
+        stack.enter_context(transaction.atomic())
+        yield
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_FAN_OUT_WORKERS, thread_name_prefix='shard-fan-out')
+    return _pool
+
+
+def _run(query, alias):
+    # Worker threads keep their connections between calls and get no request signals, so
+    # drop one that errored or outlived CONN_MAX_AGE the way a request would
+    connections[alias].close_if_unusable_or_obsolete()
+    return list(query(alias))
+
+
+def fan_out(query, key=None, reverse=False):
+    """Run ``query(alias)`` on every shard at once and merge what it returns.
+
+    With ``key`` each shard's rows must come sorted by it, and are merged in
+    order; otherwise they are concatenated. Inside a transaction the shards
+    are read one after another on this thread, whose connections are the
+    only ones that see its uncommitted writes.
+    """
+    aliases = shards()
+    if len(aliases) == 1 or any(connections[alias].in_atomic_block for alias in aliases):
+        results = [list(query(alias)) for alias in aliases]
+    else:
+        results = list(_executor().map(lambda alias: _run(query, alias), aliases))
+    if key is None:
+        return [row for rows in results for row in rows]
+    return list(heapq.merge(*results, key=key, reverse=reverse))
+
+
+def prepare_shard(alias):
+    """Start the sharded tables on ``alias`` at the shard's id range.
+
+    Returns the first id the shard hands out. Tables whose ids have already
+    passed the start of the range are left as they are.
+    """
+    floor = shards().index(alias) * id_span()
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        for model in (apps.get_model('booking_app', name) for name in SHARDED_MODELS):
+            table = connection.ops.quote_name(model._meta.db_table)
+            column = connection.ops.quote_name(model._meta.pk.column)
+            cursor.execute(f'SELECT MAX({column}) FROM {table}')
+            if (cursor.fetchone()[0] or 0) >= floor:
+                continue
+            if connection.vendor == 'mysql':
+                cursor.execute(f'ALTER TABLE {table} AUTO_INCREMENT = {floor + 1}')
+            elif connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT setval(pg_get_serial_sequence(%s, %s), %s)',
+                    [model._meta.db_table, model._meta.pk.column, floor],
+                )
+            else:
+                cursor.execute('DELETE FROM sqlite_sequence WHERE name = %s', [model._meta.db_table])
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [model._meta.db_table, floor])
+    return floor + 1
@@ -0,0 +1,179 @@
+# booking_app/snapshots.py
+"""Precomputed conference detail pages.
+
+A snapshot holds everything on the detail page that is the same for every
+visitor: the conference fields and the description, categories and
+speakers HTML, prerendered. It is cached per slug together with a version
+token. Anything that changes what the page shows replaces the token (see
+the receivers below), so a stale snapshot is never served, even one
+written by a rebuild that raced the change.
+
+Seats left and whether the visitor can book are the only per-request
+parts. They come from the cached seat counter in booking_app/inventory.py
+and the user's booked set in booking_app/user_bookings.py.
+
+When a popular snapshot expires, only one request rebuilds it. Threads in
+a process queue on a local lock, and processes take a short lock in the
+shared cache. Everyone else waits briefly for the result. A local lock
+lives only while someone holds or waits for it, and a slug with no
+conference is remembered for MISSING_TIMEOUT only, so requests for made-up
+slugs cannot grow the lock table or fill the cache.
+"""
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+
+from .models import Conference, ConferenceCategory, ConferenceHasSpeaker, Speaker
+
+SNAPSHOT_TIMEOUT = 3600
+MISSING_TIMEOUT = 30
+BUILD_LOCK_TIMEOUT = 10
+BUILD_WAIT_SECONDS = 2.0
+
+# key -> [lock, number of threads holding or waiting for it]
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+stats = {'builds': 0, 'waits': 0}
+
+
+def snapshot_key(slug):
+    return f'conference_snapshot:{slug}'
+
+
+def version_key(slug):
+    return f'conference_snapshot_version:{slug}'
+
+
+def invalidate(*slugs):
+    """Retire the snapshots for ``slugs`` once the current transaction commits.
+
+    Doing it earlier would let a rebuild read the old rows and cache them
+    under the new token.
+    """
+    versions = {version_key(slug): uuid.uuid4().hex for slug in slugs}
+    transaction.on_commit(lambda: cache.set_many(versions, None))
+
+
+def conference_versions(slugs):
+    """The current version token of each slug, for keying fragment caches of the same data.
+
+    A conference that has never changed has no token yet and maps to None.
+    """
+    tokens = cache.get_many([version_key(slug) for slug in slugs])
+    return {slug: tokens.get(version_key(slug)) for slug in slugs}
+
+
+def build_snapshot(slug, version):
+    """Render the shared parts of the page for ``slug``; conference_id is None if it does not exist."""
+    stats['builds'] += 1
+    conference = Conference.objects.filter(slug=slug).prefetch_related('categories', 'speakers').first()
+    if conference is None:
+        return {'version': version, 'conference_id': None}
+    return {
+        'version': version,
+        'conference_id': conference.conference_id,
+        'slug': conference.slug,
+        'topic': conference.topic,
+        'capacity': conference.capacity,
+        'info_html': render_to_string('booking_app/conference_detail_info.html', {'conference': conference}),
+        'speakers_html': render_to_string(
+            'booking_app/conference_detail_speakers.html', {'speakers': conference.speakers.all()},
+        ),
+    }
+
+
+def _cached(slug):
+    values = cache.get_many([snapshot_key(slug), version_key(slug)])
+    snapshot = values.get(snapshot_key(slug))
+    version = values.get(version_key(slug))
+    if snapshot is not None and snapshot['version'] == version:
+        return snapshot, version
+    return None, version
+
+
+@contextmanager
+def _local_lock(key):
+    with _local_locks_guard:
+        entry = _local_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _local_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _local_locks[key]
+
+
+def get_snapshot(slug):
+    """Return the snapshot for ``slug``, or None if there is no such conference."""
+    snapshot, version = _cached(slug)
+    if snapshot is None:
+        key = snapshot_key(slug)
+        with _local_lock(key):
+            snapshot, version = _cached(slug)
+            if snapshot is None:
+                snapshot = _rebuild(slug, version)
+    return snapshot if snapshot['conference_id'] is not None else None
+
+
+def _rebuild(slug, version):
+    key = snapshot_key(slug)
+    lock = f'{key}:building'
+    if cache.add(lock, 1, BUILD_LOCK_TIMEOUT):
+        try:
+            snapshot = build_snapshot(slug, version)
+            cache.set(key, snapshot, SNAPSHOT_TIMEOUT if snapshot['conference_id'] is not None else MISSING_TIMEOUT)
+        finally:
+            cache.delete(lock)
+        return snapshot
+
+    # Another process is rebuilding it; wait for its result rather than
+    # piling onto the database too
+    stats['waits'] += 1
+    deadline = time.monotonic() + BUILD_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.02)
+        snapshot, version = _cached(slug)
+        if snapshot is not None:
+            return snapshot
+    return build_snapshot(slug, version)
+
+
+# Replace the version token whenever something shown on the page changes.
+# Seat counts change through queryset updates, which send no signals, so
+# bookings never invalidate snapshots.
+
+@receiver(post_init, sender=Conference)
+def remember_loaded_slug(sender, instance, **kwargs):
+    instance._loaded_slug = instance.__dict__.get('slug')
+
+
+@receiver([post_save, post_delete], sender=Conference)
+def conference_changed(sender, instance, **kwargs):
+    invalidate(*{instance.slug, instance._loaded_slug} - {None, ''})
+    instance._loaded_slug = instance.slug
+
+
+@receiver([post_save, post_delete], sender=ConferenceCategory)
+@receiver([post_save, post_delete], sender=ConferenceHasSpeaker)
+def conference_part_changed(sender, instance, **kwargs):
+    slug = Conference.objects.filter(pk=instance.conference_id).values_list('slug', flat=True).first()
+    if slug:
+        invalidate(slug)
+
+
+@receiver([post_save, post_delete], sender=Speaker)
+def speaker_changed(sender, instance, **kwargs):
+    slugs = Conference.objects.filter(conferencehasspeaker__speaker=instance).values_list('slug', flat=True)
+    if slugs:
+        invalidate(*slugs)
@@ -0,0 +1,128 @@
+# booking_app/speaker_index.py
+"""In-memory prefix index over speakers, for the search form's autocomplete.
+
+Each worker keeps a sorted list of (token, speaker_id) pairs built from the
+words of every speaker's first name, last name and expertise. A query word
+matches the tokens it is a prefix of, found with two binary searches, and
+a multi-word query returns the speakers matching every word. Tokens are
+lowercased with accents stripped, so "jose" finds "José".
+
+The index is built with one query. Speaker changes replace a version token
+in the shared cache once they commit. Each worker compares that token on
+lookup and rebuilds when it has moved, so every process sees an edit
+without the index itself being shared.
+"""
+import heapq
+import threading
+import unicodedata
+import uuid
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Speaker
+
+VERSION_KEY = 'speaker_index_version'
+MAX_RESULTS = 10
+
+_lock = threading.Lock()
+_index = None
+
+
+def _fold(text):
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def tokens(*texts):
+    return [word for text in texts for word in _fold(text).split()]
+
+
+class SpeakerIndex:
+    def __init__(self, rows, version=None):
+        self.version = version
+        # Speakers in result order; the index refers to them by position
+        self.speakers = sorted(
+            (
+                {'id': speaker_id, 'name': f'{first_name} {last_name}', 'expertise': expertise,
+                 'tokens': tokens(first_name, last_name, expertise)}
+                for speaker_id, first_name, last_name, expertise in rows
+            ),
+            key=lambda speaker: (_fold(speaker['name']), speaker['id']),
+        )
+        self.ranks = {speaker['id']: rank for rank, speaker in enumerate(self.speakers)}
+        entries = sorted(
+            {(token, rank) for rank, speaker in enumerate(self.speakers) for token in speaker.pop('tokens')}
+        )
+        self.tokens = [token for token, _ in entries]
+        self.entry_ranks = [rank for _, rank in entries]
+
+    def __len__(self):
+        return len(self.speakers)
+
+    def prefixed(self, prefix):
+        """Ranks of the speakers with a token starting with ``prefix``."""
+        start = bisect_left(self.tokens, prefix)
+        end = bisect_left(self.tokens, prefix + '\U0010ffff', start)
+        return self.entry_ranks[start:end]
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Speakers matching every word of ``query`` as a prefix, ordered by name."""
+        matches = None
+        for word in tokens(query):
+            found = set(self.prefixed(word))
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+        if matches is None:
+            return []
+        return [self.speakers[rank] for rank in heapq.nsmallest(limit, matches)]
+
+    def get(self, speaker_id):
+        rank = self.ranks.get(speaker_id)
+        return self.speakers[rank] if rank is not None else None
+
+
+def build_index(version=None):
+    rows = Speaker.objects.values_list('speaker_id', 'first_name', 'last_name', 'expertise')
+    return SpeakerIndex(rows, version)
+
+
+def get_index():
+    """This worker's index, rebuilt first if speakers changed since it was built."""
+    global _index
+    version = cache.get(VERSION_KEY)
+    index = _index
+    if index is None or index.version != version:
+        with _lock:
+            if _index is None or _index.version != version:
+                _index = build_index(version)
+            index = _index
+    return index
+
+
+def search_speakers(query, limit=MAX_RESULTS):
+    return get_index().search(query, limit)
+
+
+def speaker_summary(speaker_id):
+    """The id, name and expertise of a speaker, or None if there is no such speaker."""
+    return get_index().get(speaker_id)
+
+
+def invalidate():
+    """Make every worker rebuild its index once the current transaction commits.
+
+    Called for each saved or deleted Speaker; call it after bulk changes,
+    which send no signals.
+    """
+    version = uuid.uuid4().hex
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, version, None))
+
+
+@receiver([post_save, post_delete], sender=Speaker)
+def speaker_changed(sender, **kwargs):
+    invalidate()
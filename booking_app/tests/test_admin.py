@@ -0,0 +1,87 @@
+from datetime import date, time
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from booking_app import paginators
+from booking_app.models import Booking, Conference, Payment, User
+
+
+class ChangelistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(self.admin)
+        self.conferences = [
+            Conference.objects.create(
+                topic=f'{date(2099, month, 1):%B} summit', description='', date=date(2099, month, 1),
+                time_start=time(9), time_end=time(17), capacity=100, price=Decimal('40.00'),
+            )
+            for month in (1, 2)
+        ]
+
+    def book(self, count):
+        for conference in self.conferences:
+            for _ in range(count):
+                user = User.objects.create_user(f'attendee{User.objects.filter(is_staff=False).count()}')
+                booking = Booking.objects.create(user=user, conference=conference, status='confirmed')
+                Payment.objects.create(booking=booking, amount=Decimal('40.00'), payment_method='paypal')
+
+    def queries(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_the_rows_shown(self):
+        for name in ('booking', 'payment'):
+            url = reverse(f'admin:booking_app_{name}_changelist')
+            self.book(2)
+            self.queries(url)  # Loads the admin's cached lookups
+            few = self.queries(url)
+            self.book(10)
+            self.assertEqual(self.queries(url), few, name)
+
+    def test_month_filter_narrows_to_one_month(self):
+        self.book(2)
+        response = self.client.get(reverse('admin:booking_app_booking_changelist'), {'month': '2099-02'})
+        shown = {booking.conference for booking in response.context['cl'].result_list}
+        self.assertEqual(shown, {self.conferences[1]})
+        months = [choice['display'] for choice in response.context['cl'].filter_specs[0].choices(response.context['cl'])]
+        self.assertIn('February 2099', months)
+
+    def test_search_matches_exact_usernames_and_topic_prefixes(self):
+        self.book(2)
+        url = reverse('admin:booking_app_booking_changelist')
+        self.assertEqual(self.client.get(url, {'q': 'attendee0'}).context['cl'].result_count, 1)
+        self.assertEqual(self.client.get(url, {'q': 'attendee'}).context['cl'].result_count, 0)
+        self.assertEqual(self.client.get(url, {'q': 'Febr'}).context['cl'].result_count, 2)
+        self.assertEqual(self.client.get(url, {'q': 'summit'}).context['cl'].result_count, 0)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('attendee')
+        conference = Conference.objects.create(
+            topic='Counted', description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=100, price=Decimal('40.00'),
+        )
+        Booking.objects.create(user=user, conference=conference, status='confirmed')
+
+    def test_large_unfiltered_table_uses_the_estimate(self):
+        with mock.patch.object(paginators, 'estimated_row_count', return_value=2_000_000):
+            with self.assertNumQueries(0):
+                count = paginators.EstimatedCountPaginator(Booking.objects.order_by('pk'), 100).count
+        self.assertEqual(count, 2_000_000)
+
+    def test_filtered_or_small_tables_are_counted_exactly(self):
+        with mock.patch.object(paginators, 'estimated_row_count', return_value=2_000_000):
+            filtered = Booking.objects.filter(status='confirmed').order_by('pk')
+            self.assertEqual(paginators.EstimatedCountPaginator(filtered, 100).count, 1)
+        with mock.patch.object(paginators, 'estimated_row_count', return_value=50):
+            self.assertEqual(paginators.EstimatedCountPaginator(Booking.objects.order_by('pk'), 100).count, 1)
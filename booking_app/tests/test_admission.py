@@ -0,0 +1,191 @@
+from datetime import date, time
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from booking_app import admission, pricing
+from booking_app.models import Booking, Conference, User
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class AdmissionQueueTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch.object(admission, 'store', admission.LocalStore(clock=self.clock))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_walk_in_gets_a_slot_while_one_is_free(self):
+        lease, ticket, position = admission.enter('conf', None, 2)
+        self.assertIsNotNone(lease)
+        self.assertIsNone(ticket)
+        admission.leave(lease)
+
+    def test_waiting_visitors_get_in_in_arrival_order(self):
+        running = admission.enter('conf', None, 1)[0]
+        _, first, _ = admission.enter('conf', None, 1)
+        _, second, position = admission.enter('conf', None, 1)
+        self.assertEqual(position, 2)
+
+        admission.leave(running)
+        self.assertIsNone(admission.enter('conf', second, 1)[0])
+        self.assertIsNotNone(admission.enter('conf', first, 1)[0])
+
+    def test_abandoned_ticket_does_not_block_the_queue(self):
+        running = admission.enter('conf', None, 1, idle=1)[0]
+        _, abandoned, _ = admission.enter('conf', None, 1, idle=1)
+        _, later, _ = admission.enter('conf', None, 1, idle=1)
+        admission.leave(running)
+
+        # The holder of the first ticket never comes back
+        self.assertIsNone(admission.enter('conf', later, 1, idle=1)[0])
+        self.clock.now += 1.1
+        lease = admission.enter('conf', later, 1, idle=1)[0]
+        self.assertIsNotNone(lease)
+        admission.leave(lease)
+
+        # Nobody is left waiting, so a walk-in goes straight through
+        lease, ticket, _ = admission.enter('conf', None, 1, idle=1)
+        self.assertIsNotNone(lease)
+        self.assertIsNone(ticket)
+
+    def test_polling_keeps_a_place_in_line(self):
+        running = admission.enter('conf', None, 1, idle=1)[0]
+        _, first, _ = admission.enter('conf', None, 1, idle=1)
+        _, second, _ = admission.enter('conf', None, 1, idle=1)
+        for _ in range(3):
+            self.clock.now += 0.4
+            admission.enter('conf', first, 1, idle=1)
+            admission.enter('conf', second, 1, idle=1)
+        admission.leave(running)
+        self.assertIsNone(admission.enter('conf', second, 1, idle=1)[0])
+        self.assertIsNotNone(admission.enter('conf', first, 1, idle=1)[0])
+
+    def test_slot_of_a_request_that_never_left_is_freed(self):
+        self.assertIsNotNone(admission.enter('conf', None, 1, lease_seconds=1)[0])
+        self.assertIsNone(admission.enter('conf', None, 1, lease_seconds=1)[0])
+        self.clock.now += 1.1
+        # The first ticket holder comes back once the dead request's lease ran out
+        self.assertIsNotNone(admission.enter('conf', 1, 1, lease_seconds=1)[0])
+
+    def test_leave_does_not_release_a_slot_someone_else_holds(self):
+        stale = admission.enter('conf', None, 1, lease_seconds=1)[0]
+        self.clock.now += 1.1
+        current = admission.enter('conf', None, 1, lease_seconds=1)[0]
+        self.assertIsNotNone(current)
+        admission.leave(stale)
+        self.assertIsNone(admission.enter('conf', None, 1)[0])
+
+    def test_resume_renews_a_kept_slot_until_its_lease_runs_out(self):
+        lease = admission.enter('conf', None, 1, lease_seconds=1)[0]
+        self.clock.now += 0.8
+        self.assertTrue(admission.resume(lease, 1))
+        self.clock.now += 0.8
+        self.assertTrue(admission.resume(lease, 1))
+        self.clock.now += 1.1
+        self.assertFalse(admission.resume(lease, 1))
+
+
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(admission, 'store', admission.LocalStore())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def burst(self, rates, count, now, **meta):
+        return [
+            admission.check_rates(
+                self.factory.post('/', **meta), 'book_conference', rates, 'HTTP_X_FORWARDED_FOR', now=now,
+            )
+            for _ in range(count)
+        ]
+
+    def test_burst_past_the_bucket_is_told_to_wait(self):
+        waits = self.burst({'ip': '10/m'}, 12, now=1000.0, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(waits[:10], [0] * 10)
+        self.assertAlmostEqual(waits[10], 6.0)
+
+        response = admission.too_many_requests(waits[10], 'Slow down.')
+        self.assertEqual((response.status_code, response['Retry-After']), (429, '6'))
+
+        # One token comes back every six seconds
+        self.assertEqual(self.burst({'ip': '10/m'}, 2, now=1006.0, REMOTE_ADDR='10.0.0.1')[0], 0)
+        self.assertGreater(self.burst({'ip': '10/m'}, 1, now=1006.0, REMOTE_ADDR='10.0.0.1')[0], 0)
+
+    def test_other_clients_have_their_own_bucket(self):
+        self.burst({'ip': '2/m'}, 3, now=1000.0, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(self.burst({'ip': '2/m'}, 1, now=1000.0, REMOTE_ADDR='10.0.0.2'), [0])
+
+    def test_forwarded_hops_written_by_the_client_are_ignored(self):
+        waits = [
+            self.burst({'ip': '2/m'}, 1, now=1000.0, HTTP_X_FORWARDED_FOR=f'198.51.100.{n}, 203.0.113.7')[0]
+            for n in range(3)
+        ]
+        self.assertEqual(waits[:2], [0, 0])
+        self.assertGreater(waits[2], 0)
+
+    def test_client_ip_counts_trusted_proxies_from_the_right(self):
+        request = self.factory.get('/', HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2, 3.3.3.3', REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(admission.client_ip(request, 'HTTP_X_FORWARDED_FOR'), '3.3.3.3')
+        self.assertEqual(admission.client_ip(request, 'HTTP_X_FORWARDED_FOR', 2), '2.2.2.2')
+        self.assertEqual(admission.client_ip(request, 'HTTP_X_FORWARDED_FOR', 5), '1.1.1.1')
+        self.assertEqual(admission.client_ip(self.factory.get('/'), 'HTTP_X_FORWARDED_FOR'), '127.0.0.1')
+
+
+class AdmissionMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.conference = Conference.objects.create(
+            topic='Flash sale', description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+        )
+        self.url = reverse('book_conference', args=[self.conference.slug])
+
+    def login(self, name):
+        user = User.objects.create_user(name, email=f'{name}@example.com', password='x')
+        client = self.client_class()
+        client.force_login(user)
+        return user, client
+
+    @override_settings(ADMISSION_CONTROL={'RATES': {'book_conference': {'user': '2/m'}}})
+    def test_burst_gets_429_with_retry_after(self):
+        _, client = self.login('eager')
+        statuses = [client.get(self.url).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+    @override_settings(ADMISSION_CONTROL={'QUEUED_ROUTES': ['book_conference'], 'CONCURRENCY': 1})
+    def test_admitted_visitor_keeps_their_slot_through_the_form(self):
+        user, first = self.login('first')
+        _, second = self.login('second')
+
+        form = first.get(self.url)
+        self.assertEqual(form.status_code, 200)
+        self.assertIn(admission.PASS_COOKIE, form.cookies)
+        self.assertEqual(second.get(self.url).status_code, 429)
+
+        # The submission runs in the slot the form was shown in
+        response = first.post(self.url, {
+            'conference': self.conference.pk,
+            'payment_method': 'paypal',
+            'quote': pricing.issue_quote(user.pk, self.conference.pk, Decimal('40.00')),
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Booking.objects.filter(user=user).exists())
+        self.assertEqual(response.cookies[admission.PASS_COOKIE].value, '')
+
+        # The waiting page refreshes with a GET and now gets the form
+        self.assertEqual(second.get(self.url).status_code, 200)
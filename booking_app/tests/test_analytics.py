@@ -0,0 +1,31 @@
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from booking_app import analytics
+from booking_app.models import AnalyticsWatermark, Booking, Conference, DailyConferenceStats, Payment, User
+
+
+class CatchUpTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        user = User.objects.create_user('attendee', password='x')
+        self.conference = Conference.objects.create(
+            topic='Analytics', description='', date=self.today,
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+        )
+        booking = Booking.objects.create(user=user, conference=self.conference, status='confirmed')
+        payment = Payment.objects.create(booking=booking, amount=Decimal('40.00'), payment_method='paypal', status='completed')
+        Payment.objects.filter(pk=payment.pk).update(payment_date=timezone.now() - timedelta(days=1))
+
+    def test_catch_up_stops_at_yesterday_and_leaves_today_to_the_signals(self):
+        # A delta the signals applied today that a rebuild of today would wipe
+        analytics.bump_conference_day(self.conference.pk, self.today, ratings_count=1, ratings_sum=5)
+
+        self.assertEqual(analytics.catch_up(until=self.today), 1)
+        self.assertEqual(AnalyticsWatermark.objects.get().day, self.today - timedelta(days=1))
+        self.assertEqual(DailyConferenceStats.objects.get(day=self.today - timedelta(days=1)).revenue, Decimal('40.00'))
+        self.assertEqual(DailyConferenceStats.objects.get(day=self.today).ratings_sum, 5)
+        self.assertEqual(analytics.catch_up(), 0)
@@ -0,0 +1,100 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from booking_app import archiving, reporting
+from booking_app.models import (
+    ArchivedBooking, ArchivedFeedback, ArchivedPayment, Booking, Conference, Feedback, Payment, User,
+)
+
+
+def make_conference(topic, day):
+    return Conference.objects.create(
+        topic=topic, description='', date=day,
+        time_start=time(9), time_end=time(17), capacity=100, price=Decimal('40.00'),
+    )
+
+
+@override_settings(ADMISSION_CONTROL={}, ARCHIVE_AFTER_DAYS=365)
+class ArchivingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.past = make_conference('Past', date(2001, 5, 1))
+        self.users = [User.objects.create_user(f'attendee{n}', password='x') for n in range(5)]
+        self.payments = []
+        for n, user in enumerate(self.users):
+            booking = Booking.objects.create(
+                user=user, conference=self.past, status='cancelled' if n == 0 else 'confirmed',
+                payment_status='completed',
+            )
+            self.payments.append(Payment.objects.create(
+                booking=booking, amount=Decimal('40.00'), payment_method='paypal',
+                status='completed', transaction_id=f'tx-{n}',
+            ))
+            Feedback.objects.create(user=user, conference=self.past, rating=4, comments='Good')
+
+    def test_only_conferences_past_the_cutoff_and_not_waiting_on_payments_are_due(self):
+        recent = make_conference('Upcoming', date(2099, 1, 1))
+        waiting = make_conference('Waiting', date(2001, 6, 1))
+        booking = Booking.objects.create(user=self.users[0], conference=waiting)
+        Payment.objects.create(booking=booking, amount=Decimal('40.00'), payment_method='paypal', status='processing')
+
+        due = list(archiving.archivable_conferences())
+        self.assertIn(self.past, due)
+        self.assertNotIn(recent, due)
+        self.assertNotIn(waiting, due)
+
+    def test_conference_is_moved_in_batches_keeping_primary_keys(self):
+        booking_ids = set(Booking.objects.values_list('pk', flat=True))
+        payment_ids = set(Payment.objects.values_list('pk', flat=True))
+        feedback_ids = set(Feedback.objects.values_list('pk', flat=True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = archiving.archive_conference(self.past.pk, batch_size=2)
+
+        self.assertEqual(moved, {'bookings': 5, 'payments': 5, 'feedback': 5})
+        for model in (Booking, Payment, Feedback):
+            self.assertFalse(model.objects.exists(), model.__name__)
+        self.assertEqual(set(ArchivedBooking.objects.values_list('pk', flat=True)), booking_ids)
+        self.assertEqual(set(ArchivedPayment.objects.values_list('pk', flat=True)), payment_ids)
+        self.assertEqual(set(ArchivedFeedback.objects.values_list('pk', flat=True)), feedback_ids)
+        self.assertEqual(ArchivedPayment.objects.get(transaction_id='tx-3').booking.user, self.users[3])
+        self.past.refresh_from_db()
+        self.assertIsNotNone(self.past.archived_at)
+        self.assertNotIn(self.past, archiving.archivable_conferences())
+
+    def test_interrupted_run_resumes_with_what_is_left(self):
+        self.assertEqual(archiving.archive_booking_batch(self.past.pk, batch_size=2), (2, 2))
+        self.assertEqual(Booking.objects.count(), 3)
+
+        totals = archiving.archive_conferences()
+        self.assertEqual(totals, {'conferences': 1, 'bookings': 3, 'payments': 3, 'feedback': 5})
+        self.assertEqual(ArchivedBooking.objects.count(), 5)
+
+    def test_finance_report_is_unchanged_by_archiving(self):
+        before = reporting.build_report()
+        archiving.archive_conferences()
+        self.assertEqual(reporting.build_report(), before)
+
+    def test_receipts_and_my_bookings_read_the_archive(self):
+        archiving.archive_conferences()
+        booking_id = self.payments[2].booking_id
+        self.client.force_login(self.users[2])
+
+        response = self.client.get(reverse('receipt', args=[booking_id]))
+        self.assertContains(response, 'tx-2')
+        self.assertContains(self.client.get(reverse('my_bookings')), reverse('receipt', args=[booking_id]))
+        self.assertEqual(self.client.get(reverse('receipt', args=[self.payments[3].booking_id])).status_code, 404)
+
+    def test_archived_conference_can_no_longer_be_booked(self):
+        archiving.archive_conferences()
+        self.past.refresh_from_db()
+        self.client.force_login(User.objects.create_user('latecomer', password='x'))
+
+        response = self.client.get(reverse('book_conference', args=[self.past.slug]))
+        self.assertRedirects(response, reverse('conference_detail', args=[self.past.slug]), fetch_redirect_response=False)
+        self.assertEqual([str(message) for message in get_messages(response.wsgi_request)], ['This conference has ended.'])
@@ -0,0 +1,35 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from booking_app.auth_backends import CachedModelBackend
+from booking_app.models import User, user_cache_key
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.backend = CachedModelBackend()
+        self.user = User.objects.create_user('attendee', password='old-passphrase')
+
+    def test_user_is_loaded_once_and_served_from_the_cache(self):
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    def test_saving_the_user_drops_the_cached_copy(self):
+        self.backend.get_user(self.user.pk)
+        self.user.first_name = 'Ada'
+        self.user.save()
+        self.assertEqual(self.backend.get_user(self.user.pk).first_name, 'Ada')
+
+    def test_deactivating_with_a_queryset_update_logs_the_user_out(self):
+        self.backend.get_user(self.user.pk)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_bulk_updated_password_is_not_served_stale(self):
+        self.backend.get_user(self.user.pk)
+        self.user.set_password('new-passphrase')
+        User.objects.bulk_update([self.user], ['password'])
+        self.assertTrue(self.backend.get_user(self.user.pk).check_password('new-passphrase'))
@@ -0,0 +1,89 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from booking_app import outbox, pricing
+from booking_app.models import Booking, Conference, OutboxMessage, User
+from booking_app.payments import settle_payment
+
+
+@override_settings(ADMISSION_CONTROL={})
+class RebookingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('attendee', email='attendee@example.com', password='x')
+        self.conference = Conference.objects.create(
+            topic='Rebooking', description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+        )
+        self.client.force_login(self.user)
+
+    def book(self):
+        return self.client.post(reverse('book_conference', args=[self.conference.slug]), {
+            'conference': self.conference.pk,
+            'payment_method': 'paypal',
+            'quote': pricing.issue_quote(self.user.pk, self.conference.pk, Decimal('40.00')),
+        })
+
+    def settle(self, booking, succeeded):
+        settle_payment(booking.payments.order_by('-pk').first().pk, succeeded=succeeded)
+        booking.refresh_from_db()
+
+    def seats_taken(self):
+        self.conference.refresh_from_db()
+        return self.conference.seats_taken
+
+    def test_booking_after_a_failed_payment_reopens_it(self):
+        self.book()
+        booking = Booking.objects.get(user=self.user)
+        self.settle(booking, succeeded=False)
+        self.assertEqual((booking.status, self.seats_taken()), ('cancelled', 0))
+
+        response = self.book()
+        self.assertRedirects(response, reverse('receipt', args=[booking.pk]), fetch_redirect_response=False)
+        booking.refresh_from_db()
+        self.assertEqual((booking.status, booking.payment_status, self.seats_taken()), ('pending', 'pending', 1))
+        self.assertEqual(booking.payments.count(), 2)
+
+        self.settle(booking, succeeded=True)
+        self.assertEqual(booking.status, 'confirmed')
+        self.assertEqual(
+            sorted(OutboxMessage.objects.values_list('event', flat=True)), ['booking_confirmed', 'payment_failed'],
+        )
+        self.assertEqual(self.client.get(reverse('receipt', args=[booking.pk])).context['payment'].status, 'completed')
+
+    def test_booking_after_cancelling_reopens_it_once_the_payment_is_settled(self):
+        self.book()
+        booking = Booking.objects.get(user=self.user)
+        self.client.post(reverse('cancel_booking', args=[booking.pk]))
+
+        # The capture is still with the gateway
+        self.book()
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'cancelled')
+
+        self.settle(booking, succeeded=False)
+        self.book()
+        booking.refresh_from_db()
+        self.assertEqual((booking.status, self.seats_taken()), ('pending', 1))
+
+        self.client.post(reverse('cancel_booking', args=[booking.pk]))
+        cancelled = OutboxMessage.objects.filter(event='booking_cancelled')
+        self.assertEqual(cancelled.count(), 2)
+        self.assertIn('you can book again', outbox.build_email(cancelled.first()).body)
+
+    def test_a_cancelled_paid_booking_is_not_reopened(self):
+        self.book()
+        booking = Booking.objects.get(user=self.user)
+        self.settle(booking, succeeded=True)
+        self.client.post(reverse('cancel_booking', args=[booking.pk]))
+
+        self.book()
+        booking.refresh_from_db()
+        self.assertEqual((booking.status, booking.payments.count(), self.seats_taken()), ('cancelled', 1, 0))
+        body = outbox.build_email(OutboxMessage.objects.get(event='booking_cancelled')).body
+        self.assertIn('contact us', body)
+        self.assertNotIn('you can book again', body)
@@ -0,0 +1,56 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.core import signing
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from booking_app import calendar_feeds
+from booking_app.models import Booking, Conference, User
+
+
+class PersonalFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('attendee', password='x')
+        conference = Conference.objects.create(
+            topic='Calendars', description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+        )
+        Booking.objects.create(user=self.user, conference=conference, status='confirmed')
+
+    def feed(self, token):
+        return self.client.get(reverse('booking_calendar', args=[token]))
+
+    def test_feed_lists_the_users_bookings(self):
+        response = self.feed(calendar_feeds.feed_token(self.user))
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('SUMMARY:Calendars', body)
+        self.assertIn('STATUS:CONFIRMED', body)
+
+    def test_unchanged_poll_gets_a_304(self):
+        token = calendar_feeds.feed_token(self.user)
+        etag = self.feed(token)['ETag']
+        self.assertEqual(self.client.get(reverse('booking_calendar', args=[token]), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_forged_token_is_refused(self):
+        self.assertEqual(self.feed(f'{self.user.pk}:0:forged').status_code, 404)
+
+    def test_resetting_the_feed_revokes_the_old_link(self):
+        old = calendar_feeds.feed_token(self.user)
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('reset_calendar'))
+        self.user.refresh_from_db()
+        new = calendar_feeds.feed_token(self.user)
+
+        self.assertNotEqual(old, new)
+        self.assertEqual(self.feed(old).status_code, 404)
+        self.assertEqual(self.feed(new).status_code, 200)
+
+    def test_token_from_before_feed_versions_works_until_reset(self):
+        legacy = signing.Signer(salt=calendar_feeds.TOKEN_SALT).sign(str(self.user.pk))
+        self.assertEqual(calendar_feeds.user_for_token(legacy), self.user.pk)
+        calendar_feeds.reset_feed_token(self.user.pk)
+        self.assertIsNone(calendar_feeds.user_for_token(legacy))
@@ -0,0 +1,105 @@
+from collections import Counter
+from datetime import date, time
+from decimal import Decimal
+from itertools import product
+
+import numpy as np
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from booking_app import co_bookings
+from booking_app.models import Booking, CoBooking, Conference, ConferenceNeighbour, User
+from booking_app.recommendations import also_booked, recommended_for
+
+
+class PairCountTests(SimpleTestCase):
+    def test_counts_match_a_plain_python_count(self):
+        rng = np.random.default_rng(7)
+        pairs = {(int(user), int(conference)) for user, conference in rng.integers(0, 30, size=(200, 2))}
+        users = np.array([user for user, _ in pairs], dtype=np.int64)
+        conferences = np.array([conference for _, conference in pairs], dtype=np.int64)
+        expected = Counter()
+        for user in set(users.tolist()):
+            booked = [conference for owner, conference in pairs if owner == user]
+            expected.update(product(booked, booked))
+
+        a, b, counts = co_bookings.pair_counts(users, conferences)
+        self.assertEqual(dict(zip(zip(a.tolist(), b.tolist()), counts.tolist())), expected)
+
+    def test_no_bookings_give_no_cells(self):
+        a, b, counts = co_bookings.pair_counts(np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+        self.assertEqual((len(a), len(b), len(counts)), (0, 0, 0))
+
+
+@override_settings(RECOMMENDATION_NEIGHBOURS=2, ADMISSION_CONTROL={})
+class CoBookingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.python, self.django, self.rust, self.go = (
+            self.conference(topic) for topic in ('Python', 'Django', 'Rust', 'Go')
+        )
+        self.users = [User.objects.create_user(f'attendee{n}', password='x') for n in range(4)]
+        self.book(
+            (0, self.python), (0, self.django), (0, self.rust),
+            (1, self.python), (1, self.django),
+            (2, self.python), (2, self.go),
+            (3, self.rust), (3, self.go),
+        )
+
+    def conference(self, topic, day=date(2099, 1, 1), **fields):
+        return Conference.objects.create(
+            topic=topic, description='', date=day,
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'), **fields,
+        )
+
+    def book(self, *pairs, status='confirmed'):
+        Booking.objects.bulk_create(
+            Booking(user=self.users[user], conference=conference, status=status) for user, conference in pairs
+        )
+
+    def matrix(self):
+        return set(CoBooking.objects.values_list('conference_id', 'other_id', 'count'))
+
+    def neighbours(self, conference):
+        return list(
+            ConferenceNeighbour.objects.filter(conference=conference).order_by('rank').values_list('neighbour__topic', flat=True)
+        )
+
+    def test_rebuild_stores_the_matrix_and_ranks_neighbours_by_cosine_similarity(self):
+        co_bookings.rebuild()
+        cells = {(a, b): n for a, b, n in self.matrix()}
+        self.assertEqual(cells[self.python.pk, self.python.pk], 3)
+        self.assertEqual(cells[self.python.pk, self.django.pk], 2)
+        self.assertEqual(cells[self.django.pk, self.python.pk], 2)
+        self.assertNotIn((self.django.pk, self.go.pk), cells)
+        # Django: Python 2/sqrt(2*3), Rust 1/sqrt(2*2); Rust falls out at two neighbours
+        self.assertEqual(self.neighbours(self.django), ['Python', 'Rust'])
+        # Rust and Go tie for Python at 1/sqrt(3*2); the lower id ranks first
+        self.assertEqual(self.neighbours(self.python), ['Django', 'Rust'])
+
+    def test_update_folds_new_bookings_in_like_a_rebuild(self):
+        co_bookings.rebuild()
+        self.book((1, self.go), (2, self.rust))
+        Booking.objects.bulk_create([Booking(user=self.users[3], conference=self.django, status='cancelled')])
+        self.assertEqual(co_bookings.update(), 4)
+        updated = (self.matrix(), set(ConferenceNeighbour.objects.values_list('conference', 'neighbour', 'rank')))
+
+        co_bookings.rebuild()
+        self.assertEqual(updated, (self.matrix(), set(ConferenceNeighbour.objects.values_list('conference', 'neighbour', 'rank'))))
+        self.assertEqual(co_bookings.update(), 0)
+
+    def test_only_upcoming_open_conferences_are_recommended(self):
+        Conference.objects.filter(pk=self.python.pk).update(date=date(2001, 1, 1))
+        Conference.objects.filter(pk=self.go.pk).update(deleting_at=timezone.now())
+        co_bookings.rebuild()
+        self.assertEqual(also_booked(self.django.pk), [self.rust])
+        self.assertEqual(also_booked(self.rust.pk, exclude={self.django.pk}), [])
+
+    def test_my_bookings_recommends_neighbours_of_the_users_bookings(self):
+        co_bookings.rebuild()
+        self.assertEqual([row['topic'] for row in recommended_for([self.django.pk])], ['Python', 'Rust'])
+        self.client.force_login(self.users[1])
+        response = self.client.get(reverse('my_bookings'))
+        self.assertEqual([row['topic'] for row in response.context['recommendations']], ['Rust'])
@@ -0,0 +1,71 @@
+import random
+from datetime import date, time
+
+from django.test import SimpleTestCase
+
+from booking_app.conflicts import IntervalIndex, find_conflicts
+
+DAY = date(2099, 1, 1)
+
+
+def at(hour, minute=0):
+    return time(hour, minute)
+
+
+class IntervalIndexTests(SimpleTestCase):
+    def test_back_to_back_intervals_do_not_overlap(self):
+        index = IntervalIndex([(DAY, at(9), at(10), 'a'), (DAY, at(11), at(12), 'b')])
+        self.assertEqual(index.overlapping(DAY, at(10), at(11)), [])
+        self.assertEqual(index.overlapping(DAY, at(9, 59), at(11, 1)), ['a', 'b'])
+
+    def test_nested_intervals_overlap_the_one_around_them(self):
+        index = IntervalIndex([(DAY, at(9), at(17), 'day'), (DAY, at(10), at(11), 'talk')])
+        self.assertEqual(index.overlapping(DAY, at(15), at(16)), ['day'])
+        self.assertEqual(index.overlapping(DAY, at(10, 30), at(10, 45)), ['day', 'talk'])
+        self.assertEqual(index.overlapping(DAY, at(8), at(18)), ['day', 'talk'])
+
+    def test_intervals_with_the_same_start_are_all_found(self):
+        index = IntervalIndex([(DAY, at(9), at(10), 'short'), (DAY, at(9), at(12), 'long')])
+        self.assertEqual(index.overlapping(DAY, at(9), at(9, 30)), ['short', 'long'])
+        self.assertEqual(index.overlapping(DAY, at(11), at(13)), ['long'])
+
+    def test_other_dates_are_not_searched(self):
+        index = IntervalIndex([(DAY, at(9), at(10), 'a')])
+        self.assertEqual(index.overlapping(date(2099, 1, 2), at(9), at(10)), [])
+
+    def test_adding_one_by_one_answers_like_building_at_once(self):
+        rng = random.Random(7)
+        intervals = []
+        for n in range(200):
+            start = rng.randrange(0, 23 * 60)
+            end = start + rng.randrange(1, 4 * 60)
+            intervals.append((DAY, start, end, n))
+        built = IntervalIndex(intervals)
+        added = IntervalIndex()
+        for interval in intervals:
+            added.add(*interval)
+        for start in range(0, 24 * 60, 17):
+            self.assertEqual(added.overlapping(DAY, start, start + 30), built.overlapping(DAY, start, start + 30))
+
+
+class FindConflictsTests(SimpleTestCase):
+    def test_back_to_back_sessions_of_a_speaker_do_not_clash(self):
+        rows = [('ada', DAY, at(9), at(10), 1), ('ada', DAY, at(10), at(11), 2)]
+        self.assertEqual(list(find_conflicts(rows)), [])
+
+    def test_nested_and_same_start_sessions_clash(self):
+        rows = [
+            ('ada', DAY, at(9), at(17), 1),
+            ('ada', DAY, at(10), at(11), 2),
+            ('ada', DAY, at(10), at(12), 3),
+        ]
+        self.assertEqual(list(find_conflicts(rows)), [('ada', 1, 2), ('ada', 1, 3), ('ada', 2, 3)])
+
+    def test_only_the_same_speaker_on_the_same_date_clashes(self):
+        rows = [
+            ('ada', DAY, at(9), at(10), 1),
+            ('grace', DAY, at(9), at(10), 2),
+            ('ada', date(2099, 1, 2), at(9), at(10), 3),
+            ('ada', None, at(9), at(10), 4),
+        ]
+        self.assertEqual(list(find_conflicts(rows)), [])
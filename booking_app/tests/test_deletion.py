@@ -0,0 +1,78 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from booking_app import archiving, deletion
+from booking_app.models import Booking, Conference, ConferenceDeletion, Feedback, GroupOrder, Payment, Ticket, User
+
+
+@override_settings(CONFERENCE_DELETION_PAUSE=0, ADMISSION_CONTROL={})
+class ConferenceDeletionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.conference = Conference.objects.create(
+            topic='Withdrawn', description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=100, price=Decimal('40.00'),
+        )
+        for n in range(5):
+            user = User.objects.create_user(f'attendee{n}', password='x')
+            booking = Booking.objects.create(user=user, conference=self.conference, status='confirmed')
+            Payment.objects.create(booking=booking, amount=Decimal('40.00'), payment_method='paypal', status='completed')
+            Feedback.objects.create(user=user, conference=self.conference, rating=5, comments='')
+        order = GroupOrder.objects.create(user=user, conference=self.conference, seats=2, status='confirmed')
+        Ticket.objects.bulk_create([Ticket(order=order, attendee_name='Guest', attendee_email='g@example.com')] * 2)
+        Payment.objects.create(order=order, amount=Decimal('80.00'), payment_method='paypal', status='completed')
+
+    def queue(self):
+        deletion.queue_deletion(Conference.objects.filter(pk=self.conference.pk))
+        self.conference.refresh_from_db()
+
+    def test_queued_conference_is_closed_but_not_marked_as_ended(self):
+        self.queue()
+        self.assertIsNotNone(self.conference.deleting_at)
+        self.assertIsNone(self.conference.archived_at)
+
+        self.client.force_login(User.objects.create_user('latecomer', password='x'))
+        response = self.client.get(reverse('book_conference', args=[self.conference.slug]))
+        self.assertRedirects(response, reverse('conference_detail', args=[self.conference.slug]), fetch_redirect_response=False)
+        self.assertEqual(
+            [str(message) for message in get_messages(response.wsgi_request)],
+            ['This conference has been withdrawn and can no longer be booked.'],
+        )
+
+    def test_queued_conference_is_not_archived(self):
+        self.queue()
+        self.assertNotIn(self.conference, archiving.archivable_conferences(before=date(2100, 1, 1)))
+
+    def test_deletion_empties_every_table_in_batches_then_deletes_the_conference(self):
+        self.queue()
+        done = deletion.delete_queued(batch_size=2)
+        self.assertEqual(len(done), 1)
+        self.assertIsNotNone(done[0].finished_at)
+        self.assertEqual(done[0].rows_deleted, ConferenceDeletion.objects.get().rows_deleted)
+        self.assertFalse(Conference.objects.filter(pk=self.conference.pk).exists())
+        for model in (Booking, Payment, Feedback, GroupOrder, Ticket):
+            self.assertFalse(model.objects.exists(), model.__name__)
+
+    def test_interrupted_deletion_resumes_where_it_stopped(self):
+        self.queue()
+        record = ConferenceDeletion.objects.get()
+
+        class Interrupted(Exception):
+            pass
+
+        def stop_after_three(progress):
+            if progress.rows_deleted >= 3:
+                raise Interrupted
+
+        with self.assertRaises(Interrupted):
+            deletion.delete_conference(record, batch_size=1, progress=stop_after_three)
+        self.assertTrue(Booking.objects.exists())
+
+        deletion.delete_queued(batch_size=1)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(Conference.objects.filter(pk=self.conference.pk).exists())
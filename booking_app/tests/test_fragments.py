@@ -0,0 +1,70 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from booking_app.models import Booking, Conference, ConferenceCategory, ConferenceHasSpeaker, Payment, Speaker, User
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('attendee', password='x')
+        self.client.force_login(self.user)
+        self.speaker = Speaker.objects.create(speaker_id='S1', first_name='Ada', last_name='Lovelace', expertise='Maths')
+
+    def add_conferences(self, count):
+        for _ in range(count):
+            number = Conference.objects.count()
+            conference = Conference.objects.create(
+                topic=f'Conference {number}', description='', date=date(2099, 1, 1),
+                time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+            )
+            ConferenceCategory.objects.create(conference=conference, category='Science')
+            ConferenceHasSpeaker.objects.create(conference=conference, speaker=self.speaker)
+            booking = Booking.objects.create(user=self.user, conference=conference, status='confirmed')
+            Payment.objects.create(booking=booking, amount=Decimal('40.00'), payment_method='paypal')
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_warm_pages_do_not_query_per_row(self):
+        for name in ('my_bookings', 'conferences'):
+            url = reverse(name)
+            self.add_conferences(2)
+            self.queries(url)
+            few = self.queries(url)
+            self.add_conferences(8)
+            self.queries(url)
+            self.assertEqual(self.queries(url), few, name)
+
+    def test_card_is_rerendered_when_its_conference_changes(self):
+        self.add_conferences(1)
+        self.assertContains(self.client.get(reverse('conferences')), 'Ada Lovelace')
+        self.speaker.last_name = 'King'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.speaker.save()
+        self.assertContains(self.client.get(reverse('conferences')), 'Ada King')
+
+    def test_booking_row_is_rerendered_when_its_status_changes(self):
+        self.add_conferences(1)
+        self.assertContains(self.client.get(reverse('my_bookings')), 'Confirmed')
+        Booking.objects.update(status='cancelled')
+        self.assertNotContains(self.client.get(reverse('my_bookings')), '>Confirmed<')
+
+    def test_payment_details_are_loaded_on_demand_for_own_bookings_only(self):
+        self.add_conferences(1)
+        booking = Booking.objects.get()
+        page = self.client.get(reverse('my_bookings')).content.decode()
+        self.assertEqual(page.count('id="paymentModal"'), 1)
+        self.assertIn(reverse('booking_payments', args=[booking.pk]), page)
+
+        self.assertContains(self.client.get(reverse('booking_payments', args=[booking.pk])), '40.00')
+        self.client.force_login(User.objects.create_user('someone-else', password='x'))
+        self.assertEqual(self.client.get(reverse('booking_payments', args=[booking.pk])).status_code, 404)
@@ -0,0 +1,99 @@
+from datetime import date, time
+from decimal import Decimal
+from importlib import import_module
+
+from django.apps import apps
+from django.core.cache import cache
+from django.test import TestCase
+
+from booking_app import inventory
+from booking_app.group_orders import cancel_group_order, place_group_order
+from booking_app.inventory import SeatsUnavailable
+from booking_app.models import Booking, Conference, GroupOrder, Payment, Ticket, User
+from booking_app.payments import settle_payment
+
+
+class SeatInventoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.conference = Conference.objects.create(
+            topic='Inventory', description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=3, price=Decimal('40.00'),
+        )
+
+    def seats_taken(self):
+        return inventory.seats_taken(self.conference.pk)
+
+    def test_reservations_stop_at_capacity(self):
+        self.assertTrue(inventory.reserve_seats(self.conference.pk, 2))
+        self.assertFalse(inventory.reserve_seats(self.conference.pk, 2))
+        self.assertTrue(inventory.reserve_seats(self.conference.pk))
+        self.assertFalse(inventory.reserve_seats(self.conference.pk))
+        inventory.release_seats(self.conference.pk, 2)
+        self.assertEqual(self.seats_taken(), 1)
+
+    def test_cached_count_follows_committed_reservations(self):
+        self.assertEqual(inventory.cached_seats_taken(self.conference.pk), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory.reserve_seats(self.conference.pk, 2)
+        self.assertEqual(inventory.cached_seats_taken(self.conference.pk), 2)
+
+    def test_recount_counts_pending_and_confirmed_seats(self):
+        for name, status in (('pending', 'pending'), ('confirmed', 'confirmed'), ('cancelled', 'cancelled')):
+            Booking.objects.create(user=User.objects.create_user(name), conference=self.conference, status=status)
+        GroupOrder.objects.create(user=User.objects.get(username='pending'), conference=self.conference, seats=1)
+        self.assertEqual(inventory.recount_seats(), 1)
+        self.assertEqual(self.seats_taken(), 3)
+
+    def test_migration_backfill_counts_the_same_seats_as_recount(self):
+        for name, status in (('pending', 'pending'), ('confirmed', 'confirmed'), ('cancelled', 'cancelled')):
+            Booking.objects.create(user=User.objects.create_user(name), conference=self.conference, status=status)
+        import_module('booking_app.migrations.0008_group_orders').count_taken_seats(apps, None)
+        self.assertEqual(self.seats_taken(), 2)
+
+
+class GroupOrderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('organiser', email='organiser@example.com')
+        self.conference = Conference.objects.create(
+            topic='Groups', description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=5, price=Decimal('40.00'),
+        )
+        self.attendees = [(f'Attendee {n}', f'attendee{n}@example.com') for n in range(4)]
+
+    def seats_taken(self):
+        return inventory.seats_taken(self.conference.pk)
+
+    def test_order_reserves_every_seat_and_takes_one_payment(self):
+        order = place_group_order(self.user, self.conference, self.attendees, 'paypal', Decimal('35.00'))
+        self.assertEqual(self.seats_taken(), 4)
+        self.assertEqual(Ticket.objects.filter(order=order).count(), 4)
+        payment = Payment.objects.get(order=order)
+        self.assertEqual(payment.amount, Decimal('140.00'))
+
+        settle_payment(payment.pk, succeeded=True)
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.payment_status), ('confirmed', 'completed'))
+
+    def test_order_that_does_not_fit_leaves_nothing_behind(self):
+        inventory.reserve_seats(self.conference.pk, 2)
+        with self.assertRaises(SeatsUnavailable):
+            place_group_order(self.user, self.conference, self.attendees, 'paypal')
+        self.assertEqual(self.seats_taken(), 2)
+        self.assertFalse(GroupOrder.objects.exists())
+        self.assertFalse(Ticket.objects.exists())
+        self.assertFalse(Payment.objects.exists())
+
+    def test_failed_payment_releases_the_seats(self):
+        order = place_group_order(self.user, self.conference, self.attendees, 'paypal')
+        settle_payment(Payment.objects.get(order=order).pk, succeeded=False)
+        order.refresh_from_db()
+        self.assertEqual((order.status, self.seats_taken()), ('cancelled', 0))
+
+    def test_cancelling_twice_releases_the_seats_once(self):
+        order = place_group_order(self.user, self.conference, self.attendees, 'paypal')
+        inventory.reserve_seats(self.conference.pk)
+        cancel_group_order(order)
+        cancel_group_order(order)
+        self.assertEqual(self.seats_taken(), 1)
@@ -0,0 +1,115 @@
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from booking_app import ledger
+from booking_app.group_orders import cancel_group_order, place_group_order
+from booking_app.models import Booking, BookingEvent, Conference, LedgerSnapshot, Payment, User
+from booking_app.payments import settle_payment
+
+
+def make_conference(topic):
+    return Conference.objects.create(
+        topic=topic, description='', date=date(2099, 1, 1),
+        time_start=time(9), time_end=time(17), capacity=100, price=Decimal('35.00'),
+    )
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        self.start = timezone.now() - timedelta(days=1)
+        self.busy = make_conference('Busy')
+        self.quiet = make_conference('Quiet')
+        events = []
+        for hour in range(10):
+            events.append(BookingEvent(conference=self.busy, kind='booked', seats=2, at=self.hour(hour)))
+            events.append(BookingEvent(conference=self.busy, kind='paid', amount=Decimal('70.00'), at=self.hour(hour)))
+        events.append(BookingEvent(conference=self.busy, kind='cancelled', seats=-1, at=self.hour(5)))
+        events.append(BookingEvent(conference=self.busy, kind='refunded', amount=Decimal('-35.00'), at=self.hour(5)))
+        events.append(BookingEvent(conference=self.quiet, kind='booked', seats=1, at=self.hour(0)))
+        BookingEvent.objects.bulk_create(events)
+
+    def hour(self, n):
+        return self.start + timedelta(hours=n)
+
+    def replay(self, conference, when):
+        seats = revenue = 0
+        for event in BookingEvent.objects.filter(conference=conference, at__lte=when):
+            seats += event.seats
+            revenue += event.amount
+        return seats, revenue
+
+    def test_snapshots_hold_running_totals_of_changed_conferences_only(self):
+        self.assertEqual(ledger.take_snapshots(until=self.hour(3.5)), 2)
+        self.assertEqual(ledger.take_snapshots(until=self.hour(7.5)), 1)
+        snapshot = LedgerSnapshot.objects.get(conference=self.busy, as_of=self.hour(7.5))
+        self.assertEqual((snapshot.seats, snapshot.revenue), self.replay(self.busy, self.hour(7.5)))
+        self.assertFalse(LedgerSnapshot.objects.filter(conference=self.quiet, as_of=self.hour(7.5)).exists())
+
+    def test_cut_at_or_before_the_last_one_writes_nothing(self):
+        ledger.take_snapshots(until=self.hour(5))
+        self.assertEqual(ledger.take_snapshots(until=self.hour(5)), 0)
+        self.assertEqual(ledger.take_snapshots(until=self.hour(4)), 0)
+
+    def test_state_from_a_snapshot_matches_a_full_replay(self):
+        ledger.take_snapshots(until=self.hour(3.5))
+        ledger.take_snapshots(until=self.hour(7.5))
+        for when in (self.hour(-1), self.hour(2), self.hour(3.5), self.hour(5), self.hour(8), self.hour(12)):
+            for conference in (self.busy, self.quiet):
+                self.assertEqual(ledger.state_at(conference.pk, when), self.replay(conference, when), when)
+        self.assertEqual(ledger.state_at(self.busy.pk, self.hour(12)), (19, Decimal('665.00')))
+
+
+class RecordingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('organiser', email='organiser@example.com')
+        self.conference = make_conference('Recorded')
+        self.attendees = [(f'Guest {n}', f'guest{n}@example.com') for n in range(4)]
+
+    def kinds(self):
+        return list(BookingEvent.objects.order_by('pk').values_list('kind', 'seats', 'amount'))
+
+    def test_group_order_records_booking_payment_and_cancellation(self):
+        order = place_group_order(self.user, self.conference, self.attendees, 'paypal')
+        settle_payment(Payment.objects.get(order=order).pk, succeeded=True)
+        cancel_group_order(order)
+        self.assertEqual(self.kinds(), [
+            ('booked', 4, Decimal('0.00')),
+            ('paid', 0, Decimal('140.00')),
+            ('cancelled', -4, Decimal('0.00')),
+            ('refunded', 0, Decimal('-140.00')),
+        ])
+        self.assertEqual(ledger.state_at(self.conference.pk, timezone.now()), (0, Decimal('0.00')))
+
+    def test_capture_after_cancellation_is_recorded_as_a_refund(self):
+        order = place_group_order(self.user, self.conference, self.attendees, 'paypal')
+        cancel_group_order(order)
+        settle_payment(Payment.objects.get(order=order).pk, succeeded=True)
+        self.assertEqual([kind for kind, _, _ in self.kinds()], ['booked', 'cancelled', 'paid', 'refunded'])
+        self.assertEqual(ledger.state_at(self.conference.pk, timezone.now()), (0, Decimal('0.00')))
+
+    def test_failed_capture_gives_the_seats_back(self):
+        order = place_group_order(self.user, self.conference, self.attendees, 'paypal')
+        settle_payment(Payment.objects.get(order=order).pk, succeeded=False)
+        self.assertEqual([kind for kind, _, _ in self.kinds()], ['booked', 'cancelled'])
+
+
+class OpenLedgerTests(TestCase):
+    def test_opening_snapshot_comes_from_seats_taken_and_captured_payments(self):
+        conference = make_conference('Predates the ledger')
+        for n, status in enumerate(('confirmed', 'confirmed', 'cancelled')):
+            user = User.objects.create_user(f'attendee{n}')
+            booking = Booking.objects.create(user=user, conference=conference, status=status)
+            Payment.objects.create(booking=booking, amount=Decimal('35.00'), payment_method='paypal', status='completed')
+        Conference.objects.filter(pk=conference.pk).update(seats_taken=2)
+        tracked = make_conference('Already tracked')
+        LedgerSnapshot.objects.create(conference=tracked, as_of=timezone.now(), seats=0, revenue=0)
+
+        self.assertEqual(ledger.open_ledger(), 1)
+        snapshot = LedgerSnapshot.objects.get(conference=conference)
+        self.assertEqual((snapshot.seats, snapshot.revenue), (2, Decimal('70.00')))
+        self.assertEqual(ledger.open_ledger(), 0)
@@ -0,0 +1,42 @@
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from booking_app import outbox
+from booking_app.models import Booking, Conference, OutboxMessage, User
+
+
+class OutboxDispatchTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('attendee', email='attendee@example.com', password='x')
+        conference = Conference.objects.create(
+            topic='Outbox', description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+        )
+        self.booking = Booking.objects.create(user=user, conference=conference, status='cancelled')
+        self.message = outbox.enqueue('booking_cancelled', self.booking)
+
+    def test_due_messages_are_sent_once(self):
+        self.assertEqual(outbox.dispatch_batch(), (1, 0))
+        self.assertEqual(outbox.dispatch_batch(), (0, 0))
+        self.message.refresh_from_db()
+        self.assertEqual((self.message.status, self.message.attempts), ('sent', 1))
+        self.assertEqual(mail.outbox[0].to, ['attendee@example.com'])
+
+    def test_a_claimed_message_is_left_alone_until_its_claim_lapses(self):
+        self.assertEqual(len(outbox.claim_due('default', 10)), 1)
+        self.assertEqual(outbox.claim_due('default', 10), [])
+
+        later = timezone.now() + timedelta(seconds=outbox.SEND_LEASE_SECONDS + 1)
+        reclaimed, = outbox.claim_due('default', 10, now=later)
+        self.assertEqual(reclaimed.attempts, 2)
+
+    def test_a_message_without_its_booking_fails_at_once(self):
+        OutboxMessage.objects.filter(pk=self.message.pk).update(booking=None)
+        self.assertEqual(outbox.dispatch_batch(), (0, 1))
+        self.message.refresh_from_db()
+        self.assertEqual((self.message.status, self.message.attempts), ('failed', 1))
+        self.assertEqual(mail.outbox, [])
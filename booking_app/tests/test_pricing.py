@@ -0,0 +1,122 @@
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from booking_app import pricing
+from booking_app.models import Booking, Conference, Payment, PriceTable, User
+
+TIERS = {
+    'PRICING_OCCUPANCY_TIERS': [(0.0, 1.00), (0.5, 1.10), (0.9, 1.50)],
+    'PRICING_LEAD_TIME_TIERS': [(60, 0.90), (14, 1.00), (0, 1.20)],
+}
+
+
+@override_settings(**TIERS)
+class PriceTableTests(SimpleTestCase):
+    day = date(2099, 6, 1)
+
+    def price(self, seats_taken, days_before, day=day):
+        table = pricing.build_table(Decimal('100.00'), 10, day)
+        return pricing.price_from_table(table, seats_taken, self.day - timedelta(days=days_before))
+
+    def test_lead_time_bands_start_on_their_day(self):
+        self.assertEqual(self.price(0, 100), Decimal('90.00'))
+        self.assertEqual(self.price(0, 60), Decimal('90.00'))
+        self.assertEqual(self.price(0, 59), Decimal('100.00'))
+        self.assertEqual(self.price(0, 14), Decimal('100.00'))
+        self.assertEqual(self.price(0, 13), Decimal('120.00'))
+
+    def test_occupancy_tiers_start_at_their_share_of_capacity(self):
+        self.assertEqual(self.price(4, 30), Decimal('100.00'))
+        self.assertEqual(self.price(5, 30), Decimal('110.00'))
+        self.assertEqual(self.price(9, 5), Decimal('180.00'))
+
+    def test_conference_without_a_date_has_the_furthest_lead_time_price(self):
+        self.assertEqual(self.price(0, 0, day=None), Decimal('90.00'))
+        self.assertEqual(self.price(5, 0, day=None), Decimal('99.00'))
+
+
+class QuoteTests(SimpleTestCase):
+    def test_quote_is_bound_to_the_user_and_conference(self):
+        quote = pricing.issue_quote(1, 2, Decimal('123.45'))
+        self.assertEqual(pricing.read_quote(quote, 1, 2), Decimal('123.45'))
+        with self.assertRaisesMessage(pricing.InvalidQuote, 'another booking'):
+            pricing.read_quote(quote, 3, 2)
+        with self.assertRaisesMessage(pricing.InvalidQuote, 'not valid'):
+            pricing.read_quote(quote[:-1] + ('A' if quote[-1] != 'A' else 'B'), 1, 2)
+        with self.assertRaisesMessage(pricing.InvalidQuote, 'not valid'):
+            pricing.read_quote(None, 1, 2)
+
+    @override_settings(PRICE_QUOTE_SECONDS=-1)
+    def test_expired_quote_is_refused(self):
+        with self.assertRaisesMessage(pricing.InvalidQuote, 'expired'):
+            pricing.read_quote(pricing.issue_quote(1, 2, Decimal('10.00')), 1, 2)
+
+
+@override_settings(ADMISSION_CONTROL={}, **TIERS)
+class RepricingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.conference = Conference.objects.create(
+                topic='Priced', description='', date=timezone.localdate() + timedelta(days=30),
+                time_start=time(9), time_end=time(17), capacity=10, price=Decimal('100.00'),
+            )
+
+    def test_saving_a_conference_stores_and_caches_its_table(self):
+        table = PriceTable.objects.get(conference=self.conference).table
+        self.assertEqual(cache.get(pricing.table_key(self.conference.pk)), table)
+        self.assertEqual(pricing.current_price(self.conference.pk, 0), Decimal('100.00'))
+
+        self.conference.price = Decimal('200.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.conference.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(pricing.current_price(self.conference.pk, 5), Decimal('220.00'))
+
+    def test_reprice_covers_upcoming_open_conferences(self):
+        past = Conference.objects.create(
+            topic='Past', description='', date=date(2001, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('100.00'),
+        )
+        Conference.objects.create(
+            topic='Withdrawn', description='', date=date(2099, 1, 1), deleting_at=timezone.now(),
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('100.00'),
+        )
+        PriceTable.objects.all().delete()
+        self.assertEqual(pricing.reprice(), 1)
+        self.assertEqual(list(PriceTable.objects.values_list('conference', flat=True)), [self.conference.pk])
+        cache.clear()
+        self.assertEqual(pricing.current_price(past.pk, 0, today=date(2000, 1, 1)), Decimal('90.00'))
+        self.assertFalse(PriceTable.objects.filter(conference=past).exists())
+
+    def test_booking_charges_the_quoted_price(self):
+        user = User.objects.create_user('attendee', password='x')
+        self.client.force_login(user)
+        url = reverse('book_conference', args=[self.conference.slug])
+        form = {'conference': self.conference.pk, 'payment_method': 'paypal'}
+
+        response = self.client.post(url, {**form, 'quote': pricing.issue_quote(user.pk, self.conference.pk, '95.50')})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Payment.objects.get(booking__user=user).amount, Decimal('95.50'))
+
+    def test_foreign_quote_shows_the_current_price_again(self):
+        user = User.objects.create_user('attendee', password='x')
+        self.client.force_login(user)
+        response = self.client.post(reverse('book_conference', args=[self.conference.slug]), {
+            'conference': self.conference.pk, 'payment_method': 'paypal',
+            'quote': pricing.issue_quote(user.pk + 1, self.conference.pk, '1.00'),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['price'], Decimal('100.00'))
+        self.assertEqual(pricing.read_quote(response.context['quote'], user.pk, self.conference.pk), Decimal('100.00'))
+        self.assertEqual(
+            [str(message) for message in get_messages(response.wsgi_request)],
+            ['Your price quote is for another booking. Please confirm the current price.'],
+        )
+        self.assertFalse(Booking.objects.exists())
@@ -0,0 +1,32 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.test import TestCase
+
+from booking_app import reporting
+from booking_app.models import Booking, Conference, Payment, User
+
+
+class FinanceReportTests(TestCase):
+    def test_rows_of_deleted_conferences_are_not_counted_towards_others(self):
+        user = User.objects.create_user('attendee', password='x')
+        first, last = (
+            Conference.objects.create(
+                conference_id=pk, topic=f'Conference {pk}', description='', date=date(2099, 1, 1),
+                time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+            )
+            for pk in (2, 5)
+        )
+        # Bookings do not enforce their conference; 3 sorts before a live id, 9 past the end.
+        # Written in bulk, as the rollup signals would need the conferences to exist
+        bookings = Booking.objects.bulk_create(
+            Booking(user=user, conference_id=conference_id, status='confirmed') for conference_id in (2, 3, 9)
+        )
+        Payment.objects.bulk_create(
+            Payment(booking=booking, amount=Decimal('40.00'), payment_method='paypal', status='completed')
+            for booking in bookings
+        )
+
+        occupancy = {row['conference_id']: row for row in reporting.build_report()['occupancy']}
+        self.assertEqual((occupancy[first.pk]['confirmed'], occupancy[first.pk]['revenue']), (1, Decimal('40.00')))
+        self.assertEqual((occupancy[last.pk]['confirmed'], occupancy[last.pk]['revenue']), (0, Decimal('0.00')))
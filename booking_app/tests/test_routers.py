@@ -0,0 +1,54 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from booking_app import routers
+from booking_app.models import Conference, User
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTests(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        # The replica lags: it has not seen the primary's conference yet
+        for alias, topic in (('default', 'Primary topic'), ('replica', 'Replica topic')):
+            Conference(
+                topic=topic, description='', date=date(2099, 1, 1),
+                time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+            ).save(using=alias)
+
+    def test_read_only_views_read_a_replica(self):
+        response = self.client.get(reverse('conferences'))
+        self.assertContains(response, 'Replica topic')
+        self.assertNotContains(response, 'Primary topic')
+
+    def test_writes_stay_on_the_primary(self):
+        self.client.post(reverse('register'), {
+            'username': 'newcomer', 'first_name': 'New', 'last_name': 'Comer', 'email': 'newcomer@example.com',
+            'password1': 'a-long-passphrase', 'password2': 'a-long-passphrase',
+        })
+        self.assertTrue(User.objects.using('default').filter(username='newcomer').exists())
+        self.assertFalse(User.objects.using('replica').exists())
+
+        router = routers.PrimaryReplicaRouter()
+        routers._state.use_replica = True
+        try:
+            self.assertEqual(router.db_for_read(Conference), 'replica')
+            self.assertEqual(router.db_for_write(Conference), 'default')
+            with routers.primary_db():
+                self.assertIsNone(router.db_for_read(Conference))
+        finally:
+            routers._state.use_replica = False
+
+    def test_a_write_pins_the_browser_to_the_primary(self):
+        response = self.client.post(reverse('login'), {'username': 'nobody', 'password': 'wrong'})
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+        response = self.client.get(reverse('conferences'))
+        self.assertContains(response, 'Primary topic')
+        self.assertNotContains(response, 'Replica topic')
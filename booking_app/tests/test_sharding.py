@@ -0,0 +1,80 @@
+from datetime import time
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from booking_app import analytics, archiving, ledger, reporting, sharding
+from booking_app.models import (
+    ArchivedBooking, Booking, Conference, DailyConferenceStats, DailyPaymentMethodStats, Feedback, GroupOrder,
+    Payment, User,
+)
+
+
+@override_settings(BOOKING_SHARDS=['default', 'shard1'])
+class ShardedReadersTests(TestCase):
+    databases = {'default', 'shard1'}
+
+    def setUp(self):
+        sharding.prepare_shard('shard1')
+        self.today = timezone.localdate()
+        self.user = User.objects.create_user('attendee', password='x')
+        # Conference 2 is on default, conference 3 on shard1
+        self.local, self.remote = (
+            Conference.objects.create(
+                conference_id=pk, topic=f'Conference {pk}', description='', date=self.today,
+                time_start=time(9), time_end=time(17), capacity=100, price=Decimal('50.00'), seats_taken=4,
+            )
+            for pk in (2, 3)
+        )
+        self.assertEqual(sharding.shard_for(self.remote.pk), 'shard1')
+        for conference in (self.local, self.remote):
+            booking = Booking.objects.create(user=self.user, conference=conference, status='confirmed')
+            Payment.objects.create(booking=booking, amount=Decimal('50.00'), payment_method='paypal', status='completed')
+        self.order = GroupOrder.objects.create(user=self.user, conference=self.remote, seats=3, status='confirmed')
+        Payment.objects.create(order=self.order, amount=Decimal('150.00'), payment_method='credit_card', status='completed')
+        Feedback.objects.create(user=self.user, conference=self.remote, rating=4, comments='')
+
+    def test_rows_of_the_remote_conference_are_on_its_shard(self):
+        self.assertEqual(Booking.objects.using('shard1').get().conference_id, self.remote.pk)
+        self.assertEqual(Payment.objects.using('shard1').count(), 2)
+        self.assertEqual(Payment.objects.using('default').count(), 1)
+
+    def test_rebuild_day_counts_payments_and_feedback_on_every_shard(self):
+        DailyConferenceStats.objects.all().delete()
+        DailyPaymentMethodStats.objects.all().delete()
+        analytics.rebuild_day(self.today)
+
+        stats = DailyConferenceStats.objects.get(conference=self.remote, day=self.today)
+        self.assertEqual((stats.bookings, stats.revenue), (4, Decimal('200.00')))
+        self.assertEqual((stats.ratings_count, stats.ratings_sum), (1, 4))
+        self.assertEqual(DailyConferenceStats.objects.get(conference=self.local, day=self.today).revenue, Decimal('50.00'))
+        methods = dict(
+            DailyPaymentMethodStats.objects.filter(conference=self.remote).values_list('payment_method', 'amount')
+        )
+        self.assertEqual(methods, {'paypal': Decimal('50.00'), 'credit_card': Decimal('150.00')})
+
+    def test_finance_report_and_ledger_opening_read_every_shard(self):
+        occupancy = {row['conference_id']: row for row in reporting.build_report()['occupancy']}
+        self.assertEqual(occupancy[self.remote.pk]['confirmed'], 4)
+        self.assertEqual(occupancy[self.remote.pk]['revenue'], Decimal('200.00'))
+
+        ledger.open_ledger()
+        self.assertEqual(ledger.state_at(self.remote.pk, timezone.now()), (4, Decimal('200.00')))
+
+    def test_deleting_a_user_deletes_their_rows_on_other_shards(self):
+        self.user.delete()
+        for alias in ('default', 'shard1'):
+            self.assertFalse(Booking.objects.using(alias).exists())
+            self.assertFalse(Payment.objects.using(alias).exists())
+            self.assertFalse(Feedback.objects.using(alias).exists())
+
+    def test_archiving_sweeps_rows_left_on_default(self):
+        # Written before sharding was set up
+        other = User.objects.create_user('early', password='x')
+        Booking.objects.using('default').create(user=other, conference=self.remote, status='confirmed')
+
+        moved = archiving.archive_conference(self.remote.pk)
+        self.assertEqual(moved['bookings'], 2)
+        self.assertFalse(Booking.objects.using('default').filter(conference=self.remote).exists())
+        self.assertEqual(ArchivedBooking.objects.filter(conference=self.remote).count(), 2)
@@ -0,0 +1,48 @@
+from datetime import date, time
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from booking_app import snapshots
+from booking_app.models import Conference
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def create(self, topic):
+        return Conference.objects.create(
+            topic=topic, description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+        )
+
+    def test_snapshot_is_built_once_and_replaced_on_change(self):
+        conference = self.create('Snapshots')
+        with self.captureOnCommitCallbacks(execute=True):
+            conference.save()
+        builds = snapshots.stats['builds']
+        self.assertEqual(snapshots.get_snapshot(conference.slug)['topic'], 'Snapshots')
+        snapshots.get_snapshot(conference.slug)
+        self.assertEqual(snapshots.stats['builds'], builds + 1)
+
+        conference.topic = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            conference.save()
+        self.assertEqual(snapshots.get_snapshot(conference.slug)['topic'], 'Renamed')
+
+    def test_unknown_slug_is_remembered_briefly_and_leaves_no_lock(self):
+        with mock.patch.object(snapshots.cache, 'set', wraps=snapshots.cache.set) as cache_set:
+            self.assertIsNone(snapshots.get_snapshot('no-such-conference'))
+        cache_set.assert_called_once()
+        self.assertEqual(cache_set.call_args.args[2], snapshots.MISSING_TIMEOUT)
+        self.assertEqual(snapshots._local_locks, {})
+
+    def test_conference_created_under_a_missing_slug_is_served(self):
+        self.assertIsNone(snapshots.get_snapshot('late-arrival'))
+        with self.captureOnCommitCallbacks(execute=True):
+            conference = self.create('Late arrival')
+        self.assertEqual(conference.slug, 'late-arrival')
+        self.assertEqual(snapshots.get_snapshot('late-arrival')['conference_id'], conference.pk)
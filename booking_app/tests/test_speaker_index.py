@@ -0,0 +1,79 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from booking_app import speaker_index
+from booking_app.models import Conference, ConferenceHasSpeaker, Speaker
+from booking_app.speaker_index import SpeakerIndex
+
+
+class SpeakerIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = SpeakerIndex([
+            ('S1', 'José', 'García', 'Machine learning'),
+            ('S2', 'Ada', 'Lovelace', 'Mathematics'),
+            ('S3', 'Alan', 'Turing', 'Machine intelligence'),
+            ('S4', 'Grace', 'Hopper', 'Compilers'),
+        ])
+
+    def names(self, query, limit=10):
+        return [speaker['name'] for speaker in self.index.search(query, limit)]
+
+    def test_words_match_as_prefixes_of_any_name_or_expertise_word(self):
+        self.assertEqual(self.names('lov'), ['Ada Lovelace'])
+        self.assertEqual(self.names('mach'), ['Alan Turing', 'José García'])
+        self.assertEqual(self.names('comp'), ['Grace Hopper'])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.names('machine intel'), ['Alan Turing'])
+        self.assertEqual(self.names('machine hopper'), [])
+
+    def test_case_and_accents_are_ignored(self):
+        self.assertEqual(self.names('JOSE garc'), ['José García'])
+
+    def test_results_are_ordered_by_name_and_limited(self):
+        self.assertEqual(self.names('a', limit=2), ['Ada Lovelace', 'Alan Turing'])
+        self.assertEqual(self.names(''), [])
+
+    def test_get_looks_a_speaker_up_by_id(self):
+        self.assertEqual(self.index.get('S4')['name'], 'Grace Hopper')
+        self.assertIsNone(self.index.get('missing'))
+
+
+@override_settings(ADMISSION_CONTROL={})
+class SpeakerAutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        speaker_index._index = None
+        self.speaker = Speaker.objects.create(speaker_id='S1', first_name='Ada', last_name='Lovelace', expertise='Maths')
+
+    def test_endpoint_returns_matching_speakers(self):
+        response = self.client.get(reverse('speaker_autocomplete'), {'q': 'love'})
+        self.assertEqual(response.json()['results'], [{'id': 'S1', 'name': 'Ada Lovelace', 'expertise': 'Maths'}])
+
+    def test_index_is_rebuilt_after_a_speaker_changes(self):
+        speaker_index.search_speakers('ada')
+        with self.captureOnCommitCallbacks(execute=True):
+            Speaker.objects.create(speaker_id='S2', first_name='Adele', last_name='Goldberg', expertise='Smalltalk')
+        self.assertEqual([s['id'] for s in speaker_index.search_speakers('ad')], ['S1', 'S2'])
+
+    def test_search_page_does_not_list_every_speaker(self):
+        conference = Conference.objects.create(
+            topic='Analytical engines', description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+        )
+        ConferenceHasSpeaker.objects.create(conference=conference, speaker=self.speaker)
+        Conference.objects.create(
+            topic='Compiler construction', description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+        )
+        response = self.client.get(reverse('conferences'))
+        self.assertContains(response, 'Compiler construction')
+        self.assertNotContains(response, '<option value="S1"')
+
+        response = self.client.get(reverse('conferences'), {'speaker': 'S1'})
+        self.assertContains(response, 'Analytical engines')
+        self.assertNotContains(response, 'Compiler construction')
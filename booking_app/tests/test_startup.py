@@ -0,0 +1,47 @@
+from datetime import date, time
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from booking_app.management.commands import benchmark_startup
+from booking_app.models import Booking, Conference, Payment, User
+
+
+class WorkerBootTests(SimpleTestCase):
+    def test_worker_boot_does_not_import_the_lazy_modules(self):
+        _, imports, _ = benchmark_startup.run(['-c', benchmark_startup.WORKER_BOOT])
+        self.assertIn('booking_app.views', imports)
+        loaded = {module.split('.')[0] for module in imports} & set(benchmark_startup.LAZY_MODULES)
+        self.assertEqual(loaded, set())
+
+    def test_budget_overrun_fails_the_command(self):
+        with self.assertRaisesMessage(CommandError, 'over the 0 ms budget'):
+            call_command('benchmark_startup', runs=1, budget_ms=0, stdout=StringIO())
+
+
+class ReceiptDownloadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('attendee', password='x')
+        conference = Conference.objects.create(
+            topic='Printing', description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+        )
+        self.booking = Booking.objects.create(user=self.user, conference=conference, status='confirmed')
+        self.client.force_login(self.user)
+
+    def test_completed_payment_downloads_as_pdf(self):
+        Payment.objects.create(booking=self.booking, amount=Decimal('40.00'), payment_method='paypal', status='completed')
+        response = self.client.get(reverse('download_receipt', args=[self.booking.pk]))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="receipt_{self.booking.pk}.pdf"')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    def test_pending_payment_has_no_pdf_yet(self):
+        Payment.objects.create(booking=self.booking, amount=Decimal('40.00'), payment_method='paypal')
+        response = self.client.get(reverse('download_receipt', args=[self.booking.pk]))
+        self.assertRedirects(response, reverse('receipt', args=[self.booking.pk]), fetch_redirect_response=False)
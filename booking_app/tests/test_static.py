@@ -0,0 +1,64 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+PRODUCTION_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
+
+class CollectedStaticTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.root)
+        cls.settings = override_settings(STATIC_ROOT=cls.root, STORAGES=PRODUCTION_STORAGES, DEBUG=False)
+        cls.settings.enable()
+        cls.addClassCleanup(cls.settings.disable)
+        # The vendored libraries only add compression time
+        call_command('collectstatic', interactive=False, verbosity=0, ignore_patterns=['vendor'])
+        with open(os.path.join(cls.root, 'staticfiles.json')) as manifest:
+            cls.paths = json.load(manifest)['paths']
+
+    def read(self, name):
+        with open(os.path.join(self.root, self.paths[name])) as file:
+            return file.read()
+
+    def test_files_get_content_hashed_names_and_compressed_copies(self):
+        hashed = self.paths['css/site.css']
+        self.assertRegex(hashed, r'^css/site\.[0-9a-f]{12}\.css$')
+        for suffix in ('.gz', '.br'):
+            self.assertTrue(os.path.exists(os.path.join(self.root, hashed + suffix)), suffix)
+
+    def test_stylesheet_points_at_hashed_images(self):
+        css = self.read('css/site.css')
+        self.assertIn(os.path.basename(self.paths['images/conference-bg-1024.webp']), css)
+        self.assertNotIn("url('../images/conference-bg-1024.webp')", css)
+
+    def test_hashed_files_are_served_compressed_and_immutable(self):
+        response = self.client.get(f'/static/{self.paths["css/site.css"]}', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=315360000', response['Cache-Control'])
+
+
+class PageAssetsTests(TestCase):
+    def test_pages_load_self_hosted_assets_only(self):
+        html = self.client.get(reverse('home')).content.decode()
+        self.assertIn('/static/vendor/bootstrap-5.3.0/css/bootstrap.min.css', html)
+        self.assertIn('/static/css/site.css', html)
+        self.assertNotIn('cdn.', html)
+        self.assertNotIn('conference-bg.jpg', html)
+        scripts = re.findall(r'<script [^>]*>', html)
+        self.assertTrue(scripts)
+        for script in scripts:
+            self.assertIn(' defer', script)
@@ -0,0 +1,65 @@
+import json
+from datetime import date, time
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from booking_app import tickets
+from booking_app.models import Booking, CheckIn, Conference, User
+
+
+class CheckInTests(TestCase):
+    def setUp(self):
+        tickets._admitted.clear()
+        self.conference = Conference.objects.create(
+            topic='Door', description='', date=date(2099, 1, 1),
+            time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+        )
+        self.first, self.second = (
+            Booking.objects.create(
+                user=User.objects.create_user(name, password='x'), conference=self.conference, status='confirmed',
+            )
+            for name in ('first', 'second')
+        )
+
+    def scan(self, *bookings, token=None):
+        tokens = [tickets.booking_token(booking) for booking in bookings]
+        if token:
+            tokens.append(token)
+        response = self.client.post(
+            reverse('check_in', args=[self.conference.pk]),
+            json.dumps({'device': 'door-1', 'scans': [{'token': t} for t in tokens]}),
+            content_type='application/json',
+            headers={tickets.SCANNER_HEADER: tickets.scanner_key(self.conference.pk)},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_a_ticket_is_admitted_once(self):
+        self.assertEqual(self.scan(self.first, self.first), ['admitted', 'duplicate'])
+        self.assertEqual(self.scan(self.first, self.second), ['duplicate', 'admitted'])
+        self.assertEqual(CheckIn.objects.filter(conference=self.conference).count(), 2)
+
+    def test_a_ticket_admitted_by_another_process_is_a_duplicate(self):
+        self.scan(self.first)
+        tickets._admitted.clear()
+        self.assertEqual(self.scan(self.first), ['duplicate'])
+        self.assertEqual(CheckIn.objects.filter(code=f'b{self.first.pk}').count(), 1)
+
+    def test_a_revoked_ticket_is_refused(self):
+        tickets.revoke(self.conference.pk, [f'b{self.second.pk}'])
+        self.assertEqual(self.scan(self.second, self.first, self.second), ['revoked', 'admitted', 'revoked'])
+        self.assertFalse(CheckIn.objects.filter(code=f'b{self.second.pk}').exists())
+
+        response = self.client.get(
+            reverse('ticket_revocations', args=[self.conference.pk]),
+            headers={tickets.SCANNER_HEADER: tickets.scanner_key(self.conference.pk)},
+        )
+        self.assertEqual(response.json()['bookings'], [self.second.pk])
+
+    def test_forged_and_foreign_tickets_are_invalid(self):
+        forged = tickets.booking_token(self.first)[:-2] + 'xx'
+        foreign = tickets.ticket_token(self.conference.pk + 1, f'b{self.first.pk}')
+        self.assertEqual(self.scan(token=forged), ['invalid'])
+        self.assertEqual(self.scan(token=foreign), ['invalid'])
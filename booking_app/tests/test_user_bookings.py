@@ -0,0 +1,62 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from booking_app.models import Booking, Conference, User
+from booking_app.user_bookings import active_conference_ids, booked_conference_ids
+
+
+class BookedSetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('attendee')
+        self.first, self.second = (
+            Conference.objects.create(
+                topic=topic, description='', date=date(2099, 1, 1),
+                time_start=time(9), time_end=time(17), capacity=10, price=Decimal('40.00'),
+            )
+            for topic in ('First', 'Second')
+        )
+
+    def book(self, conference, status='pending'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(user=self.user, conference=conference, status=status)
+
+    def test_warm_checks_need_no_query(self):
+        self.book(self.first)
+        active_conference_ids(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertIn(self.first.pk, active_conference_ids(self.user.pk))
+            self.assertNotIn(self.second.pk, booked_conference_ids(self.user.pk))
+
+    def test_cached_sets_follow_bookings_as_they_change(self):
+        self.assertEqual(active_conference_ids(self.user.pk), frozenset())
+        booking = self.book(self.first)
+        self.assertEqual(active_conference_ids(self.user.pk), {self.first.pk})
+
+        booking.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        # A cancelled booking still counts as booked, for recommendations
+        self.assertEqual(active_conference_ids(self.user.pk), frozenset())
+        self.assertEqual(booked_conference_ids(self.user.pk), {self.first.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.delete()
+        self.assertEqual(booked_conference_ids(self.user.pk), frozenset())
+
+    def test_cached_sets_match_a_fresh_load(self):
+        self.book(self.first, 'confirmed')
+        active_conference_ids(self.user.pk)
+        self.book(self.second, 'cancelled')
+        cached = (booked_conference_ids(self.user.pk), active_conference_ids(self.user.pk))
+        cache.clear()
+        self.assertEqual((booked_conference_ids(self.user.pk), active_conference_ids(self.user.pk)), cached)
+
+    def test_change_rolled_back_leaves_the_cache_alone(self):
+        active_conference_ids(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=False):
+            Booking.objects.create(user=self.user, conference=self.first)
+        self.assertEqual(active_conference_ids(self.user.pk), frozenset())
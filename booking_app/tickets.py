@@ -0,0 +1,195 @@
+# booking_app/tickets.py
+"""Signed tickets and batched check-in at the venue door.
+
+A confirmed booking, and each seat of a confirmed group order, has a ticket
+token (the QR payload) of the form ``<conference_id>.<code>.<signature>``.
+The code is ``b<booking_id>`` or ``t<ticket_id>`` and the signature is an
+HMAC-SHA256 of the rest under a key derived for that conference from
+TICKET_SIGNING_KEY. Tokens are computed, not stored, so issuing one costs
+nothing. A scanner loaded with the conference key (see the scanner_setup
+command) verifies tokens itself, without a round trip over the venue link.
+
+Scanners send what they scanned to ``check_in_view`` in batches.
+``check_in()`` rejects repeats from an in-memory set of the codes this
+process has already admitted for the conference, and writes the rest with
+one bulk insert. The unique (conference, code) constraint catches a ticket
+admitted by another process, so a code is admitted at most once.
+
+Cancelling a ticket that was issued revokes it. Scanners pull the
+revocations of their conference from ``ticket_revocations_view``, passing
+the last id they have so they only get new ones.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import CheckIn, TicketRevocation
+
+SCANNER_HEADER = 'X-Scanner-Key'
+SIGNATURE_BYTES = 16
+MAX_SCANS_PER_BATCH = 1000
+# Conferences whose admitted codes each process keeps in memory
+MAX_TRACKED_CONFERENCES = 50
+
+_admitted = {}
+_admitted_lock = threading.Lock()
+
+
+class InvalidTicket(Exception):
+    pass
+
+
+def _master_key():
+    return getattr(settings, 'TICKET_SIGNING_KEY', None) or settings.SECRET_KEY
+
+
+def conference_key(conference_id):
+    """The key a conference's tickets are signed with; load it onto its scanners."""
+    return hmac.new(_master_key().encode(), f'tickets:{conference_id}'.encode(), hashlib.sha256).digest()
+
+
+def scanner_key(conference_id):
+    """The key a conference's scanners send in SCANNER_HEADER."""
+    return hmac.new(_master_key().encode(), f'scanner:{conference_id}'.encode(), hashlib.sha256).hexdigest()
+
+
+def scanner_allowed(conference_id, key):
+    return hmac.compare_digest(scanner_key(conference_id), key or '')
+
+
+def _signature(key, payload):
+    digest = hmac.new(key, payload.encode(), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    return base64.urlsafe_b64encode(digest).decode().rstrip('=')
+
+
+def ticket_token(conference_id, code):
+    payload = f'{conference_id}.{code}'
+    return f'{payload}.{_signature(conference_key(conference_id), payload)}'
+
+
+def booking_token(booking):
+    """The ticket token of a confirmed booking, or None."""
+    if booking.status != 'confirmed':
+        return None
+    return ticket_token(booking.conference_id, f'b{booking.booking_id}')
+
+
+def group_ticket_tokens(order, tickets):
+    """``[(ticket, token)]`` for the tickets of ``order``; tokens are None until it is confirmed."""
+    if order.status != 'confirmed':
+        return [(ticket, None) for ticket in tickets]
+    return [(ticket, ticket_token(order.conference_id, f't{ticket.pk}')) for ticket in tickets]
+
+
+def read_token(token, key=None):
+    """Return ``(conference_id, code)`` if ``token`` is genuine."""
+    try:
+        conference_id, code, signature = token.split('.')
+        conference_id = int(conference_id)
+    except (AttributeError, ValueError):
+        raise InvalidTicket('Malformed ticket.')
+    key = key or conference_key(conference_id)
+    if not hmac.compare_digest(_signature(key, f'{conference_id}.{code}'), signature):
+        raise InvalidTicket('Ticket signature does not match.')
+    return conference_id, code
+
+
+def revoke(conference_id, codes):
+    """Revoke issued tickets; call it inside the transaction that cancels them."""
+    TicketRevocation.objects.bulk_create(
+        [TicketRevocation(conference_id=conference_id, code=code) for code in codes],
+        ignore_conflicts=True,
+    )
+
+
+def revocations_since(conference_id, since=0):
+    """``(last id, booking ids, ticket ids)`` revoked for a conference after revocation ``since``."""
+    rows = TicketRevocation.objects.filter(conference_id=conference_id, pk__gt=since).values_list('pk', 'code')
+    last, bookings, tickets = since, [], []
+    for pk, code in rows:
+        last = max(last, pk)
+        (bookings if code[0] == 'b' else tickets).append(int(code[1:]))
+    return last, sorted(bookings), sorted(tickets)
+
+
+def parse_scans(body):
+    """Decode a check-in request body: ``(device, [(token, scanned_at)])``."""
+    request = json.loads(body)
+    if not isinstance(request, dict) or not isinstance(request.get('scans'), list):
+        raise ValueError('Expected {"device": ..., "scans": [{"token": ..., "at": ...}]}.')
+    if len(request['scans']) > MAX_SCANS_PER_BATCH:
+        raise ValueError(f'At most {MAX_SCANS_PER_BATCH} scans per batch.')
+    scans = []
+    for scan in request['scans']:
+        scanned_at = datetime.fromisoformat(scan['at']) if scan.get('at') else timezone.now()
+        if timezone.is_naive(scanned_at):
+            scanned_at = timezone.make_aware(scanned_at)
+        scans.append((scan['token'], scanned_at))
+    return str(request.get('device', ''))[:45], scans
+
+
+def _admitted_codes(conference_id):
+    with _admitted_lock:
+        if conference_id not in _admitted and len(_admitted) >= MAX_TRACKED_CONFERENCES:
+            del _admitted[next(iter(_admitted))]
+        return _admitted.setdefault(conference_id, set())
+
+
+def check_in(conference_id, scans, device=''):
+    """Admit a batch of ``(token, scanned_at)`` scans at a conference's door.
+
+    Returns a result per scan, in order: 'admitted', 'duplicate' (already
+    admitted, or earlier in the batch), 'revoked' or 'invalid' (forged, or
+    for another conference).
+    """
+    results = [None] * len(scans)
+    fresh, repeats = {}, []
+    admitted = _admitted_codes(conference_id)
+    key = conference_key(conference_id)
+    for i, (token, scanned_at) in enumerate(scans):
+        try:
+            ticket_conference, code = read_token(token, key)
+        except InvalidTicket:
+            results[i] = 'invalid'
+            continue
+        if ticket_conference != conference_id:
+            results[i] = 'invalid'
+        elif code in admitted:
+            results[i] = 'duplicate'
+        elif code in fresh:
+            repeats.append((i, code))
+        else:
+            fresh[code] = i, scanned_at
+
+    revoked = set()
+    if fresh:
+        revoked = set(
+            TicketRevocation.objects.filter(conference_id=conference_id, code__in=fresh).values_list('code', flat=True)
+        )
+        for code in revoked:
+            results[fresh.pop(code)[0]] = 'revoked'
+    for i, code in repeats:
+        results[i] = 'revoked' if code in revoked else 'duplicate'
+    if fresh:
+        batch = uuid.uuid4()
+        CheckIn.objects.bulk_create(
+            [
+                CheckIn(conference_id=conference_id, code=code, scanned_at=scanned_at, device=device, batch=batch)
+                for code, (_, scanned_at) in fresh.items()
+            ],
+            ignore_conflicts=True,
+        )
+        # Codes another process admitted first were skipped by the insert
+        inserted = set(CheckIn.objects.filter(batch=batch).values_list('code', flat=True))
+        for code, (i, _) in fresh.items():
+            results[i] = 'admitted' if code in inserted else 'duplicate'
+        with _admitted_lock:
+            admitted.update(fresh)
+    return results
@@ -8,11 +8,22 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('conferences/', views.conferences_view, name='conferences'),
+    path('calendar/conferences.ics', views.conference_calendar_view, name='conference_calendar'),
+    path('calendar/<str:token>/bookings.ics', views.booking_calendar_view, name='booking_calendar'),
+    path('calendar/reset/', views.reset_calendar_view, name='reset_calendar'),
+    path('speakers/autocomplete/', views.speaker_autocomplete_view, name='speaker_autocomplete'),
     path('conferences/<slug:slug>/', views.conference_detail_view, name='conference_detail'),
     path('conferences/<slug:slug>/book/', views.booking_view, name='book_conference'),
+    path('conferences/<slug:slug>/book-group/', views.group_booking_view, name='book_group'),
     path('conferences/<slug:slug>/feedback/', views.feedback_view, name='feedback'),
     path('my-bookings/', views.my_bookings_view, name='my_bookings'),
+    path('my-bookings/<int:booking_id>/payments/', views.booking_payments_view, name='booking_payments'),
     path('my-bookings/<int:booking_id>/cancel/', views.cancel_booking_view, name='cancel_booking'),
+    path('group-orders/<int:order_id>/', views.group_order_view, name='group_order'),
     path('receipt/<int:booking_id>/', views.receipt_view, name='receipt'),
     path('receipt/<int:booking_id>/download/', views.download_receipt_view, name='download_receipt'),
+    path('analytics/', views.analytics_dashboard_view, name='analytics_dashboard'),
+    path('payments/webhook/', views.payment_webhook_view, name='payment_webhook'),
+    path('check-in/<int:conference_id>/scans/', views.check_in_view, name='check_in'),
+    path('check-in/<int:conference_id>/revocations/', views.ticket_revocations_view, name='ticket_revocations'),
 ]
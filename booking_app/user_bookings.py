@@ -0,0 +1,87 @@
+# booking_app/user_bookings.py
+"""Which conferences each user has booked, cached per user.
+
+Each user's entry is a pair of frozensets of conference ids:
+
+* ``booked``: every conference the user has a Booking row for, whatever
+  its status, to leave out of their recommendations.
+* ``active``: the subset whose booking is not cancelled, for the
+  "Booked" badges and "can book": bookings are unique per user and
+  conference, and booking a conference again reopens the cancelled row.
+
+Users hold a handful of bookings, so two small sets are more compact than
+a bitmap over all conference ids and still answer membership in O(1).
+The entry is loaded with one query on the (user, conference) index of
+each shard and then kept up to date as bookings are created, cancelled or deleted, so a
+warm check needs no database round trip.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import sharding
+from .models import Booking
+
+BOOKED_SET_TIMEOUT = 3600
+
+
+def booked_set_key(user_id):
+    return f'user_booked_conferences:{user_id}'
+
+
+def _load(user_id):
+    booked, active = set(), set()
+    rows = sharding.fan_out(
+        lambda alias: Booking.objects.using(alias).filter(user_id=user_id).values_list('conference_id', 'status')
+    )
+    for conference_id, status in rows:
+        booked.add(conference_id)
+        if status != 'cancelled':
+            active.add(conference_id)
+    return frozenset(booked), frozenset(active)
+
+
+def _entry(user_id):
+    entry = cache.get(booked_set_key(user_id))
+    if entry is None:
+        entry = _load(user_id)
+        cache.set(booked_set_key(user_id), entry, BOOKED_SET_TIMEOUT)
+    return entry
+
+
+def booked_conference_ids(user_id):
+    """Ids of the conferences ``user_id`` has a booking for, cancelled or not."""
+    return _entry(user_id)[0]
+
+
+def active_conference_ids(user_id):
+    """Ids of the conferences ``user_id`` holds a pending or confirmed booking for."""
+    return _entry(user_id)[1]
+
+
+def _update(user_id, conference_id, booked, active):
+    """Apply one booking change to the cached entry once the change commits.
+
+    An entry that is not cached is left alone; the next read loads it.
+    """
+    def apply():
+        key = booked_set_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            return
+        booked_ids, active_ids = entry
+        booked_ids = booked_ids | {conference_id} if booked else booked_ids - {conference_id}
+        active_ids = active_ids | {conference_id} if active else active_ids - {conference_id}
+        cache.set(key, (booked_ids, active_ids), BOOKED_SET_TIMEOUT)
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, **kwargs):
+    _update(instance.user_id, instance.conference_id, booked=True, active=instance.status != 'cancelled')
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    _update(instance.user_id, instance.conference_id, booked=False, active=False)
@@ -1,24 +1,33 @@
 # booking_app/views.py
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.db import IntegrityError
-from django.http import HttpResponse
-from .models import User, Conference, Booking, Feedback, Speaker, Payment
-from .forms import UserRegistrationForm, BookingForm, FeedbackForm, ConferenceSearchForm, PaymentForm
+from django.db.models import Count, prefetch_related_objects
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from .models import Conference, Booking, Feedback, Payment, GroupOrder, ArchivedBooking
+from .forms import UserRegistrationForm, BookingForm, FeedbackForm, ConferenceSearchForm, PaymentForm, AnalyticsRangeForm, GroupBookingForm
+from .analytics import dashboard_data
+from .conflicts import booking_overlap_policy, user_booking_conflicts
+from .group_orders import cancel_group_order, place_group_order
+from .gateway import SIGNATURE_HEADER, InvalidSignature
+from .inventory import SeatsUnavailable, cached_seats_taken, release_seats, reserve_seats
+from .payments import handle_gateway_event, queue_capture
+from .receipts import render_receipt_pdf
+from .recommendations import also_booked, recommended_for
+from .snapshots import conference_versions, get_snapshot
+from .speaker_index import search_speakers, speaker_summary
+from .user_bookings import active_conference_ids, booked_conference_ids
+from . import calendar_feeds, ledger, outbox, pricing, sharding, tickets
 import uuid
-from django.template.loader import render_to_string
-from django.conf import settings
-import os
-import io
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
 from decimal import Decimal
+from operator import attrgetter
+from datetime import timedelta
+from django.utils import timezone
 
 def set_default_prices():
     """Set default prices for conferences that don't have a price set."""
@@ -81,58 +90,138 @@ def conferences_view(request):
         if category:
             conferences = conferences.filter(categories__category__icontains=category)
         if speaker:
-            conferences = conferences.filter(speakers=speaker)
+            conferences = conferences.filter(speakers__speaker_id=speaker)
+    
+    # Conferences the visitor holds a booking for, for the "Booked" badges
+    booked_ids = active_conference_ids(request.user.pk) if request.user.is_authenticated else frozenset()
+    
+    # The cards are fragment-cached per conference version, so their
+    # categories and speakers are only queried when a conference changes
+    conferences = list(conferences)
+    versions = conference_versions([conference.slug for conference in conferences])
+    for conference in conferences:
+        conference.version = versions[conference.slug]
+    
+    selected_speaker = None
+    if search_form.is_valid() and search_form.cleaned_data.get('speaker'):
+        selected_speaker = speaker_summary(search_form.cleaned_data['speaker'])
     
     return render(request, 'booking_app/conferences.html', {
         'conferences': conferences,
-        'search_form': search_form
+        'search_form': search_form,
+        'selected_speaker': selected_speaker,
+        'booked_ids': booked_ids
     })
 
+def conference_calendar_view(request):
+    return calendar_feeds.catalogue_response(request)
+
+def booking_calendar_view(request, token):
+    # Calendar apps poll this without a session; the signed token names the user
+    user_id = calendar_feeds.user_for_token(token)
+    if user_id is None:
+        raise Http404('No calendar matches the given token.')
+    return calendar_feeds.bookings_response(request, user_id)
+
+def speaker_autocomplete_view(request):
+    # Speakers whose names or expertise start with the typed words, from the in-memory index
+    return JsonResponse({'results': search_speakers(request.GET.get('q', '')[:100])})
+
 def conference_detail_view(request, slug):
-    conference = get_object_or_404(Conference, slug=slug)
-    speakers = conference.speakers.all()
+    # The shared parts of the page are prerendered; only seats and the
+    # visitor's booking state are looked up per request
+    conference = get_snapshot(slug)
+    if conference is None:
+        raise Http404('No conference matches the given query.')
+    seats_taken = cached_seats_taken(conference['conference_id'])
+    spots_left = conference['capacity'] - seats_taken
     can_book = True
-    
-    # Calculate spots left
-    bookings_count = Booking.objects.filter(conference=conference, status='confirmed').count()
-    spots_left = conference.capacity - bookings_count
+    booked = frozenset()
     
     if request.user.is_authenticated:
-        # Check if the user has already booked this conference
-        already_booked = Booking.objects.filter(user=request.user, conference=conference).exists()
-        # Check if the conference is at capacity
-        at_capacity = bookings_count >= conference.capacity
-        
-        can_book = not already_booked and not at_capacity
+        # Check if the user has already booked this conference; a cancelled booking can be reopened
+        booked = booked_conference_ids(request.user.pk)
+        already_booked = conference['conference_id'] in active_conference_ids(request.user.pk)
+        can_book = not already_booked and spots_left > 0
         
     return render(request, 'booking_app/conference_detail.html', {
         'conference': conference,
-        'speakers': speakers,
         'can_book': can_book,
-        'spots_left': spots_left
+        'spots_left': spots_left,
+        'price': pricing.current_price(conference['conference_id'], seats_taken),
+        'also_booked': also_booked(conference['conference_id'], exclude=booked),
     })
 
+def closed_refusal(conference):
+    """Why ``conference`` takes no new bookings, or '' if it does."""
+    if conference.deleting_at:
+        return 'This conference has been withdrawn and can no longer be booked.'
+    # Archived conferences have ended, and their bookings are no longer in the Booking table
+    if conference.archived_at:
+        return 'This conference has ended.'
+    return ''
+
+def reopen_refusal(booking):
+    """Why ``booking`` cannot be booked again, or '' if it can.
+
+    Only a cancelled booking none of whose payments went through or is
+    still with the gateway is reopened; a captured payment is owed back
+    for the cancellation it belongs to, so it cannot pay for the seat again.
+    """
+    if booking.status != 'cancelled':
+        return 'You have already booked this conference.'
+    statuses = set(booking.payments.values_list('status', flat=True))
+    if 'completed' in statuses:
+        return 'Your cancelled booking for this conference was paid for; please contact us to book it again.'
+    if statuses - {'failed'}:
+        return 'The payment of your cancelled booking is still being processed; please try again in a few minutes.'
+    return ''
+
 @login_required
 def booking_view(request, slug):
     conference = get_object_or_404(Conference, slug=slug)
     
-    # Check if the user has already booked this conference
-    already_booked = Booking.objects.filter(user=request.user, conference=conference).exists()
+    # Archived conferences and ones queued for deletion are closed
+    refusal = closed_refusal(conference)
+    if refusal:
+        messages.error(request, refusal)
+        return redirect('conference_detail', slug=slug)
+    
+    # Check if the user has already booked this conference; a cancelled booking can be reopened
+    already_booked = conference.conference_id in active_conference_ids(request.user.pk)
     if already_booked:
         messages.error(request, 'You have already booked this conference.')
         return redirect('conference_detail', slug=slug)
     
     # Check if the conference is at capacity
-    bookings_count = Booking.objects.filter(conference=conference, status='confirmed').count()
-    if bookings_count >= conference.capacity:
+    if conference.seats_taken >= conference.capacity:
         messages.error(request, 'This conference is at full capacity.')
         return redirect('conference_detail', slug=slug)
     
+    # Check whether the conference clashes with the user's other bookings
+    overlap_policy = booking_overlap_policy()
+    if overlap_policy != 'off':
+        clashes = user_booking_conflicts(request.user, conference)
+        if clashes:
+            clash_topics = ', '.join(booking.conference.topic for booking in clashes)
+            if overlap_policy == 'block':
+                messages.error(request, f'This conference overlaps with your booking for {clash_topics}.')
+                return redirect('conference_detail', slug=slug)
+            if request.method != 'POST':
+                messages.warning(request, f'This conference overlaps with your booking for {clash_topics}.')
+    
     if request.method == 'POST':
         booking_form = BookingForm(request.POST)
         payment_form = PaymentForm(request.POST)
         
-        if booking_form.is_valid() and payment_form.is_valid():
+        # Charge the price the form was shown with; its quote is signed, so checking it needs no query
+        try:
+            quoted_price = pricing.read_quote(request.POST.get('quote'), request.user.pk, conference.pk)
+        except pricing.InvalidQuote as exc:
+            quoted_price = None
+            messages.warning(request, f'{exc} Please confirm the current price.')
+        
+        if quoted_price is not None and booking_form.is_valid() and payment_form.is_valid():
             # Create the booking
             booking = booking_form.save(commit=False)
             booking.user = request.user
@@ -141,32 +230,40 @@ def booking_view(request, slug):
             booking.payment_status = 'pending'
             
             try:
-                booking.save()
-                
-                # Create the payment
-                payment = Payment.objects.create(
-                    booking=booking,
-                    amount=conference.price,
-                    payment_method=payment_form.cleaned_data['payment_method'],
-                    transaction_id=str(uuid.uuid4()),  # Generate a unique transaction ID
-                    status='pending'
-                )
-                
-                # In a real application, you would integrate with a payment gateway here
-                # For demo purposes, we'll simulate a successful payment
-                
-                # Simulate payment processing
-                payment.status = 'completed'
-                payment.save()
+                with sharding.atomic(sharding.shard_for(conference.pk)):
+                    # Bookings are unique per user and conference, so a cancelled one is reopened
+                    previous = (
+                        Booking.objects.for_conference(conference.pk).select_for_update()
+                        .filter(user=request.user, conference=conference).first()
+                    )
+                    if previous is not None:
+                        refusal = reopen_refusal(previous)
+                        if refusal:
+                            messages.error(request, refusal)
+                            return redirect('conference_detail', slug=slug)
+                        booking = previous
+                        booking.status = 'pending'
+                        booking.payment_status = 'pending'
+                    if not reserve_seats(conference.pk):
+                        raise SeatsUnavailable
+                    booking.save()
+                    ledger.record('booked', booking, seats=1)
+                    
+                    # Queue the payment; process_payments captures it and the
+                    # gateway's webhook confirms the booking
+                    queue_capture(
+                        booking=booking,
+                        amount=quoted_price,
+                        payment_method=payment_form.cleaned_data['payment_method'],
+                        transaction_id=str(uuid.uuid4()),  # Generate a unique transaction ID
+                    )
                 
-                # Update booking status
-                booking.status = 'confirmed'
-                booking.payment_status = 'completed'
-                booking.save()
-                
-                messages.success(request, 'Booking and payment successful!')
+                messages.success(request, 'Booking received! Your payment is being processed.')
                 return redirect('receipt', booking_id=booking.booking_id)
                 
+            except SeatsUnavailable:
+                messages.error(request, 'This conference is at full capacity.')
+                return redirect('conference_detail', slug=slug)
             except IntegrityError:
                 messages.error(request, 'You have already booked this conference.')
                 return redirect('conference_detail', slug=slug)
@@ -174,145 +271,50 @@ def booking_view(request, slug):
         booking_form = BookingForm(initial={'conference': conference})
         payment_form = PaymentForm()
     
+    price = pricing.current_price(conference.pk, conference.seats_taken)
     return render(request, 'booking_app/booking_form.html', {
         'form': booking_form,
         'payment_form': payment_form,
-        'conference': conference
+        'conference': conference,
+        'price': price,
+        'quote': pricing.issue_quote(request.user.pk, conference.pk, price),
+        'quote_minutes': pricing.quote_seconds() // 60,
     })
 
+def get_receipt_records(request, booking_id):
+    """The user's booking and its payment, from the live tables or, for past conferences, the archive."""
+    booking = (
+        Booking.objects.for_pk(booking_id).filter(booking_id=booking_id, user=request.user)
+        .prefetch_related('conference', 'user').first()
+    )
+    if booking is None:
+        booking = get_object_or_404(
+            ArchivedBooking.objects.select_related('conference', 'user'), booking_id=booking_id, user=request.user,
+        )
+    # A reopened booking has a payment for each attempt; the latest is the one that counts
+    payment = booking.payments.order_by('-pk').first()
+    if payment is None:
+        raise Http404('No payment matches the given query.')
+    return booking, payment
+
 @login_required
 def receipt_view(request, booking_id):
-    booking = get_object_or_404(Booking, booking_id=booking_id, user=request.user)
-    payment = get_object_or_404(Payment, booking=booking)
+    booking, payment = get_receipt_records(request, booking_id)
     
     return render(request, 'booking_app/receipt.html', {
         'booking': booking,
-        'payment': payment
+        'payment': payment,
+        'ticket_token': tickets.booking_token(booking),
     })
 
 @login_required
 def download_receipt_view(request, booking_id):
-    booking = get_object_or_404(Booking, booking_id=booking_id, user=request.user)
-    payment = get_object_or_404(Payment, booking=booking)
-    
-    # Create a file-like buffer to receive PDF data
-    buffer = io.BytesIO()
-    
-    # Create the PDF object, using the buffer as its "file."
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=30,
-        alignment=1  # Center alignment
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=12,
-        spaceAfter=10
-    )
-    
-    normal_style = styles['Normal']
-    
-    # Add content
-    elements.append(Paragraph("Payment Receipt", title_style))
-    elements.append(Spacer(1, 12))
-    
-    # Conference Details
-    elements.append(Paragraph("Conference Details", heading_style))
-    conference_data = [
-        ["Conference:", booking.conference.topic],
-        ["Date:", booking.conference.date.strftime("%B %d, %Y") if booking.conference.date else "Not specified"],
-        ["Time:", f"{booking.conference.time_start.strftime('%I:%M %p')} - {booking.conference.time_end.strftime('%I:%M %p')}"],
-    ]
-    
-    conference_table = Table(conference_data, colWidths=[1.5*inch, 4*inch])
-    conference_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-    ]))
-    elements.append(conference_table)
-    elements.append(Spacer(1, 12))
-    
-    # Payment Information
-    elements.append(Paragraph("Payment Information", heading_style))
-    payment_data = [
-        ["Receipt #:", payment.transaction_id],
-        ["Date:", payment.payment_date.strftime("%B %d, %Y %H:%M")],
-        ["Method:", payment.payment_method.title()],
-        ["Status:", "Paid"],
-    ]
-    
-    payment_table = Table(payment_data, colWidths=[1.5*inch, 4*inch])
-    payment_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-    ]))
-    elements.append(payment_table)
-    elements.append(Spacer(1, 12))
-    
-    # Attendee Information
-    elements.append(Paragraph("Attendee Information", heading_style))
-    attendee_data = [
-        ["Name:", f"{booking.user.first_name} {booking.user.last_name}"],
-        ["Email:", booking.user.email],
-    ]
-    
-    if booking.user.phone:
-        attendee_data.append(["Phone:", str(booking.user.phone)])
+    booking, payment = get_receipt_records(request, booking_id)
+    if payment.status != 'completed':
+        messages.info(request, 'A receipt is available once the payment has gone through.')
+        return redirect('receipt', booking_id=booking.booking_id)
     
-    attendee_table = Table(attendee_data, colWidths=[1.5*inch, 4*inch])
-    attendee_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-    ]))
-    elements.append(attendee_table)
-    elements.append(Spacer(1, 12))
-    
-    # Amount Details
-    elements.append(Paragraph("Amount Details", heading_style))
-    amount_data = [
-        ["Description", "Amount"],
-        [f"Conference Registration - {booking.conference.topic}", f"${payment.amount}"],
-        ["Total", f"${payment.amount}"],
-    ]
-    
-    amount_table = Table(amount_data, colWidths=[4*inch, 1.5*inch])
-    amount_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    elements.append(amount_table)
-    
-    # Build the PDF
-    doc.build(elements)
-    
-    # Get the value of the BytesIO buffer and write it to the response
-    pdf = buffer.getvalue()
-    buffer.close()
+    pdf = render_receipt_pdf(booking, payment)
     
     # Create the HTTP response
     response = HttpResponse(pdf, content_type='application/pdf')
@@ -320,18 +322,126 @@ def download_receipt_view(request, booking_id):
     
     return response
 
+@login_required
+def group_booking_view(request, slug):
+    conference = get_object_or_404(Conference, slug=slug)
+    refusal = closed_refusal(conference)
+    if refusal:
+        messages.error(request, refusal)
+        return redirect('conference_detail', slug=slug)
+    
+    if request.method == 'POST':
+        form = GroupBookingForm(request.POST)
+        try:
+            quoted_price = pricing.read_quote(request.POST.get('quote'), request.user.pk, conference.pk)
+        except pricing.InvalidQuote as exc:
+            quoted_price = None
+            messages.warning(request, f'{exc} Please confirm the current price.')
+        if quoted_price is not None and form.is_valid():
+            try:
+                order = place_group_order(
+                    request.user,
+                    conference,
+                    form.cleaned_data['attendees'],
+                    form.cleaned_data['payment_method'],
+                    quoted_price,
+                )
+            except SeatsUnavailable:
+                messages.error(request, 'There are not enough seats left for this group.')
+            else:
+                messages.success(request, f'Group booking for {order.seats} attendees received! Your payment is being processed.')
+                return redirect('group_order', order_id=order.order_id)
+    else:
+        form = GroupBookingForm()
+    
+    price = pricing.current_price(conference.pk, conference.seats_taken)
+    return render(request, 'booking_app/group_booking_form.html', {
+        'form': form,
+        'conference': conference,
+        'spots_left': conference.capacity - conference.seats_taken,
+        'price': price,
+        'quote': pricing.issue_quote(request.user.pk, conference.pk, price),
+        'quote_minutes': pricing.quote_seconds() // 60,
+    })
+
+@login_required
+def group_order_view(request, order_id):
+    order = get_object_or_404(GroupOrder.objects.select_related('conference'), order_id=order_id, user=request.user)
+    
+    if request.method == 'POST' and order.status in ('pending', 'confirmed'):
+        cancel_group_order(order)
+        messages.success(request, 'Group booking cancelled successfully.')
+        return redirect('group_order', order_id=order.order_id)
+    
+    return render(request, 'booking_app/group_order.html', {
+        'order': order,
+        'tickets': tickets.group_ticket_tokens(order, order.tickets.all()),
+        'payment': order.payments.first(),
+    })
+
 @login_required
 def my_bookings_view(request):
-    bookings = Booking.objects.filter(user=request.user).order_by('-time')
-    return render(request, 'booking_app/my_bookings.html', {'bookings': bookings})
+    bookings = sharding.fan_out(
+        lambda alias: Booking.objects.using(alias).filter(user=request.user)
+        .annotate(payment_count=Count('payments')).order_by('-time'),
+        key=attrgetter('time'), reverse=True,
+    )
+    prefetch_related_objects(bookings, 'conference')
+    # Rows are fragment-cached on the booking's state and its conference's version
+    versions = conference_versions({booking.conference.slug for booking in bookings})
+    for booking in bookings:
+        booking.conference_version = versions[booking.conference.slug]
+    group_orders = GroupOrder.objects.filter(user=request.user).select_related('conference').order_by('-created_at')
+    archived_bookings = (
+        ArchivedBooking.objects.filter(user=request.user).select_related('conference').order_by('-conference__date')
+    )
+    recommendations = recommended_for(
+        [booking.conference_id for booking in [*bookings, *archived_bookings] if booking.status != 'cancelled'],
+        exclude=[booking.conference_id for booking in bookings],
+    )
+    calendar_url = request.build_absolute_uri(
+        reverse('booking_calendar', args=[calendar_feeds.feed_token(request.user)])
+    )
+    return render(request, 'booking_app/my_bookings.html', {
+        'bookings': bookings,
+        'group_orders': group_orders,
+        'archived_bookings': archived_bookings,
+        'recommendations': recommendations,
+        'calendar_url': calendar_url,
+    })
+
+@login_required
+@require_POST
+def reset_calendar_view(request):
+    calendar_feeds.reset_feed_token(request.user.pk)
+    messages.success(request, 'Your calendar feed has a new link. The old link no longer works; subscribe to the new one.')
+    return redirect('my_bookings')
+
+@login_required
+def booking_payments_view(request, booking_id):
+    # Loaded into the payment details modal on my_bookings when it is opened
+    booking = get_object_or_404(Booking.objects.for_pk(booking_id), pk=booking_id, user=request.user)
+    return render(request, 'booking_app/booking_payments.html', {
+        'booking': booking,
+        'payments': booking.payments.order_by('payment_date'),
+    })
 
 @login_required
 def cancel_booking_view(request, booking_id):
-    booking = get_object_or_404(Booking, pk=booking_id, user=request.user)
+    booking = get_object_or_404(Booking.objects.for_pk(booking_id), pk=booking_id, user=request.user)
     
     if request.method == 'POST':
-        booking.status = 'cancelled'
-        booking.save()
+        with sharding.atomic(booking._state.db):
+            # Re-read under a lock so a repeated cancel cannot release the seat twice
+            booking = Booking.objects.for_pk(booking.pk).select_for_update().get(pk=booking.pk)
+            if booking.status in ('pending', 'confirmed'):
+                release_seats(booking.conference_id)
+                ledger.record_cancellation(booking, 1)
+            if booking.status == 'confirmed':
+                tickets.revoke(booking.conference_id, [f'b{booking.booking_id}'])
+            booking.status = 'cancelled'
+            booking.save()
+            outbox.enqueue('booking_cancelled', booking)
         messages.success(request, 'Booking cancelled successfully.')
         return redirect('my_bookings')
     
@@ -342,11 +452,11 @@ def feedback_view(request, slug):
     conference = get_object_or_404(Conference, slug=slug)
     
     # Check if the user has booked this conference
-    booking = get_object_or_404(Booking, user=request.user, conference=conference)
+    booking = get_object_or_404(Booking.objects.for_conference(conference.pk), user=request.user, conference=conference)
     
     # Check if the user has already given feedback
     try:
-        feedback = Feedback.objects.get(user=request.user, conference=conference)
+        feedback = Feedback.objects.for_conference(conference.pk).get(user=request.user, conference=conference)
         messages.info(request, 'You have already provided feedback for this conference.')
         return redirect('my_bookings')
     except Feedback.DoesNotExist:
@@ -368,4 +478,60 @@ def feedback_view(request, slug):
     return render(request, 'booking_app/feedback_form.html', {
         'form': form,
         'conference': conference
-    })
\ No newline at end of file
+    })
+
+def is_organizer(user):
+    return user.is_authenticated and (user.is_staff or user.role in ('organizer', 'admin'))
+
+@user_passes_test(is_organizer)
+def analytics_dashboard_view(request):
+    form = AnalyticsRangeForm(request.GET)
+    end = timezone.localdate()
+    start = end - timedelta(days=29)
+    if form.is_valid():
+        end = form.cleaned_data.get('end') or end
+        start = form.cleaned_data.get('start') or end - timedelta(days=29)
+    
+    # Everything on this page comes from the daily rollup tables
+    data = dashboard_data(start, end)
+    return render(request, 'booking_app/analytics_dashboard.html', {
+        'form': form,
+        'start': start,
+        'end': end,
+        **data,
+    })
+
+@csrf_exempt
+@require_POST
+def payment_webhook_view(request):
+    """Receive a capture result from the payment gateway."""
+    try:
+        payment = handle_gateway_event(request.body, request.headers.get(SIGNATURE_HEADER, ''))
+    except InvalidSignature:
+        return HttpResponseForbidden('Invalid signature')
+    except (ValueError, Payment.DoesNotExist) as exc:
+        return HttpResponseBadRequest(str(exc))
+    return JsonResponse({'payment_id': payment.payment_id, 'status': payment.status})
+
+@csrf_exempt
+@require_POST
+def check_in_view(request, conference_id):
+    """Admit a batch of tickets scanned at the door; one result per scan, in order."""
+    if not tickets.scanner_allowed(conference_id, request.headers.get(tickets.SCANNER_HEADER)):
+        return HttpResponseForbidden('Invalid scanner key')
+    try:
+        device, scans = tickets.parse_scans(request.body)
+    except (ValueError, KeyError, TypeError) as exc:
+        return HttpResponseBadRequest(str(exc))
+    return JsonResponse({'results': tickets.check_in(conference_id, scans, device)})
+
+def ticket_revocations_view(request, conference_id):
+    """Tickets revoked after revocation ``since``, as sorted booking and group ticket ids."""
+    if not tickets.scanner_allowed(conference_id, request.headers.get(tickets.SCANNER_HEADER)):
+        return HttpResponseForbidden('Invalid scanner key')
+    try:
+        since = int(request.GET.get('since', 0))
+    except ValueError:
+        return HttpResponseBadRequest('since must be a revocation id')
+    last, bookings, group_tickets = tickets.revocations_since(conference_id, since)
+    return JsonResponse({'next': last, 'bookings': bookings, 'tickets': group_tickets})
@@ -0,0 +1,183 @@
+"""
+In-process database connection pool.
+
+Used by the ``conference_system.mysql_pool`` database backend. Each worker
+process keeps up to ``SIZE`` raw DB-API connections per database alias and
+hands them out to Django connection wrappers, so a request that closes its
+connection returns it to the pool instead of tearing down the socket.
+
+Configure it with a ``POOL`` entry next to the usual ``DATABASES`` keys::
+
+    'POOL': {'SIZE': 10, 'TIMEOUT': 5, 'MAX_IDLE': 300}
+"""
+import threading
+from collections import deque
+from time import monotonic
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the pool timeout."""
+
+
+class ConnectionPool:
+    def __init__(self, size=10, timeout=5, max_idle=300, check=None):
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._check = check
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._created = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self, factory):
+        """Return an idle connection, or a new one from ``factory()``."""
+        started = monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeout(f'No database connection available within {self.timeout}s')
+        waited = monotonic() - started
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    conn, idle_since = self._idle.pop()
+                if monotonic() - idle_since < self.max_idle and self._is_usable(conn):
+                    return conn
+                self._discard(conn)
+
+            conn = factory()
+            with self._lock:
+                self._created += 1
+            return conn
+        except Exception:
+            self._free_slot()
+            raise
+
+    def release(self, conn, reuse=True):
+        """Give a connection back, or close it when ``reuse`` is False."""
+        if reuse:
+            with self._lock:
+                self._idle.append((conn, monotonic()))
+        else:
+            self._discard(conn)
+        self._free_slot()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'created': self._created,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+                'wait_ms_avg': self._wait_total * 1000 / self._checkouts if self._checkouts else 0.0,
+                'wait_ms_max': self._wait_max * 1000,
+            }
+
+    def _free_slot(self):
+        with self._lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    def _is_usable(self, conn):
+        if self._check is None:
+            return True
+        try:
+            self._check(conn)
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, conn):
+        with self._lock:
+            self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict, check=None):
+    """Return the process-wide pool for a database alias, creating it once."""
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            options = settings_dict.get('POOL', {})
+            pool = _pools[alias] = ConnectionPool(
+                size=options.get('SIZE', 10),
+                timeout=options.get('TIMEOUT', 5),
+                max_idle=options.get('MAX_IDLE', 300),
+                check=check,
+            )
+        return pool
+
+
+def pool_stats():
+    """Return ``{alias: stats}`` for every pool created in this process."""
+    with _pools_lock:
+        return {alias: pool.stats() for alias, pool in _pools.items()}
+
+
+class PooledDatabaseWrapperMixin:
+    """Borrow raw connections from the pool instead of opening new ones.
+
+    Mix in front of a backend's DatabaseWrapper. Closing the wrapper returns
+    the connection to the pool; connections that saw errors or were closed
+    mid-transaction are thrown away instead.
+    """
+
+    def _pool_check(self, conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict, check=self._pool_check)
+
+    def get_new_connection(self, conn_params):
+        parent = super()
+        return self.pool.acquire(lambda: parent.get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        reuse = not self.errors_occurred and not self.in_atomic_block
+        if reuse:
+            try:
+                with self.wrap_database_errors:
+                    if not self.autocommit:
+                        self.connection.rollback()
+            except Exception:
+                reuse = False
+        self.pool.release(self.connection, reuse=reuse)
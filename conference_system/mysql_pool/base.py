@@ -0,0 +1,14 @@
+"""
+MySQL backend that reuses connections from an in-process pool.
+
+Set ``'ENGINE': 'conference_system.mysql_pool'`` and ``CONN_MAX_AGE = 0`` so
+connections go back to the pool at the end of each request.
+"""
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from conference_system.db_pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, MySQLDatabaseWrapper):
+    def _pool_check(self, conn):
+        conn.ping()
@@ -21,6 +21,7 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'whitenoise.runserver_nostatic',  # Serve static files through WhiteNoise under runserver too
     'django.contrib.staticfiles',
     'booking_app',
     'widget_tweaks',  # For form field styling
@@ -28,12 +29,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'booking_app.admission.AdmissionControlMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'booking_app.routers.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'conference_system.urls'
@@ -68,9 +72,52 @@ DATABASES = {
     }
 }
 
+# Read replicas: aliases in DATABASES that replicate 'default'. Reads from the
+# views in REPLICA_READ_VIEWS go to a replica unless the user wrote something
+# in the last REPLICA_PIN_SECONDS.
+DATABASE_ROUTERS = ['booking_app.sharding.ShardRouter', 'booking_app.routers.PrimaryReplicaRouter']
+REPLICA_DATABASES = []
+REPLICA_PIN_SECONDS = 5
+REPLICA_READ_VIEWS = [
+    'home',
+    'conferences',
+    'conference_detail',
+    'receipt',
+    'download_receipt',
+    'analytics_dashboard',
+    'admin:booking_app_booking_changelist',
+    'admin:booking_app_payment_changelist',
+]
+
+# Sharding: aliases in DATABASES, each migrated in full, that split the
+# bookings, payments, feedback and outbox messages between them by conference
+# (see booking_app/sharding.py). Empty keeps everything on 'default'. Run
+# `python manage.py prepare_shards` once after migrating them, and never
+# reorder the list: shard i hands out ids from i * BOOKING_SHARD_ID_SPAN.
+BOOKING_SHARDS = []
+BOOKING_SHARD_ID_SPAN = 100_000_000
+
 # Custom user model
 AUTH_USER_MODEL = 'booking_app.User'
 
+# Load the session user from the cache instead of the database on every request
+AUTHENTICATION_BACKENDS = ['booking_app.auth_backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = 300
+
+# Cache (use Redis or Memcached in production so workers share entries)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'conference-booking',
+        # Room for a page of fragment-cached rows (see my_bookings.html)
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Sessions are read from the cache and written through to the database.
+# Use 'django.contrib.sessions.backends.signed_cookies' to skip storage entirely.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -90,6 +137,12 @@ AUTH_PASSWORD_VALIDATORS = [
 # Login URL
 LOGIN_URL = '/login/'
 
+# How to handle bookings that overlap another of the user's bookings: 'warn', 'block' or 'off'
+BOOKING_OVERLAP_POLICY = 'warn'
+
+# Most seats a single group order may book
+GROUP_ORDER_MAX_SEATS = 1000
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -103,6 +156,92 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# `collectstatic` writes content-hashed copies of every file plus gzip and
+# Brotli variants; WhiteNoise serves them straight from the WSGI layer with
+# far-future immutable cache headers, picking the smallest encoding the
+# client accepts. With DEBUG on, templates use the plain names instead.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
+# Email (booking notifications are queued in the outbox and sent by
+# `python manage.py dispatch_outbox`). Use the SMTP backend in production.
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+DEFAULT_FROM_EMAIL = 'bookings@conference-booking.local'
+
+# Payment gateway. Bookings queue their payment; `python manage.py process_payments`
+# submits it and the gateway confirms it through the /payments/webhook/ callback.
+# `python manage.py mock_gateway` runs a local gateway for development.
+SITE_URL = 'http://127.0.0.1:8000'
+PAYMENT_GATEWAY = {
+    'BACKEND': 'booking_app.gateway.HTTPGateway',
+    'URL': 'http://127.0.0.1:8765',
+    'TIMEOUT': 5,
+    'WEBHOOK_SECRET': 'django-insecure-webhook-secret',
+    'MAX_IN_FLIGHT': 20,  # Payments submitted and waiting for their webhook
+    'CONCURRENCY': 4,  # Parallel submit calls per worker
+    'CAPTURE_TIMEOUT': 300,  # Resubmit if no webhook arrives within this many seconds
+    'MAX_ATTEMPTS': 5,
+}
+
+# Admission control for the endpoints hit hardest during sales (see
+# booking_app/admission.py). Rates are token buckets, 'count/period' with a
+# period of s, m, h or d, keyed per user, per client IP or per route.
+ADMISSION_CONTROL = {
+    'RATES': {
+        'login': {'ip': '20/m'},
+        'book_conference': {'user': '10/m', 'ip': '60/m', 'route': '6000/m'},
+        'book_group': {'user': '5/m', 'ip': '30/m'},
+        'speaker_autocomplete': {'ip': '300/m'},
+    },
+    'QUEUED_ROUTES': ['book_conference', 'book_group'],
+    'CONCURRENCY': 20,  # Visitors booking at once per conference, from the form to its submission
+    'QUEUE_RETRY_SECONDS': 2,
+    'TICKET_IDLE_SECONDS': 30,  # A waiting caller who stops refreshing gives up their place
+    'SLOT_LEASE_SECONDS': 60,  # Slot of a visitor who leaves the form, or of a dead request, is freed after this
+    # Behind proxies, set CLIENT_IP_HEADER to 'HTTP_X_FORWARDED_FOR' and this to
+    # the number of proxies that append to it
+    'CLIENT_IP_HEADER': 'REMOTE_ADDR',
+    'TRUSTED_PROXIES': 1,
+}
+
+# Bookings, payments and feedback of conferences that ended more than this
+# many days ago are moved to the archive tables by
+# `python manage.py archive_conferences` (see booking_app/archiving.py).
+ARCHIVE_AFTER_DAYS = 365
+
+# `python manage.py snapshot_ledger --loop` snapshots the booking ledger this
+# far behind the clock, so transactions still writing events can commit first.
+LEDGER_SNAPSHOT_LAG_SECONDS = 300
+
+# Ticket tokens (the QR payload) are signed with a per-conference key derived
+# from this (see booking_app/tickets.py); `python manage.py scanner_setup`
+# prints a conference's key for its door scanners. Defaults to SECRET_KEY;
+# changing it invalidates every ticket already issued.
+TICKET_SIGNING_KEY = None
+
+# Conferences kept per conference for "attendees also booked", refreshed by
+# `python manage.py update_recommendations` (see booking_app/co_bookings.py).
+RECOMMENDATION_NEIGHBOURS = 10
+
+# Demand-based pricing (see booking_app/pricing.py). A seat costs the
+# conference's price times the multiplier of the highest occupancy tier
+# reached (share of capacity taken, multiplier) and of the lead-time tier
+# it is in (at least this many days before the conference, multiplier).
+# Run `python manage.py update_prices` after changing the tiers. A quote
+# shown on the booking forms is honoured for PRICE_QUOTE_SECONDS.
+PRICING_OCCUPANCY_TIERS = [(0.0, 1.00), (0.5, 1.10), (0.75, 1.25), (0.9, 1.50)]
+PRICING_LEAD_TIME_TIERS = [(60, 0.90), (14, 1.00), (0, 1.20)]
+PRICE_QUOTE_SECONDS = 900
+
+# Conferences queued for deletion in the admin are deleted by
+# `python manage.py delete_conferences` in batches (see
+# booking_app/deletion.py), sleeping this long between batches so other
+# writers are not kept waiting on the tables.
+CONFERENCE_DELETION_PAUSE = 0.05
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -0,0 +1,117 @@
+# conference_system/settings_production.py
+#
+# Production profile. Select it with
+#     DJANGO_SETTINGS_MODULE=conference_system.settings_production
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import ADMISSION_CONTROL, DATABASES, PAYMENT_GATEWAY, REPLICA_DATABASES, TEMPLATES
+
+
+def required_env(name):
+    value = os.environ.get(name)
+    if not value:
+        raise ImproperlyConfigured(f'Set the {name} environment variable for the production profile.')
+    return value
+
+
+DEBUG = False
+
+# The development key in settings.py is public; sessions, password reset
+# links, price quotes and tickets are signed with this one
+SECRET_KEY = required_env('SECRET_KEY')
+
+ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost').split(',')
+
+# Parse each template once per worker and keep it compiled in memory. Listed
+# explicitly so the profile does not depend on DEBUG; template changes need
+# a worker restart. The debug context processor is dropped as well.
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS'] = {
+    **TEMPLATES[0]['OPTIONS'],
+    'context_processors': [
+        processor for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+        if processor != 'django.template.context_processors.debug'
+    ],
+    'loaders': [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ],
+}
+
+# Shared cache. The cached users, conference snapshots, booked sets, price
+# tables and the admission queue and slots must be one store for every
+# worker: with a per-process cache each worker admits its own quota and
+# serves entries other workers have invalidated. Set CACHE_URL to
+# redis://host:6379/0 (needs the redis package) or memcached://host:11211
+# (needs pymemcache).
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_URL,
+        'KEY_PREFIX': 'conference-booking',
+    }}
+elif CACHE_URL.startswith('memcached://'):
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': CACHE_URL[len('memcached://'):].split(','),
+        'KEY_PREFIX': 'conference-booking',
+    }}
+else:
+    raise ImproperlyConfigured('Set CACHE_URL to a redis:// or memcached:// URL; production needs a shared cache.')
+
+# Public base URL, used to build the payment gateway's webhook address
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost')
+
+PAYMENT_GATEWAY = {
+    **PAYMENT_GATEWAY,
+    'URL': os.environ.get('PAYMENT_GATEWAY_URL', PAYMENT_GATEWAY['URL']),
+    # Webhooks signed with an empty secret would be accepted from anyone
+    'WEBHOOK_SECRET': required_env('PAYMENT_WEBHOOK_SECRET'),
+    'MAX_IN_FLIGHT': int(os.environ.get('PAYMENT_MAX_IN_FLIGHT', PAYMENT_GATEWAY['MAX_IN_FLIGHT'])),
+}
+
+# Behind a reverse proxy every request arrives from the proxy's address; set
+# ADMISSION_CLIENT_IP_HEADER (e.g. HTTP_X_FORWARDED_FOR) so per-IP rate limits
+# see the real client.
+ADMISSION_CONTROL = {
+    **ADMISSION_CONTROL,
+    'CLIENT_IP_HEADER': os.environ.get('ADMISSION_CLIENT_IP_HEADER', 'REMOTE_ADDR'),
+}
+
+# Keep each worker's database connection open between requests instead of
+# reconnecting every time, and ping it before reuse so a dropped connection
+# is replaced rather than failing the request.
+DATABASES['default'].update({
+    'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+    'CONN_HEALTH_CHECKS': True,
+})
+
+# Optional in-process pool: set DB_POOL_SIZE to enable it. Pooled connections
+# are returned at the end of every request, so persistent connections are
+# switched off for them.
+if os.environ.get('DB_POOL_SIZE'):
+    DATABASES['default'].update({
+        'ENGINE': 'conference_system.mysql_pool',
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'SIZE': int(os.environ['DB_POOL_SIZE']),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+            'MAX_IDLE': int(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        },
+    })
+
+# Read replica: set DB_REPLICA_HOST to route read-only views to it.
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES = REPLICA_DATABASES + ['replica']
@@ -0,0 +1,27 @@
+# conference_system/settings_test.py
+#
+# Test profile: SQLite, with a second database to shard bookings onto and a
+# third to stand in for a read replica.
+#     python manage.py test booking_app --settings=conference_system.settings_test
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+    'shard1': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+    'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+}
+
+# Tests that read from replicas set REPLICA_DATABASES = ['replica'] themselves
+REPLICA_DATABASES = []
+
+# Tests that shard set BOOKING_SHARDS = ['default', 'shard1'] themselves
+BOOKING_SHARDS = []
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+# Pages render without running collectstatic first
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
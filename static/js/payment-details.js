@@ -0,0 +1,26 @@
+// static/js/payment-details.js
+// Load a booking's payment details into the shared modal on My Bookings
+// when it is opened, instead of rendering a modal for every booking
+document.addEventListener('DOMContentLoaded', function() {
+    var modal = document.getElementById('paymentModal');
+    if (!modal) {
+        return;
+    }
+    var content = modal.querySelector('.payment-details');
+    modal.addEventListener('show.bs.modal', function(event) {
+        content.innerHTML = '<div class="modal-body text-center"><div class="spinner-border" role="status"></div></div>';
+        fetch(event.relatedTarget.dataset.paymentsUrl, {credentials: 'same-origin'})
+            .then(function(response) {
+                if (!response.ok) {
+                    throw new Error(response.statusText);
+                }
+                return response.text();
+            })
+            .then(function(html) {
+                content.innerHTML = html;
+            })
+            .catch(function() {
+                content.innerHTML = '<div class="modal-body text-danger">Payment details could not be loaded. Please try again.</div>';
+            });
+    });
+});
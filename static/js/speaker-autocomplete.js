@@ -0,0 +1,63 @@
+// static/js/speaker-autocomplete.js
+// Suggest speakers as the visitor types and keep only the chosen speaker's
+// id in the search form
+document.addEventListener('DOMContentLoaded', function() {
+    var input = document.getElementById('speaker-search');
+    if (!input) {
+        return;
+    }
+    var hidden = document.getElementById('id_speaker');
+    var results = document.getElementById('speaker-results');
+    var timer = null;
+    var latest = 0;
+
+    function hide() {
+        results.classList.add('d-none');
+        results.innerHTML = '';
+    }
+
+    function show(speakers) {
+        results.innerHTML = '';
+        speakers.forEach(function(speaker) {
+            var item = document.createElement('button');
+            item.type = 'button';
+            item.className = 'list-group-item list-group-item-action';
+            item.textContent = speaker.name;
+            var expertise = document.createElement('small');
+            expertise.className = 'text-muted ms-2';
+            expertise.textContent = speaker.expertise;
+            item.appendChild(expertise);
+            item.addEventListener('mousedown', function(event) {
+                event.preventDefault();
+                input.value = speaker.name;
+                hidden.value = speaker.id;
+                hide();
+            });
+            results.appendChild(item);
+        });
+        results.classList.toggle('d-none', speakers.length === 0);
+    }
+
+    input.addEventListener('input', function() {
+        hidden.value = '';
+        clearTimeout(timer);
+        var query = input.value.trim();
+        if (!query) {
+            hide();
+            return;
+        }
+        timer = setTimeout(function() {
+            var request = ++latest;
+            fetch(input.dataset.autocompleteUrl + '?q=' + encodeURIComponent(query))
+                .then(function(response) { return response.json(); })
+                .then(function(data) {
+                    // Ignore answers to queries the visitor has already typed past
+                    if (request === latest) {
+                        show(data.results);
+                    }
+                })
+                .catch(hide);
+        }, 150);
+    });
+    input.addEventListener('blur', hide);
+});